@@ -89,14 +89,19 @@ from xmodule.exceptions import SerializationError
 from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT, ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import DuplicateCourseError, InvalidProctoringProvider, ItemNotFoundError
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
+from xmodule.modulestore.xml_exporter import (
+    export_course_to_archive,
+    export_course_to_xml,
+    export_library_to_archive,
+    export_library_to_xml
+)
 from xmodule.modulestore.xml_importer import CourseImportException, import_course_from_xml, import_library_from_xml
 from xmodule.tabs import StaticTab
 
 from .models import ComponentLink, ContainerLink, LearningContextLinksStatus, LearningContextLinksStatusChoices
 from .outlines import update_outline_from_modulestore
 from .outlines_regenerate import CourseOutlineRegenerate
-from .toggles import bypass_olx_failure_enabled
+from .toggles import bypass_olx_failure_enabled, streaming_export_enabled
 from .utils import course_import_olx_validation_is_enabled
 
 User = get_user_model()
@@ -411,6 +416,9 @@ def create_export_tarball(course_block, course_key, context, status=None):
     root_dir = path(mkdtemp())
 
     try:
+        if streaming_export_enabled():
+            return _stream_export_tarball(course_block, course_key, export_file, status)
+
         if isinstance(course_key, LibraryLocator):
             export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
         else:
@@ -465,6 +473,27 @@ def create_export_tarball(course_block, course_key, context, status=None):
     return export_file
 
 
+def _stream_export_tarball(course_block, course_key, export_file, status=None):
+    """
+    Exports the course or library straight into the export tarball, compressing it as it is exported.
+    """
+    name = course_block.url_name
+    if status:
+        # The export is compressed as it goes, so there is no separate compression step.
+        status.set_state('Compressing')
+        status.increment_completed_steps()
+    LOGGER.debug('tar file being streamed to %s', export_file.name)
+    set_custom_attribute("exporting_course_to_xml_started", str(course_key))
+    if isinstance(course_key, LibraryLocator):
+        export_library_to_archive(modulestore(), contentstore(), course_key, export_file, name)
+    else:
+        export_course_to_archive(modulestore(), contentstore(), course_block.id, export_file, name)
+    set_custom_attribute("exporting_course_to_xml_completed", str(course_key))
+    export_file.flush()
+    export_file.seek(0)
+    return export_file
+
+
 class CourseImportTask(UserTask):  # pylint: disable=abstract-method
     """
     Base class for course and library import tasks.
@@ -737,6 +766,7 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             static_content_store=contentstore(),
             target_id=courselike_key,
             verbose=True,
+            static_content_workers=settings.COURSE_IMPORT_STATIC_CONTENT_WORKERS,
         )
 
         new_location = courselike_items[0].location
@@ -4,6 +4,7 @@ Unit tests for course import and export Celery tasks
 import copy
 import json
 import logging
+import tarfile
 from unittest import mock
 from unittest.mock import AsyncMock, patch, MagicMock
 from uuid import uuid4
@@ -22,6 +23,7 @@ from user_tasks.models import UserTaskArtifact, UserTaskStatus
 
 from cms.djangoapps.contentstore.tests.test_libraries import LibraryTestCase
 from cms.djangoapps.contentstore.tests.utils import CourseTestCase
+from cms.djangoapps.contentstore.toggles import STREAMING_EXPORT
 from common.djangoapps.course_action_state.models import CourseRerunState
 from common.djangoapps.student.tests.factories import UserFactory
 from openedx.core.djangoapps.course_apps.toggles import EXAMS_IDA
@@ -76,6 +78,26 @@ class ExportCourseTestCase(CourseTestCase):
         output = artifacts[0]
         self.assertEqual(output.name, 'Output')
 
+    @override_waffle_flag(STREAMING_EXPORT, active=True)
+    def test_streaming_success(self):
+        """
+        Verify that a streamed course export task produces a complete tarball
+        """
+        key = str(self.course.location.course_key)
+        result = export_olx.delay(self.user.id, key, 'en')
+        status = UserTaskStatus.objects.get(task_id=result.id)
+        self.assertEqual(status.state, UserTaskStatus.SUCCEEDED)
+        artifacts = UserTaskArtifact.objects.filter(status=status)
+        self.assertEqual(len(artifacts), 1)
+        output = artifacts[0]
+        self.assertEqual(output.name, 'Output')
+        with output.file.open('rb') as output_file:
+            with tarfile.open(fileobj=output_file, mode='r:gz') as tar_file:
+                names = tar_file.getnames()
+        url_name = self.course.location.block_id
+        self.assertIn(f'{url_name}/course.xml', names)
+        self.assertIn(f'{url_name}/policies/assets.json', names)
+
     @mock.patch('cms.djangoapps.contentstore.tasks.export_course_to_xml', side_effect=side_effect_exception)
     def test_exception(self, mock_export):  # pylint: disable=unused-argument
         """
@@ -67,6 +67,29 @@ def bypass_olx_failure_enabled():
     return BYPASS_OLX_FAILURE.is_enabled()
 
 
+# .. toggle_name: contentstore.streaming_export
+# .. toggle_implementation: WaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, course and library exports are written straight into the export tarball as
+#   they are generated, with static assets streamed from the contentstore, instead of being exported to a temporary
+#   directory that is then compressed. This bounds the memory and disk space used to export courses with large assets.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-04-18
+STREAMING_EXPORT = WaffleFlag(
+    f'{CONTENTSTORE_NAMESPACE}.streaming_export',
+    __name__,
+    CONTENTSTORE_LOG_PREFIX,
+)
+
+
+def streaming_export_enabled():
+    """
+    Check if exports should be streamed into the export tarball.
+    """
+    return STREAMING_EXPORT.is_enabled()
+
+
 # .. toggle_name: legacy_studio.exam_settings
 # .. toggle_implementation: WaffleFlag
 # .. toggle_default: False
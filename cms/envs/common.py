@@ -1136,6 +1136,13 @@ MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 COURSE_IMPORT_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
 COURSE_METADATA_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# .. setting_name: COURSE_IMPORT_STATIC_CONTENT_WORKERS
+# .. setting_default: 1
+# .. setting_description: The number of threads used by a course import to read static files and generate their
+#   thumbnails before they are saved to the contentstore in batches. Increase this to speed up importing courses
+#   with many static files.
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = 1
+
 
 ##### EMBARGO #####
 EMBARGO_SITE_REDIRECT_URL = None
@@ -2143,6 +2150,21 @@ CACHES = {
     },
 }
 
+# .. setting_name: SPLIT_MODULESTORE_LOCAL_STRUCTURE_CACHE_MAX_BYTES
+# .. setting_default: 0
+# .. setting_description: Maximum total (pickled) size in bytes of the in-process LRU cache of split
+#   modulestore course structures that sits in front of the 'course_structure_cache' django cache.
+#   Structures are immutable per version, so cached entries never go stale. 0 disables the cache.
+SPLIT_MODULESTORE_LOCAL_STRUCTURE_CACHE_MAX_BYTES = 0
+
+# .. setting_name: SPLIT_MODULESTORE_DEFINITION_PREFETCH_SIZE
+# .. setting_default: 0
+# .. setting_description: When a split modulestore block's definition is first loaded lazily, also load the
+#   definitions of its siblings and descendants in the same query, up to this many definitions, and keep at most
+#   this many loaded definitions per course runtime. This avoids one query per block when traversing a course.
+#   0 disables prefetching, so each definition is loaded on its own.
+SPLIT_MODULESTORE_DEFINITION_PREFETCH_SIZE = 0
+
 ############################ OAUTH2 Provider ###################################
 
 # 5 minute expiration time for JWT id tokens issued for external API requests.
@@ -12,7 +12,13 @@ from django.db import transaction
 from opaque_keys.edx.keys import CourseKey, UsageKey
 
 from lms.djangoapps.ccx.models import CcxFieldOverride, CustomCourseForEdX
-from lms.djangoapps.courseware.field_overrides import FieldOverrideProvider
+from lms.djangoapps.course_blocks import transformed_cache
+from lms.djangoapps.courseware.field_overrides import (
+    ALL_BLOCKS,
+    FieldOverrideProvider,
+    block_key,
+    clear_precompiled_overrides
+)
 from openedx.core.lib.cache_utils import get_cache
 
 log = logging.getLogger(__name__)
@@ -48,6 +54,21 @@ class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
             return get_override_for_ccx(ccx, block, name, default)
         return default
 
+    def overridden_fields(self, course_key):
+        """
+        Return the fields overridden by the ccx that is active for this course, if any.
+        """
+        ccx = get_current_ccx(course_key)
+        if not ccx:
+            return {}
+        overridden_fields = {
+            block_key(location): set(block_overrides)
+            for location, block_overrides in _get_overrides_for_ccx(ccx).items()
+        }
+        # See get_override_for_ccx
+        overridden_fields[ALL_BLOCKS] = {'course_edit_method'}
+        return overridden_fields
+
     @classmethod
     def enabled_for(cls, block):  # lint-amnesty, pylint: disable=arguments-differ
         """
@@ -176,6 +197,8 @@ def override_field_for_ccx(ccx, block, name, value):
 
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name] = value_json
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name + "_instance"] = override
+    clear_precompiled_overrides()
+    transformed_cache.invalidate_course(ccx.locator)
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -192,6 +215,7 @@ def clear_override_for_ccx(ccx, block, name):
             field=name).delete()
 
         clear_ccx_field_info_from_ccx_map(ccx, block, name)
+        transformed_cache.invalidate_course(ccx.locator)
 
     except CcxFieldOverride.DoesNotExist:
         pass
@@ -219,3 +243,4 @@ def bulk_delete_ccx_override_fields(ccx, ids):
     ids = list(set(ids))
     if ids:
         CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        transformed_cache.invalidate_course(ccx.locator)
@@ -12,6 +12,7 @@ from openedx.core.djangoapps.content.block_structure.api import get_block_struct
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
 
+from . import transformed_cache
 from .transformers import library_content, load_override_data, start_date, user_partitions, visibility
 from .usage_info import CourseUsageInfo
 
@@ -92,7 +93,35 @@ def get_course_blocks(
             transformers, the transformed block structure will be
             exactly equivalent to the blocks that the given user has
             access.
+
+    Note: When the course_blocks.cache_transformed_blocks flag is enabled,
+    results for the default transformers are cached per user; see
+    transformed_cache.
     """
+    block_structure_manager = get_block_structure_manager(starting_block_usage_key.course_key)
+
+    # Only the default transformers are cached, since custom transformers
+    # may depend on arbitrary state, and completion changes too often.
+    cache_key = None
+    if (
+        not transformers and
+        not include_completion and
+        collected_block_structure is None and
+        transformed_cache.is_enabled(user, starting_block_usage_key.course_key)
+    ):
+        cache_key = transformed_cache.get_cache_key(
+            user,
+            starting_block_usage_key,
+            transformed_cache.get_collected_version(block_structure_manager),
+            allow_start_dates_in_future=allow_start_dates_in_future,
+            include_has_scheduled_content=include_has_scheduled_content,
+            individual_student_overrides=has_individual_student_override_provider(),
+        )
+        if cache_key:
+            block_structure = transformed_cache.get_blocks(cache_key, starting_block_usage_key)
+            if block_structure is not None:
+                return block_structure
+
     if not transformers:
         transformers = BlockStructureTransformers(get_course_block_access_transformers(user))
     if include_completion:
@@ -104,9 +133,12 @@ def get_course_blocks(
         include_has_scheduled_content
     )
 
-    return get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
+    block_structure = block_structure_manager.get_transformed(
         transformers,
         starting_block_usage_key,
         collected_block_structure,
         user,
     )
+    if cache_key:
+        transformed_cache.set_blocks(cache_key, block_structure)
+    return block_structure
@@ -0,0 +1,54 @@
+"""
+Signal handlers for the course blocks app.
+"""
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from opaque_keys.edx.keys import CourseKey
+
+from common.djangoapps.student.models import CourseAccessRole
+from common.djangoapps.student.signals import ENROLLMENT_TRACK_UPDATED
+from lms.djangoapps.courseware.models import StudentFieldOverride
+from openedx.core.djangoapps.course_groups.signals.signals import COHORT_MEMBERSHIP_UPDATED
+
+from . import transformed_cache
+
+
+@receiver(COHORT_MEMBERSHIP_UPDATED, dispatch_uid="course_blocks_invalidate_on_cohort_change")
+def invalidate_on_cohort_change(sender, user, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's cached course blocks when their cohort changes.
+    """
+    transformed_cache.invalidate(user, course_key)
+
+
+@receiver(ENROLLMENT_TRACK_UPDATED, dispatch_uid="course_blocks_invalidate_on_enrollment_track_change")
+def invalidate_on_enrollment_track_change(sender, user, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's cached course blocks when their enrollment track changes.
+    """
+    transformed_cache.invalidate(user, course_key)
+
+
+@receiver(post_save, sender=StudentFieldOverride, dispatch_uid="course_blocks_invalidate_on_student_override_save")
+@receiver(post_delete, sender=StudentFieldOverride, dispatch_uid="course_blocks_invalidate_on_student_override_delete")
+def invalidate_on_student_override_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's cached course blocks when one of their individual
+    field overrides, such as a due date extension, is set or cleared.
+    """
+    transformed_cache.invalidate(instance.student, instance.course_id)
+
+
+@receiver(post_save, sender=CourseAccessRole, dispatch_uid="course_blocks_invalidate_on_access_role_save")
+@receiver(post_delete, sender=CourseAccessRole, dispatch_uid="course_blocks_invalidate_on_access_role_delete")
+def invalidate_on_access_role_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's cached course blocks when they are given or
+    removed a role, in every course when the role is an org or global one.
+    """
+    if isinstance(instance.course_id, CourseKey):
+        transformed_cache.invalidate(instance.user, instance.course_id)
+    else:
+        transformed_cache.invalidate_user(instance.user)
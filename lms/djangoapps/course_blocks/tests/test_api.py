@@ -7,12 +7,20 @@ from unittest.mock import Mock, patch
 
 import ddt
 from django.http.request import HttpRequest
+from edx_django_utils.cache import RequestCache
+from edx_toggles.toggles.testutils import override_waffle_flag
 
+from common.djangoapps.student.roles import CourseStaffRole, OrgStaffRole
 from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.course_blocks import transformed_cache
 from lms.djangoapps.course_blocks.api import get_course_blocks
+from lms.djangoapps.course_blocks.toggles import CACHE_TRANSFORMED_BLOCKS
 from lms.djangoapps.course_blocks.transformers.tests.helpers import CourseStructureTestCase
 from lms.djangoapps.course_blocks.transformers.tests.test_user_partitions import UserPartitionTestMixin
 from lms.djangoapps.courseware.block_render import make_track_function, prepare_runtime_for_user
+from lms.djangoapps.courseware.student_field_overrides import clear_override_for_user, override_field_for_user
+from openedx.core.djangoapps.content.block_structure.api import update_course_in_cache
+from openedx.core.djangoapps.content.block_structure.manager import BlockStructureManager
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort
 from xmodule.modulestore.django import modulestore
@@ -147,3 +155,66 @@ class TestGetCourseBlocks(UserPartitionTestMixin, CourseStructureTestCase):
             set(block_structure.get_block_keys()),
             self.get_block_key_set(self.blocks, *expected_blocks)
         )
+
+    @override_waffle_flag(CACHE_TRANSFORMED_BLOCKS, active=True)
+    def test_transformed_cache(self):
+        self.setup_partitions_and_course()
+        update_course_in_cache(self.course.id)
+        get_transformed = BlockStructureManager.get_transformed
+
+        with patch.object(
+            BlockStructureManager, 'get_transformed', autospec=True, side_effect=get_transformed,
+        ) as mock_get_transformed:
+            block_structure = get_course_blocks(self.user, self.course.location)
+            cached_block_structure = get_course_blocks(self.user, self.course.location)
+            assert mock_get_transformed.call_count == 1
+            assert set(cached_block_structure.get_block_keys()) == set(block_structure.get_block_keys())
+
+            # Other options are cached separately.
+            get_course_blocks(self.user, self.course.location, allow_start_dates_in_future=True)
+            assert mock_get_transformed.call_count == 2
+
+            # Changing the user's cohort, individual overrides or roles invalidates their cached blocks.
+            invalidating_changes = [
+                lambda: add_user_to_cohort(
+                    self.partition_cohorts[self.user_partition.id - 1][0], self.user.username,
+                ),
+                lambda: override_field_for_user(self.user, self.course, 'days_early_for_beta', 2.0),
+                lambda: clear_override_for_user(self.user, self.course, 'days_early_for_beta'),
+                lambda: CourseStaffRole(self.course.id).add_users(self.user),
+                lambda: CourseStaffRole(self.course.id).remove_users(self.user),
+                lambda: OrgStaffRole(self.course.id.org).add_users(self.user),
+                # As when a CCX's overrides change.
+                lambda: transformed_cache.invalidate_course(self.course.id),
+            ]
+            for call_count, invalidating_change in enumerate(invalidating_changes, start=3):
+                invalidating_change()
+                get_course_blocks(self.user, self.course.location)
+                assert mock_get_transformed.call_count == call_count
+                get_course_blocks(self.user, self.course.location)
+                assert mock_get_transformed.call_count == call_count
+
+    @override_waffle_flag(CACHE_TRANSFORMED_BLOCKS, active=True)
+    def test_transformed_cache_reads_version_once(self):
+        self.setup_partitions_and_course()
+        update_course_in_cache(self.course.id)
+        RequestCache.clear_all_namespaces()
+        get_collected_version = BlockStructureManager.get_collected_version
+
+        with patch.object(
+            BlockStructureManager, 'get_collected_version', autospec=True, side_effect=get_collected_version,
+        ) as mock_get_collected_version:
+            get_course_blocks(self.user, self.course.location)
+            get_course_blocks(self.user, self.course.location)
+            assert mock_get_collected_version.call_count == 1
+
+            RequestCache.clear_all_namespaces()
+            get_course_blocks(self.user, self.course.location)
+            assert mock_get_collected_version.call_count == 2
+
+    def test_transformed_cache_disabled(self):
+        self.setup_partitions_and_course()
+        with patch.object(BlockStructureManager, 'get_transformed') as mock_get_transformed:
+            get_course_blocks(self.user, self.course.location)
+            get_course_blocks(self.user, self.course.location)
+        assert mock_get_transformed.call_count == 2
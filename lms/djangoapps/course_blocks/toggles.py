@@ -0,0 +1,20 @@
+"""
+Toggles for the course blocks app.
+"""
+
+from openedx.core.djangoapps.waffle_utils import CourseWaffleFlag
+
+WAFFLE_FLAG_NAMESPACE = 'course_blocks'
+
+# .. toggle_name: course_blocks.cache_transformed_blocks
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, get_course_blocks caches the course blocks it transforms for each
+#   learner with the default transformers, keyed by the version of the collected course blocks and the
+#   learner's enrollment, and reuses them until the course is published again, the learner's cohort or
+#   enrollment track changes, or the cache entry expires.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_warning: Changes that are not signalled, such as start dates passing or personalized due dates,
+#   are only picked up when entries expire after COURSE_BLOCKS_TRANSFORMED_CACHE_TIMEOUT seconds.
+CACHE_TRANSFORMED_BLOCKS = CourseWaffleFlag(f'{WAFFLE_FLAG_NAMESPACE}.cache_transformed_blocks', __name__)
@@ -0,0 +1,211 @@
+"""
+Cache of the course blocks transformed for individual users.
+
+Transforming a course's block structure for a user runs every access
+transformer, yet for most learners the result is the same from one
+request to the next.  When the CACHE_TRANSFORMED_BLOCKS flag is enabled,
+get_course_blocks stores the transformed block structure, keyed by:
+
+    * the version of the collected block structure, so that entries are
+      not reused once the course is re-collected after a publish,
+    * the user, their enrollment mode and whether it is active,
+    * generations that are replaced whenever something the transformers
+      read changes (see handlers.py): one per user and course, for their
+      cohort, enrollment track, course roles and individual overrides, one
+      per user, for their org and global roles, and one per course, for
+      the overrides of CCXs, and
+    * the options passed to get_course_blocks.
+
+Entries also expire after COURSE_BLOCKS_TRANSFORMED_CACHE_TIMEOUT
+seconds, which bounds how long changes that are not signalled (such as
+start dates passing) take to show.
+"""
+
+
+import hashlib
+import pickle
+from logging import getLogger
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from common.djangoapps.student.models import CourseEnrollment
+from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.lib.cache_utils import get_cache, zpickle, zunpickle
+
+from .toggles import CACHE_TRANSFORMED_BLOCKS
+
+log = getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'course_blocks.transformed'
+COLLECTED_VERSION_CACHE_NAMESPACE = 'course_blocks.transformed_cache.collected_version'
+
+# Bump this whenever the format of cached entries changes.
+VERSION = 1
+
+# Entries larger than this are not cached, matching the block structure store.
+MAX_ENTRY_SIZE_IN_BYTES = 2 * 1024 * 1024
+
+
+def is_enabled(user, course_key):
+    """
+    Returns whether transformed course blocks may be cached for the
+    given user in the given course.
+
+    Anonymous users and users who are masquerading are never cached.
+    """
+    if not user.is_authenticated:
+        return False
+    if getattr(user, 'masquerade_settings', {}).get(course_key) or hasattr(user, 'real_user'):
+        return False
+    return CACHE_TRANSFORMED_BLOCKS.is_enabled(course_key)
+
+
+def get_collected_version(block_structure_manager):
+    """
+    Returns the version of the collected block structure of the given
+    BlockStructureManager, which is read from the store once per request.
+    """
+    request_cache = get_cache(COLLECTED_VERSION_CACHE_NAMESPACE)
+    root_block_usage_key = block_structure_manager.root_block_usage_key
+    if root_block_usage_key not in request_cache:
+        request_cache[root_block_usage_key] = block_structure_manager.get_collected_version()
+    return request_cache[root_block_usage_key]
+
+
+def get_cache_key(user, starting_block_usage_key, collected_version, **options):
+    """
+    Returns the key under which the given user's transformed course
+    blocks are cached, or None if the course has not been collected.
+
+    Arguments:
+        user (User) - The user for whom the blocks are transformed.
+
+        starting_block_usage_key (UsageKey) - The starting block of the
+            transformed block structure.
+
+        collected_version (str) - The version of the collected block
+            structure, from get_collected_version.
+
+        options (dict) - Any other arguments that affect the transform.
+    """
+    if collected_version is None:
+        return None
+
+    course_key = starting_block_usage_key.course_key
+    enrollment_mode, is_active = CourseEnrollment.enrollment_mode_for_user(user, course_key)
+    fingerprint = '|'.join(str(component) for component in (
+        VERSION,
+        collected_version,
+        starting_block_usage_key,
+        enrollment_mode,
+        is_active,
+        *_get_generations(
+            _get_generation_cache_key(user, course_key),
+            _get_user_generation_cache_key(user),
+            _get_course_generation_cache_key(course_key),
+        ),
+        sorted(options.items()),
+    ))
+    return '{prefix}.{course_key}.{user_id}.{hash}'.format(
+        prefix=CACHE_KEY_PREFIX,
+        course_key=course_key,
+        user_id=user.id,
+        hash=hashlib.md5(fingerprint.encode('utf-8')).hexdigest(),
+    )
+
+
+def get_blocks(cache_key, starting_block_usage_key):
+    """
+    Returns the cached transformed block structure for the given
+    cache_key, or None if it is not cached.
+    """
+    serialized_data = cache.get(cache_key)
+    if serialized_data is None:
+        return None
+    try:
+        block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+    except Exception:  # pylint: disable=broad-except
+        log.exception('Course Blocks: Failed to load transformed blocks from cache for %s', cache_key)
+        return None
+    return BlockStructureFactory.create_new(
+        starting_block_usage_key,
+        block_relations,
+        transformer_data,
+        block_data_map,
+    )
+
+
+def set_blocks(cache_key, block_structure):
+    """
+    Caches the given transformed block structure under the given
+    cache_key, unless it is too large or cannot be pickled.
+    """
+    try:
+        serialized_data = zpickle((
+            block_structure._block_relations,  # pylint: disable=protected-access
+            block_structure.transformer_data,
+            block_structure._block_data_map,  # pylint: disable=protected-access
+        ))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        log.exception('Course Blocks: Failed to serialize transformed blocks for %s', cache_key)
+        return
+    if len(serialized_data) < MAX_ENTRY_SIZE_IN_BYTES:
+        cache.set(cache_key, serialized_data, timeout=settings.COURSE_BLOCKS_TRANSFORMED_CACHE_TIMEOUT)
+
+
+def invalidate(user, course_key):
+    """
+    Invalidates all cached transformed course blocks of the given user in
+    the given course.
+    """
+    cache.set(_get_generation_cache_key(user, course_key), uuid4().hex, timeout=None)
+
+
+def invalidate_user(user):
+    """
+    Invalidates all cached transformed course blocks of the given user, in
+    every course.
+    """
+    cache.set(_get_user_generation_cache_key(user), uuid4().hex, timeout=None)
+
+
+def invalidate_course(course_key):
+    """
+    Invalidates all cached transformed course blocks of every user in the
+    given course.
+    """
+    cache.set(_get_course_generation_cache_key(course_key), uuid4().hex, timeout=None)
+
+
+def _get_generations(*generation_cache_keys):
+    """
+    Returns the current generations under the given cache keys.
+
+    If a generation is missing (never set, or evicted), a new one is
+    created so that entries cached under an earlier generation are never
+    reused.
+    """
+    generations = cache.get_many(generation_cache_keys)
+    missing_generations = {
+        generation_cache_key: uuid4().hex
+        for generation_cache_key in generation_cache_keys
+        if generation_cache_key not in generations
+    }
+    if missing_generations:
+        cache.set_many(missing_generations, timeout=None)
+        generations.update(missing_generations)
+    return [generations[generation_cache_key] for generation_cache_key in generation_cache_keys]
+
+
+def _get_generation_cache_key(user, course_key):
+    return f'{CACHE_KEY_PREFIX}.generation.{course_key}.{user.id}'
+
+
+def _get_user_generation_cache_key(user):
+    return f'{CACHE_KEY_PREFIX}.user_generation.{user.id}'
+
+
+def _get_course_generation_cache_key(course_key):
+    return f'{CACHE_KEY_PREFIX}.course_generation.{course_key}'
@@ -33,6 +33,7 @@ class HiddenContentTransformer(BlockStructureTransformer):
     """
     WRITE_VERSION = 4
     READ_VERSION = 4
+    COLLECTS_FROM_ANCESTORS_ONLY = True
     MERGED_HIDE_AFTER_DUE = 'merged_hide_after_due'
     MERGED_END_DATE = 'merged_end_date'
 
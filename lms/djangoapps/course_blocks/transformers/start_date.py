@@ -34,6 +34,7 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    COLLECTS_FROM_ANCESTORS_ONLY = True
     MERGED_START_DATE = 'merged_start_date'
 
     @classmethod
@@ -45,20 +46,17 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
         return "start_date"
 
     @classmethod
-    def _check_has_scheduled_content(cls, block_structure, scheduled_content_condition):
+    def _check_has_scheduled_content(cls, block_structure, scheduled_content_mask):
         '''
         Returns a block structure where the root course block has been
         updated to include a has_scheduled_content field (True if the course
         has any blocks with release dates in the future, False otherwise).
-        '''
-        has_scheduled_content = False
-        for block_key in block_structure.topological_traversal():
-            if scheduled_content_condition(block_key):
-                has_scheduled_content = True
-                break
 
+        scheduled_content_mask is the mask of blocks with release dates in
+        the future, over the block structure's traversal orders.
+        '''
         block_structure.override_xblock_field(
-            block_structure.root_block_usage_key, 'has_scheduled_content', has_scheduled_content
+            block_structure.root_block_usage_key, 'has_scheduled_content', any(scheduled_content_mask)
         )
 
     @classmethod
@@ -105,7 +103,11 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
                 now=now
             )
 
+        # Evaluate the start dates of all blocks in a single pass, shared by
+        # the has_scheduled_content check and the removal filter.
+        removal_mask = block_structure.get_traversal_orders().mask(_removal_condition)
+
         if usage_info.include_has_scheduled_content:
-            self._check_has_scheduled_content(block_structure, _removal_condition)
+            self._check_has_scheduled_content(block_structure, removal_mask)
 
-        return [block_structure.create_removal_filter(_removal_condition)]
+        return [block_structure.create_bulk_removal_filter(_removal_condition, removal_mask=removal_mask)]
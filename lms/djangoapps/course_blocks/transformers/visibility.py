@@ -26,6 +26,7 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    COLLECTS_FROM_ANCESTORS_ONLY = True
 
     MERGED_VISIBLE_TO_STAFF_ONLY = 'merged_visible_to_staff_only'
 
@@ -67,7 +68,7 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
             return [block_structure.create_universal_filter()]
 
         return [
-            block_structure.create_removal_filter(
+            block_structure.create_bulk_removal_filter(
                 lambda block_key: self._get_visible_to_staff_only(block_structure, block_key),
             )
         ]
@@ -24,7 +24,7 @@ def get_student_module_as_dict(user, course_key, block_key):
         return {}
 
     try:
-        student_module = StudentModule.objects.get(
+        student_module = StudentModule.objects.for_shard(course_key, user.id).get(
             student=user,
             course_id=course_key,
             module_state_key=block_key,
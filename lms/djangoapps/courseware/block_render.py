@@ -61,7 +61,7 @@ from lms.djangoapps.courseware.masquerade import (
     is_masquerading_as_specific_student,
     setup_masquerade
 )
-from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache, buffered_user_state_writes
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
 from lms.djangoapps.courseware.services import UserStateService
 from lms.djangoapps.grades.api import GradesUtilService
@@ -911,7 +911,7 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course
 
     set_custom_attributes_for_course_key(course_key)
 
-    with modulestore().bulk_operations(course_key):
+    with modulestore().bulk_operations(course_key), buffered_user_state_writes(course_key):
         usage_key = _get_usage_key_for_course(course_key, usage_id)
         if is_xblock_aside(usage_key):
             # Get the usage key for the block being wrapped by the aside (not the aside itself)
@@ -13,23 +13,39 @@ Currently, this module is used in the `block_render` module in this same
 package and is used to wrap the `authored_data` when constructing an
 `LmsFieldData`.  This means overrides will be in effect for all scopes covered
 by `authored_data`, e.g. course content and settings stored in Mongo.
+
+Every field read goes through the enabled providers, so when the
+courseware.precompiled_field_overrides flag is on for a course, the providers
+that can tell which fields they override (see
+`FieldOverrideProvider.overridden_fields`) are asked once per user and course
+in a request, and the result is compiled into a table of which providers
+override each field of each block.  Reads of the fields no provider overrides,
+which are most of them, then don't go through the providers at all.
 """
 
 
 import threading
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 from contextlib import contextmanager
 
 from django.conf import settings
-from edx_django_utils.cache import DEFAULT_REQUEST_CACHE
+from edx_django_utils.cache import DEFAULT_REQUEST_CACHE, RequestCache
+from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from xblock.field_data import FieldData
 
+from lms.djangoapps.courseware.toggles import precompiled_field_overrides_are_enabled
 from xmodule.modulestore.inheritance import InheritanceMixin
 
 NOTSET = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = 'lms.djangoapps.courseware.field_overrides.enabled_providers.{course_id}'
 ENABLED_MODULESTORE_OVERRIDE_PROVIDERS_KEY = 'lms.djangoapps.courseware.modulestore_field_overrides.\
     enabled_providers.{course_id}'
+PRECOMPILED_OVERRIDES_NAMESPACE = 'lms.djangoapps.courseware.field_overrides.precompiled'
+
+# The key, in the index returned by `FieldOverrideProvider.overridden_fields`,
+# of the fields a provider may override on any block.
+ALL_BLOCKS = None
 
 
 def resolve_dotted(name):
@@ -62,6 +78,27 @@ def _lineage(block):
         parent = parent.get_parent()
 
 
+def block_key(usage_key):
+    """
+    Returns the key of the block with the given usage key in the index returned
+    by `FieldOverrideProvider.overridden_fields`: its block type and block id,
+    which are the same for the block in a course and in the course's CCXs,
+    whatever their version and branch.
+    """
+    return usage_key.block_type, usage_key.block_id
+
+
+def _usage_key(block):
+    """
+    Returns the usage key of the given block, or of the block the given aside
+    applies to, or None if it has none.
+    """
+    usage_id = getattr(getattr(block, 'scope_ids', None), 'usage_id', None)
+    if isinstance(usage_id, (AsideUsageKeyV1, AsideUsageKeyV2)):
+        return usage_id.usage_key
+    return usage_id
+
+
 class _OverridesDisabled(threading.local):
     """
     A thread local used to manage state of overrides being disabled or not.
@@ -134,6 +171,84 @@ class FieldOverrideProvider(metaclass=ABCMeta):
         """
         return False
 
+    def overridden_fields(self, course_key):
+        """
+        Return which fields of which blocks of the given course this provider
+        may override, or None if it can't tell.
+
+        Providers that can tell return a dict mapping the `block_key` of
+        blocks to the names of the fields they may override on them, where
+        `ALL_BLOCKS` maps to the names of the fields they may override on any
+        block.  Their `get` method is then only called for those fields, when
+        overrides are precompiled for the course.
+
+        Arguments:
+          course_key (CourseKey)
+
+        Returns:
+          dict or None
+        """
+        return None
+
+
+def clear_precompiled_overrides():
+    """
+    Clears the overrides precompiled during the request, so that they are
+    compiled again, with the overrides set since.
+    """
+    RequestCache(PRECOMPILED_OVERRIDES_NAMESPACE).clear()
+
+
+class PrecompiledOverrides:
+    """
+    Which of a user's override providers for a course override each field of
+    each block, compiled from the index each provider returns from
+    `overridden_fields`.  Providers are identified by their position in the
+    providers of the `OverrideFieldData`.
+    """
+    def __init__(self, providers, course_key):
+        # Providers that can't tell which fields they override may override any.
+        any_provider = set()
+        any_block = defaultdict(set)
+        by_block = defaultdict(set)
+        for position, provider in enumerate(providers):
+            overridden_fields = provider.overridden_fields(course_key)
+            if overridden_fields is None:
+                any_provider.add(position)
+                continue
+            for key, names in overridden_fields.items():
+                for name in names:
+                    if key is ALL_BLOCKS:
+                        any_block[name].add(position)
+                    else:
+                        by_block[(key, name)].add(position)
+
+        self.any_field = tuple(sorted(any_provider))
+        self.any_block = {
+            name: tuple(sorted(positions | any_provider)) for name, positions in any_block.items()
+        }
+        self.by_block = {
+            (key, name): tuple(sorted(positions | any_block.get(name, set()) | any_provider))
+            for (key, name), positions in by_block.items()
+        }
+        self.names = set(any_block) | {name for __, name in by_block}
+
+    def positions(self, usage_key, name):
+        """
+        Returns the positions, in order, of the providers that may override
+        the field named `name` of the block with the given usage key.
+        """
+        positions = self.by_block.get((block_key(usage_key), name))
+        if positions is None:
+            positions = self.any_block.get(name, self.any_field)
+        return positions
+
+    def may_override(self, name):
+        """
+        Returns whether any provider may override the field named `name` of any block.
+        """
+        return bool(self.any_field) or name in self.names
+
 
 class OverrideFieldData(FieldData):
     """
@@ -199,15 +314,60 @@ class OverrideFieldData(FieldData):
 
     def __init__(self, user, fallback, providers):  # pylint: disable=super-init-not-called
         self.fallback = fallback
+        self.user_id = getattr(user, 'id', None)
         self.providers = tuple(provider(user, fallback) for provider in providers)
 
+    def _precompiled_overrides(self, course_key):
+        """
+        Returns the PrecompiledOverrides of the user's blocks in the given
+        course, compiling them once per request, or None if they aren't
+        precompiled for the course.
+
+        They aren't kept on this instance, so that clear_precompiled_overrides
+        applies to it.
+        """
+        cache = RequestCache(PRECOMPILED_OVERRIDES_NAMESPACE).data
+        cache_key = (course_key, self.user_id, tuple(type(provider) for provider in self.providers))
+        precompiled = cache.get(cache_key, NOTSET)
+        if precompiled is NOTSET:
+            precompiled = None
+            if precompiled_field_overrides_are_enabled(course_key):
+                precompiled = PrecompiledOverrides(self.providers, course_key)
+            cache[cache_key] = precompiled
+        return precompiled
+
+    def _providers_for(self, block, name):
+        """
+        Returns the providers that may override the field named `name` of `block`, in order.
+        """
+        usage_key = _usage_key(block)
+        if usage_key is None:
+            return self.providers
+        precompiled = self._precompiled_overrides(usage_key.context_key)
+        if precompiled is None:
+            return self.providers
+        return [self.providers[position] for position in precompiled.positions(usage_key, name)]
+
+    def _may_inherit_override(self, block, name):
+        """
+        Returns whether the field named `name` of `block` may inherit an
+        override from one of its ancestors.
+        """
+        if name not in InheritanceMixin.fields:  # pylint: disable=no-member
+            return False
+        usage_key = _usage_key(block)
+        if usage_key is None:
+            return True
+        precompiled = self._precompiled_overrides(usage_key.context_key)
+        return precompiled is None or precompiled.may_override(name)
+
     def get_override(self, block, name):
         """
         Checks for an override for the field identified by `name` in `block`.
         Returns the overridden value or `NOTSET` if no override is found.
         """
         if not overrides_disabled():
-            for provider in self.providers:
+            for provider in self._providers_for(block, name):
                 value = provider.get(block, name, NOTSET)
                 if value is not NOTSET:
                     return value
@@ -234,8 +394,7 @@ class OverrideFieldData(FieldData):
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = list(InheritanceMixin.fields.keys())  # pylint: disable=no-member
-            if name in inheritable:
+            if self._may_inherit_override(block, name):
                 for ancestor in _lineage(block):
                     if self.get_override(ancestor, name) is not NOTSET:
                         return False
@@ -249,8 +408,7 @@ class OverrideFieldData(FieldData):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
         if self.providers and not overrides_disabled():
-            inheritable = list(InheritanceMixin.fields.keys())  # pylint: disable=no-member
-            if name in inheritable:
+            if self._may_inherit_override(block, name):
                 for ancestor in _lineage(block):
                     value = self.get_override(ancestor, name)
                     if value is not NOTSET:
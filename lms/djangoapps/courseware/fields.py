@@ -3,7 +3,10 @@ Custom fields
 """
 
 
-from django.db.models.fields import AutoField
+from django.db.models.fields import AutoField, TextField
+
+from lms.djangoapps.courseware.state_encoding import decode_state, encode_state
+from lms.djangoapps.courseware.toggles import COMPRESS_STUDENT_MODULE_STATE
 
 
 class UnsignedBigIntAutoField(AutoField):
@@ -34,3 +37,24 @@ class UnsignedBigIntAutoField(AutoField):
             return "BIGSERIAL"
         else:
             return None
+
+
+class CompressedStateField(TextField):
+    """
+    A text field for JSON-serialized XBlock user state, which is stored
+    compressed when the courseware.compress_student_module_state switch is on.
+
+    The value is always the plain JSON text in Python: stored states are
+    decoded when they are loaded, whether they were stored compressed or not.
+    """
+    def from_db_value(self, value, expression, connection):  # pylint: disable=unused-argument
+        return decode_state(value)
+
+    def to_python(self, value):
+        return decode_state(super().to_python(value))
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is not None and COMPRESS_STUDENT_MODULE_STATE.is_enabled():
+            value = encode_state(value)
+        return value
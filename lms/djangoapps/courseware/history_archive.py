@@ -0,0 +1,257 @@
+"""
+Tiered storage of StudentModule history.
+
+The history tables (courseware_studentmodulehistory and its extended variant)
+keep a record of every state saved for a problem, but old records are rarely
+read: only the staff submission history views read them, through
+BaseStudentModuleHistory.get_history.  When settings.STUDENT_MODULE_HISTORY_ARCHIVE
+is enabled, the archive_student_module_history management command moves the
+records older than a configurable age out of their table, into compressed,
+append-only segment files of each course on the archive storage, and
+get_history reads the records of both tiers.
+
+A segment holds the records of many StudentModules, each in its own
+zlib-compressed block of JSON lines, so that the records of a StudentModule
+can be read without decompressing the whole segment.  The segments, and where
+in them the records of each StudentModule are, are indexed by
+StudentModuleHistoryArchiveSegment and StudentModuleHistoryArchiveEntry.
+The records of deleted StudentModules are purged from the segments by
+compacting them, which the management command does when asked to.
+"""
+
+
+import hashlib
+import itertools
+import json
+import logging
+import zlib
+from io import BytesIO
+from operator import attrgetter
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from lms.djangoapps.courseware.models import (
+    StudentModuleHistoryArchiveEntry,
+    StudentModuleHistoryArchiveSegment,
+    chunks
+)
+from openedx.core.storage import get_storage
+
+log = logging.getLogger(__name__)
+
+# The history record fields kept in the archive, besides student_module_id.
+ARCHIVED_FIELDS = ('id', 'version', 'created', 'state', 'grade', 'max_grade')
+
+# How many history records are deleted per query once archived.
+DELETE_CHUNK_SIZE = 1000
+
+
+def _config():
+    return getattr(settings, 'STUDENT_MODULE_HISTORY_ARCHIVE', None) or {}
+
+
+def is_enabled():
+    """
+    Return whether history records are archived, and read from the archive.
+    """
+    return bool(_config().get('ENABLED'))
+
+
+def archive_storage():
+    """
+    Return the Django storage the segments are stored on.
+    """
+    config = _config()
+    return get_storage(config.get('STORAGE_CLASS'), **(config.get('STORAGE_KWARGS') or {}))
+
+
+def _segment_path(history_model_cls, course_key):
+    """
+    Return the path of a new segment of the course's records from the given
+    history model, in a directory determined by hashing the course key.
+    """
+    course_dir = hashlib.sha1(str(course_key).encode('utf-8')).hexdigest()
+    return '/'.join(filter(None, [
+        _config().get('ROOT_PATH'),
+        history_model_cls._meta.db_table,
+        course_dir,
+        f'{uuid4().hex}.jsonl.zz',
+    ]))
+
+
+def _serialize_record(history_entry):
+    """
+    Return the JSON line archiving the given history record.
+    """
+    record = {field: getattr(history_entry, field) for field in ARCHIVED_FIELDS}
+    record['created'] = history_entry.created.isoformat()
+    return json.dumps(record)
+
+
+def _deserialize_record(history_model_cls, student_module_id, line):
+    """
+    Return an (unsaved) instance of the history model for the given archived JSON line.
+    """
+    record = json.loads(line)
+    record['created'] = parse_datetime(record['created'])
+    return history_model_cls(student_module_id=student_module_id, **record)
+
+
+def archive_history(history_model_cls, course_key, student_module_ids, created_before):
+    """
+    Moves the records of the given history model that were created before
+    `created_before` for the given StudentModules, which belong to the given
+    course, to a new segment, and returns it, or None if there were none.
+
+    The records are deleted from their table only once the segment is
+    written and indexed, so that they are always in at least one tier.
+    """
+    history_entries = list(
+        history_model_cls.objects.filter(
+            student_module_id__in=student_module_ids,
+            created__lt=created_before,
+        ).order_by('student_module_id', 'id')
+    )
+    if not history_entries:
+        return None
+
+    segment_file = BytesIO()
+    archive_entries = []
+    for student_module_id, records in itertools.groupby(history_entries, attrgetter('student_module_id')):
+        records = list(records)
+        block = zlib.compress('\n'.join(_serialize_record(record) for record in records).encode('utf-8'))
+        archive_entries.append(StudentModuleHistoryArchiveEntry(
+            student_module_id=student_module_id,
+            offset=segment_file.tell(),
+            length=len(block),
+            record_count=len(records),
+        ))
+        segment_file.write(block)
+
+    path = archive_storage().save(_segment_path(history_model_cls, course_key), ContentFile(segment_file.getvalue()))
+    with transaction.atomic():
+        segment = StudentModuleHistoryArchiveSegment.objects.create(
+            history_table=history_model_cls._meta.db_table,
+            course_id=course_key,
+            path=path,
+            record_count=len(history_entries),
+        )
+        for archive_entry in archive_entries:
+            archive_entry.segment = segment
+        StudentModuleHistoryArchiveEntry.objects.bulk_create(archive_entries)
+
+    for ids in chunks([history_entry.id for history_entry in history_entries], DELETE_CHUNK_SIZE):
+        history_model_cls.objects.filter(id__in=ids).delete()
+
+    log.info(
+        'Archived %d %s records of %d StudentModules of course %s to %s',
+        len(history_entries), history_model_cls._meta.db_table, len(archive_entries), course_key, path,
+    )
+    return segment
+
+
+def compact_segments(history_model_cls, course_key):
+    """
+    Rewrites the course's segments of records from the given history model
+    which hold the records of deleted StudentModules, without those records,
+    and returns how many records were purged.
+
+    The index entries of a StudentModule are deleted with it, but its records
+    stay in their append-only segment until it is rewritten here: the blocks of
+    the remaining entries are copied as they are to a new segment file, which
+    replaces the old one in the index before the old one is deleted.  Segments
+    left without any entries are deleted altogether.
+    """
+    storage = archive_storage()
+    purged_count = 0
+    segments = StudentModuleHistoryArchiveSegment.objects.filter(
+        history_table=history_model_cls._meta.db_table,
+        course_id=course_key,
+    ).annotate(
+        indexed_record_count=Coalesce(Sum('studentmodulehistoryarchiveentry__record_count'), 0),
+    ).filter(indexed_record_count__lt=F('record_count'))
+    for segment in segments:
+        with transaction.atomic():
+            segment = StudentModuleHistoryArchiveSegment.objects.select_for_update().get(id=segment.id)
+            archive_entries = list(
+                StudentModuleHistoryArchiveEntry.objects.filter(segment=segment).order_by('offset')
+            )
+            old_path = segment.path
+            record_count = sum(archive_entry.record_count for archive_entry in archive_entries)
+            if archive_entries:
+                segment_file = BytesIO()
+                with storage.open(old_path, 'rb') as old_segment_file:
+                    for archive_entry in archive_entries:
+                        old_segment_file.seek(archive_entry.offset)
+                        block = old_segment_file.read(archive_entry.length)
+                        archive_entry.offset = segment_file.tell()
+                        segment_file.write(block)
+                segment.path = storage.save(
+                    _segment_path(history_model_cls, course_key), ContentFile(segment_file.getvalue()),
+                )
+                StudentModuleHistoryArchiveEntry.objects.bulk_update(archive_entries, ['offset'])
+                purged_count += segment.record_count - record_count
+                segment.record_count = record_count
+                segment.save(update_fields=['path', 'record_count'])
+            else:
+                purged_count += segment.record_count
+                segment.delete()
+        storage.delete(old_path)
+        log.info(
+            'Purged the records of deleted StudentModules from %s segment %s of course %s, keeping %d records',
+            history_model_cls._meta.db_table, old_path, course_key, record_count,
+        )
+    return purged_count
+
+
+def get_archived_history(history_model_cls, student_module_ids):
+    """
+    Return the archived records of the given history model for the given
+    StudentModules, as unsaved instances of the model, latest first.
+    """
+    archive_entries = StudentModuleHistoryArchiveEntry.objects.filter(
+        segment__history_table=history_model_cls._meta.db_table,
+        student_module_id__in=student_module_ids,
+    ).select_related('segment').order_by('segment_id', 'offset')
+
+    history_entries = []
+    storage = archive_storage()
+    for __, segment_entries in itertools.groupby(archive_entries, attrgetter('segment_id')):
+        segment_entries = list(segment_entries)
+        with storage.open(segment_entries[0].segment.path, 'rb') as segment_file:
+            for archive_entry in segment_entries:
+                segment_file.seek(archive_entry.offset)
+                block = zlib.decompress(segment_file.read(archive_entry.length)).decode('utf-8')
+                history_entries.extend(
+                    _deserialize_record(history_model_cls, archive_entry.student_module_id, line)
+                    for line in block.split('\n')
+                )
+
+    history_entries.sort(key=attrgetter('id'), reverse=True)
+    return history_entries
+
+
+def with_archived_history(history_model_cls, student_modules, history_entries):
+    """
+    Return the given records of the given history model for the given
+    StudentModules, followed by their archived records if the archive is
+    enabled, latest first.
+    """
+    history_entries = list(history_entries)
+    if not is_enabled():
+        return history_entries
+
+    # A record can be in both tiers if archiving it was interrupted before
+    # it was deleted from its table.
+    hot_ids = {history_entry.id for history_entry in history_entries}
+    return history_entries + [
+        history_entry
+        for history_entry in get_archived_history(history_model_cls, [module.id for module in student_modules])
+        if history_entry.id not in hot_ids
+    ]
@@ -0,0 +1,153 @@
+"""
+Moves old StudentModule history records out of their tables, into the compressed segment files of each course
+on the history archive storage (see settings.STUDENT_MODULE_HISTORY_ARCHIVE), from which the submission
+history keeps reading them.
+
+The records of each batch of a course's StudentModules are archived to a segment of their own, so that the
+command can be stopped at any time, and run again.
+
+With --compact, the segments of each course are also rewritten without the records of the StudentModules
+deleted since they were archived, which only their index entries are deleted with.
+
+Example usage:
+    $ ./manage.py lms archive_student_module_history --settings=devstack
+    $ ./manage.py lms archive_student_module_history --older-than-days 730 --courses course-v1:edX+DemoX+Demo_Course
+    $ ./manage.py lms archive_student_module_history --compact
+"""
+
+
+import time
+from datetime import timedelta
+from textwrap import dedent
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from lms.djangoapps.courseware import history_archive
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, StudentModuleHistory
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
+
+TABLES = ('studentmodulehistory', 'studentmodulehistoryextended')
+
+
+class Command(BaseCommand):  # lint-amnesty, pylint: disable=missing-class-docstring
+    help = dedent(__doc__).strip()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            help='Archive the records created more than this many days ago. Defaults to the MIN_AGE_DAYS setting.',
+            type=int,
+        )
+        parser.add_argument(
+            '--courses',
+            help='The courses to archive the records of. Defaults to all courses.',
+            nargs='+',
+        )
+        parser.add_argument(
+            '--tables',
+            help='The history tables to archive the records of.',
+            nargs='+',
+            choices=TABLES,
+            default=list(TABLES),
+        )
+        parser.add_argument(
+            '--batch-size',
+            help='Number of StudentModules whose records are archived to each segment.',
+            default=1000,
+            type=int,
+        )
+        parser.add_argument(
+            '--compact',
+            help='Also rewrite the segments holding the records of deleted StudentModules without them.',
+            action='store_true',
+        )
+        parser.add_argument(
+            '--sleep-between',
+            help='Seconds to sleep between batches.',
+            default=0.0,
+            type=float,
+        )
+
+    def handle(self, *args, **options):
+        if not history_archive.is_enabled():
+            raise CommandError('The StudentModule history archive is not enabled.')
+        if options['batch_size'] < 1:
+            raise CommandError('The batch size must be at least 1.')
+
+        older_than_days = options['older_than_days']
+        if older_than_days is None:
+            older_than_days = settings.STUDENT_MODULE_HISTORY_ARCHIVE.get('MIN_AGE_DAYS', 365)
+        created_before = timezone.now() - timedelta(days=older_than_days)
+
+        history_models = self._history_models(options['tables'])
+        for course_key in self._course_keys(options['courses']):
+            record_count = 0
+            for student_module_ids in self._student_module_batches(course_key, options['batch_size']):
+                for history_model_cls in history_models:
+                    segment = history_archive.archive_history(
+                        history_model_cls, course_key, student_module_ids, created_before,
+                    )
+                    if segment is not None:
+                        record_count += segment.record_count
+                if options['sleep_between']:
+                    time.sleep(options['sleep_between'])
+            self.stdout.write(f'{course_key}: archived {record_count} records created before {created_before}')
+            if options['compact']:
+                purged_count = sum(
+                    history_archive.compact_segments(history_model_cls, course_key)
+                    for history_model_cls in history_models
+                )
+                self.stdout.write(f'{course_key}: purged {purged_count} records of deleted StudentModules')
+
+    @staticmethod
+    def _history_models(tables):
+        """
+        Return the history models of the given tables.
+        """
+        history_models = []
+        if 'studentmodulehistory' in tables:
+            history_models.append(StudentModuleHistory)
+        if 'studentmodulehistoryextended' in tables and apps.is_installed(
+            'lms.djangoapps.coursewarehistoryextended'
+        ):
+            from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+            history_models.append(StudentModuleHistoryExtended)
+        return history_models
+
+    @staticmethod
+    def _course_keys(course_ids):
+        """
+        Return the keys of the given courses, or of all courses.
+        """
+        if not course_ids:
+            return CourseOverview.get_all_course_keys()
+        try:
+            return [CourseKey.from_string(course_id) for course_id in course_ids]
+        except InvalidKeyError as exc:
+            raise CommandError(f'Invalid course key: {exc}') from exc
+
+    @staticmethod
+    def _student_module_batches(course_key, batch_size):
+        """
+        Yield the ids of the course's StudentModules whose history is saved, in batches.
+        """
+        for shard in StudentModuleShardRouter.shards_for_course(course_key):
+            student_modules = StudentModule.objects.db_manager(shard).filter(
+                course_id=course_key,
+                module_type__in=BaseStudentModuleHistory.HISTORY_SAVING_TYPES,
+            ).order_by('id')
+            last_id = 0
+            while True:
+                student_module_ids = list(
+                    student_modules.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size]
+                )
+                if not student_module_ids:
+                    break
+                yield student_module_ids
+                last_id = student_module_ids[-1]
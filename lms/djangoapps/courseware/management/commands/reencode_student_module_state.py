@@ -0,0 +1,143 @@
+"""
+Re-encodes the XBlock user state stored in StudentModule and its history tables.
+
+States are stored compressed by new writes once the courseware.compress_student_module_state
+switch is on; this command compresses the states stored before that, in batches, so that it can
+run in the background. With --decode, it stores all states back as plain JSON instead.
+
+Rows are rewritten without changing their modified time, and only if their state wasn't changed
+since it was read, as by a learner meanwhile. The command can be stopped at any time, and resumed
+with --start-id.
+
+Example usage:
+    $ ./manage.py lms reencode_student_module_state --settings=devstack
+    $ ./manage.py lms reencode_student_module_state --tables studentmodule --batch-size 500 --sleep-between 0.5
+"""
+
+
+import logging
+import time
+from textwrap import dedent
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, TextField, Value
+
+from lms.djangoapps.courseware.models import StudentModule, StudentModuleHistory
+from lms.djangoapps.courseware.state_encoding import decode_state, encode_state
+from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
+
+log = logging.getLogger(__name__)
+
+TABLES = ('studentmodule', 'studentmodulehistory', 'studentmodulehistoryextended')
+
+
+class Command(BaseCommand):  # lint-amnesty, pylint: disable=missing-class-docstring
+    help = dedent(__doc__).strip()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tables',
+            help='The tables to re-encode the states of.',
+            nargs='+',
+            choices=TABLES,
+            default=list(TABLES),
+        )
+        parser.add_argument(
+            '--decode',
+            help='Store the states as plain JSON, rather than compressed.',
+            action='store_true',
+            default=False,
+        )
+        parser.add_argument(
+            '--batch-size',
+            help='Number of rows to re-encode in each batch.',
+            default=1000,
+            type=int,
+        )
+        parser.add_argument(
+            '--sleep-between',
+            help='Seconds to sleep between batches.',
+            default=0.0,
+            type=float,
+        )
+        parser.add_argument(
+            '--start-id',
+            help='Only re-encode the rows with greater ids, to resume a previous run.',
+            default=0,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('The batch size must be at least 1.')
+
+        for table in options['tables']:
+            for manager in self._managers(table):
+                stats = self._reencode(manager, options)
+                message = (
+                    f"{table} ({manager.db}): rewrote {stats['rows_rewritten']} of {stats['rows_read']} rows, "
+                    f"from {stats['bytes_before']} to {stats['bytes_after']} bytes of state, "
+                    f"skipped {stats['rows_changed']} rows changed meanwhile"
+                )
+                log.info('reencode_student_module_state: %s', message)
+                self.stdout.write(message)
+
+    @staticmethod
+    def _managers(table):
+        """
+        Return the managers of the databases storing the given table.
+        """
+        if table == 'studentmodule':
+            return [StudentModule.objects.db_manager(shard) for shard in StudentModuleShardRouter.shards() or [None]]
+        if table == 'studentmodulehistory':
+            return [StudentModuleHistory.objects]
+        if not apps.is_installed('lms.djangoapps.coursewarehistoryextended'):
+            return []
+        from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+        return [StudentModuleHistoryExtended.objects]
+
+    def _reencode(self, manager, options):
+        """
+        Re-encodes the states of the manager's table in batches, and returns statistics about them.
+        """
+        stats = {'rows_read': 0, 'rows_rewritten': 0, 'rows_changed': 0, 'bytes_before': 0, 'bytes_after': 0}
+        last_id = options['start_id']
+        while True:
+            # The states are read as stored, rather than decoded by their field.
+            rows = list(
+                manager.filter(id__gt=last_id).order_by('id').annotate(
+                    stored_state=ExpressionWrapper(F('state'), output_field=TextField()),
+                ).values_list('id', 'stored_state')[:options['batch_size']]
+            )
+            if not rows:
+                return stats
+
+            with transaction.atomic(using=manager.db):
+                for row_id, stored_state in rows:
+                    state = decode_state(stored_state)
+                    new_state = state if options['decode'] else encode_state(state)
+                    stats['rows_read'] += 1
+                    stats['bytes_before'] += len(stored_state or '')
+                    if new_state == stored_state:
+                        stats['bytes_after'] += len(stored_state or '')
+                        continue
+                    # The states are compared and written as they are, rather than encoded by their field,
+                    # and the row is left as it is if its state was changed since it was read.
+                    rewritten = manager.filter(
+                        id=row_id, state=Value(stored_state, output_field=TextField()),
+                    ).update(state=Value(new_state, output_field=TextField()))
+                    if rewritten:
+                        stats['bytes_after'] += len(new_state or '')
+                        stats['rows_rewritten'] += 1
+                    else:
+                        stats['rows_changed'] += 1
+
+            last_id = rows[-1][0]
+            log.info(
+                'reencode_student_module_state: %s (%s) re-encoded up to id %d: %s',
+                manager.model._meta.db_table, manager.db, last_id, stats,
+            )
+            if options['sleep_between']:
+                time.sleep(options['sleep_between'])
@@ -0,0 +1,71 @@
+"""
+Tests for the archive_student_module_history management command.
+"""
+
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+
+from lms.djangoapps.courseware.models import (
+    BaseStudentModuleHistory,
+    StudentModuleHistoryArchiveEntry,
+    StudentModuleHistoryArchiveSegment
+)
+from lms.djangoapps.courseware.tests.factories import COURSE_KEY
+from lms.djangoapps.courseware.tests.test_history_archive import HistoryArchiveTestMixin
+from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+
+
+class TestArchiveStudentModuleHistory(HistoryArchiveTestMixin, TestCase):
+    """
+    Tests archive_student_module_history management command.
+    """
+    # Tell Django to clean out all databases, not just default
+    databases = set(connections)
+
+    def _archive(self, *args):
+        output = StringIO()
+        call_command(
+            'archive_student_module_history', '--courses', str(COURSE_KEY), '--batch-size', '2', *args, stdout=output,
+        )
+        return output.getvalue()
+
+    def test_archive(self):
+        old_modules = self.create_history(['usage_1', 'usage_2', 'usage_3'], 2, 60)
+        new_modules = self.create_history(['usage_4'], 2, 1)
+        history = [
+            (entry.id, entry.state) for entry in BaseStudentModuleHistory.get_history(old_modules + new_modules)
+        ]
+
+        output = self._archive()
+        assert f'{COURSE_KEY}: archived 6 records' in output
+        # The three old StudentModules are archived in batches of two.
+        assert StudentModuleHistoryArchiveSegment.objects.count() == 2
+        assert set(StudentModuleHistoryExtended.objects.values_list('student_module_id', flat=True)) == {
+            new_modules[0].id
+        }
+        assert sorted(
+            (entry.id, entry.state) for entry in BaseStudentModuleHistory.get_history(old_modules + new_modules)
+        ) == sorted(history)
+
+        assert f'{COURSE_KEY}: archived 2 records' in self._archive('--older-than-days', '0')
+
+    def test_compact(self):
+        student_modules = self.create_history(['usage_1', 'usage_2'], 2, 60)
+        self._archive()
+        student_modules[0].delete()
+        assert 'purged' not in self._archive()
+
+        output = self._archive('--compact')
+        assert f'{COURSE_KEY}: purged 2 records' in output
+        assert StudentModuleHistoryArchiveSegment.objects.get().record_count == 2
+        assert StudentModuleHistoryArchiveEntry.objects.get().student_module_id == student_modules[1].id
+
+    def test_disabled(self):
+        with override_settings(STUDENT_MODULE_HISTORY_ARCHIVE={'ENABLED': False}):
+            with pytest.raises(CommandError):
+                self._archive()
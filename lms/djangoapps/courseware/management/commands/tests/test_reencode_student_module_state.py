@@ -0,0 +1,79 @@
+"""
+Tests for the reencode_student_module_state management command.
+"""
+
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase
+
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.state_encoding import decode_state, encode_state
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from lms.djangoapps.courseware.tests.test_state_encoding import LARGE_STATE, stored_states
+from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+
+
+class TestReencodeStudentModuleState(TestCase):
+    """
+    Tests reencode_student_module_state management command.
+    """
+    # Tell Django to clean out all databases, not just default
+    databases = set(connections)
+
+    def setUp(self):
+        super().setUp()
+        self.student_modules = [StudentModuleFactory(state=state) for state in (LARGE_STATE, '{}', None)]
+        self.modified = [student_module.modified for student_module in StudentModule.objects.order_by('id')]
+
+    def _reencode(self, *args):
+        output = StringIO()
+        call_command('reencode_student_module_state', '--batch-size', '2', *args, stdout=output)
+        return output.getvalue()
+
+    def test_encode(self):
+        output = self._reencode()
+        assert stored_states(StudentModule) == [encode_state(LARGE_STATE), '{}', None]
+        assert stored_states(StudentModuleHistoryExtended) == [encode_state(LARGE_STATE), '{}', None]
+        assert [student_module.state for student_module in StudentModule.objects.order_by('id')] == [
+            LARGE_STATE, '{}', None,
+        ]
+        assert [student_module.modified for student_module in StudentModule.objects.order_by('id')] == self.modified
+        assert 'studentmodule (default): rewrote 1 of 3 rows' in output
+        assert 'skipped 0 rows changed meanwhile' in output
+
+        # Re-encoding again rewrites nothing.
+        assert 'studentmodule (default): rewrote 0 of 3 rows' in self._reencode('--tables', 'studentmodule')
+
+    def test_decode(self):
+        self._reencode()
+        self._reencode('--decode')
+        assert stored_states(StudentModule) == [LARGE_STATE, '{}', None]
+        assert stored_states(StudentModuleHistoryExtended) == [LARGE_STATE, '{}', None]
+
+    def test_start_id(self):
+        self._reencode('--start-id', str(self.student_modules[0].id), '--tables', 'studentmodule')
+        assert stored_states(StudentModule) == [LARGE_STATE, '{}', None]
+
+    def test_changed_meanwhile(self):
+        learner_state = '{"attempts": 1}'
+
+        def decode_after_learner_write(state):
+            # The learner saves a new state once the command has read the old one.
+            if state == LARGE_STATE:
+                student_module = StudentModule.objects.get(id=self.student_modules[0].id)
+                student_module.state = learner_state
+                student_module.save()
+            return decode_state(state)
+
+        with patch(
+            'lms.djangoapps.courseware.management.commands.reencode_student_module_state.decode_state',
+            side_effect=decode_after_learner_write,
+        ):
+            output = self._reencode('--tables', 'studentmodule')
+        assert 'studentmodule (default): rewrote 0 of 3 rows' in output
+        assert 'skipped 1 rows changed meanwhile' in output
+        assert stored_states(StudentModule) == [learner_state, '{}', None]
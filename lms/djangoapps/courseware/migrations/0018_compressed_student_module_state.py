@@ -0,0 +1,32 @@
+# Generated by Django 4.2.24 on 2026-10-18 12:00
+
+from django.db import migrations
+
+import lms.djangoapps.courseware.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseware', '0017_financialassistanceconfiguration'),
+    ]
+
+    # CompressedStateField is stored in the same text column as TextField, so
+    # these only update the state, rather than altering the large tables.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='studentmodule',
+                    name='state',
+                    field=lms.djangoapps.courseware.fields.CompressedStateField(blank=True, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='studentmodulehistory',
+                    name='state',
+                    field=lms.djangoapps.courseware.fields.CompressedStateField(blank=True, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.24 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import opaque_keys.edx.django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseware', '0018_compressed_student_module_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentModuleHistoryArchiveSegment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('history_table', models.CharField(max_length=64)),
+                ('course_id', opaque_keys.edx.django.models.LearningContextKeyField(db_index=True, max_length=255)),
+                ('path', models.CharField(max_length=255)),
+                ('record_count', models.PositiveIntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentModuleHistoryArchiveEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_module_id', models.PositiveBigIntegerField(db_index=True)),
+                ('offset', models.PositiveBigIntegerField()),
+                ('length', models.PositiveIntegerField()),
+                ('record_count', models.PositiveIntegerField()),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courseware.studentmodulehistoryarchivesegment')),
+            ],
+        ),
+    ]
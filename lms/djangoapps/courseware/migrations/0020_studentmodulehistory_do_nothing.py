@@ -0,0 +1,19 @@
+# Generated by Django 4.2.24 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseware', '0019_studentmodulehistoryarchive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentmodulehistory',
+            name='student_module',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='courseware.studentmodule'),
+        ),
+    ]
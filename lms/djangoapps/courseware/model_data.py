@@ -15,6 +15,7 @@ pieces of information for each scope, and thus how to cache, prefetch, and creat
 entries.
 
 UserStateCache: A cache for Scope.user_state
+UserStateWriteBuffer: Coalesces the Scope.user_state writes made in buffered_user_state_writes
 UserStateSummaryCache: A cache for Scope.user_state_summary
 PreferencesCache: A cache for Scope.preferences
 UserInfoCache: A cache for Scope.user_info
@@ -26,8 +27,10 @@ import json
 import logging
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict, namedtuple
+from contextlib import contextmanager
 
 from django.db import DatabaseError, IntegrityError, transaction
+from edx_django_utils import monitoring as monitoring_utils
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.keys import LearningContextKey
@@ -36,7 +39,10 @@ from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
 from xblock.fields import Scope, UserScope
 from xblock.runtime import KeyValueStore
 
+from lms.djangoapps.courseware.toggles import write_behind_user_state_is_enabled
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+from openedx.core.lib.cache_utils import get_cache
+from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
 from xmodule.modulestore.django import modulestore  # lint-amnesty, pylint: disable=wrong-import-order
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
@@ -330,6 +336,89 @@ class DjangoOrmFieldCache(metaclass=ABCMeta):
         raise NotImplementedError()
 
 
+class UserStateWriteBuffer:
+    """
+    The Scope.user_state writes buffered by the UserStateCaches of a request,
+    coalesced per user and block, until they are flushed.
+    """
+    def __init__(self):
+        # Maps usernames to their user state clients and the state to write
+        # for each of their blocks.
+        self._writes = {}
+        self._write_count = 0
+
+    def add(self, client, username, block_keys_to_state):
+        """
+        Buffers the given state for the given user's blocks, overlaid over the
+        state already buffered for them.
+        """
+        __, buffered_state = self._writes.setdefault(username, (client, defaultdict(dict)))
+        for block_key, state in block_keys_to_state.items():
+            buffered_state[block_key].update(state)
+        self._write_count += 1
+
+    def discard(self, username, block_key, field_name):
+        """
+        Discards the buffered write of the given field of the given user's block.
+        """
+        if username in self._writes:
+            __, buffered_state = self._writes[username]
+            if block_key in buffered_state:
+                buffered_state[block_key].pop(field_name, None)
+
+    def flush(self):
+        """
+        Writes the buffered state of each user in one bulk upsert.
+
+        Raises: KeyValueMultiSaveError if the state of a user fails to save
+        """
+        writes, self._writes = self._writes, {}
+        monitoring_utils.increment('courseware.write_behind_user_state.flushes')
+        monitoring_utils.accumulate('courseware.write_behind_user_state.writes_buffered', self._write_count)
+        monitoring_utils.accumulate(
+            'courseware.write_behind_user_state.blocks_written',
+            sum(len(buffered_state) for __, buffered_state in writes.values()),
+        )
+        self._write_count = 0
+        for username, (client, buffered_state) in writes.items():
+            try:
+                client.bulk_set_many(username, buffered_state)
+            except DatabaseError:
+                log.exception("Saving buffered user state failed for %s", username)
+                raise KeyValueMultiSaveError([])  # lint-amnesty, pylint: disable=raise-missing-from
+
+
+_WRITE_BUFFER_CACHE_NAMESPACE = 'courseware.model_data.user_state_write_buffer'
+
+
+def get_user_state_write_buffer():
+    """
+    Returns the UserStateWriteBuffer of the current buffered_user_state_writes
+    block, or None outside of one.
+    """
+    return get_cache(_WRITE_BUFFER_CACHE_NAMESPACE).get('buffer')
+
+
+@contextmanager
+def buffered_user_state_writes(course_key):
+    """
+    Buffers the Scope.user_state writes made in the block, if the
+    courseware.write_behind_user_state flag is enabled for the course, and
+    writes them when it exits.  Blocks nested in another write to it.
+    """
+    cache = get_cache(_WRITE_BUFFER_CACHE_NAMESPACE)
+    if 'buffer' in cache or not write_behind_user_state_is_enabled(course_key):
+        yield
+        return
+
+    write_buffer = cache['buffer'] = UserStateWriteBuffer()
+    try:
+        yield
+    finally:
+        del cache['buffer']
+        write_buffer.flush()
+
+
 class UserStateCache:
     """
     Cache for Scope.user_state xblock field data.
@@ -399,6 +488,12 @@ class UserStateCache:
 
             pending_updates[cache_key][kvs_key.field_name] = value
 
+        write_buffer = get_user_state_write_buffer()
+        if write_buffer is not None:
+            write_buffer.add(self._client, self.user.username, pending_updates)
+            self._cache.update(pending_updates)
+            return
+
         try:
             self._client.set_many(
                 self.user.username,
@@ -444,6 +539,10 @@ class UserStateCache:
         if kvs_key.field_name not in field_state:
             raise KeyError(kvs_key.field_name)
 
+        write_buffer = get_user_state_write_buffer()
+        if write_buffer is not None:
+            write_buffer.discard(self.user.username, cache_key, kvs_key.field_name)
+
         self._client.delete(self.user.username, cache_key, fields=[kvs_key.field_name])
         del field_state[kvs_key.field_name]
 
@@ -929,7 +1028,9 @@ class ScoresClient:
 
     def fetch_scores(self, locations):
         """Grab score information."""
-        scores_qset = StudentModule.objects.filter(
+        scores_qset = StudentModule.objects.db_manager(
+            StudentModuleShardRouter.shard_for(self.course_key, self.user_id),
+        ).filter(
             student_id=self.user_id,
             course_id=self.course_key,
             module_state_key__in=set(locations),
@@ -973,9 +1074,11 @@ def set_score(user_id, usage_key, score, max_score):
     """
     created = False
     kwargs = {"student_id": user_id, "module_state_key": usage_key, "course_id": usage_key.context_key}
+    shard = StudentModuleShardRouter.shard_for(usage_key.context_key, user_id)
+    student_modules = StudentModule.objects.db_manager(shard)
     try:
-        with transaction.atomic():
-            student_module, created = StudentModule.objects.get_or_create(
+        with transaction.atomic(using=shard):
+            student_module, created = student_modules.get_or_create(
                 defaults={
                     'grade': score,
                     'max_grade': max_score,
@@ -990,7 +1093,7 @@ def set_score(user_id, usage_key, score, max_score):
             'score %d and max_score %d',
             str(user_id), usage_key.context_key, usage_key, score, max_score
         )
-        student_module = StudentModule.objects.get(**kwargs)
+        student_module = student_modules.get(**kwargs)
 
     if not created:
         student_module.grade = score
@@ -1005,7 +1108,9 @@ def get_score(user_id, usage_key):
     Returns None if not found.
     """
     try:
-        student_module = StudentModule.objects.get(
+        student_module = StudentModule.objects.db_manager(
+            StudentModuleShardRouter.shard_for(usage_key.course_key, user_id),
+        ).get(
             student_id=user_id,
             module_state_key=usage_key,
             course_id=usage_key.course_key,
@@ -21,19 +21,29 @@ from config_models.models import ConfigurationModel
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models.signals import post_delete, post_save
+from django.db.utils import OperationalError, ProgrammingError
+from django.dispatch import Signal, receiver
 
 from django.utils.translation import gettext_lazy as _
 from edx_django_utils.cache.utils import RequestCache
 from model_utils.models import TimeStampedModel
 from opaque_keys.edx.django.models import BlockTypeKeyField, CourseKeyField, LearningContextKeyField, UsageKeyField
-from lms.djangoapps.courseware.fields import UnsignedBigIntAutoField
+from lms.djangoapps.courseware.fields import CompressedStateField, UnsignedBigIntAutoField
 
 from openedx.core.djangolib.markup import HTML
+from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
 
 log = logging.getLogger("edx.courseware")
 
+# Signal sent after StudentModule rows are written in bulk, which sends no
+# post_save signals, so that their history can be saved in bulk as well.
+# providing_args=[
+#         'student_modules',  # The StudentModule instances written, as stored.
+#     ]
+student_modules_bulk_saved = Signal()
+
 
 def chunks(items, chunk_size):
     """
@@ -76,6 +86,45 @@ class ChunkingManager(models.Manager):
         return res
 
 
+class StudentModuleManager(ChunkingManager):
+    """
+    :class:`~ChunkingManager` of StudentModule, which also gives the managers of the
+    databases storing the rows of a user or a course, as partitioned by
+    :class:`~StudentModuleShardRouter`.
+
+    Queries made with this manager itself only read and write the default database,
+    so those which may involve rows stored on a shard must use the managers of their
+    shards instead.  Without shards, these are all equivalent to this manager.
+    """
+
+    def for_shard(self, course_key, user_id):
+        """
+        Return the manager of the database storing the rows of the user in the course.
+        """
+        return self.db_manager(StudentModuleShardRouter.shard_for(course_key, user_id))
+
+    def for_shards(self, course_key, user_id=None):
+        """
+        Return the managers of the databases storing the rows of the course, or only
+        those of the user in the course if `user_id` is given.
+        """
+        if user_id is not None:
+            return [self.for_shard(course_key, user_id)]
+        return [self.db_manager(shard) for shard in StudentModuleShardRouter.shards_for_course(course_key)]
+
+    def for_user_shards(self, user_id):
+        """
+        Return the managers of the databases storing the rows of the user, in any course.
+        """
+        return [self.db_manager(shard) for shard in StudentModuleShardRouter.shards_for_user(user_id)]
+
+    def for_all_shards(self):
+        """
+        Return the managers of all the databases storing rows.
+        """
+        return [self.db_manager(shard) for shard in StudentModuleShardRouter.shards() or [None]]
+
+
 class StudentModule(models.Model):
     """
     Keeps student state for a particular XBlock usage and particular student.
@@ -84,7 +133,7 @@ class StudentModule(models.Model):
 
     .. no_pii:
     """
-    objects = ChunkingManager()
+    objects = StudentModuleManager()
 
     id = UnsignedBigIntAutoField(primary_key=True)  # pylint: disable=invalid-name
 
@@ -106,7 +155,7 @@ class StudentModule(models.Model):
         ]
 
     # Internal state of the object
-    state = models.TextField(null=True, blank=True)
+    state = CompressedStateField(null=True, blank=True)
 
     # Grade, and are we done?
     grade = models.FloatField(null=True, blank=True, db_index=True)
@@ -126,8 +175,14 @@ class StudentModule(models.Model):
         """
         Return all model instances that correspond to problems that have been
         submitted for a given course. So module_type='problem' and a non-null
-        grade. Use a read replica if one exists for this environment.
+        grade. Use a read replica if one exists for this environment, unless
+        the instances are stored on shards.
         """
+        if StudentModuleShardRouter.is_enabled():
+            return list(itertools.chain.from_iterable(
+                manager.filter(course_id=course_id, module_type='problem', grade__isnull=False)
+                for manager in cls.objects.for_shards(course_id)
+            ))
         queryset = cls.objects.filter(
             course_id=course_id,
             module_type='problem',
@@ -157,13 +212,17 @@ class StudentModule(models.Model):
     @classmethod
     def get_state_by_params(cls, course_id, module_state_keys, student_id=None):
         """
-        Return all model instances that correspond to a course and module keys.
+        Return the querysets of all model instances that correspond to a course and module keys,
+        one for each of the databases storing them.
 
         Student ID is optional keyword argument, if provided it narrows down the instances.
         """
-        module_states = cls.objects.filter(course_id=course_id, module_state_key__in=module_state_keys)
-        if student_id:
-            module_states = module_states.filter(student_id=student_id)
+        module_states = []
+        for manager in cls.objects.for_shards(course_id, student_id or None):
+            shard_module_states = manager.filter(course_id=course_id, module_state_key__in=module_state_keys)
+            if student_id:
+                shard_module_states = shard_module_states.filter(student_id=student_id)
+            module_states.append(shard_module_states)
         return module_states
 
     @classmethod
@@ -171,13 +230,24 @@ class StudentModule(models.Model):
         if not student.is_authenticated:
             return
         else:
-            cls.objects.update_or_create(
+            cls.objects.for_shard(course_id, student.id).update_or_create(
                 student=student,
                 course_id=course_id,
                 module_state_key=module_state_key,
                 defaults=defaults,
             )
 
+    @receiver(post_delete, sender=User)
+    def delete_sharded_state(sender, instance, using, **kwargs):  # pylint: disable=no-self-argument, unused-argument
+        """
+        Delete the StudentModules of a deleted user which are stored on shards, which
+        the deletion of the user doesn't cascade to.
+        """
+        if StudentModuleShardRouter.is_enabled():
+            for manager in StudentModule.objects.for_user_shards(instance.id):
+                if manager.db != using:
+                    manager.filter(student_id=instance.id).delete()
+
 
 class BaseStudentModuleHistory(models.Model):
     """
@@ -195,7 +265,7 @@ class BaseStudentModuleHistory(models.Model):
 
     # This should be populated from the modified field in StudentModule
     created = models.DateTimeField(db_index=True)
-    state = models.TextField(null=True, blank=True)
+    state = CompressedStateField(null=True, blank=True)
     grade = models.FloatField(null=True, blank=True)
     max_grade = models.FloatField(null=True, blank=True)
 
@@ -206,7 +276,12 @@ class BaseStudentModuleHistory(models.Model):
         across multiple data stores.  Django does not handle this correctly with the built-in
         student_module property.
         """
-        return StudentModule.objects.get(pk=self.student_module_id)
+        for manager in StudentModule.objects.for_all_shards():
+            try:
+                return manager.get(pk=self.student_module_id)
+            except StudentModule.DoesNotExist:
+                continue
+        raise StudentModule.DoesNotExist(f'StudentModule {self.student_module_id} does not exist')
 
     @staticmethod
     def get_history(student_modules):
@@ -214,23 +289,33 @@ class BaseStudentModuleHistory(models.Model):
         Find history objects across multiple backend stores for a given StudentModule
         """
 
+        from lms.djangoapps.courseware.history_archive import with_archived_history
+
         history_entries = []
 
         if settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
             from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
-            history_entries += StudentModuleHistoryExtended.objects.filter(
-                # Django will sometimes try to join to courseware_studentmodule
-                # so just do an in query
-                student_module__in=[module.id for module in student_modules]
-            ).order_by('-id')
+            history_entries += with_archived_history(
+                StudentModuleHistoryExtended,
+                student_modules,
+                StudentModuleHistoryExtended.objects.filter(
+                    # Django will sometimes try to join to courseware_studentmodule
+                    # so just do an in query
+                    student_module__in=[module.id for module in student_modules]
+                ).order_by('-id'),
+            )
 
         # If we turn off reading from multiple history tables, then we don't want to read from
         # StudentModuleHistory anymore, we believe that all history is in the Extended table.
         if settings.FEATURES.get('ENABLE_READING_FROM_MULTIPLE_HISTORY_TABLES'):
             # we want to save later SQL queries on the model which allows us to prefetch
-            history_entries += StudentModuleHistory.objects.prefetch_related('student_module').filter(
-                student_module__in=student_modules
-            ).order_by('-id')
+            history_entries += with_archived_history(
+                StudentModuleHistory,
+                student_modules,
+                StudentModuleHistory.objects.prefetch_related('student_module').filter(
+                    student_module__in=student_modules
+                ).order_by('-id'),
+            )
 
         return history_entries
 
@@ -288,6 +373,61 @@ class BaseStudentModuleHistory(models.Model):
                     # Re-raise unexpected errors
                     raise
 
+    @staticmethod
+    def bulk_save_history_entries(student_modules, history_model_cls, request_cache_key):
+        """
+        When many StudentModule instances are written in bulk, save their changes in the
+        corresponding activity history table, like save_history_entry does for each, with one
+        query for the new history records and one for those already created during this request.
+        """
+        student_modules = [
+            student_module for student_module in student_modules
+            if student_module.module_type in history_model_cls.HISTORY_SAVING_TYPES
+        ]
+        if not student_modules:
+            return
+
+        request_cache = RequestCache('studentmodulehistory')
+        request_smh_cache = request_cache.get_cached_response(request_cache_key).get_value_or_default({})
+        cached_entries = history_model_cls.objects.in_bulk([
+            request_smh_cache[student_module.id]
+            for student_module in student_modules
+            if student_module.id in request_smh_cache
+        ])
+
+        new_entries = []
+        updated_entries = []
+        for student_module in student_modules:
+            history_entry = cached_entries.get(request_smh_cache.get(student_module.id))
+            if history_entry:
+                updated_entries.append(history_entry)
+            else:
+                history_entry = history_model_cls(student_module=student_module, version=None)
+                new_entries.append(history_entry)
+            history_entry.created = student_module.modified
+            history_entry.state = student_module.state
+            history_entry.grade = student_module.grade
+            history_entry.max_grade = student_module.max_grade
+
+        try:
+            history_model_cls.objects.bulk_create(new_entries)
+            history_model_cls.objects.bulk_update(updated_entries, ['created', 'state', 'grade', 'max_grade'])
+        except (ProgrammingError, OperationalError) as exc:
+            log.warning(
+                "Failed to save history entries for %d StudentModules - history table may not exist or be "
+                "configured: %s",
+                len(student_modules),
+                str(exc)
+            )
+            return
+
+        # Databases that don't return the ids of bulk-created rows (like MySQL) leave them unset, so
+        # later saves during this request create new records for those StudentModules.
+        request_cache.setdefault(request_cache_key, {})
+        for history_entry in new_entries:
+            if history_entry.id is not None:
+                request_cache.data[request_cache_key][history_entry.student_module_id] = history_entry.id
+
 
 class StudentModuleHistory(BaseStudentModuleHistory):
     """Keeps a complete history of state changes for a given XModule for a given
@@ -298,7 +438,7 @@ class StudentModuleHistory(BaseStudentModuleHistory):
         app_label = "courseware"
         get_latest_by = "created"
 
-    student_module = models.ForeignKey(StudentModule, db_index=True, db_constraint=False, on_delete=models.CASCADE)
+    student_module = models.ForeignKey(StudentModule, db_index=True, db_constraint=False, on_delete=models.DO_NOTHING)
 
     def __repr__(self):
         student_dict = {
@@ -313,6 +453,15 @@ class StudentModuleHistory(BaseStudentModuleHistory):
     def __str__(self):
         return str(repr(self))
 
+    @receiver(post_delete, sender=StudentModule)
+    def delete_history(sender, instance, **kwargs):  # pylint: disable=no-self-argument, unused-argument
+        """
+        Django can't cascade deletes from the StudentModules stored on shards to their
+        history, which stays in the default database, so the model is on_delete=DO_NOTHING
+        and the history is deleted here.
+        """
+        StudentModuleHistory.objects.using(DEFAULT_DB_ALIAS).filter(student_module_id=instance.id).delete()
+
     def save_history(sender, instance, **kwargs):  # pylint: disable=no-self-argument, unused-argument
         """
         Checks the instance's module_type, and creates & saves a
@@ -325,11 +474,73 @@ class StudentModuleHistory(BaseStudentModuleHistory):
             "lms.djangoapps.courseware.models.student_module_history_map"
         )
 
+    def bulk_save_history(sender, student_modules, **kwargs):  # pylint: disable=no-self-argument, unused-argument
+        """
+        Creates & saves the StudentModuleHistory entries of StudentModules
+        written in bulk, for the module_types that we save.
+        """
+        BaseStudentModuleHistory.bulk_save_history_entries(
+            student_modules,
+            StudentModuleHistory,
+            "lms.djangoapps.courseware.models.student_module_history_map"
+        )
+
     # When the extended studentmodulehistory table exists, don't save
     # duplicate history into courseware_studentmodulehistory, just retain
     # data for reading.
     if not settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
         post_save.connect(save_history, sender=StudentModule)
+        student_modules_bulk_saved.connect(bulk_save_history, sender=StudentModule)
+
+
+class StudentModuleHistoryArchiveSegment(models.Model):
+    """
+    A compressed, append-only file on the history archive storage, holding
+    StudentModule history records of a course that were moved out of their
+    history table.  See lms.djangoapps.courseware.history_archive.
+
+    .. no_pii:
+    """
+
+    class Meta:
+        app_label = "courseware"
+
+    # The db_table of the history model the records were archived from.
+    history_table = models.CharField(max_length=64)
+    course_id = LearningContextKeyField(max_length=255, db_index=True)
+    path = models.CharField(max_length=255)
+    record_count = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'StudentModuleHistoryArchiveSegment<{self.history_table}, {self.course_id}, {self.path}>'
+
+
+class StudentModuleHistoryArchiveEntry(models.Model):
+    """
+    Where the archived history records of a StudentModule are in a segment:
+    a zlib-compressed block of ``length`` bytes starting at ``offset``.
+
+    .. no_pii:
+    """
+
+    class Meta:
+        app_label = "courseware"
+
+    segment = models.ForeignKey(StudentModuleHistoryArchiveSegment, on_delete=models.CASCADE)
+    student_module_id = models.PositiveBigIntegerField(db_index=True)
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveIntegerField()
+    record_count = models.PositiveIntegerField()
+
+    @receiver(post_delete, sender=StudentModule)
+    def delete_archived_history(sender, instance, **kwargs):  # pylint: disable=no-self-argument, unused-argument
+        """
+        Forget the archived history of deleted StudentModules, which stays in
+        the append-only segments until they are compacted.
+        """
+        if getattr(settings, 'STUDENT_MODULE_HISTORY_ARCHIVE', {}).get('ENABLED'):
+            StudentModuleHistoryArchiveEntry.objects.filter(student_module_id=instance.id).delete()
 
 
 class XBlockFieldBase(models.Model):
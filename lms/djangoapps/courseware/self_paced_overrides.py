@@ -3,7 +3,7 @@ Field overrides for self-paced courses. This allows overriding due
 dates for each block in the course.
 """
 
-from .field_overrides import FieldOverrideProvider
+from .field_overrides import ALL_BLOCKS, FieldOverrideProvider
 
 
 class SelfPacedDateOverrideProvider(FieldOverrideProvider):
@@ -22,6 +22,9 @@ class SelfPacedDateOverrideProvider(FieldOverrideProvider):
 
         return default
 
+    def overridden_fields(self, course_key):
+        return {ALL_BLOCKS: {'due', 'start'}}
+
     @classmethod
     def enabled_for(cls, block):  # lint-amnesty, pylint: disable=arguments-differ
         """This provider is enabled for self-paced courses only."""
@@ -6,6 +6,8 @@ Courseware services.
 import json
 
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import UsageKey
 
 from lms.djangoapps.courseware.models import StudentModule
 from common.djangoapps.student.models import get_user_by_username_or_email
@@ -32,9 +34,13 @@ class UserStateService:
         except User.DoesNotExist:
             return {}
         try:
-            student_module = StudentModule.objects.get(
+            usage_key = UsageKey.from_string(str(block_id))
+        except InvalidKeyError:
+            return {}
+        try:
+            student_module = StudentModule.objects.for_shard(usage_key.context_key, user.id).get(
                 student=user,
-                module_state_key=block_id
+                module_state_key=usage_key
             )
             return json.loads(student_module.state)
         except StudentModule.DoesNotExist:
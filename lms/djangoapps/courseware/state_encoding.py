@@ -0,0 +1,73 @@
+"""
+Compact encoding of the XBlock user state stored in StudentModule and its history.
+
+The state is stored as JSON text.  Large states (like those of capa problems,
+which keep their student answers, correct map and input state) can instead be
+stored zlib-compressed, as a versioned header followed by the base64 encoding
+of the compressed JSON, so that it still fits the existing text columns.  No
+JSON text starts with the header, so legacy rows, stored as plain JSON, are
+read as they are.
+
+See CompressedStateField, which encodes and decodes states transparently, and
+the reencode_student_module_state management command.
+"""
+
+
+import base64
+import binascii
+import zlib
+
+from edx_django_utils import monitoring as monitoring_utils
+
+# The header of states encoded as version 1: zlib-compressed JSON, base64-encoded.
+ZLIB_V1_HEADER = '~z1:'
+
+# States shorter than this are stored as plain JSON, since compressing them saves little.
+MIN_ENCODED_LENGTH = 256
+
+ZLIB_LEVEL = 6
+
+
+class StateDecodingError(ValueError):
+    """
+    Raised when an encoded state can't be decoded.
+    """
+
+
+def is_encoded(state):
+    """
+    Return whether the stored ``state`` is encoded, rather than plain JSON.
+    """
+    return state is not None and state.startswith(ZLIB_V1_HEADER)
+
+
+def encode_state(state):
+    """
+    Return the encoding of the JSON text ``state``, or ``state`` itself if it
+    is already encoded, or if encoding it wouldn't make it shorter.
+    """
+    if state is None or len(state) < MIN_ENCODED_LENGTH or is_encoded(state):
+        return state
+
+    compressed = zlib.compress(state.encode('utf-8'), ZLIB_LEVEL)
+    encoded_state = ZLIB_V1_HEADER + base64.b64encode(compressed).decode('ascii')
+    if len(encoded_state) >= len(state):
+        return state
+
+    monitoring_utils.increment('courseware.student_module_state.encoded')
+    monitoring_utils.accumulate('courseware.student_module_state.bytes_saved', len(state) - len(encoded_state))
+    return encoded_state
+
+
+def decode_state(state):
+    """
+    Return the JSON text of the stored ``state``, which may be encoded or not.
+    """
+    if not is_encoded(state):
+        return state
+
+    try:
+        compressed = base64.b64decode(state[len(ZLIB_V1_HEADER):].encode('ascii'), validate=True)
+        return zlib.decompress(compressed).decode('utf-8')
+    except (binascii.Error, zlib.error, UnicodeError) as exc:
+        raise StateDecodingError(f'Invalid encoded state: {state[:40]!r}') from exc
@@ -5,11 +5,12 @@ by the individual due dates feature.
 
 
 import json
+from collections import defaultdict
 
 from lms.djangoapps.courseware.models import StudentFieldOverride
 from openedx.core.lib.xblock_utils import is_xblock_aside
 
-from .field_overrides import FieldOverrideProvider
+from .field_overrides import FieldOverrideProvider, block_key, clear_precompiled_overrides
 
 
 class IndividualStudentOverrideProvider(FieldOverrideProvider):
@@ -21,6 +22,9 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
     def get(self, block, name, default):
         return get_override_for_user(self.user, block, name, default)
 
+    def overridden_fields(self, course_key):
+        return _get_overridden_fields_for_user(self.user, course_key)
+
     @classmethod
     def enabled_for(cls, course):  # pylint: disable=arguments-differ
         """This simple override provider is always enabled"""
@@ -69,6 +73,21 @@ def _get_overrides_for_user(user, block):
     return overrides
 
 
+def _get_overridden_fields_for_user(user, course_key):
+    """
+    Gets the names of the fields overridden for the `user` in the course, in
+    a dictionary keyed by the `block_key` of their block.
+    """
+    query = StudentFieldOverride.objects.filter(
+        course_id=course_key,
+        student_id=user.id,
+    ).values_list('location', 'field')
+    overridden_fields = defaultdict(set)
+    for location, field in query:
+        overridden_fields[block_key(location)].add(field)
+    return overridden_fields
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -83,6 +102,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    clear_precompiled_overrides()
 
 
 def clear_override_for_user(user, block, name):
@@ -2,24 +2,37 @@
 Tests for `field_overrides` module.
 """
 import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
 import pytest
 from django.test.utils import override_settings
+from edx_django_utils.cache import RequestCache
+from edx_toggles.toggles.testutils import override_waffle_flag
 from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
 
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
 from ..field_overrides import (
+    ALL_BLOCKS,
     FieldOverrideProvider,
     OverrideFieldData,
     OverrideModulestoreFieldData,
+    block_key,
+    clear_precompiled_overrides,
     disable_overrides,
     resolve_dotted
 )
 from ..testutils import FieldOverrideTestMixin
+from ..toggles import COURSEWARE_PRECOMPILED_FIELD_OVERRIDES
 
 TESTUSER = "testuser"
 
+# The overrides of TestIndexedOverrideProvider, keyed by block id.
+INDEXED_OVERRIDES = {'problem_1': {'foo': 'fu'}}
+
 
 class TestOverrideProvider(FieldOverrideProvider):
     """
@@ -43,6 +56,32 @@ class TestOverrideProvider(FieldOverrideProvider):
         return True
 
 
+class TestIndexedOverrideProvider(FieldOverrideProvider):
+    """
+    A concrete implementation of `FieldOverrideProvider` for testing, which
+    tells which fields it overrides.
+    """
+    calls = []
+
+    def get(self, block, name, default):
+        block_id = block.scope_ids.usage_id.block_id
+        self.calls.append((block_id, name))
+        if name == 'oh':
+            return 'man'
+        return INDEXED_OVERRIDES.get(block_id, {}).get(name, default)
+
+    def overridden_fields(self, course_key):
+        overridden_fields = {
+            ('problem', block_id): set(overrides) for block_id, overrides in INDEXED_OVERRIDES.items()
+        }
+        overridden_fields[ALL_BLOCKS] = {'oh'}
+        return overridden_fields
+
+    @classmethod
+    def enabled_for(cls, course):  # pylint: disable=arguments-differ
+        return True
+
+
 class OverrideFieldBase(SharedModuleStoreTestCase):
     """
     Base class for field data override tests.  Using override_settings and
@@ -145,6 +184,81 @@ class OverrideModulestoreFieldDataTests(FieldOverrideTestMixin, OverrideFieldDat
         assert isinstance(data, DictFieldData)
 
 
+@override_settings(FIELD_OVERRIDE_PROVIDERS=(
+    'lms.djangoapps.courseware.tests.test_field_overrides.TestIndexedOverrideProvider',))
+@override_waffle_flag(COURSEWARE_PRECOMPILED_FIELD_OVERRIDES, active=True)
+class PrecompiledOverridesTests(OverrideFieldBase):
+    """
+    Tests for precompiling the overrides of `OverrideFieldData`.
+    """
+
+    def setUp(self):
+        super().setUp()
+        OverrideFieldData.provider_classes = None
+        RequestCache.clear_all_namespaces()
+        TestIndexedOverrideProvider.calls = []
+
+    def tearDown(self):
+        super().tearDown()
+        OverrideFieldData.provider_classes = None
+
+    def make_one(self):
+        """
+        Factory method.
+        """
+        return OverrideFieldData.wrap(TESTUSER, self.course, DictFieldData({
+            'foo': 'bar',
+            'bees': 'knees',
+        }))
+
+    def make_block(self, block_id):
+        """
+        Returns a stand-in for the problem with the given block id.
+        """
+        usage_key = self.course.id.make_usage_key('problem', block_id)
+        return SimpleNamespace(scope_ids=ScopeIds(TESTUSER, 'problem', usage_key, usage_key))
+
+    def _read_fields(self, data):
+        """
+        Reads fields of two problems, only one of which has its own overrides.
+        """
+        problem_1, problem_2 = self.make_block('problem_1'), self.make_block('problem_2')
+        assert data.get(problem_1, 'foo') == 'fu'
+        assert data.get(problem_2, 'foo') == 'bar'
+        assert data.get(problem_1, 'bees') == 'knees'
+        assert data.get(problem_2, 'oh') == 'man'
+
+    def test_get(self):
+        self._read_fields(self.make_one())
+        assert TestIndexedOverrideProvider.calls == [('problem_1', 'foo'), ('problem_2', 'oh')]
+
+    @override_waffle_flag(COURSEWARE_PRECOMPILED_FIELD_OVERRIDES, active=False)
+    def test_disabled(self):
+        self._read_fields(self.make_one())
+        assert TestIndexedOverrideProvider.calls == [
+            ('problem_1', 'foo'), ('problem_2', 'foo'), ('problem_1', 'bees'), ('problem_2', 'oh'),
+        ]
+
+    def test_shared(self):
+        self._read_fields(self.make_one())
+        with patch.object(TestIndexedOverrideProvider, 'overridden_fields') as mock_overridden_fields:
+            self._read_fields(self.make_one())
+        mock_overridden_fields.assert_not_called()
+
+    def test_cleared(self):
+        data = self.make_one()
+        problem_2 = self.make_block('problem_2')
+        assert data.get(problem_2, 'foo') == 'bar'
+        with patch.dict(INDEXED_OVERRIDES, {'problem_2': {'foo': 'fu'}}):
+            assert data.get(problem_2, 'foo') == 'bar'
+            clear_precompiled_overrides()
+            assert data.get(problem_2, 'foo') == 'fu'
+
+    def test_block_key(self):
+        problem = self.make_block('problem_1')
+        assert block_key(problem.scope_ids.usage_id) == ('problem', 'problem_1')
+
+
 class ResolveDottedTests(unittest.TestCase):
     """
     Tests for `resolve_dotted`.
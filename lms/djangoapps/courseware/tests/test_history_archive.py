@@ -0,0 +1,172 @@
+"""
+Tests for the archive of StudentModule history.
+"""
+
+
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from lms.djangoapps.courseware.history_archive import (
+    archive_history,
+    archive_storage,
+    compact_segments,
+    get_archived_history
+)
+from lms.djangoapps.courseware.models import (
+    BaseStudentModuleHistory,
+    StudentModule,
+    StudentModuleHistoryArchiveEntry,
+    StudentModuleHistoryArchiveSegment
+)
+from lms.djangoapps.courseware.tests.factories import COURSE_KEY, LOCATION, StudentModuleFactory
+from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+
+
+class HistoryArchiveTestMixin:
+    """
+    Enables the history archive, on a temporary directory.
+    """
+    def setUp(self):
+        super().setUp()
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        archive_settings = override_settings(STUDENT_MODULE_HISTORY_ARCHIVE={
+            'ENABLED': True,
+            'STORAGE_CLASS': 'django.core.files.storage.FileSystemStorage',
+            'STORAGE_KWARGS': {'location': archive_dir},
+            'ROOT_PATH': 'history',
+            'MIN_AGE_DAYS': 30,
+        })
+        archive_settings.enable()
+        self.addCleanup(archive_settings.disable)
+
+    def create_history(self, usage_ids, record_count, age_days):
+        """
+        Saves `record_count` states for each of the given blocks, whose history records are
+        `age_days` days old, and returns their StudentModules.
+        """
+        student_modules = []
+        for usage_id in usage_ids:
+            student_module = StudentModuleFactory(
+                module_state_key=LOCATION(usage_id),
+                course_id=COURSE_KEY,
+                state=json.dumps({'attempt': 0}),
+            )
+            for attempt in range(1, record_count):
+                student_module.state = json.dumps({'attempt': attempt})
+                student_module.grade = attempt
+                student_module.save()
+            student_modules.append(student_module)
+        StudentModuleHistoryExtended.objects.filter(
+            student_module_id__in=[student_module.id for student_module in student_modules],
+        ).update(created=timezone.now() - timedelta(days=age_days))
+        return student_modules
+
+
+class TestHistoryArchive(HistoryArchiveTestMixin, TestCase):
+    """
+    Tests for archiving and reading StudentModule history.
+    """
+    # Tell Django to clean out all databases, not just default
+    databases = set(connections)
+
+    def _history(self, student_modules):
+        return [
+            (entry.id, entry.student_module_id, entry.state, entry.grade, entry.created)
+            for entry in BaseStudentModuleHistory.get_history(student_modules)
+        ]
+
+    def test_archive(self):
+        student_modules = self.create_history(['usage_1', 'usage_2'], 3, 60)
+        history = self._history(student_modules)
+        assert len(history) == 6
+
+        segment = archive_history(
+            StudentModuleHistoryExtended, COURSE_KEY, [module.id for module in student_modules], timezone.now(),
+        )
+        assert segment.record_count == 6
+        assert segment.course_id == COURSE_KEY
+        assert StudentModuleHistoryArchiveEntry.objects.filter(segment=segment).count() == 2
+        assert not StudentModuleHistoryExtended.objects.exists()
+        assert self._history(student_modules) == history
+
+        # The records of a single StudentModule are read from the segment on their own.
+        archived_history = get_archived_history(StudentModuleHistoryExtended, [student_modules[1].id])
+        assert [entry.state for entry in archived_history] == [
+            json.dumps({'attempt': attempt}) for attempt in (2, 1, 0)
+        ]
+
+    def test_hot_and_archived(self):
+        student_modules = self.create_history(['usage_1'], 2, 60)
+        archive_history(StudentModuleHistoryExtended, COURSE_KEY, [student_modules[0].id], timezone.now())
+        student_modules[0].state = json.dumps({'attempt': 2})
+        student_modules[0].save()
+
+        states = [json.loads(state) for __, __, state, __, __ in self._history(student_modules)]
+        assert states == [{'attempt': 2}, {'attempt': 1}, {'attempt': 0}]
+
+        history = list(DjangoXBlockUserStateClient().get_history(
+            student_modules[0].student.username, LOCATION('usage_1'),
+        ))
+        assert [entry.state for entry in history] == states
+
+    def test_only_old_records(self):
+        old_modules = self.create_history(['usage_1'], 2, 60)
+        new_modules = self.create_history(['usage_2'], 2, 1)
+        segment = archive_history(
+            StudentModuleHistoryExtended,
+            COURSE_KEY,
+            [module.id for module in old_modules + new_modules],
+            timezone.now() - timedelta(days=30),
+        )
+        assert segment.record_count == 2
+        assert StudentModuleHistoryExtended.objects.filter(student_module_id=new_modules[0].id).count() == 2
+        assert archive_history(
+            StudentModuleHistoryExtended, COURSE_KEY, [new_modules[0].id], timezone.now() - timedelta(days=30),
+        ) is None
+
+    def test_interrupted_archive(self):
+        student_modules = self.create_history(['usage_1'], 2, 60)
+        history_entries = list(StudentModuleHistoryExtended.objects.all())
+        archive_history(StudentModuleHistoryExtended, COURSE_KEY, [student_modules[0].id], timezone.now())
+        # As if the records weren't deleted once archived.
+        StudentModuleHistoryExtended.objects.bulk_create(history_entries)
+        assert len(self._history(student_modules)) == 2
+
+    def test_deleted_student_module(self):
+        student_modules = self.create_history(['usage_1'], 2, 60)
+        archive_history(StudentModuleHistoryExtended, COURSE_KEY, [student_modules[0].id], timezone.now())
+        StudentModule.objects.get(id=student_modules[0].id).delete()
+        assert not StudentModuleHistoryArchiveEntry.objects.exists()
+        assert StudentModuleHistoryArchiveSegment.objects.exists()
+
+    def test_compact(self):
+        student_modules = self.create_history(['usage_1', 'usage_2', 'usage_3'], 2, 60)
+        segment = archive_history(
+            StudentModuleHistoryExtended, COURSE_KEY, [module.id for module in student_modules], timezone.now(),
+        )
+        old_path = segment.path
+        history = self._history(student_modules[1:])
+        assert compact_segments(StudentModuleHistoryExtended, COURSE_KEY) == 0
+
+        StudentModule.objects.get(id=student_modules[0].id).delete()
+        assert compact_segments(StudentModuleHistoryExtended, COURSE_KEY) == 2
+        segment.refresh_from_db()
+        assert segment.record_count == 4
+        assert segment.path != old_path
+        assert not archive_storage().exists(old_path)
+        assert self._history(student_modules[1:]) == history
+        assert compact_segments(StudentModuleHistoryExtended, COURSE_KEY) == 0
+
+        # A segment left without any StudentModule is deleted.
+        StudentModule.objects.filter(id__in=[module.id for module in student_modules[1:]]).delete()
+        assert compact_segments(StudentModuleHistoryExtended, COURSE_KEY) == 4
+        assert not StudentModuleHistoryArchiveSegment.objects.exists()
+        assert not archive_storage().exists(segment.path)
@@ -8,12 +8,18 @@ import pytest
 
 from django.db import connections, DatabaseError
 from django.test import TestCase
+from edx_toggles.toggles.testutils import override_waffle_flag
 from xblock.core import XBlock
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.fields import BlockScope, Scope, ScopeIds
 
 from common.djangoapps.student.tests.factories import UserFactory
-from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from lms.djangoapps.courseware.model_data import (
+    DjangoKeyValueStore,
+    FieldDataCache,
+    InvalidScopeError,
+    buffered_user_state_writes
+)
 from lms.djangoapps.courseware.models import (
     StudentModule,
     XModuleStudentInfoField,
@@ -26,6 +32,8 @@ from lms.djangoapps.courseware.tests.factories import StudentInfoFactory
 from lms.djangoapps.courseware.tests.factories import StudentModuleFactory as cmfStudentModuleFactory
 from lms.djangoapps.courseware.tests.factories import StudentPrefsFactory
 from lms.djangoapps.courseware.tests.factories import UserStateSummaryFactory
+from lms.djangoapps.courseware.toggles import COURSEWARE_WRITE_BEHIND_USER_STATE
+from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
 
 
 def mock_field(scope, name):
@@ -299,6 +307,89 @@ class TestMissingStudentModule(TestCase):  # lint-amnesty, pylint: disable=missi
             assert not self.kvs.has(user_state_key('a_field'))
 
 
+@override_waffle_flag(COURSEWARE_WRITE_BEHIND_USER_STATE, active=True)
+class TestBufferedStudentModuleStorage(TestCase):
+    """Tests for user_state storage via StudentModule with write-behind buffering"""
+    # Tell Django to clean out all databases, not just default
+    databases = set(connections)
+
+    def setUp(self):
+        super().setUp()
+        self.student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value', 'b_field': 'b_value'}))
+        self.user = self.student_module.student
+        assert self.user.id == 1
+        self.field_data_cache = FieldDataCache(
+            [mock_block([mock_field(Scope.user_state, 'a_field')])],
+            COURSE_KEY,
+            self.user,
+        )
+        self.kvs = DjangoKeyValueStore(self.field_data_cache)
+
+    def _history_count(self):
+        return StudentModuleHistoryExtended.objects.filter(student_module_id=self.student_module.id).count()
+
+    def test_writes_coalesced(self):
+        "Test that user_state writes are written together when the buffered block exits"
+        history_count = self._history_count()
+        with buffered_user_state_writes(COURSE_KEY):
+            with self.assertNumQueries(0, using='default'):
+                with self.assertNumQueries(0, using='student_module_history'):
+                    self.kvs.set(user_state_key('a_field'), 'new_value')
+                    self.kvs.set_many({
+                        user_state_key('a_field'): 'newer_value',
+                        user_state_key('not_a_field'): 'new_value',
+                    })
+                    assert 'newer_value' == self.kvs.get(user_state_key('a_field'))
+            assert {'a_field': 'a_value', 'b_field': 'b_value'} == json.loads(StudentModule.objects.get().state)
+
+        assert 1 == StudentModule.objects.all().count()
+        assert {'a_field': 'newer_value', 'b_field': 'b_value', 'not_a_field': 'new_value'} == json.loads(StudentModule.objects.get().state)  # lint-amnesty, pylint: disable=line-too-long
+        assert history_count + 1 == self._history_count()
+
+    def test_missing_student_module(self):
+        "Test that buffered user_state writes to a missing StudentModule create it"
+        StudentModule.objects.all().delete()
+        with buffered_user_state_writes(COURSE_KEY):
+            self.kvs.set(user_state_key('a_field'), 'a_value')
+            assert 0 == StudentModule.objects.all().count()
+
+        student_module = StudentModule.objects.get()
+        assert {'a_field': 'a_value'} == json.loads(student_module.state)
+        assert 'problem' == student_module.module_type
+        assert 1 == StudentModuleHistoryExtended.objects.filter(student_module_id=student_module.id).count()
+
+    def test_delete_buffered_field(self):
+        "Test that deleting a field discards its buffered write"
+        with buffered_user_state_writes(COURSE_KEY):
+            self.kvs.set_many({user_state_key('a_field'): 'new_value', user_state_key('c_field'): 'c_value'})
+            self.kvs.delete(user_state_key('c_field'))
+
+        assert {'a_field': 'new_value', 'b_field': 'b_value'} == json.loads(StudentModule.objects.get().state)
+
+    def test_nested(self):
+        "Test that buffered blocks nested in another write when the outermost one exits"
+        with buffered_user_state_writes(COURSE_KEY):
+            with buffered_user_state_writes(COURSE_KEY):
+                self.kvs.set(user_state_key('a_field'), 'new_value')
+            assert 'a_value' == json.loads(StudentModule.objects.get().state)['a_field']
+
+        assert 'new_value' == json.loads(StudentModule.objects.get().state)['a_field']
+
+    @override_waffle_flag(COURSEWARE_WRITE_BEHIND_USER_STATE, active=False)
+    def test_flag_disabled(self):
+        "Test that user_state writes aren't buffered when the flag is disabled"
+        with buffered_user_state_writes(COURSE_KEY):
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+            assert 'new_value' == json.loads(StudentModule.objects.get().state)['a_field']
+
+    def test_flush_failure(self):
+        "Test failures when writing buffered user_state"
+        with patch('django.db.models.query.QuerySet.bulk_create', side_effect=DatabaseError):
+            with pytest.raises(KeyValueMultiSaveError):
+                with buffered_user_state_writes(COURSE_KEY):
+                    self.kvs.set(user_state_key('a_field'), 'new_value')
+
+
 class StorageTestBase:
     """
     A base class for that gets subclassed when testing each of the scopes.
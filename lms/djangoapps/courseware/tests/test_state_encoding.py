@@ -0,0 +1,103 @@
+"""
+Tests for the compact encoding of StudentModule state.
+"""
+
+
+import base64
+import json
+import random
+
+import pytest
+from django.db import connections
+from django.db.models import ExpressionWrapper, F, TextField
+from django.test import TestCase
+from edx_toggles.toggles.testutils import override_waffle_switch
+
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.state_encoding import (
+    MIN_ENCODED_LENGTH,
+    ZLIB_V1_HEADER,
+    StateDecodingError,
+    decode_state,
+    encode_state,
+    is_encoded
+)
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from lms.djangoapps.courseware.toggles import COMPRESS_STUDENT_MODULE_STATE
+from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+
+LARGE_STATE = json.dumps({
+    'student_answers': {f'input_{index}': 'choice_1' for index in range(50)},
+    'correct_map': {f'input_{index}': {'correctness': 'correct', 'hint': ''} for index in range(50)},
+})
+
+
+def stored_states(model):
+    """
+    Return the states of the model's rows as stored, rather than decoded by their field.
+    """
+    return list(
+        model.objects.order_by('id').annotate(
+            stored_state=ExpressionWrapper(F('state'), output_field=TextField()),
+        ).values_list('stored_state', flat=True)
+    )
+
+
+class TestStateEncoding(TestCase):
+    """
+    Tests for encoding and decoding states.
+    """
+    def test_round_trip(self):
+        encoded_state = encode_state(LARGE_STATE)
+        assert is_encoded(encoded_state)
+        assert encoded_state.startswith(ZLIB_V1_HEADER)
+        assert len(encoded_state) < len(LARGE_STATE)
+        assert decode_state(encoded_state) == LARGE_STATE
+
+    def test_already_encoded(self):
+        encoded_state = encode_state(LARGE_STATE)
+        assert encode_state(encoded_state) == encoded_state
+
+    def test_not_encoded(self):
+        short_state = json.dumps({'position': 1})
+        incompressible_state = json.dumps({'key': base64.b64encode(random.Random(0).randbytes(300)).decode('ascii')})
+        assert len(short_state) < MIN_ENCODED_LENGTH
+        for state in (None, short_state, incompressible_state):
+            assert encode_state(state) == state
+            assert decode_state(state) == state
+
+    def test_invalid(self):
+        with pytest.raises(StateDecodingError):
+            decode_state(ZLIB_V1_HEADER + 'not base64!')
+
+
+class TestCompressedStateField(TestCase):
+    """
+    Tests for storing StudentModule states with CompressedStateField.
+    """
+    # Tell Django to clean out all databases, not just default
+    databases = set(connections)
+
+    def test_disabled(self):
+        student_module = StudentModuleFactory(state=LARGE_STATE)
+        assert stored_states(StudentModule) == [LARGE_STATE]
+        assert StudentModule.objects.get(id=student_module.id).state == LARGE_STATE
+
+    @override_waffle_switch(COMPRESS_STUDENT_MODULE_STATE, True)
+    def test_enabled(self):
+        student_module = StudentModuleFactory(state=LARGE_STATE)
+        assert stored_states(StudentModule) == [encode_state(LARGE_STATE)]
+        assert StudentModule.objects.get(id=student_module.id).state == LARGE_STATE
+        assert list(StudentModule.objects.values_list('state', flat=True)) == [LARGE_STATE]
+
+        # Problem history is stored compressed as well.
+        assert stored_states(StudentModuleHistoryExtended) == [encode_state(LARGE_STATE)]
+        assert StudentModuleHistoryExtended.objects.get().state == LARGE_STATE
+
+    def test_legacy_rows(self):
+        with override_waffle_switch(COMPRESS_STUDENT_MODULE_STATE, True):
+            compressed_module = StudentModuleFactory(state=LARGE_STATE)
+        legacy_module = StudentModuleFactory(state=LARGE_STATE)
+        assert stored_states(StudentModule) == [encode_state(LARGE_STATE), LARGE_STATE]
+        for student_module in (compressed_module, legacy_module):
+            assert StudentModule.objects.get(id=student_module.id).state == LARGE_STATE
@@ -9,14 +9,19 @@ from xblock.fields import Scope
 from datetime import datetime
 from unittest import TestCase
 from collections import defaultdict
-from django.db import connections
+from unittest.mock import patch
+from django.db import IntegrityError, connections
+from django.db.models.query import QuerySet
+from django.test import override_settings
 
 from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.courseware.models import student_modules_bulk_saved
 from lms.djangoapps.courseware.user_state_client import (
     DjangoXBlockUserStateClient,
     XBlockUserStateClient,
     XBlockUserState
 )
+from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase  # lint-amnesty, pylint: disable=wrong-import-order
 
 
@@ -749,6 +754,36 @@ class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
             3. Remove this override to re-enable the working test
         """
 
+    def test_bulk_set_many_shard_failure(self):
+        """
+        Test that a failure to write the rows of one shard doesn't keep the rows
+        of the other shards from being written, nor their history from being saved.
+        """
+        failing_course_key = self._course(0)
+        bulk_create = QuerySet.bulk_create
+
+        def shard_for(course_key, user_id):  # pylint: disable=unused-argument
+            return 'default' if course_key == failing_course_key else None
+
+        def fail_on_shard(queryset, student_modules, *args, **kwargs):
+            if student_modules[0].course_id == failing_course_key:
+                raise IntegrityError
+            return bulk_create(queryset, student_modules, *args, **kwargs)
+
+        with patch.object(StudentModuleShardRouter, 'shard_for', side_effect=shard_for):
+            with patch.object(QuerySet, 'bulk_create', autospec=True, side_effect=fail_on_shard):
+                with patch.object(student_modules_bulk_saved, 'send') as mock_send:
+                    self.client.bulk_set_many(
+                        self._user(0),
+                        {self._block(0): {'a': 'b'}, self._block(1000): {'b': 'c'}},
+                    )
+
+        with self.assertRaises(self.client.DoesNotExist):
+            self.get(user=0, block=0)
+        self.assertEqual(self.get(user=0, block=1000).state, {'b': 'c'})
+        student_modules = mock_send.call_args[1]['student_modules']
+        self.assertEqual([student_module.module_state_key for student_module in student_modules], [self._block(1000)])
+
     def test_multiple_history_entries(self):
         """
         Changes made in the edx-platform repo broke this test in the edx-user-state-client repo.
@@ -757,3 +792,17 @@ class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
             2. Update the test in the other repo to align with the new functionality
             3. Remove this override to re-enable the working test
         """
+
+
+@override_settings(STUDENT_MODULE_SHARDS={'DATABASES': ['default'], 'KEY': 'course'})
+class TestCourseShardedDjangoUserStateClient(TestDjangoUserStateClient):
+    """
+    Tests of the DjangoUserStateClient backend, with StudentModule partitioned by course.
+    """
+
+
+@override_settings(STUDENT_MODULE_SHARDS={'DATABASES': ['default'], 'KEY': 'user'})
+class TestUserShardedDjangoUserStateClient(TestDjangoUserStateClient):
+    """
+    Tests of the DjangoUserStateClient backend, with StudentModule partitioned by user.
+    """
@@ -138,6 +138,52 @@ COURSEWARE_OPTIMIZED_RENDER_XBLOCK = CourseWaffleFlag(
     f'{WAFFLE_FLAG_NAMESPACE}.optimized_render_xblock', __name__
 )
 
+# .. toggle_name: courseware.write_behind_user_state
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Waffle flag to buffer the Scope.user_state writes made while an XBlock handler is called,
+#   coalescing them per learner and block, and to write them when the handler returns in one bulk upsert of
+#   StudentModule, along with one bulk insert of their history. Handlers that update several fields per
+#   interaction, like those of problems and videos, otherwise write each update as it is made.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_warning: Buffered writes are lost if the process dies before the handler returns, and other requests
+#   don't see them until then.
+COURSEWARE_WRITE_BEHIND_USER_STATE = CourseWaffleFlag(
+    f'{WAFFLE_FLAG_NAMESPACE}.write_behind_user_state', __name__
+)
+
+# .. toggle_name: courseware.precompiled_field_overrides
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Waffle flag to compile, once per learner and course in a request, which fields of which
+#   blocks the enabled field override providers override, so that the field reads of a learner's blocks only go
+#   through the providers that override the field, and the reads of the fields no provider overrides don't go
+#   through any. Otherwise every provider is asked about every field read, and the individual due dates provider
+#   queries the overrides of each block.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_warning: Overrides set by other processes during a request are not seen until the next request.
+COURSEWARE_PRECOMPILED_FIELD_OVERRIDES = CourseWaffleFlag(
+    f'{WAFFLE_FLAG_NAMESPACE}.precompiled_field_overrides', __name__
+)
+
+# .. toggle_name: courseware.compress_student_module_state
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: Waffle switch to store the XBlock user state of StudentModule and its history compressed,
+#   as versioned, base64-encoded zlib-compressed JSON, when that is shorter than the JSON. States stored as plain
+#   JSON are read as before whether the switch is on or not, and the reencode_student_module_state management
+#   command re-encodes the states stored before the switch was turned on.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_warning: Turning the switch off doesn't decode the states already stored compressed, which only the
+#   platform reads transparently: decode them with reencode_student_module_state --decode before reading the
+#   tables with anything else.
+COMPRESS_STUDENT_MODULE_STATE = WaffleSwitch(
+    f'{WAFFLE_FLAG_NAMESPACE}.compress_student_module_state', __name__
+)
+
 # .. toggle_name: COURSES_INVITE_ONLY
 # .. toggle_implementation: SettingToggle
 # .. toggle_type: feature_flag
@@ -202,3 +248,17 @@ def courseware_disable_navigation_sidebar_blocks_caching(course_key=None):
     Return whether the courseware.disable_navigation_sidebar_blocks_caching flag is on.
     """
     return COURSEWARE_MICROFRONTEND_NAVIGATION_SIDEBAR_BLOCKS_DISABLE_CACHING.is_enabled(course_key)
+
+
+def write_behind_user_state_is_enabled(course_key):
+    """
+    Return whether the courseware.write_behind_user_state flag is on.
+    """
+    return COURSEWARE_WRITE_BEHIND_USER_STATE.is_enabled(course_key)
+
+
+def precompiled_field_overrides_are_enabled(course_key):
+    """
+    Return whether the courseware.precompiled_field_overrides flag is on.
+    """
+    return COURSEWARE_PRECOMPILED_FIELD_OVERRIDES.is_enabled(course_key)
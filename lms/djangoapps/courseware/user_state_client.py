@@ -10,17 +10,18 @@ from operator import attrgetter
 from time import time
 
 from abc import abstractmethod
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
 from django.core.paginator import Paginator
-from django.db import transaction
+from django.db import connections, router, transaction
 from django.db.utils import IntegrityError
 from edx_django_utils import monitoring as monitoring_utils
 from xblock.fields import Scope
 
-from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, student_modules_bulk_saved
+from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
 
 try:
     import simplejson as json
@@ -267,10 +268,22 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         """
         self.user = user
 
+    def _get_user(self, username):
+        """
+        Return the user with the supplied ``username``, reusing the user this
+        client was created with if it matches.
+        """
+        if self.user is not None and self.user.username == username:
+            return self.user
+        return User.objects.get(username=username)
+
     def _get_student_modules(self, username, block_keys):
         """
         Retrieve the :class:`~StudentModule`s for the supplied ``username`` and ``block_keys``.
 
+        When StudentModule is partitioned across shards, the blocks of each
+        course are loaded from the shard storing them.
+
         Arguments:
             username (str): The name of the user to load `StudentModule`s for.
             block_keys (list of :class:`~UsageKey`): The set of XBlocks to load data for.
@@ -281,12 +294,25 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             course_key_func,
         )
 
+        if StudentModuleShardRouter.is_enabled():
+            # The shards don't store users, so they can't be joined to.
+            try:
+                user_id = self._get_user(username).id
+            except User.DoesNotExist:
+                return
+            student_filter = {'student_id': user_id}
+        else:
+            user_id = None
+            student_filter = {'student__username': username}
+
         for course_key, usage_keys in by_course:
-            query = StudentModule.objects.chunked_filter(
+            query = StudentModule.objects.db_manager(
+                StudentModuleShardRouter.shard_for(course_key, user_id),
+            ).chunked_filter(
                 'module_state_key__in',
                 usage_keys,
-                student__username=username,
                 course_id=course_key,
+                **student_filter
             )
 
             for student_module in query:
@@ -418,10 +444,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         # that were queried in get_many) so that if the score has
         # been changed by some other piece of the code, we don't overwrite
         # that score.
-        if self.user is not None and self.user.username == username:
-            user = self.user
-        else:
-            user = User.objects.get(username=username)
+        user = self._get_user(username)
 
         if user.is_anonymous:
             # Anonymous users cannot be persisted to the database, so let's just use
@@ -431,8 +454,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         evt_time = time()
 
         for usage_key, state in block_keys_to_state.items():
+            shard = StudentModuleShardRouter.shard_for(usage_key.context_key, user.id)
             try:
-                student_module, created = StudentModule.objects.get_or_create(
+                student_module, created = StudentModule.objects.db_manager(shard).get_or_create(
                     student=user,
                     course_id=usage_key.context_key,
                     module_state_key=usage_key,
@@ -463,7 +487,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 num_fields_after = len(current_state)
                 student_module.state = json.dumps(current_state)
                 try:
-                    with transaction.atomic():
+                    with transaction.atomic(using=student_module._state.db):  # pylint: disable=protected-access
                         # Updating the object - force_update guarantees no INSERT will occur.
                         student_module.save(force_update=True)
                 except IntegrityError:
@@ -498,6 +522,105 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         duration = (finish_time - evt_time) * 1000  # milliseconds
         self._nr_stat_accumulate('set_many', 'duration', duration)
 
+    def bulk_set_many(self, username, block_keys_to_state, scope=Scope.user_state):
+        """
+        Set fields for many XBlocks, like :meth:`set_many`, but with a single
+        bulk upsert of the StudentModules, and a single bulk insert of their
+        history, rather than queries for each XBlock.
+
+        When StudentModule is partitioned across shards, the rows of each
+        shard are upserted separately, and a failure on one shard doesn't
+        keep the rows of the others from being written.
+
+        Arguments:
+            username: The name of the user whose state should be set
+            block_keys_to_state (dict): A dict mapping UsageKeys to state dicts.
+                Each state dict maps field names to values. These state dicts
+                are overlaid over the stored state.
+            scope (Scope): The scope to store data to
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported")
+
+        self._nr_stat_increment('bulk_set_many', 'calls')
+
+        user = self._get_user(username)
+
+        if user.is_anonymous or not block_keys_to_state:
+            return
+
+        evt_time = time()
+
+        # The stored state is read for all blocks at once, and overlaid with
+        # the new state just before it is written, so that as little as
+        # possible changes in between.
+        stored_modules = {
+            usage_key: student_module
+            for student_module, usage_key in self._get_student_modules(username, list(block_keys_to_state))
+        }
+        student_modules_by_shard = defaultdict(list)
+        for usage_key, state in block_keys_to_state.items():
+            stored_module = stored_modules.get(usage_key)
+            if stored_module is not None and stored_module.state is not None:
+                current_state = json.loads(stored_module.state)
+                current_state.update(state)
+                state = current_state
+            student_module = StudentModule(
+                student=user,
+                course_id=usage_key.context_key,
+                module_state_key=usage_key,
+                module_type=usage_key.block_type,
+                state=json.dumps(state),
+            )
+            student_modules_by_shard[StudentModuleShardRouter.shard_for(usage_key.context_key, user.id)].append(
+                student_module
+            )
+
+            self._nr_block_stat_accumulate('bulk_set_many', usage_key.block_type, 'size', len(student_module.state))
+            if stored_module is None:
+                self._nr_block_stat_increment('bulk_set_many', usage_key.block_type, 'blocks_created')
+            else:
+                self._nr_block_stat_increment('bulk_set_many', usage_key.block_type, 'blocks_updated')
+
+        # A failure on one shard doesn't keep the rows of the other shards from being written.
+        written_block_keys = []
+        for shard, student_modules in student_modules_by_shard.items():
+            shard = shard or router.db_for_write(StudentModule)
+            features = connections[shard].features
+            try:
+                with transaction.atomic(using=shard):
+                    StudentModule.objects.db_manager(shard).bulk_create(
+                        student_modules,
+                        update_conflicts=True,
+                        unique_fields=(
+                            ['student', 'module_state_key', 'course_id']
+                            if features.supports_update_conflicts_with_target else None
+                        ),
+                        update_fields=['state', 'modified'],
+                    )
+            except IntegrityError:
+                log.warning("bulk_set_many: IntegrityError for student {} on shard {} - {} block keys: {}".format(
+                    user, shard, len(student_modules),
+                    [student_module.module_state_key for student_module in student_modules],
+                ))
+                continue
+            written_block_keys.extend(student_module.module_state_key for student_module in student_modules)
+
+        # The rows written are read back for their history, since their ids,
+        # grades and modified times aren't returned by every database.
+        if any(
+            usage_key.block_type in BaseStudentModuleHistory.HISTORY_SAVING_TYPES
+            for usage_key in written_block_keys
+        ):
+            student_modules = [
+                student_module for student_module, __ in self._get_student_modules(username, written_block_keys)
+            ]
+            student_modules_bulk_saved.send(sender=StudentModule, student_modules=student_modules)
+
+        finish_time = time()
+        duration = (finish_time - evt_time) * 1000  # milliseconds
+        self._nr_stat_accumulate('bulk_set_many', 'duration', duration)
+
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
         Delete the stored XBlock state for a many xblock usages.
@@ -557,6 +680,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if len(student_modules) == 0:
             raise self.DoesNotExist()
 
+        student_modules_by_id = {student_module.id: student_module for student_module in student_modules}
         history_entries = BaseStudentModuleHistory.get_history(student_modules)
 
         # If no history records exist, raise an error
@@ -575,9 +699,11 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             if state == {}:
                 state = None
 
-            block_key = history_entry.csm.module_state_key
-            block_key = block_key.map_into_course(
-                history_entry.csm.course_id
+            # The StudentModules were already loaded, from their shard if
+            # StudentModule is partitioned.
+            student_module = student_modules_by_id[history_entry.student_module_id]
+            block_key = student_module.module_state_key.map_into_course(
+                student_module.course_id
             )
 
             yield XBlockUserState(username, block_key, state, history_entry.created, scope)
@@ -600,19 +726,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        results = StudentModule.objects.order_by('id').filter(module_state_key=block_key).select_related('student')
-        p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
-
-        for page_number in p.page_range:
-            page = p.page(page_number)
-
-            for sm in page.object_list:
-                state = json.loads(sm.state)
-
-                if state == {}:
-                    continue
-
-                yield XBlockUserState(sm.student.username, sm.module_state_key, state, sm.modified, scope)
+        for shard in StudentModuleShardRouter.shards_for_course(block_key.context_key):
+            results = StudentModule.objects.db_manager(shard).order_by('id').filter(module_state_key=block_key)
+            yield from self._iter_user_states(results, scope)
 
     def iter_all_for_course(self, course_key, block_type=None, scope=Scope.user_state):
         """
@@ -632,14 +748,33 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        results = StudentModule.objects.order_by('id').filter(course_id=course_key)
-        if block_type:
-            results = results.filter(module_type=block_type)
+        for shard in StudentModuleShardRouter.shards_for_course(course_key):
+            results = StudentModule.objects.db_manager(shard).order_by('id').filter(course_id=course_key)
+            if block_type:
+                results = results.filter(module_type=block_type)
+            yield from self._iter_user_states(results, scope)
 
+    def _iter_user_states(self, results, scope):
+        """
+        Return an iterator over the XBlockUserState of the StudentModules in
+        ``results``, read in pages of settings.USER_STATE_BATCH_SIZE.
+        """
+        if StudentModuleShardRouter.is_enabled():
+            # The shards don't store users, so each page's usernames are
+            # loaded from the default database.
+            results = results.only('id', 'student_id', 'module_state_key', 'state', 'modified')
+        else:
+            results = results.select_related('student')
         p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
 
         for page_number in p.page_range:
             page = p.page(page_number)
+            if StudentModuleShardRouter.is_enabled():
+                usernames = dict(
+                    User.objects.filter(id__in={sm.student_id for sm in page.object_list}).values_list('id', 'username')
+                )
+            else:
+                usernames = {sm.student_id: sm.student.username for sm in page.object_list}
 
             for sm in page.object_list:
                 state = json.loads(sm.state)
@@ -647,4 +782,4 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 if state == {}:
                     continue
 
-                yield XBlockUserState(sm.student.username, sm.module_state_key, state, sm.modified, scope)
+                yield XBlockUserState(usernames[sm.student_id], sm.module_state_key, state, sm.modified, scope)
@@ -1292,10 +1292,11 @@ def submission_history(request, course_id, learner_identifier, location):
 
     # This is ugly, but until we have a proper submissions API that we can use to provide
     # the scores instead, it will have to do.
-    csm = StudentModule.objects.filter(
+    found_user_id = User.objects.get(username=found_user_name).id
+    csm = list(StudentModule.objects.for_shard(course_key, found_user_id).filter(
         module_state_key=usage_key,
-        student__username=found_user_name,
-        course_id=course_key)
+        student_id=found_user_id,
+        course_id=course_key))
 
     scores = BaseStudentModuleHistory.get_history(csm)
 
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.24 on 2026-10-18 12:00
+
+from django.db import migrations
+
+import lms.djangoapps.courseware.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coursewarehistoryextended', '0003_rename_studentmodulehistoryextended_student_module_student_module_idx'),
+    ]
+
+    # CompressedStateField is stored in the same text column as TextField, so
+    # this only updates the state, rather than altering the large table.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='studentmodulehistoryextended',
+                    name='state',
+                    field=lms.djangoapps.courseware.fields.CompressedStateField(blank=True, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -18,7 +18,7 @@ from django.db import models
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, student_modules_bulk_saved
 from lms.djangoapps.courseware.fields import UnsignedBigIntAutoField
 
 
@@ -57,6 +57,18 @@ class StudentModuleHistoryExtended(BaseStudentModuleHistory):
             "lms.djangoapps.coursewarehistoryextended.models.student_module_history_extended_map"
         )
 
+    @receiver(student_modules_bulk_saved, sender=StudentModule)
+    def bulk_save_history(sender, student_modules, **kwargs):  # pylint: disable=no-self-argument, unused-argument
+        """
+        Creates & saves the StudentModuleHistoryExtended entries of
+        StudentModules written in bulk, for the module_types that we save.
+        """
+        BaseStudentModuleHistory.bulk_save_history_entries(
+            student_modules,
+            StudentModuleHistoryExtended,
+            "lms.djangoapps.coursewarehistoryextended.models.student_module_history_extended_map"
+        )
+
     @receiver(post_delete, sender=StudentModule)
     def delete_history(sender, instance, **kwargs):  # pylint: disable=no-self-argument, unused-argument
         """
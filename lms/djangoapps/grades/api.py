@@ -17,6 +17,7 @@ from lms.djangoapps.grades import constants, context, course_data, events
 # TODO move Gradebook to be an external feature outside of core Grades
 from lms.djangoapps.grades.config.waffle import gradebook_bulk_management_enabled, is_writable_gradebook_enabled
 # Public Grades Factories
+from lms.djangoapps.grades.batch_grader import BatchCourseGrader
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
 from lms.djangoapps.grades.models_api import *
 from lms.djangoapps.grades.signals import signals
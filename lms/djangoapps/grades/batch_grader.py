@@ -0,0 +1,580 @@
+"""
+Batch computation of course grades.
+
+CourseGradeFactory grades one learner at a time: it builds a subsection
+grade factory per learner, looks up the score of every problem, and
+aggregates those scores through CourseGrade and the course's grader.
+For grade reports over large courses, BatchCourseGrader instead loads the
+scores of a batch of learners into (learners x scorable blocks) arrays and
+applies weights, subsection totals and the grading policy to the whole
+batch at once.
+
+The computation mirrors CourseGradeFactory.update, performing the same
+floating point operations in the same order, so that the resulting
+percents, letter grades and pass states are identical.  It relies on all
+learners in the batch seeing the same graded content, so it is only used
+for courses and learners for which that holds (see GradingPlan and
+BatchCourseGrader.grade); the others are graded one at a time as before.
+Only the percents, letter grades and pass states are computed in batches:
+the subsection grades of the resulting CourseGrades are still read one
+learner at a time, and should not be relied on.
+"""
+
+
+from datetime import datetime
+from logging import getLogger
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from edx_when.models import UserDate
+from lazy import lazy
+from pytz import UTC
+from submissions.models import ScoreSummary
+
+from common.djangoapps.student.models import AnonymousUserId, CourseAccessRole
+from lms.djangoapps.course_blocks.transformers.start_date import StartDateTransformer
+from lms.djangoapps.course_blocks.transformers.user_partitions import UserPartitionTransformer
+from lms.djangoapps.course_blocks.transformers.visibility import VisibilityTransformer
+from lms.djangoapps.courseware.models import StudentFieldOverride, StudentModule
+from xmodule.graders import AssignmentFormatGrader, WeightedSubsectionsGrader  # lint-amnesty, pylint: disable=wrong-import-order
+
+from .course_data import CourseData
+from .course_grade import CourseGrade, CourseGradeBase, ZeroCourseGrade, _uniqueify_and_keep_order
+from .grade_utils import are_grades_frozen
+from .models import PersistentSubsectionGradeOverride
+from .scores import possibly_scored
+from .transformer import GradesTransformer
+
+log = getLogger(__name__)
+
+# The number of learners whose scores are loaded and graded together.
+USERS_PER_BATCH = 500
+
+# Blocks whose children are chosen separately for each learner.
+RANDOMIZED_BLOCK_TYPES = frozenset(('library_content', 'itembank'))
+
+# Block types which only store their scores in the courseware student module.
+CSM_SCORED_BLOCK_TYPES = frozenset(('problem',))
+
+
+class GradingPlan:
+    """
+    The graded content of a course and its grading policy, laid out as
+    arrays for grading many learners at once.
+
+    Scorable blocks are numbered in the order they are first reached in
+    the course, and each graded subsection records the numbers of the
+    scorable blocks it contains, in the order the per-learner grading
+    visits them.  Content that is not yet released or is visible to
+    staff only is left out, just as it is left out of a learner's course
+    blocks.
+
+    If the course cannot be graded in batches, unsupported_reason says why.
+    """
+    def __init__(self, course, collected_structure, now=None):
+        self.course = CourseGradeBase._prep_course_for_grading(course)  # pylint: disable=protected-access
+        self.grade_cutoffs = self.course.grade_cutoffs
+        self.structure = collected_structure
+        self.now = now or datetime.now(UTC)
+        self.unsupported_reason = None
+
+        # Whether any content was left out because it is hidden from learners.
+        self.excludes_content = False
+
+        # Scorable blocks, as lists of usage keys and arrays of their grading values.
+        self.block_keys = []
+        self.weights = np.zeros(0)
+        self.max_scores = np.zeros(0)
+        self.explicit_graded = np.zeros(0, dtype=bool)
+
+        # Graded subsections, as lists of usage keys and arrays of their scorable blocks' numbers.
+        self.subsection_keys = []
+        self.subsection_blocks = []
+
+        # The (AssignmentFormatGrader, weight) of each subgrader, with the numbers of the subsections it grades.
+        self.subgraders = []
+
+        self._block_indices = {}
+        self._subsection_indices = {}
+
+        grader = self.course.grader
+        if settings.GENERATE_PROFILE_SCORES:
+            self.unsupported_reason = 'random profile scores are generated'
+        elif not isinstance(grader, WeightedSubsectionsGrader) or not all(
+            isinstance(subgrader, AssignmentFormatGrader) for subgrader, _, _ in grader.subgraders
+        ):
+            self.unsupported_reason = f'the course grader {grader!r} is not supported'
+        else:
+            self._build(grader)
+
+    def __repr__(self):
+        return 'GradingPlan({}: {} subsections, {} scorable blocks)'.format(
+            self.structure.root_block_usage_key,
+            len(self.subsection_keys),
+            len(self.block_keys),
+        )
+
+    @property
+    def block_types(self):
+        return {block_key.block_type for block_key in self.block_keys}
+
+    @property
+    def is_supported(self):
+        return self.unsupported_reason is None
+
+    def block_index(self, usage_key):
+        """
+        Returns the number of the scorable block with the given usage key,
+        or None if it is not graded in this plan.
+        """
+        return self._block_indices.get(usage_key.replace(version=None, branch=None))
+
+    def subsection_index(self, usage_key):
+        """
+        Returns the number of the graded subsection with the given usage
+        key, or None if it is not graded in this plan.
+        """
+        return self._subsection_indices.get(usage_key.replace(version=None, branch=None))
+
+    def _build(self, grader):
+        """
+        Lays out the graded subsections and scorable blocks of the course.
+        """
+        structure = self.structure
+        root_key = structure.root_block_usage_key
+        if self._is_hidden(root_key):
+            self.unsupported_reason = 'the course is not released'
+            return
+
+        formats = {subgrader.type for subgrader, _, _ in grader.subgraders}
+        weights, max_scores, explicit_graded = [], [], []
+
+        for chapter_key in structure.get_children(root_key):
+            if self._is_hidden(chapter_key):
+                continue
+            for subsection_key in _uniqueify_and_keep_order(structure.get_children(chapter_key)):
+                subsection = structure[subsection_key]
+                if (
+                    not getattr(subsection, 'graded', False) or
+                    getattr(subsection, 'format', '') not in formats or
+                    self._is_hidden(subsection_key)
+                ):
+                    continue
+                normalized_key = subsection_key.replace(version=None, branch=None)
+                if normalized_key in self._subsection_indices:
+                    continue
+
+                block_numbers = []
+                for block_key in structure.post_order_traversal(filter_func=possibly_scored, start_node=subsection_key):
+                    if block_key.block_type in RANDOMIZED_BLOCK_TYPES or self._is_group_restricted(block_key):
+                        self.unsupported_reason = f'the graded content of {subsection_key} differs between learners'
+                        return
+                    block = structure[block_key]
+                    if self._is_hidden(block_key) or not getattr(block, 'has_score', False):
+                        continue
+                    normalized_block_key = block_key.replace(version=None, branch=None)
+                    if normalized_block_key not in self._block_indices:
+                        self._block_indices[normalized_block_key] = len(self.block_keys)
+                        self.block_keys.append(block_key)
+                        weight = getattr(block, 'weight', None)
+                        max_score = structure.get_transformer_block_field(block_key, GradesTransformer, 'max_score')
+                        weights.append(np.nan if weight is None else weight)
+                        max_scores.append(np.nan if max_score is None else max_score)
+                        explicit_graded.append(structure.get_transformer_block_field(
+                            block_key, GradesTransformer, GradesTransformer.EXPLICIT_GRADED_FIELD_NAME, True,
+                        ) is not False)
+                    block_numbers.append(self._block_indices[normalized_block_key])
+
+                self._subsection_indices[normalized_key] = len(self.subsection_keys)
+                self.subsection_keys.append(subsection_key)
+                self.subsection_blocks.append(np.array(block_numbers, dtype=np.intp))
+
+        self.weights = np.array(weights, dtype=float)
+        self.max_scores = np.array(max_scores, dtype=float)
+        self.explicit_graded = np.array(explicit_graded, dtype=bool)
+        self.subgraders = [
+            (
+                subgrader,
+                weight,
+                np.array([
+                    index for index, subsection_key in enumerate(self.subsection_keys)
+                    if getattr(structure[subsection_key], 'format', '') == subgrader.type
+                ], dtype=np.intp),
+            )
+            for subgrader, _, weight in grader.subgraders
+        ]
+
+    def _is_hidden(self, block_key):
+        """
+        Returns whether the given block is removed from the course blocks
+        of learners, because it is not yet released or is visible to
+        staff only.  Records that content was left out if so.
+        """
+        start = self.structure.get_transformer_block_field(
+            block_key, StartDateTransformer, StartDateTransformer.MERGED_START_DATE, None,
+        )
+        hidden = (
+            self.structure.get_transformer_block_field(
+                block_key, VisibilityTransformer, VisibilityTransformer.MERGED_VISIBLE_TO_STAFF_ONLY, False,
+            ) or
+            (bool(start) and not settings.FEATURES['DISABLE_START_DATES'] and self.now <= start)
+        )
+        if hidden:
+            self.excludes_content = True
+        return hidden
+
+    def _is_group_restricted(self, block_key):
+        """
+        Returns whether access to the given block is restricted to some
+        groups of learners.
+        """
+        merged_group_access = self.structure.get_transformer_block_field(
+            block_key, UserPartitionTransformer, 'merged_group_access',
+        )
+        return bool(merged_group_access and merged_group_access.get_allowed_groups())
+
+
+class BatchCourseGrader:
+    """
+    Computes the course grades of many learners in a course at once.
+    """
+    def __init__(self, course_data, now=None):
+        """
+        Arguments:
+            course_data (CourseData): the course, which is not specific to any user.
+        """
+        self.course_data = course_data
+        self.course_key = course_data.course_key
+        self.plan = GradingPlan(course_data.course, course_data.collected_structure, now=now)
+
+    @property
+    def unsupported_reason(self):
+        """
+        Returns why the course cannot be graded in batches, or None if it can.
+        """
+        if are_grades_frozen(self.course_key):
+            return 'grades are frozen'
+        return self.plan.unsupported_reason
+
+    def grade(self, users):
+        """
+        Returns a dict of the CourseGrade of each of the given users, keyed
+        by user id.
+
+        Users with a course role, such as beta testers, who may see content
+        that other learners do not, are left out whenever the plan leaves
+        out hidden content.  Users with per-learner date or field overrides
+        in the course are always left out.
+        """
+        users, scores = self._load_scores(users)
+        return self._course_grades(users, scores)
+
+    def grade_problems(self, users):
+        """
+        Returns a dict of the CourseGrade of each of the given users, keyed
+        by user id, and the BatchProblemScores of the users, for those
+        users who are graded as by grade.
+        """
+        users, scores = self._load_scores(users)
+        return self._course_grades(users, scores), BatchProblemScores(self.plan, users, scores)
+
+    def _load_scores(self, users):
+        """
+        Returns the given users who can be graded in a batch, and their
+        _BatchScores.
+        """
+        users = list(users)
+        excluded_user_ids = self._get_overridden_user_ids(users)
+        if self.plan.excludes_content:
+            excluded_user_ids |= self._get_role_user_ids(users)
+            users = [user for user in users if not user.is_staff]
+        users = [user for user in users if user.id not in excluded_user_ids]
+
+        scores = _BatchScores(self.plan, len(users))
+        if users:
+            user_rows = {user.id: row for row, user in enumerate(users)}
+            self._load_csm_scores(scores, user_rows)
+            if self.plan.block_types - CSM_SCORED_BLOCK_TYPES:
+                self._load_submissions_scores(scores, users)
+            self._load_overrides(scores, user_rows)
+        return users, scores
+
+    def _course_grades(self, users, scores):
+        """
+        Returns a dict of the CourseGrade of each of the given users, keyed
+        by user id, computed from their _BatchScores.
+        """
+        if not users:
+            return {}
+        percents = self._compute_percents(scores)
+        course_grades = {}
+        for row, user in enumerate(users):
+            course_data = CourseData(
+                user,
+                course=self.course_data.course,
+                collected_block_structure=self.course_data.collected_structure,
+                course_key=self.course_key,
+            )
+            if not scores.has_scores[row]:
+                course_grades[user.id] = ZeroCourseGrade(user, course_data)
+                continue
+            # pylint: disable=protected-access
+            percent = CourseGrade._compute_percent({'percent': float(percents[row])})
+            course_grades[user.id] = CourseGrade(
+                user,
+                course_data,
+                percent,
+                CourseGrade._compute_letter_grade(self.plan.grade_cutoffs, percent),
+                CourseGrade._compute_passed(self.plan.grade_cutoffs, percent),
+            )
+        return course_grades
+
+    def _compute_percents(self, scores):
+        """
+        Returns an array of the course grade percent of each user, before rounding.
+        """
+        plan = self.plan
+        weighted_earned, weighted_possible, is_graded = scores.weighted()
+        graded_earned = np.where(is_graded, weighted_earned, 0.0)
+        graded_possible = np.where(is_graded, weighted_possible, 0.0)
+
+        num_users = len(scores.has_scores)
+        subsection_earned = np.zeros((num_users, len(plan.subsection_keys)))
+        subsection_possible = np.zeros((num_users, len(plan.subsection_keys)))
+        for index, block_numbers in enumerate(plan.subsection_blocks):
+            if len(block_numbers):
+                # Summed with cumsum so that the scores are added in order, as by aggregate_scores.
+                subsection_earned[:, index] = np.cumsum(graded_earned[:, block_numbers], axis=1)[:, -1]
+                subsection_possible[:, index] = np.cumsum(graded_possible[:, block_numbers], axis=1)[:, -1]
+        subsection_earned = np.where(np.isnan(scores.earned_overrides), subsection_earned, scores.earned_overrides)
+        subsection_possible = np.where(
+            np.isnan(scores.possible_overrides), subsection_possible, scores.possible_overrides,
+        )
+
+        is_included = subsection_possible > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            subsection_percents = np.where(
+                is_included, np.around(subsection_earned / subsection_possible, decimals=4), 0.0,
+            )
+
+        total = np.zeros(num_users)
+        for subgrader, weight, subsection_numbers in plan.subgraders:
+            total += assignment_format_percents(
+                subgrader,
+                subsection_percents[:, subsection_numbers],
+                is_included[:, subsection_numbers],
+            ) * weight
+        return total
+
+    def _load_csm_scores(self, scores, user_rows):
+        """
+        Loads the users' scores from the courseware student module.
+        """
+        if not self.plan.block_keys:
+            return
+        for manager in StudentModule.objects.for_shards(self.course_key):
+            rows = manager.filter(
+                course_id=self.course_key,
+                student_id__in=list(user_rows),
+                module_state_key__in=self.plan.block_keys,
+            ).values_list('student_id', 'module_state_key', 'grade', 'max_grade')
+            for user_id, location, grade, max_grade in rows:
+                column = self.plan.block_index(location.map_into_course(self.course_key))
+                if column is not None and max_grade is not None:
+                    scores.set_csm_score(user_rows[user_id], column, grade, max_grade)
+
+    def _load_submissions_scores(self, scores, users):
+        """
+        Loads the users' scores from the submissions app, as the submissions
+        API's get_scores would, but in one query for all the users rather
+        than one per user.
+        """
+        # As by anonymous_id_for_user, a user's anonymous id in the course is
+        # their latest one. Users without one have never submitted anything.
+        anonymous_ids = dict(AnonymousUserId.objects.filter(
+            user_id__in=[user.id for user in users],
+            course_id=self.course_key,
+        ).order_by('id').values_list('user_id', 'anonymous_user_id'))
+        if not anonymous_ids:
+            return
+        user_rows = {user.id: row for row, user in enumerate(users)}
+        anonymous_id_rows = {anonymous_id: user_rows[user_id] for user_id, anonymous_id in anonymous_ids.items()}
+
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=str(self.course_key),
+            student_item__student_id__in=list(anonymous_id_rows),
+        ).select_related('latest', 'student_item')
+        for score_summary in score_summaries:
+            latest_score = score_summary.latest
+            # get_scores leaves out hidden scores, such as those that were reset.
+            if latest_score.is_hidden():
+                continue
+            column = self._block_index_for_string(score_summary.student_item.item_id)
+            if column is not None:
+                scores.set_submission_score(
+                    anonymous_id_rows[score_summary.student_item.student_id],
+                    column,
+                    latest_score.points_earned,
+                    latest_score.points_possible,
+                )
+
+    def _load_overrides(self, scores, user_rows):
+        """
+        Loads the users' subsection grade overrides.
+        """
+        rows = PersistentSubsectionGradeOverride.objects.filter(
+            grade__course_id=self.course_key,
+            grade__user_id__in=list(user_rows),
+        ).values_list('grade__user_id', 'grade__usage_key', 'earned_graded_override', 'possible_graded_override')
+        for user_id, usage_key, earned_override, possible_override in rows:
+            column = self.plan.subsection_index(usage_key.map_into_course(self.course_key))
+            if column is not None:
+                scores.set_override(user_rows[user_id], column, earned_override, possible_override)
+
+    def _block_index_for_string(self, location):
+        """
+        Returns the number of the scorable block whose serialized usage key
+        is the given location, or None.
+        """
+        return self._block_indices_by_string.get(location)
+
+    @lazy
+    def _block_indices_by_string(self):
+        return {str(block_key): index for index, block_key in enumerate(self.plan.block_keys)}
+
+    def _get_role_user_ids(self, users):
+        """
+        Returns the ids of the given users who have a role in the course or its organization.
+        """
+        return set(CourseAccessRole.objects.filter(
+            Q(course_id=self.course_key) | Q(org__iexact=self.course_key.org),
+            user_id__in=[user.id for user in users],
+        ).values_list('user_id', flat=True))
+
+    def _get_overridden_user_ids(self, users):
+        """
+        Returns the ids of the given users who have per-learner date or field
+        overrides in the course, which the plan does not take into account.
+        """
+        user_ids = [user.id for user in users]
+        return set(UserDate.objects.filter(
+            content_date__course_id=self.course_key, user_id__in=user_ids,
+        ).values_list('user_id', flat=True)) | set(StudentFieldOverride.objects.filter(
+            course_id=self.course_key, student_id__in=user_ids,
+        ).values_list('student_id', flat=True))
+
+
+class BatchProblemScores:
+    """
+    The scores of a batch of users in the scorable blocks of a GradingPlan,
+    as (users x blocks) arrays of the values of their ProblemScores.
+
+    A user's score in a block is available if it is in the user's
+    CourseGrade.problem_scores, and attempted if that ProblemScore has a
+    first_attempted date.
+    """
+    def __init__(self, plan, users, scores):
+        self.plan = plan
+        self.user_rows = {user.id: row for row, user in enumerate(users)}
+        self.earned, self.possible, _ = scores.weighted()
+        self.is_available = scores.has_score()
+        self.is_attempted = scores.from_submissions | scores.csm_attempted
+
+
+class _BatchScores:
+    """
+    The raw scores of a batch of users for the scorable blocks of a
+    GradingPlan, as (users x blocks) arrays.
+    """
+    def __init__(self, plan, num_users):
+        self.plan = plan
+        shape = (num_users, len(plan.block_keys))
+        self.raw_earned = np.zeros(shape)
+        self.raw_possible = np.tile(plan.max_scores, (num_users, 1))
+        self.csm_attempted = np.zeros(shape, dtype=bool)
+        self.from_submissions = np.zeros(shape, dtype=bool)
+        self.submissions_earned = np.zeros(shape)
+        self.submissions_possible = np.zeros(shape)
+        self.earned_overrides = np.full((num_users, len(plan.subsection_keys)), np.nan)
+        self.possible_overrides = np.full((num_users, len(plan.subsection_keys)), np.nan)
+        self.has_scores = np.zeros(num_users, dtype=bool)
+
+    def set_csm_score(self, row, column, grade, max_grade):
+        self.raw_earned[row, column] = 0.0 if grade is None else grade
+        self.csm_attempted[row, column] = grade is not None
+        self.raw_possible[row, column] = max_grade
+        self.has_scores[row] = True
+
+    def set_submission_score(self, row, column, points_earned, points_possible):
+        self.from_submissions[row, column] = True
+        self.submissions_earned[row, column] = points_earned
+        self.submissions_possible[row, column] = points_possible
+        self.has_scores[row] = True
+
+    def set_override(self, row, column, earned_override, possible_override):
+        if earned_override is not None:
+            self.earned_overrides[row, column] = earned_override
+        if possible_override is not None:
+            self.possible_overrides[row, column] = possible_override
+        self.has_scores[row] = True
+
+    def weighted(self):
+        """
+        Returns arrays of the weighted earned and possible scores and of
+        whether each score counts towards the graded total, as computed
+        by scores.get_score.
+        """
+        weights = self.plan.weights
+        use_weight = ~np.isnan(weights) & (self.raw_possible != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted_earned = np.where(use_weight, self.raw_earned * weights / self.raw_possible, self.raw_earned)
+        weighted_possible = np.where(use_weight, weights, self.raw_possible)
+        weighted_earned = np.where(self.from_submissions, self.submissions_earned, weighted_earned)
+        weighted_possible = np.where(self.from_submissions, self.submissions_possible, weighted_possible)
+        is_graded = self.has_score() & (weighted_possible > 0) & self.plan.explicit_graded
+        return weighted_earned, weighted_possible, is_graded
+
+    def has_score(self):
+        """
+        Returns an array of whether each block has a score at all, which
+        blocks without a maximum score do not, and so are never graded.
+        """
+        return self.from_submissions | ~np.isnan(self.raw_possible)
+
+
+def assignment_format_percents(subgrader, percents, is_included):
+    """
+    Returns an array of the percent that the given AssignmentFormatGrader
+    computes for each row of subsection percents, as its grade method does.
+
+    Arguments:
+        subgrader (AssignmentFormatGrader): the grader of the subsections.
+        percents (numpy.ndarray): (users x subsections) percents of the subsections graded by subgrader.
+        is_included (numpy.ndarray): (users x subsections) whether each subsection is in the user's grade sheet.
+    """
+    num_users, num_subsections = percents.shape
+    min_count = int(float(subgrader.min_count))
+    width = max(min_count, num_subsections)
+
+    # Move each user's included subsections to the front, in order, followed by zero placeholders.
+    order = np.argsort(~is_included, axis=1, kind='stable')
+    breakdown = np.zeros((num_users, width))
+    breakdown[:, :num_subsections] = np.take_along_axis(np.where(is_included, percents, 0.0), order, axis=1)
+    counts = np.maximum(min_count, is_included.sum(axis=1))
+    is_present = np.arange(width) < counts[:, np.newaxis]
+
+    # Drop the lowest scores, as total_with_drops does: entries are stably sorted by descending
+    # percent and the last drop_count of them are dropped. Entries past a user's count sort first.
+    is_kept = is_present.copy()
+    if subgrader.drop_count > 0 and width:
+        sort_keys = np.where(is_present, -breakdown, -np.inf)
+        dropped = np.argsort(sort_keys, axis=1, kind='stable')[:, -subgrader.drop_count:]
+        np.put_along_axis(is_kept, dropped, False, axis=1)
+
+    if width:
+        aggregate = np.cumsum(np.where(is_kept, breakdown, 0.0), axis=1)[:, -1]
+    else:
+        aggregate = np.zeros(num_users)
+    denominators = counts - subgrader.drop_count
+    return np.where(denominators > 0, aggregate / np.maximum(denominators, 1), aggregate)
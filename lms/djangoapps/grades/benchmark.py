@@ -0,0 +1,334 @@
+"""
+Benchmarks the grading pipeline on synthetic courses.
+
+SyntheticCourse creates a course with a configurable outline and grading
+policy, along with synthetic learners who have scores in its problems.
+GradingBenchmark then times the operations of the grading pipeline on it,
+from computing one learner's grade to generating the course's grade reports,
+and returns the timings as JSON-serializable dicts so that they can be
+compared between runs.  See the benchmark_grading management command.
+
+The synthetic data is written to the configured databases and modulestore,
+so benchmarks should only be run against local ones.
+"""
+
+
+import json
+import math
+import random
+import statistics
+import time
+from logging import getLogger
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from edx_django_utils.cache import RequestCache
+
+from common.djangoapps.student.models import CourseEnrollment, UserProfile
+from lms.djangoapps.courseware.courses import get_course_blocks_completion_summary
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.instructor_task.data import InstructorTaskTypes
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.tasks import calculate_grades_csv, calculate_problem_grade_report
+from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager, update_course_in_cache
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from xmodule.modulestore import ModuleStoreEnum  # lint-amnesty, pylint: disable=wrong-import-order
+from xmodule.modulestore.django import modulestore  # lint-amnesty, pylint: disable=wrong-import-order
+
+from .course_data import CourseData
+from .course_grade_factory import CourseGradeFactory
+from .models import PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks
+from .subsection_grade_factory import SubsectionGradeFactory
+
+log = getLogger(__name__)
+
+# A multiple choice problem worth one point.
+PROBLEM_DATA = (
+    '<problem><multiplechoiceresponse><choicegroup type="MultipleChoice">'
+    '<choice correct="false">Choice 1</choice><choice correct="true">Choice 2</choice>'
+    '</choicegroup></multiplechoiceresponse></problem>'
+)
+
+# The operations timed by GradingBenchmark, in the order they are run.
+OPERATIONS = (
+    'subsection_grade_update',
+    'course_grade_update',
+    'course_grade_read',
+    'progress_page',
+    'course_grade_report',
+    'problem_grade_report',
+)
+
+
+class SyntheticCourse:
+    """
+    A synthetic course and its synthetic learners.
+    """
+    def __init__(self, course_key, learners):
+        self.course_key = course_key
+        self.learners = learners
+
+    @classmethod
+    def create(
+        cls,
+        sections,
+        subsections_per_section,
+        problems_per_subsection,
+        assignment_types,
+        learner_count,
+        attempt_rate,
+        seed=None,
+    ):
+        """
+        Creates and publishes a course with the given number of sections,
+        graded subsections in each section and problems in each subsection.
+        The subsections take the given assignment types in turn, and each
+        assignment type weighs the same in the course grade.
+
+        Then creates and enrolls the given number of learners, each of whom
+        has attempted the given fraction of the problems, answering each
+        correctly or not at random.
+        """
+        rng = random.Random(seed)
+        store = modulestore()
+        user_id = ModuleStoreEnum.UserID.mgmt_command
+        run = f'benchmark_{uuid4().hex[:12]}'
+
+        with store.default_store(ModuleStoreEnum.Type.split):
+            course = store.create_course('GradingBenchmark', 'GB101', run, user_id, fields={
+                'display_name': 'Grading Benchmark',
+            })
+        course_key = course.id.for_branch(None)
+        course_usage_key = store.make_course_usage_key(course_key)
+        subsection_types = {assignment_type: 0 for assignment_type in assignment_types}
+        problem_keys = []
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, course_key):
+            with store.bulk_operations(course_key):
+                for section_index in range(sections):
+                    chapter = store.create_child(user_id, course_usage_key, 'chapter', fields={
+                        'display_name': f'Section {section_index}',
+                    })
+                    for subsection_index in range(subsections_per_section):
+                        assignment_type = assignment_types[
+                            (section_index * subsections_per_section + subsection_index) % len(assignment_types)
+                        ]
+                        subsection_types[assignment_type] += 1
+                        sequential = store.create_child(user_id, chapter.location, 'sequential', fields={
+                            'display_name': f'Subsection {section_index}.{subsection_index}',
+                            'graded': True,
+                            'format': assignment_type,
+                        })
+                        vertical = store.create_child(user_id, sequential.location, 'vertical')
+                        for problem_index in range(problems_per_subsection):
+                            problem = store.create_child(user_id, vertical.location, 'problem', fields={
+                                'display_name': f'Problem {section_index}.{subsection_index}.{problem_index}',
+                                'data': PROBLEM_DATA,
+                            })
+                            problem_keys.append(course_key.make_usage_key('problem', problem.location.block_id))
+
+                course = store.get_course(course_key)
+                course.set_grading_policy({
+                    'GRADER': [
+                        {
+                            'type': assignment_type,
+                            'min_count': subsection_count,
+                            'drop_count': 0,
+                            'short_label': assignment_type[:3],
+                            'weight': 1.0 / len(assignment_types),
+                        }
+                        for assignment_type, subsection_count in subsection_types.items()
+                    ],
+                    'GRADE_CUTOFFS': {'Pass': 0.5},
+                })
+                store.update_item(course, user_id)
+            store.publish(course_usage_key, user_id)
+
+        update_course_in_cache(course_key)
+        CourseOverview.load_from_module_store(course_key)
+        learners = cls._create_learners(course_key, problem_keys, learner_count, attempt_rate, rng)
+        log.info(
+            'Grades: Created benchmark course %s with %d problems and %d learners',
+            course_key,
+            len(problem_keys),
+            len(learners),
+        )
+        return cls(course_key, learners)
+
+    @staticmethod
+    def _create_learners(course_key, problem_keys, learner_count, attempt_rate, rng):
+        """
+        Creates and enrolls the synthetic learners, and their scores.
+        """
+        user_model = get_user_model()
+        username_prefix = f'gb_{course_key.run}_'
+        user_model.objects.bulk_create([
+            user_model(username=f'{username_prefix}{index}', email=f'{username_prefix}{index}@example.com')
+            for index in range(learner_count)
+        ])
+        learners = list(user_model.objects.filter(username__startswith=username_prefix).order_by('id'))
+        UserProfile.objects.bulk_create([UserProfile(user=learner, name=learner.username) for learner in learners])
+        CourseEnrollment.objects.bulk_create([
+            CourseEnrollment(user=learner, course_id=course_key, mode='audit', is_active=True)
+            for learner in learners
+        ])
+        state = json.dumps({'attempts': 1})
+        for learner in learners:
+            StudentModule.objects.for_shard(course_key, learner.id).bulk_create([
+                StudentModule(
+                    student=learner,
+                    course_id=course_key,
+                    module_state_key=problem_key,
+                    module_type=problem_key.block_type,
+                    state=state,
+                    grade=rng.randint(0, 1),
+                    max_grade=1,
+                )
+                for problem_key in problem_keys
+                if rng.random() < attempt_rate
+            ])
+        return learners
+
+    def delete(self):
+        """
+        Deletes the course, its learners and everything created for them.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        for report_name, __ in report_store.links_for(self.course_key):
+            report_store.storage.delete(report_store.path_to(self.course_key, report_name))
+        InstructorTask.objects.filter(course_id=self.course_key).delete()
+        PersistentCourseGrade.objects.filter(course_id=self.course_key).delete()
+        PersistentSubsectionGrade.objects.filter(course_id=self.course_key).delete()
+        VisibleBlocks.objects.filter(course_id=self.course_key).delete()
+        get_user_model().objects.filter(id__in=[learner.id for learner in self.learners]).delete()
+        CourseOverview.objects.filter(id=self.course_key).delete()
+        modulestore().delete_course(self.course_key, ModuleStoreEnum.UserID.mgmt_command)
+
+
+class GradingBenchmark:
+    """
+    Times the operations of the grading pipeline on a SyntheticCourse.
+
+    Operations on a single learner are timed for each of a sample of the
+    learners, and operations on the whole course are timed once.  The request
+    cache is cleared before each run, as it would be between requests.
+    """
+    def __init__(self, course, sample_size):
+        self.course = course
+        self.sample = course.learners[:sample_size]
+
+    def run(self, operations=OPERATIONS):
+        """
+        Times the given operations, in the order of OPERATIONS, and returns
+        a list with the timings of each.
+        """
+        results = []
+        for operation in OPERATIONS:
+            if operation not in operations:
+                continue
+            time_runs = getattr(self, f'_time_{operation}')
+            results.append(self._timings(operation, time_runs()))
+            log.info('Grades: Benchmarked %s: %s', operation, results[-1])
+        return results
+
+    def _time_subsection_grade_update(self):
+        """
+        Updates the grade of each sampled learner in the course's first subsection.
+        """
+        course_data = CourseData(None, course_key=self.course.course_key)
+        first_section_key = course_data.collected_structure.get_children(course_data.location)[0]
+        subsection_key = course_data.collected_structure.get_children(first_section_key)[0]
+        for learner in self.sample:
+            def update(learner=learner):
+                learner_course_data = CourseData(
+                    learner, collected_block_structure=course_data.collected_structure,
+                )
+                SubsectionGradeFactory(learner, course_data=learner_course_data).update(
+                    learner_course_data.structure[subsection_key],
+                )
+            yield self._time_run(update)
+
+    def _time_course_grade_update(self):
+        """
+        Updates the course grade of each sampled learner, along with their subsection grades.
+        """
+        for learner in self.sample:
+            yield self._time_run(lambda learner=learner: CourseGradeFactory().update(
+                learner, course_key=self.course.course_key, force_update_subsections=True,
+            ))
+
+    def _time_course_grade_read(self):
+        """
+        Reads the course grade of each sampled learner, along with its problem scores.
+        """
+        for learner in self.sample:
+            yield self._time_run(lambda learner=learner: CourseGradeFactory().read(
+                learner, course_key=self.course.course_key,
+            ).problem_scores)
+
+    def _time_progress_page(self):
+        """
+        Computes the grading data shown on the progress page of each sampled learner.
+        """
+        for learner in self.sample:
+            def progress_page(learner=learner):
+                collected_block_structure = get_block_structure_manager(self.course.course_key).get_collected()
+                course_grade = CourseGradeFactory().read(learner, collected_block_structure=collected_block_structure)
+                course_grade.update(visible_grades_only=True)
+                list(course_grade.chapter_grades.values())
+                get_course_blocks_completion_summary(self.course.course_key, learner)
+            yield self._time_run(progress_page)
+
+    def _time_course_grade_report(self):
+        """
+        Generates the course grade report.
+        """
+        yield self._time_run(lambda: self._run_report_task(calculate_grades_csv, InstructorTaskTypes.GRADE_COURSE))
+
+    def _time_problem_grade_report(self):
+        """
+        Generates the problem grade report.
+        """
+        yield self._time_run(
+            lambda: self._run_report_task(calculate_problem_grade_report, InstructorTaskTypes.GRADE_PROBLEMS),
+        )
+
+    def _run_report_task(self, task, task_type):
+        """
+        Runs the given report task in this process.
+        """
+        entry = InstructorTask.create(self.course.course_key, task_type, '', {}, self.course.learners[0])
+        result = task.apply(args=(entry.id, {'task_id': entry.task_id}), task_id=entry.task_id)
+        result.get()
+
+    @staticmethod
+    def _time_run(run):
+        """
+        Calls `run` with an empty request cache, and returns how long it took
+        in seconds and how many database queries it made.
+        """
+        RequestCache.clear_all_namespaces()
+        with CaptureQueriesContext(connection) as queries:
+            start_time = time.perf_counter()
+            run()
+            duration = time.perf_counter() - start_time
+        return duration, len(queries)
+
+    @staticmethod
+    def _timings(operation, runs):
+        """
+        Returns a dict summarizing the durations and query counts of the runs of an operation.
+        """
+        durations, query_counts = zip(*runs)
+        sorted_durations = sorted(durations)
+        return {
+            'operation': operation,
+            'runs': len(durations),
+            'total_seconds': round(sum(durations), 4),
+            'mean_ms': round(statistics.mean(durations) * 1000, 2),
+            'median_ms': round(statistics.median(durations) * 1000, 2),
+            'p95_ms': round(sorted_durations[math.ceil(0.95 * len(durations)) - 1] * 1000, 2),
+            'max_ms': round(sorted_durations[-1] * 1000, 2),
+            'mean_queries': round(statistics.mean(query_counts), 2),
+        }
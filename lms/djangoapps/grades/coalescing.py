@@ -0,0 +1,169 @@
+"""
+Coalesces the recalculate_subsection_grade_v3 tasks enqueued for a learner's score.
+
+Every change to a learner's score in a problem enqueues a task which
+recalculates the grades of the subsections containing it.  When scores
+change in quick succession (a learner re-submitting rapidly, or an
+external grader pushing scores again) most of those tasks are redundant.
+When the COALESCE_SUBSECTION_RECALCULATIONS flag is enabled, the score
+changes for the same user, course and problem are merged while a task for
+them is waiting to run:
+
+    * add_pending_recalculation stores the merged task arguments, and
+      returns them only if no task is scheduled yet, in which case the
+      caller enqueues one.
+    * pop_pending_recalculation, called by the task when it runs, returns
+      the newest merged arguments and lets the next score change schedule
+      a new task.
+
+A pending entry is always written before the scheduled marker is checked,
+and the marker is always cleared before the pending entry is read, so a
+score change is never left without a task to recalculate it; at worst one
+extra task runs.  The pending entry is read and written under a short lock,
+so that concurrent score changes are never merged into the same entry and
+lost; when the lock can't be acquired, the score change gets a task of
+its own.
+"""
+
+
+import hashlib
+import time
+from contextlib import contextmanager
+from logging import getLogger
+
+from django.core.cache import cache
+from edx_django_utils.monitoring import set_custom_attribute
+
+log = getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'grades.recalculate_subsection'
+
+# The delay before a coalesced task runs, during which later score changes are merged into it.
+COALESCE_WINDOW_SECONDS = 5
+
+# How long a scheduled task blocks enqueueing others, in case it is lost before it runs.
+SCHEDULED_TIMEOUT_SECONDS = 60
+
+# The task keyword argument marking a task whose arguments should be taken from the pending entry.
+COALESCED_KWARG = 'coalesced'
+
+# How long the lock of a pending entry is held at most, in case its holder dies.
+LOCK_TIMEOUT_SECONDS = 5
+
+# How many times, and how often, acquiring the lock of a pending entry is attempted.
+LOCK_ATTEMPTS = 20
+LOCK_RETRY_SECONDS = 0.01
+
+
+def add_pending_recalculation(task_kwargs):
+    """
+    Merges the arguments of a recalculate_subsection_grade_v3 task into
+    those pending for the same user, course and problem.
+
+    Returns the merged arguments with which a task must be enqueued, or
+    None if a task which will pick them up is already scheduled.
+    """
+    pending_key, scheduled_key = _cache_keys(task_kwargs)
+    with _locked(pending_key) as is_locked:
+        if not is_locked:
+            set_custom_attribute('grades_recalculation_coalesced', False)
+            log.warning('Grades: Could not lock the pending recalculations of %s, enqueueing a task', pending_key)
+            return task_kwargs
+        pending = cache.get(pending_key)
+        if pending is None:
+            pending = {'kwargs': task_kwargs, 'merged_count': 0}
+        else:
+            pending = {
+                'kwargs': _merge_task_kwargs(pending['kwargs'], task_kwargs),
+                'merged_count': pending['merged_count'] + 1,
+            }
+        cache.set(pending_key, pending, timeout=SCHEDULED_TIMEOUT_SECONDS + COALESCE_WINDOW_SECONDS)
+
+    if not cache.add(scheduled_key, True, timeout=SCHEDULED_TIMEOUT_SECONDS):
+        set_custom_attribute('grades_recalculation_coalesced', True)
+        return None
+    set_custom_attribute('grades_recalculation_coalesced', False)
+    return dict(pending['kwargs'], **{COALESCED_KWARG: True})
+
+
+def pop_pending_recalculation(task_kwargs):
+    """
+    Returns the newest arguments pending for the same user, course and
+    problem as the given task arguments, merged with them, and clears
+    them so that later score changes enqueue a new task.
+    """
+    pending_key, scheduled_key = _cache_keys(task_kwargs)
+    cache.delete(scheduled_key)
+    # The entry is read even when it can't be locked: a score change merged
+    # into it before it is deleted then gets a task of its own, since the
+    # marker is already cleared.
+    with _locked(pending_key):
+        pending = cache.get(pending_key)
+        cache.delete(pending_key)
+
+    task_kwargs = {key: value for key, value in task_kwargs.items() if key != COALESCED_KWARG}
+    merged_count = 0
+    if pending is not None:
+        task_kwargs = _merge_task_kwargs(task_kwargs, pending['kwargs'])
+        merged_count = pending['merged_count']
+
+    set_custom_attribute('grades_recalculations_merged', merged_count)
+    if merged_count:
+        log.info(
+            'Grades: Merged %d subsection grade recalculations for user %s and block %s',
+            merged_count,
+            task_kwargs['user_id'],
+            task_kwargs['usage_id'],
+        )
+    return task_kwargs
+
+
+@contextmanager
+def _locked(pending_key):
+    """
+    Context manager which holds the lock of the given pending entry,
+    yielding whether it could be acquired.
+    """
+    lock_key = f'{pending_key}.lock'
+    is_locked = False
+    for attempt in range(LOCK_ATTEMPTS):
+        if attempt:
+            time.sleep(LOCK_RETRY_SECONDS)
+        is_locked = cache.add(lock_key, True, timeout=LOCK_TIMEOUT_SECONDS)
+        if is_locked:
+            break
+    try:
+        yield is_locked
+    finally:
+        if is_locked:
+            cache.delete(lock_key)
+
+
+def _merge_task_kwargs(earlier_kwargs, later_kwargs):
+    """
+    Returns task arguments which recalculate the grades for both of the
+    given task arguments: those of the newest score, recalculated only if
+    higher when both were, and forcing the update when either did.
+    """
+    if earlier_kwargs['expected_modified_time'] > later_kwargs['expected_modified_time']:
+        earlier_kwargs, later_kwargs = later_kwargs, earlier_kwargs
+    merged_kwargs = dict(later_kwargs)
+    merged_kwargs['only_if_higher'] = earlier_kwargs.get('only_if_higher') and later_kwargs.get('only_if_higher')
+    merged_kwargs['force_update_subsections'] = (
+        earlier_kwargs.get('force_update_subsections', False) or
+        later_kwargs.get('force_update_subsections', False)
+    )
+    return merged_kwargs
+
+
+def _cache_keys(task_kwargs):
+    """
+    Returns the keys of the pending arguments and of the scheduled task
+    marker for the user, course and problem of the given task arguments.
+    """
+    fingerprint = '|'.join((str(task_kwargs['user_id']), task_kwargs['course_id'], task_kwargs['usage_id']))
+    key = '{prefix}.{hash}'.format(
+        prefix=CACHE_KEY_PREFIX,
+        hash=hashlib.md5(fingerprint.encode('utf-8')).hexdigest(),
+    )
+    return f'{key}.pending', f'{key}.scheduled'
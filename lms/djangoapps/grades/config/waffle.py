@@ -72,6 +72,55 @@ WRITABLE_GRADEBOOK = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.writable_gradebook',
 # .. toggle_tickets: https://github.com/openedx/edx-platform/pull/21389
 BULK_MANAGEMENT = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.bulk_management', __name__, LOG_PREFIX)
 
+# .. toggle_name: grades.vectorized_course_grades
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, CourseGradeFactory.iter computes the percent, letter grade and pass state of
+#   learners in batches for callers which only read those (summary_only=True), loading their scores for the whole
+#   course into arrays and applying the grading policy to all of them at once, instead of reading each learner's
+#   persisted course grade. The computed grades are not persisted.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_warning: Courses whose graded content differs between learners (content groups, randomized library
+#   content, or unsupported graders), whose grades are frozen, learners with a course role (such as beta testers) and
+#   learners with per-learner date or field overrides are still graded one learner at a time. Grade reports, which
+#   read subsection grades, are not affected by this flag.
+VECTORIZED_COURSE_GRADES = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.vectorized_course_grades', __name__, LOG_PREFIX)
+
+# .. toggle_name: grades.bulk_grade_upserts
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, CourseGradeFactory.iter with force_update (as used when recomputing the grades
+#   of a whole course) saves the subsection and course grades of learners in batches, with one upsert statement per
+#   batch of grades, instead of one read and write per grade.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+BULK_GRADE_UPSERTS = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.bulk_grade_upserts', __name__, LOG_PREFIX)
+
+# .. toggle_name: grades.coalesce_subsection_recalculations
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, a learner's score changes in a problem are merged into the subsection grade
+#   recalculation task already enqueued for them, which then runs once with the newest score, instead of each change
+#   enqueueing its own task.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_warning: Requires a cache shared by the LMS and the celery workers. Coalesced tasks run after
+#   COALESCE_WINDOW_SECONDS rather than RECALCULATE_GRADE_DELAY_SECONDS.
+COALESCE_SUBSECTION_RECALCULATIONS = CourseWaffleFlag(
+    f'{WAFFLE_NAMESPACE}.coalesce_subsection_recalculations', __name__, LOG_PREFIX
+)
+
+# .. toggle_name: grades.share_request_scores
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, the course grades read for a learner during a request share the learner's
+#   scores, which are queried from StudentModule and the Submissions API once per request rather than once per
+#   grade read. Grades which are updated always query the current scores.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+SHARE_REQUEST_SCORES = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.share_request_scores', __name__, LOG_PREFIX)
+
 
 def is_writable_gradebook_enabled(course_key):
     """
@@ -85,3 +134,31 @@ def gradebook_bulk_management_enabled(course_key):
     Returns whether bulk management features should be specially enabled for a given course.
     """
     return BULK_MANAGEMENT.is_enabled(course_key)
+
+
+def vectorized_course_grades_enabled(course_key):
+    """
+    Returns whether course grades should be computed in batches for the given course.
+    """
+    return VECTORIZED_COURSE_GRADES.is_enabled(course_key)
+
+
+def bulk_grade_upserts_enabled(course_key):
+    """
+    Returns whether updated grades should be saved in batches for the given course.
+    """
+    return BULK_GRADE_UPSERTS.is_enabled(course_key)
+
+
+def coalesce_subsection_recalculations_enabled(course_key):
+    """
+    Returns whether subsection grade recalculations should be coalesced for the given course.
+    """
+    return COALESCE_SUBSECTION_RECALCULATIONS.is_enabled(course_key)
+
+
+def share_request_scores_enabled(course_key):
+    """
+    Returns whether the grades read during a request should share scores for the given course.
+    """
+    return SHARE_REQUEST_SCORES.is_enabled(course_key)
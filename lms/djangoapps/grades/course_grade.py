@@ -277,9 +277,16 @@ class CourseGrade(CourseGradeBase):
     """
     Course Grade class when grades are updated or read from storage.
     """
-    def __init__(self, user, course_data, *args, **kwargs):
+    def __init__(
+        self, user, course_data, *args, defer_subsection_persistence=False, share_request_scores=False, **kwargs
+    ):
         super().__init__(user, course_data, *args, **kwargs)
-        self._subsection_grade_factory = SubsectionGradeFactory(user, course_data=course_data)
+        self._subsection_grade_factory = SubsectionGradeFactory(
+            user,
+            course_data=course_data,
+            defer_persistence=defer_subsection_persistence,
+            share_request_scores=share_request_scores,
+        )
 
     def update(self, visible_grades_only=False, has_staff_access=False):
         """
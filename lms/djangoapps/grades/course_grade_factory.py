@@ -2,6 +2,7 @@
 Course Grade Factory Class
 """
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 from openedx.core.djangoapps.signals.signals import (
@@ -9,10 +10,16 @@ from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_NOW_FAILED,
     COURSE_GRADE_NOW_PASSED
 )
+from .batch_grader import USERS_PER_BATCH, BatchCourseGrader
+from .config.waffle import (
+    bulk_grade_upserts_enabled,
+    share_request_scores_enabled,
+    vectorized_course_grades_enabled,
+)
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
-from .models import PersistentCourseGrade
-from .models_api import prefetch_grade_overrides_and_visible_blocks
+from .models import PersistentCourseGrade, PersistentSubsectionGrade
+from .models_api import prefetch_grade_overrides, prefetch_grade_overrides_and_visible_blocks
 
 log = getLogger(__name__)
 
@@ -75,6 +82,7 @@ class CourseGradeFactory:
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            summary_only=False,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -84,6 +92,19 @@ class CourseGradeFactory:
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        Callers which only read the percent, letter_grade and passed state
+        of the course grades pass summary_only=True.  When they do, the
+        vectorized_course_grades flag is enabled for the course and
+        force_update is False, those are computed in batches of students by
+        BatchCourseGrader rather than read from storage.  The subsection
+        grades and problem scores of such course grades are still read one
+        student at a time, and may not agree with the batch computed
+        percent, so they must not be read.
+
+        When the bulk_grade_upserts flag is enabled for the course and
+        force_update is True, the updated grades are saved in batches of
+        students rather than one grade at a time.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -93,9 +114,104 @@ class CourseGradeFactory:
         course_data = CourseData(
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
+        if summary_only and not force_update and vectorized_course_grades_enabled(course_data.course_key):
+            yield from self._iter_batched_grade_results(users, course_data)
+            return
+        if force_update and bulk_grade_upserts_enabled(course_data.course_key):
+            yield from self._iter_bulk_updated_grade_results(users, course_data)
+            return
+
         for user in users:
             yield self._iter_grade_result(user, course_data, force_update)
 
+    def _iter_batched_grade_results(self, users, course_data):
+        """
+        Yields a GradeResult for every student, computing the grades of
+        USERS_PER_BATCH students at a time.  Students who cannot be graded
+        in a batch are read from storage one at a time.
+        """
+        batch_grader = BatchCourseGrader(course_data)
+        unsupported_reason = batch_grader.unsupported_reason
+        if unsupported_reason:
+            log.info(
+                'Grades: Not computing grades in batches for course %s because %s',
+                course_data.course_key,
+                unsupported_reason,
+            )
+
+        users = iter(users)
+        while True:
+            batch = list(islice(users, USERS_PER_BATCH))
+            if not batch:
+                return
+            course_grades = {}
+            if not unsupported_reason:
+                try:
+                    course_grades = batch_grader.grade(batch)
+                except Exception:  # pylint: disable=broad-except
+                    log.exception(
+                        'Grades: Failed to compute grades in batch for %d students in course %s',
+                        len(batch),
+                        course_data.course_key,
+                    )
+            for user in batch:
+                if user.id in course_grades:
+                    yield self.GradeResult(user, course_grades[user.id], None)
+                else:
+                    yield self._iter_grade_result(user, course_data, False)
+
+    def _iter_bulk_updated_grade_results(self, users, course_data):
+        """
+        Yields a GradeResult for every student, updating the grades of
+        USERS_PER_BATCH students at a time and saving their subsection and
+        course grades with one upsert per batch.
+        """
+        users = iter(users)
+        while True:
+            batch = list(islice(users, USERS_PER_BATCH))
+            if not batch:
+                return
+            prefetch_grade_overrides(course_data.course_key, batch)
+
+            results = []
+            subsection_grade_params = []
+            course_grade_params = []
+            for user in batch:
+                try:
+                    course_grade = CourseGrade(
+                        user,
+                        CourseData(
+                            user,
+                            course=course_data.course,
+                            collected_block_structure=course_data.collected_structure,
+                            course_key=course_data.course_key,
+                        ),
+                        force_update_subsections=True,
+                        defer_subsection_persistence=True,
+                    ).update()
+                    subsection_grade_params.extend(
+                        course_grade._subsection_grade_factory.pop_deferred_grade_params()  # pylint: disable=protected-access
+                    )
+                    if course_grade.attempted:
+                        course_grade_params.append(self._persisted_params(user, course_grade))
+                    results.append(self.GradeResult(user, course_grade, None))
+                except Exception as exc:  # pylint: disable=broad-except
+                    log.exception(
+                        'Cannot grade student %s in course %s because of exception: %s',
+                        user.id,
+                        course_data.course_key,
+                        str(exc)
+                    )
+                    results.append(self.GradeResult(user, None, exc))
+
+            PersistentSubsectionGrade.bulk_update_or_create_grades(subsection_grade_params, course_data.course_key)
+            PersistentCourseGrade.bulk_update_or_create(course_data.course_key, course_grade_params)
+
+            for result in results:
+                if result.course_grade is not None:
+                    self._send_signals(result.student, result.course_grade)
+                yield result
+
     def _iter_grade_result(self, user, course_data, force_update):  # lint-amnesty, pylint: disable=missing-function-docstring
         try:
             kwargs = {
@@ -144,7 +260,8 @@ class CourseGradeFactory:
             persistent_grade.percent_grade,
             persistent_grade.letter_grade,
             persistent_grade.letter_grade != '',
-            last_updated=persistent_grade.modified
+            last_updated=persistent_grade.modified,
+            share_request_scores=share_request_scores_enabled(course_data.course_key),
         )
 
     @staticmethod
@@ -170,16 +287,37 @@ class CourseGradeFactory:
         if should_persist:
             course_grade._subsection_grade_factory.bulk_create_unsaved()  # lint-amnesty, pylint: disable=protected-access
             PersistentCourseGrade.update_or_create(
-                user_id=user.id,
                 course_id=course_data.course_key,
-                course_version=course_data.version,
-                course_edited_timestamp=course_data.edited_on,
-                grading_policy_hash=course_data.grading_policy_hash,
-                percent_grade=course_grade.percent,
-                letter_grade=course_grade.letter_grade or "",
-                passed=course_grade.passed,
+                **CourseGradeFactory._persisted_params(user, course_grade)
             )
 
+        CourseGradeFactory._send_signals(user, course_grade)
+        return course_grade
+
+    @staticmethod
+    def _persisted_params(user, course_grade):
+        """
+        Returns the parameters with which the given CourseGrade is saved.
+        """
+        course_data = course_grade.course_data
+        return dict(
+            user_id=user.id,
+            course_version=course_data.version,
+            course_edited_timestamp=course_data.edited_on,
+            grading_policy_hash=course_data.grading_policy_hash,
+            percent_grade=course_grade.percent,
+            letter_grade=course_grade.letter_grade or "",
+            passed=course_grade.passed,
+        )
+
+    @staticmethod
+    def _send_signals(user, course_grade):
+        """
+        Sends a COURSE_GRADE_CHANGED signal to listeners and
+        COURSE_GRADE_NOW_PASSED if learner has passed course or
+        COURSE_GRADE_NOW_FAILED if learner is now failing course
+        """
+        course_data = course_grade.course_data
         COURSE_GRADE_CHANGED.send_robust(
             sender=None,
             user=user,
@@ -203,7 +341,5 @@ class CourseGradeFactory:
 
         log.info(
             'Grades: Update, %s, User: %s, %s, persisted: %s',
-            course_data.full_string(), user.id, course_grade, should_persist,
+            course_data.full_string(), user.id, course_grade, course_grade.attempted,
         )
-
-        return course_grade
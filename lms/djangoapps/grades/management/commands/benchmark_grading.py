@@ -0,0 +1,136 @@
+"""
+Command to benchmark the grading pipeline on a synthetic course.
+"""
+
+
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.djangoapps.grades.benchmark import OPERATIONS, GradingBenchmark, SyntheticCourse
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Creates a synthetic course with synthetic learners, times the operations
+    of the grading pipeline on it, and writes the timings as JSON.
+
+    The synthetic data is written to the configured databases and modulestore,
+    so this should only be run against local ones.
+
+    Example usage:
+        $ ./manage.py lms benchmark_grading --settings=devstack
+        $ ./manage.py lms benchmark_grading --sections 20 --learners 1000 --output timings.json --settings=devstack
+    """
+    help = 'Benchmarks course grade computation and grade reports on a synthetic course.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sections',
+            help='Number of sections in the course.',
+            default=10,
+            type=int,
+        )
+        parser.add_argument(
+            '--subsections',
+            help='Number of graded subsections in each section.',
+            default=4,
+            type=int,
+        )
+        parser.add_argument(
+            '--problems',
+            help='Number of problems in each subsection.',
+            default=5,
+            type=int,
+        )
+        parser.add_argument(
+            '--assignment_types',
+            help='The assignment types of the subsections, each a grader of equal weight.',
+            nargs='+',
+            default=['Homework', 'Lab', 'Exam'],
+        )
+        parser.add_argument(
+            '--learners',
+            help='Number of learners enrolled in the course.',
+            default=100,
+            type=int,
+        )
+        parser.add_argument(
+            '--attempt_rate',
+            help='Fraction of the problems each learner has attempted.',
+            default=0.8,
+            type=float,
+        )
+        parser.add_argument(
+            '--sample_size',
+            help='Number of learners for whom operations on a single learner are timed.',
+            default=20,
+            type=int,
+        )
+        parser.add_argument(
+            '--operations',
+            help='The operations to time.',
+            nargs='+',
+            choices=OPERATIONS,
+            default=list(OPERATIONS),
+        )
+        parser.add_argument(
+            '--seed',
+            help='Seed for generating the learners\' scores.',
+            default=0,
+            type=int,
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write the timings to, rather than standard output.',
+        )
+        parser.add_argument(
+            '--keep',
+            help='Keep the synthetic course and learners, rather than deleting them.',
+            action='store_true',
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        if min(options['sections'], options['subsections'], options['problems'], options['learners']) < 1:
+            raise CommandError('The course must have at least one section, subsection, problem and learner.')
+        if not 1 <= options['sample_size'] <= options['learners']:
+            raise CommandError('The sample size must be between 1 and the number of learners.')
+
+        parameters = {
+            name: options[name]
+            for name in (
+                'sections', 'subsections', 'problems', 'assignment_types', 'learners', 'attempt_rate',
+                'sample_size', 'seed',
+            )
+        }
+        course = SyntheticCourse.create(
+            options['sections'],
+            options['subsections'],
+            options['problems'],
+            options['assignment_types'],
+            options['learners'],
+            options['attempt_rate'],
+            seed=options['seed'],
+        )
+        try:
+            timings = GradingBenchmark(course, options['sample_size']).run(options['operations'])
+        finally:
+            if options['keep']:
+                log.info('Grades: Kept benchmark course %s', course.course_key)
+            else:
+                course.delete()
+
+        results = json.dumps({
+            'course_id': str(course.course_key),
+            'parameters': parameters,
+            'timings': timings,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(results)
+        else:
+            self.stdout.write(results)
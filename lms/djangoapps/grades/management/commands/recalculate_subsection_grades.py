@@ -4,6 +4,7 @@ in the specified time range.
 """
 
 
+import itertools
 import logging
 from datetime import datetime
 
@@ -60,7 +61,10 @@ class Command(BaseCommand):
         event_transaction_id = create_new_event_transaction_id()
         set_event_transaction_type(PROBLEM_SUBMITTED_EVENT_TYPE)
         kwargs = {'modified__range': (modified_start, modified_end), 'module_type': 'problem'}
-        for record in StudentModule.objects.filter(**kwargs):
+        records = itertools.chain.from_iterable(
+            manager.filter(**kwargs) for manager in StudentModule.objects.for_all_shards()
+        )
+        for record in records:
             if not record.course_id.is_course:
                 # This is not a course, so we don't store subsection grades for it.
                 continue
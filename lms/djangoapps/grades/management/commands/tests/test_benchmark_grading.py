@@ -0,0 +1,64 @@
+"""
+Tests for benchmark_grading management command.
+"""
+
+
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from opaque_keys.edx.keys import CourseKey
+
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.grades.benchmark import OPERATIONS
+from lms.djangoapps.grades.models import PersistentCourseGrade
+from xmodule.modulestore.django import modulestore  # lint-amnesty, pylint: disable=wrong-import-order
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase  # lint-amnesty, pylint: disable=wrong-import-order
+
+
+class TestBenchmarkGrading(ModuleStoreTestCase):
+    """
+    Tests benchmark_grading management command.
+    """
+    def _benchmark(self, *args):
+        """
+        Runs the command on a small course, and returns its decoded output.
+        """
+        output = StringIO()
+        call_command(
+            'benchmark_grading',
+            '--sections', '2', '--subsections', '2', '--problems', '2', '--learners', '3', '--sample_size', '2',
+            *args,
+            stdout=output,
+        )
+        return json.loads(output.getvalue())
+
+    def test_benchmark(self):
+        results = self._benchmark()
+        assert [timing['operation'] for timing in results['timings']] == list(OPERATIONS)
+        for timing in results['timings']:
+            expected_runs = 1 if timing['operation'].endswith('_report') else 2
+            assert timing['runs'] == expected_runs
+            assert timing['max_ms'] >= timing['median_ms'] > 0
+
+        course_key = CourseKey.from_string(results['course_id'])
+        assert modulestore().get_course(course_key) is None
+        assert not get_user_model().objects.filter(username__startswith=f'gb_{course_key.run}_').exists()
+        assert not StudentModule.objects.filter(course_id=course_key).exists()
+        assert not PersistentCourseGrade.objects.filter(course_id=course_key).exists()
+
+    def test_keep(self):
+        results = self._benchmark('--keep', '--operations', 'course_grade_update')
+        assert [timing['operation'] for timing in results['timings']] == ['course_grade_update']
+
+        course_key = CourseKey.from_string(results['course_id'])
+        course = modulestore().get_course(course_key, depth=None)
+        assert course.grading_policy['GRADER'][0]['min_count'] == 2
+        assert StudentModule.objects.filter(course_id=course_key).count() <= 3 * 8
+        assert PersistentCourseGrade.objects.filter(course_id=course_key).count() == 2
+
+    def test_invalid_sample_size(self):
+        with pytest.raises(CommandError):
+            self._benchmark('--sample_size', '4')
@@ -55,7 +55,7 @@ class TestRecalculateSubsectionGrades(HasCourseWithProblemsMixin, ModuleStoreTes
         csm_record.course_id = CourseKey.from_string('course-v1:x+y+z')
         csm_record.module_state_key = "abc"
         csm_record.modified = utc.localize(datetime.strptime('2016-08-23 16:43', DATE_FORMAT))
-        csm_mock.objects.filter.return_value = [csm_record]
+        csm_mock.objects.for_all_shards.return_value = [MagicMock(**{'filter.return_value': [csm_record]})]
         id_mock.return_value = MagicMock()
         id_mock.return_value.id = "ID"
         self._run_command_and_check_output(task_mock, ScoreDatabaseTableEnum.courseware_student_module)
@@ -15,7 +15,7 @@ from collections import defaultdict, namedtuple
 from hashlib import sha1
 
 from django.apps import apps
-from django.db import models, IntegrityError, transaction
+from django.db import connections, models, router, IntegrityError, transaction
 from openedx_events.learning.data import CourseData, PersistentCourseGradeData
 from openedx_events.learning.signals import PERSISTENT_GRADE_SUMMARY_CHANGED
 
@@ -38,6 +38,9 @@ log = logging.getLogger(__name__)
 
 BLOCK_RECORD_LIST_VERSION = 1
 
+# The number of rows written by each statement of a bulk upsert.
+BULK_UPSERT_BATCH_SIZE = 1000
+
 # Used to serialize information about a block at the time it was used in
 # grade calculation.
 BlockRecord = namedtuple('BlockRecord', ['locator', 'weight', 'raw_possible', 'graded'])
@@ -263,6 +266,28 @@ class VisibleBlocks(models.Model):
         non_existent_brls = {brl for brl in block_record_lists if brl.hash_value not in cached_records}
         cls.bulk_create(user_id, course_key, non_existent_brls)
 
+    @classmethod
+    def bulk_create_missing(cls, course_key, block_record_lists):
+        """
+        Creates VisibleBlocks for those of the given BlockRecordList
+        objects, which may belong to many users, that do not exist yet.
+        Unlike bulk_get_or_create, this neither reads nor updates the
+        per-user VisibleBlocks cache.
+        """
+        block_record_lists = {brl.hash_value: brl for brl in block_record_lists}
+        existing_hashes = set(
+            cls.objects.filter(hashed__in=list(block_record_lists)).values_list('hashed', flat=True)
+        )
+        cls.objects.bulk_create(
+            [
+                VisibleBlocks(blocks_json=brl.json_value, hashed=hash_value, course_id=course_key)
+                for hash_value, brl in block_record_lists.items()
+                if hash_value not in existing_hashes
+            ],
+            batch_size=BULK_UPSERT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
     @classmethod
     def _initialize_cache(cls, user_id, course_key):
         """
@@ -503,6 +528,60 @@ class PersistentSubsectionGrade(TimeStampedModel):
             cls._emit_grade_calculated_event(grade)
         return grades
 
+    @classmethod
+    def bulk_update_or_create_grades(cls, grade_params_iter, course_key):
+        """
+        Creates or updates the grades with the given params, which may
+        belong to many users in the course, with a single upsert
+        statement per BULK_UPSERT_BATCH_SIZE grades.
+
+        As with update_or_create_grade, the first_attempted time of an
+        existing grade is kept once it is set.  The returned grades are
+        not read back from the database, so they have no ids.
+        """
+        grade_params_iter = list(grade_params_iter)
+        if not grade_params_iter:
+            return []
+
+        list(map(cls._prepare_params, grade_params_iter))
+        VisibleBlocks.bulk_create_missing(course_key, [params['visible_blocks'] for params in grade_params_iter])
+        list(map(cls._prepare_params_visible_blocks_id, grade_params_iter))
+
+        first_attempted_times = {
+            (user_id, usage_key.map_into_course(course_key)): first_attempted
+            for user_id, usage_key, first_attempted in cls.objects.filter(
+                course_id=course_key,
+                user_id__in={params['user_id'] for params in grade_params_iter},
+                first_attempted__isnull=False,
+            ).values_list('user_id', 'usage_key', 'first_attempted')
+        }
+        grades = []
+        for params in grade_params_iter:
+            first_attempted = first_attempted_times.get((params['user_id'], params['usage_key']))
+            if first_attempted is not None:
+                params['first_attempted'] = first_attempted
+            grades.append(PersistentSubsectionGrade(**params))
+
+        _bulk_upsert(
+            cls,
+            grades,
+            unique_fields=['course_id', 'user_id', 'usage_key'],
+            update_fields=[
+                'course_version',
+                'subtree_edited_timestamp',
+                'earned_all',
+                'possible_all',
+                'earned_graded',
+                'possible_graded',
+                'first_attempted',
+                'visible_blocks',
+                'modified',
+            ],
+        )
+        for grade in grades:
+            cls._emit_grade_calculated_event(grade)
+        return grades
+
     @classmethod
     def _prepare_params(cls, params):
         """
@@ -688,6 +767,70 @@ class PersistentCourseGrade(TimeStampedModel):
         cls._emit_openedx_persistent_grade_summary_changed_event(course_id, user_id, grade)
         return grade
 
+    @classmethod
+    def bulk_update_or_create(cls, course_id, grade_params_iter):
+        """
+        Creates or updates the course grades of many users in the course
+        with a single upsert statement per BULK_UPSERT_BATCH_SIZE grades.
+        Each of grade_params_iter holds the user_id and the keyword
+        arguments that update_or_create takes.
+
+        As with update_or_create, passed_timestamp is set the first time
+        a user passes and kept afterwards.  The returned grades are not
+        read back from the database, so they have no ids.
+        """
+        grade_params_iter = [dict(params) for params in grade_params_iter]
+        if not grade_params_iter:
+            return []
+
+        passed_timestamps = dict(cls.objects.filter(
+            course_id=course_id,
+            user_id__in=[params['user_id'] for params in grade_params_iter],
+            passed_timestamp__isnull=False,
+        ).values_list('user_id', 'passed_timestamp'))
+        grades = []
+        newly_passed_grades = []
+        for params in grade_params_iter:
+            passed = params.pop('passed')
+            if params.get('course_version', None) is None:
+                params['course_version'] = ""
+            grade = cls(course_id=course_id, passed_timestamp=passed_timestamps.get(params['user_id']), **params)
+            if passed and not grade.passed_timestamp:
+                grade.passed_timestamp = now()
+                newly_passed_grades.append(grade)
+            grades.append(grade)
+
+        _bulk_upsert(
+            cls,
+            grades,
+            unique_fields=['course_id', 'user_id'],
+            update_fields=[
+                'course_edited_timestamp',
+                'course_version',
+                'grading_policy_hash',
+                'percent_grade',
+                'letter_grade',
+                'passed_timestamp',
+                'modified',
+            ],
+        )
+        for grade in newly_passed_grades:
+            COURSE_GRADE_PASSED_FIRST_TIME.send(
+                sender=None,
+                course_id=course_id,
+                user_id=grade.user_id
+            )
+            COURSE_GRADE_PASSED_UPDATE_IN_LEARNER_PATHWAY.send(
+                sender=None,
+                user_id=grade.user_id,
+                course_id=course_id,
+            )
+        for grade in grades:
+            cls._emit_grade_calculated_event(grade)
+            cls._update_cache(course_id, grade.user_id, grade)
+            cls._emit_openedx_persistent_grade_summary_changed_event(course_id, grade.user_id, grade)
+        return grades
+
     @classmethod
     def _update_cache(cls, course_id, user_id, grade):
         course_cache = get_cache(cls._CACHE_NAMESPACE).get(cls._cache_key(course_id))
@@ -794,6 +937,21 @@ class PersistentSubsectionGradeOverride(models.Model):
             cls.objects.filter(grade__user_id=user_id, grade__course_id=course_key)
         }
 
+    @classmethod
+    def bulk_prefetch(cls, user_ids, course_key):
+        """
+        Prefetches the overrides of many users in the course with a single query.
+        """
+        prefetched = {user_id: {} for user_id in user_ids}
+        for override in cls.objects.select_related('grade').filter(
+            grade__user_id__in=list(prefetched),
+            grade__course_id=course_key,
+        ):
+            prefetched[override.grade.user_id][override.grade.usage_key] = override
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id, overrides in prefetched.items():
+            cache[(user_id, str(course_key))] = overrides
+
     @classmethod
     def get_override(cls, user_id, usage_key):  # lint-amnesty, pylint: disable=missing-function-docstring
         prefetch_values = get_cache(cls._CACHE_NAMESPACE).get((user_id, str(usage_key.course_key)), None)
@@ -863,3 +1021,20 @@ class PersistentSubsectionGradeOverride(models.Model):
     @classmethod
     def clear_prefetched_overrides_for_learner(cls, user_id, course_key):
         get_cache(cls._CACHE_NAMESPACE).pop((user_id, str(course_key)), None)
+
+
+def _bulk_upsert(model_class, objs, unique_fields, update_fields):
+    """
+    Inserts the given model objects, updating the update_fields of the
+    rows that already exist: INSERT ... ON DUPLICATE KEY UPDATE on MySQL,
+    INSERT ... ON CONFLICT DO UPDATE on databases that need to be told
+    which unique fields conflict.
+    """
+    features = connections[router.db_for_write(model_class)].features
+    model_class.objects.bulk_create(
+        objs,
+        batch_size=BULK_UPSERT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=unique_fields if features.supports_update_conflicts_with_target else None,
+        update_fields=update_fields,
+    )
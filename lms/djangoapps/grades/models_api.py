@@ -18,6 +18,10 @@ def prefetch_grade_overrides_and_visible_blocks(user, course_key):
     _VisibleBlocks.bulk_read(user.id, course_key)
 
 
+def prefetch_grade_overrides(course_key, users):
+    _PersistentSubsectionGradeOverride.bulk_prefetch([user.id for user in users], course_key)
+
+
 def prefetch_course_grades(course_key, users):
     _PersistentCourseGrade.prefetch(course_key, users)
 
@@ -3,6 +3,7 @@ Defines an endpoint for gradebook data related to a course.
 """
 
 
+import json
 import logging
 from collections import namedtuple
 from contextlib import contextmanager
@@ -11,6 +12,7 @@ from functools import wraps
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.db.models import Case, Exists, F, OuterRef, Q, When
+from django.http import StreamingHttpResponse
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from opaque_keys import InvalidKeyError
@@ -18,6 +20,7 @@ from opaque_keys.edx.keys import CourseKey, UsageKey
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
 from common.djangoapps.student.auth import has_course_author_access
@@ -367,6 +370,8 @@ class GradebookView(GradeViewMixin, PaginatedAPIView):
           only for course enrollees who belong to that cohort.
         * enrollment_mode: (optional) The slug of an enrollment mode (e.g. "verified").  If present, will return grades
           only for course enrollees with the given enrollment mode.
+        * stream: (optional) If true, the gradebook entries of all matching users are streamed rather than paginated,
+          as newline-delimited JSON (application/x-ndjson) with one entry per line.
     **GET Response Values**
         If the request for gradebook data is successful,
         an HTTP 200 "OK" response is returned.
@@ -421,6 +426,11 @@ class GradebookView(GradeViewMixin, PaginatedAPIView):
                 },
             ],
         }
+    **Streamed GET response**
+        When requesting gradebook entries for all users with `stream=true`, each line of the response is a user
+        gradebook entry, structured as above.  Entries are written as the grades of each batch of users are
+        computed, in the order in which the users enrolled.
+
     **Paginated GET response**
         When requesting gradebook entries for all users, the response is paginated and contains the following values:
         * next: The URL containing the next page of data.
@@ -436,6 +446,9 @@ class GradebookView(GradeViewMixin, PaginatedAPIView):
 
     pagination_class = CourseEnrollmentPagination
 
+    # The number of users whose gradebook entries are computed together when streaming.
+    stream_batch_size = 100
+
     def _section_breakdown(self, course, graded_subsections, course_grade):
         """
         Given a course_grade and a list of graded subsections for a given course,
@@ -653,23 +666,60 @@ class GradebookView(GradeViewMixin, PaginatedAPIView):
                 )
                 # TODO: In django 3.0+, we can directly filter on this 'exists' rather than annotating
                 q_objects.append(Q(has_excluded_role=False))
-            entries = []
             related_models = ['user']
+            if get_bool_param(request, 'stream', False):
+                enrollments = self._get_course_enrollments(course_key, q_objects, related_models, annotations)
+                return StreamingHttpResponse(
+                    self._stream_gradebook_entries(course, course_data, graded_subsections, enrollments),
+                    content_type='application/x-ndjson',
+                )
+
             users = self._paginate_users(course_key, q_objects, related_models, annotations=annotations)
 
             users_counts = self._get_users_counts(course_key, q_objects, annotations=annotations)
 
-            with bulk_gradebook_view_context(course_key, users):
-                for user, course_grade, exc in CourseGradeFactory().iter(
-                    users, course_key=course_key, collected_block_structure=course_data.collected_structure
-                ):
-                    if not exc:
-                        entry = self._gradebook_entry(user, course, graded_subsections, course_grade)
-                        entries.append(entry)
-
+            entries = self._gradebook_entries(course, course_data, graded_subsections, users)
             serializer = StudentGradebookEntrySerializer(entries, many=True)
             return self.get_paginated_response(serializer.data, **users_counts)
 
+    def _gradebook_entries(self, course, course_data, graded_subsections, users):
+        """
+        Returns the gradebook entries of the given users in the given course,
+        leaving out users whose grades could not be read.
+        """
+        entries = []
+        with bulk_gradebook_view_context(course.id, users):
+            for user, course_grade, exc in CourseGradeFactory().iter(
+                users, course_key=course.id, collected_block_structure=course_data.collected_structure
+            ):
+                if not exc:
+                    entries.append(self._gradebook_entry(user, course, graded_subsections, course_grade))
+        return entries
+
+    def _stream_gradebook_entries(self, course, course_data, graded_subsections, enrollments):
+        """
+        Yields the serialized gradebook entries of the users of the given
+        enrollments, one line of JSON per user, computing the entries of
+        stream_batch_size users at a time.
+
+        Enrollments are read in batches by increasing id, starting each batch
+        after the last id of the previous one, so that every batch is as fast
+        to read as the first.
+        """
+        enrollments = enrollments.order_by('id')
+        last_enrollment_id = None
+        while True:
+            batch = enrollments if last_enrollment_id is None else enrollments.filter(id__gt=last_enrollment_id)
+            batch = list(batch[:self.stream_batch_size])
+            if not batch:
+                return
+            last_enrollment_id = batch[-1].id
+
+            users = self._get_enrolled_users(batch)
+            entries = self._gradebook_entries(course, course_data, graded_subsections, users)
+            for entry in StudentGradebookEntrySerializer(entries, many=True).data:
+                yield json.dumps(entry, cls=JSONEncoder) + '\n'
+
     def _get_user_count(self, query_args, cache_time=3600, annotations=None):
         """
         Return the user count for the given query arguments to CourseEnrollment.
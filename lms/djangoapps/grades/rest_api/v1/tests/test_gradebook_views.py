@@ -47,6 +47,7 @@ from lms.djangoapps.grades.models import (
     PersistentSubsectionGrade,
     PersistentSubsectionGradeOverride
 )
+from lms.djangoapps.grades.rest_api.v1.gradebook_views import GradebookView
 from lms.djangoapps.grades.rest_api.v1.tests.mixins import GradeViewTestMixin
 from lms.djangoapps.grades.rest_api.v1.views import CourseEnrollmentPagination
 from lms.djangoapps.grades.subsection_grade import ReadSubsectionGrade
@@ -641,6 +642,33 @@ class GradebookViewTest(GradebookViewTestBase):
                 )
                 self._assert_data_all_users(resp)
 
+    @ddt.data(1, 2, 100)
+    def test_gradebook_data_for_course_streamed(self, stream_batch_size):
+        with patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.read') as mock_grade:
+            mock_grade.side_effect = [
+                self.mock_course_grade(self.student, passed=True, percent=0.85),
+                self.mock_course_grade(self.other_student, passed=False, percent=0.45),
+                self.mock_course_grade(self.program_student, passed=True, percent=0.75)
+            ]
+
+            with override_waffle_flag(self.waffle_flag, active=True), patch.object(
+                GradebookView, 'stream_batch_size', stream_batch_size
+            ):
+                self.login_course_staff()
+                resp = self.client.get(self.get_url(course_key=self.course.id) + '?stream=true')
+                assert status.HTTP_200_OK == resp.status_code
+                assert resp['Content-Type'] == 'application/x-ndjson'
+                lines = b''.join(resp.streaming_content).decode('utf-8').splitlines()
+
+        entries = [json.loads(line) for line in lines]
+        assert [(entry['user_id'], entry['percent']) for entry in entries] == [
+            (self.student.id, 0.85),
+            (self.other_student.id, 0.45),
+            (self.program_student.id, 0.75),
+        ]
+        assert entries[0]['section_breakdown'] == self.expected_subsection_grades()
+        assert entries[2]['external_user_key'] == 'program_user_key_0'
+
     @ddt.data(
         'login_staff',
         'login_course_admin',
@@ -174,6 +174,26 @@ class GradeViewMixin(DeveloperErrorViewMixin):
         Returns:
             A list of Enrollments, pulled from a paginated queryset.
         """
+        enrollments_in_course = self._get_course_enrollments(
+            course_key, course_enrollment_filter, related_models, annotations,
+        )
+        paged_enrollments = self.paginate_queryset(enrollments_in_course)
+        return paged_enrollments
+
+    @staticmethod
+    def _get_course_enrollments(course_key=None,
+                                course_enrollment_filter=None, related_models=None, annotations=None):
+        """
+        Args:
+            course_key (CourseLocator): The course to retrieve grades for.
+            course_enrollment_filter: Optional list of Q objects to pass
+            to `CourseEnrollment.filter()`.
+            related_models: Optional list of related models to join to the CourseEnrollment table.
+            annotations: Optional dict of fields to add to the queryset via annotation
+
+        Returns:
+            A queryset of the active Enrollments matching the filters.
+        """
         queryset = CourseEnrollment.objects
         if annotations:
             queryset = queryset.annotate(**annotations)
@@ -190,9 +210,7 @@ class GradeViewMixin(DeveloperErrorViewMixin):
         )
         if related_models:
             enrollments_in_course = enrollments_in_course.select_related(*related_models)
-
-        paged_enrollments = self.paginate_queryset(enrollments_in_course)
-        return paged_enrollments
+        return enrollments_in_course
 
     def _serialize_user_grade(self, user, course_key, course_grade):
         """
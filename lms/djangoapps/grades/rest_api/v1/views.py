@@ -151,7 +151,7 @@ class CourseGradesView(GradeViewMixin, PaginatedAPIView):
         users = self._paginate_users(course_key)
 
         with bulk_course_grade_context(course_key, users):
-            for user, course_grade, exc in CourseGradeFactory().iter(users, course_key=course_key):
+            for user, course_grade, exc in CourseGradeFactory().iter(users, course_key=course_key, summary_only=True):
                 if not exc:
                     user_grades.append(self._serialize_user_grade(user, course_key, course_grade))
 
@@ -516,11 +516,11 @@ class SubmissionHistoryView(GradeViewMixin, PaginatedAPIView):
             'submission_history': [],
             'data': block.data
         }
-        csm = StudentModule.objects.filter(
+        csm = list(StudentModule.objects.for_shard(course_enrollment.course_id, course_enrollment.user_id).filter(
             module_state_key=block.location,
             student=course_enrollment.user,
             course_id=course_enrollment.course_id
-        )
+        ))
 
         scores = BaseStudentModuleHistory.get_history(csm)
         for score in scores:
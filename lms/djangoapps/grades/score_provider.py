@@ -0,0 +1,94 @@
+"""
+Shares the scores of a learner in a course between the grades read during a request.
+
+Every CourseGrade read for a learner has its own SubsectionGradeFactory, which
+queries the learner's scores in StudentModule (CSM) and in the Submissions API
+again.  A request reading the same learner's grade several times, like the
+progress page along with its certificate and completion checks, repeats those
+queries.  When the SHARE_REQUEST_SCORES flag is enabled, the grades read from
+storage instead take the learner's scores from the LearnerScores kept for the
+learner and course in the request cache, so that each is queried once.
+
+Only grades read from storage share scores: updating a grade always queries the
+current scores, and a change to a learner's score discards the scores shared
+for them (see clear_learner_scores).
+"""
+
+
+from edx_django_utils import monitoring as monitoring_utils
+from submissions import api as submissions_api
+
+from common.djangoapps.student.models import anonymous_id_for_user
+from lms.djangoapps.courseware.model_data import ScoresClient
+from openedx.core.lib.cache_utils import get_cache
+
+_CACHE_NAMESPACE = 'grades.score_provider'
+
+
+class LearnerScores:
+    """
+    The scores of a learner in a course, each queried at most once.
+    """
+    def __init__(self, user, course_key):
+        self.user = user
+        self.course_key = course_key
+        self._scores_client = ScoresClient(course_key, user.id)
+        self._fetched_locations = None
+        self._submissions_scores = None
+
+    def csm_scores(self, scorable_locations):
+        """
+        Returns a ScoresClient with the learner's scores in CSM for the given
+        locations, querying only the locations not queried before.
+        """
+        if self._fetched_locations is None:
+            self._fetched_locations = set()
+            unfetched_locations = set(scorable_locations)
+        else:
+            unfetched_locations = set(scorable_locations) - self._fetched_locations
+            if not unfetched_locations:
+                monitoring_utils.increment('grades.shared_scores.csm_queries_avoided')
+                return self._scores_client
+
+        self._scores_client.fetch_scores(unfetched_locations)
+        self._fetched_locations |= unfetched_locations
+        return self._scores_client
+
+    def submissions_scores(self):
+        """
+        Returns the learner's scores stored by the Submissions API for the course.
+        """
+        if self._submissions_scores is None:
+            anonymous_user_id = anonymous_id_for_user(self.user, self.course_key)
+            self._submissions_scores = submissions_api.get_scores(str(self.course_key), anonymous_user_id)
+        else:
+            monitoring_utils.increment('grades.shared_scores.submissions_queries_avoided')
+        return self._submissions_scores
+
+
+def get_learner_scores(user, course_key):
+    """
+    Returns the LearnerScores shared by the current request for the given
+    learner and course, creating them if needed.
+    """
+    cache = get_cache(_CACHE_NAMESPACE)
+    cache_key = _cache_key(user.id, course_key)
+    if cache_key not in cache:
+        cache[cache_key] = LearnerScores(user, course_key)
+    return cache[cache_key]
+
+
+def clear_learner_scores(user_id, course_key):
+    """
+    Discards the scores shared by the current request for the given learner
+    and course, so that grades read later query their current scores.
+    """
+    get_cache(_CACHE_NAMESPACE).pop(_cache_key(user_id, course_key), None)
+
+
+def _cache_key(user_id, course_key):
+    """
+    Returns the request cache key for the given learner and course, which may
+    be given as strings.
+    """
+    return f'{user_id}.{course_key}'
@@ -26,8 +26,11 @@ from openedx.core.djangoapps.course_groups.signals.signals import COHORT_MEMBERS
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 
 from .. import events
+from ..coalescing import COALESCE_WINDOW_SECONDS, add_pending_recalculation
+from ..config.waffle import coalesce_subsection_recalculations_enabled
 from ..constants import GradeOverrideFeatureEnum, ScoreDatabaseTableEnum
 from ..course_grade_factory import CourseGradeFactory
+from ..score_provider import clear_learner_scores
 from ..scores import weighted_score
 from .signals import (
     PROBLEM_RAW_SCORE_CHANGED,
@@ -228,27 +231,39 @@ def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argum
     """
     Handles the PROBLEM_WEIGHTED_SCORE_CHANGED or SUBSECTION_OVERRIDE_CHANGED signals by
     enqueueing a subsection update operation to occur asynchronously.
+
+    When the coalesce_subsection_recalculations flag is enabled for the course,
+    the operation is merged into any that is already enqueued for the same user
+    and problem.
+
+    Any scores shared by the grades read during the current request are
+    discarded for the user, so that grades read later see the new score.
     """
     events.grade_updated(**kwargs)
+    clear_learner_scores(kwargs['user_id'], kwargs['course_id'])
     context_key = LearningContextKey.from_string(kwargs['course_id'])
     if not context_key.is_course:
         return  # If it's not a course, it has no subsections, so skip the subsection grading update
-    recalculate_subsection_grade_v3.apply_async(
-        kwargs=dict(
-            user_id=kwargs['user_id'],
-            anonymous_user_id=kwargs.get('anonymous_user_id'),
-            course_id=kwargs['course_id'],
-            usage_id=kwargs['usage_id'],
-            only_if_higher=kwargs.get('only_if_higher'),
-            expected_modified_time=to_timestamp(kwargs['modified']),
-            score_deleted=kwargs.get('score_deleted', False),
-            event_transaction_id=str(get_event_transaction_id()),
-            event_transaction_type=str(get_event_transaction_type()),
-            score_db_table=kwargs['score_db_table'],
-            force_update_subsections=kwargs.get('force_update_subsections', False),
-        ),
-        countdown=RECALCULATE_GRADE_DELAY_SECONDS,
+    task_kwargs = dict(
+        user_id=kwargs['user_id'],
+        anonymous_user_id=kwargs.get('anonymous_user_id'),
+        course_id=kwargs['course_id'],
+        usage_id=kwargs['usage_id'],
+        only_if_higher=kwargs.get('only_if_higher'),
+        expected_modified_time=to_timestamp(kwargs['modified']),
+        score_deleted=kwargs.get('score_deleted', False),
+        event_transaction_id=str(get_event_transaction_id()),
+        event_transaction_type=str(get_event_transaction_type()),
+        score_db_table=kwargs['score_db_table'],
+        force_update_subsections=kwargs.get('force_update_subsections', False),
     )
+    countdown = RECALCULATE_GRADE_DELAY_SECONDS
+    if coalesce_subsection_recalculations_enabled(context_key):
+        task_kwargs = add_pending_recalculation(task_kwargs)
+        if task_kwargs is None:
+            return
+        countdown = COALESCE_WINDOW_SECONDS
+    recalculate_subsection_grade_v3.apply_async(kwargs=task_kwargs, countdown=countdown)
 
 
 @receiver(SUBSECTION_SCORE_CHANGED)
@@ -11,6 +11,7 @@ from lazy import lazy
 
 from lms.djangoapps.grades.models import BlockRecord, PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import compute_percent, get_score, possibly_scored
+from lms.djangoapps.grades.transformer import GradesTransformer
 from xmodule import block_metadata_utils, graders  # lint-amnesty, pylint: disable=wrong-import-order
 from xmodule.graders import AggregatedScore, ShowCorrectness  # lint-amnesty, pylint: disable=wrong-import-order
 
@@ -260,10 +261,7 @@ class CreateSubsectionGrade(NonZeroSubsectionGrade):
     """
     def __init__(self, subsection, course_structure, submissions_scores, csm_scores):
         self.problem_scores = OrderedDict()
-        for block_key in course_structure.post_order_traversal(
-                filter_func=possibly_scored,
-                start_node=subsection.location,
-        ):
+        for block_key in self._possibly_scored_blocks(subsection.location, course_structure):
             problem_score = self._compute_block_score(block_key, course_structure, submissions_scores, csm_scores)
             if problem_score:
                 self.problem_scores[block_key] = problem_score
@@ -289,6 +287,37 @@ class CreateSubsectionGrade(NonZeroSubsectionGrade):
 
             return model
 
+    @staticmethod
+    def _possibly_scored_blocks(subsection_key, course_structure):
+        """
+        Returns the usage keys of the blocks in the given subsection of
+        the user's course_structure that may have a score, in post-order.
+
+        The scorable blocks collected in the course's grading plan are
+        used when available, rather than traversing the subsection.
+        """
+        scorable_blocks = GradesTransformer.get_scorable_blocks(course_structure, subsection_key)
+        if scorable_blocks is None:
+            return course_structure.post_order_traversal(filter_func=possibly_scored, start_node=subsection_key)
+        return [block_key for block_key in scorable_blocks if block_key in course_structure]
+
+    def deferred_model_params(self, student, override, score_deleted=False, force_update_subsections=False):
+        """
+        Returns the parameters for saving this subsection grade later, in
+        bulk with other grades, or None if it should not be saved.
+
+        The given grade override (if any) is applied to this grade's
+        totals, as update_or_create_model does once the grade is saved.
+        """
+        if not self._should_persist_per_attempted(score_deleted, force_update_subsections):
+            return None
+        params = self._persisted_model_params(student)
+        if override is not None:
+            self.override = override
+            self.all_total = self._aggregated_score_with_override(self.all_total, override)
+            self.graded_total = self._aggregated_score_with_override(self.graded_total, override)
+        return params
+
     @classmethod
     def bulk_create_models(cls, student, subsection_grades, course_key):
         """
@@ -321,6 +350,22 @@ class CreateSubsectionGrade(NonZeroSubsectionGrade):
             force_update_subsections
         )
 
+    @staticmethod
+    def _aggregated_score_with_override(score, override):
+        """
+        Returns a copy of the given `AggregatedScore` with the values of
+        the given override, where they are set.
+        """
+        score_type = 'graded' if score.graded else 'all'
+        earned_override = getattr(override, f'earned_{score_type}_override')
+        possible_override = getattr(override, f'possible_{score_type}_override')
+        return AggregatedScore(
+            tw_earned=score.earned if earned_override is None else earned_override,
+            tw_possible=score.possible if possible_override is None else possible_override,
+            graded=score.graded,
+            first_attempted=score.first_attempted,
+        )
+
     def _persisted_model_params(self, student):
         """
         Returns the parameters for creating/updating the
@@ -12,12 +12,13 @@ from submissions import api as submissions_api
 
 from common.djangoapps.student.models import anonymous_id_for_user
 from lms.djangoapps.courseware.model_data import ScoresClient
-from lms.djangoapps.grades.models import PersistentSubsectionGrade
+from lms.djangoapps.grades.models import PersistentSubsectionGrade, PersistentSubsectionGradeOverride
 from lms.djangoapps.grades.scores import possibly_scored
 from openedx.core.djangoapps.signals.signals import COURSE_ASSESSMENT_GRADE_CHANGED
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 
 from .course_data import CourseData
+from .score_provider import get_learner_scores
 from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSubsectionGrade
 
 log = getLogger(__name__)
@@ -27,12 +28,31 @@ class SubsectionGradeFactory:
     """
     Factory for Subsection Grades.
     """
-    def __init__(self, student, course=None, course_structure=None, course_data=None):
+    def __init__(
+        self,
+        student,
+        course=None,
+        course_structure=None,
+        course_data=None,
+        defer_persistence=False,
+        share_request_scores=False,
+    ):
+        """
+        If defer_persistence is True, updated grades are not saved by
+        update, but kept to be saved in bulk (see pop_deferred_grade_params).
+
+        If share_request_scores is True, the student's scores are taken from
+        those shared by the grades read during the current request (see
+        score_provider), so it must only be used to read grades.
+        """
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
+        self.defer_persistence = defer_persistence
+        self.share_request_scores = share_request_scores
 
         self._cached_subsection_grades = None
         self._unsaved_subsection_grades = OrderedDict()
+        self._deferred_grade_params = []
 
     def create(self, subsection, read_only=False, force_calculate=False):
         """
@@ -70,6 +90,14 @@ class SubsectionGradeFactory:
         )
         self._unsaved_subsection_grades.clear()
 
+    def pop_deferred_grade_params(self):
+        """
+        Returns the parameters for saving the grades updated since the
+        last call, when persistence is deferred, and forgets them.
+        """
+        grade_params, self._deferred_grade_params = self._deferred_grade_params, []
+        return grade_params
+
     def update(self, subsection, only_if_higher=None, score_deleted=False, force_update_subsections=False, persist_grade=True):  # lint-amnesty, pylint: disable=line-too-long
         """
         Updates the SubsectionGrade object for the student and subsection.
@@ -97,12 +125,22 @@ class SubsectionGradeFactory:
                     ):
                         return orig_subsection_grade
 
-            grade_model = calculated_grade.update_or_create_model(
-                self.student,
-                score_deleted,
-                force_update_subsections
-            )
-            self._update_saved_subsection_grade(subsection.location, grade_model)
+            if self.defer_persistence:
+                grade_params = calculated_grade.deferred_model_params(
+                    self.student,
+                    PersistentSubsectionGradeOverride.get_override(self.student.id, subsection.location),
+                    score_deleted,
+                    force_update_subsections
+                )
+                if grade_params:
+                    self._deferred_grade_params.append(grade_params)
+            else:
+                grade_model = calculated_grade.update_or_create_model(
+                    self.student,
+                    score_deleted,
+                    force_update_subsections
+                )
+                self._update_saved_subsection_grade(subsection.location, grade_model)
 
             if settings.FEATURES.get('ENABLE_COURSE_ASSESSMENT_GRADE_CHANGE_SIGNAL'):
                 COURSE_ASSESSMENT_GRADE_CHANGED.send(
@@ -122,6 +160,8 @@ class SubsectionGradeFactory:
         state (in CSM) for the course, while caching the result.
         """
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
+        if self.share_request_scores:
+            return get_learner_scores(self.student, self.course_data.course_key).csm_scores(scorable_locations)
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
     @lazy
@@ -130,6 +170,8 @@ class SubsectionGradeFactory:
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        if self.share_request_scores:
+            return get_learner_scores(self.student, self.course_data.course_key).submissions_scores()
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
@@ -30,6 +30,7 @@ from openedx.core.djangoapps.content.course_overviews.models import \
     CourseOverview  # lint-amnesty, pylint: disable=unused-import
 from xmodule.modulestore.django import modulestore  # lint-amnesty, pylint: disable=wrong-import-order
 
+from .coalescing import COALESCED_KWARG, pop_pending_recalculation
 from .config.waffle import DISABLE_REGRADE_ON_POLICY_CHANGE
 from .constants import ScoreDatabaseTableEnum
 from .course_grade_factory import CourseGradeFactory
@@ -186,7 +187,12 @@ def recalculate_subsection_grade_v3(self, **kwargs):
     """
     Latest version of the recalculate_subsection_grade task.  See docstring
     for _recalculate_subsection_grade for further description.
+
+    Tasks enqueued with the `coalesced` keyword argument recalculate the
+    grades with the newest arguments merged into them (see coalescing.py).
     """
+    if kwargs.get(COALESCED_KWARG):
+        kwargs = pop_pending_recalculation(kwargs)
     _recalculate_subsection_grade(self, **kwargs)
 
 
@@ -0,0 +1,168 @@
+"""
+Tests for the BatchCourseGrader class.
+"""
+from unittest import TestCase
+from unittest.mock import patch
+
+import ddt
+import numpy as np
+from django.test import override_settings
+from edx_toggles.toggles.testutils import override_waffle_flag
+from submissions import api as submissions_api
+
+from common.djangoapps.student.models import anonymous_id_for_user
+from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.courseware.models import StudentFieldOverride
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from xmodule.graders import AssignmentFormatGrader  # lint-amnesty, pylint: disable=wrong-import-order
+
+from ..batch_grader import BatchCourseGrader, assignment_format_percents
+from ..config.waffle import VECTORIZED_COURSE_GRADES
+from ..course_data import CourseData
+from ..course_grade import CourseGrade, ZeroCourseGrade
+from ..course_grade_factory import CourseGradeFactory
+from .base import GradeTestBase
+
+
+@ddt.ddt
+class TestBatchCourseGrader(GradeTestBase):
+    """
+    Tests that grades computed in batches match grades computed per user.
+    """
+    SCORES = [
+        {},
+        {'problem': (1, 1)},
+        {'problem': (1, 2), 'problem2': (0, 1)},
+        {'problem': (None, 3), 'problem2': (1, 1)},
+        {'problem2': (2, 3)},
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.users = [UserFactory() for _ in self.SCORES]
+        for user, scores in zip(self.users, self.SCORES):
+            for problem_name, (grade, max_grade) in scores.items():
+                StudentModuleFactory(
+                    student=user,
+                    course_id=self.course.id,
+                    module_state_key=getattr(self, problem_name).location,
+                    grade=grade,
+                    max_grade=max_grade,
+                )
+
+    def _batch_grader(self):
+        return BatchCourseGrader(CourseData(None, course=self.course))
+
+    @ddt.data(0.5, 0.25)
+    def test_grades_match_update(self, passing):
+        self._set_grading_policy(passing)
+        course_grades = self._batch_grader().grade(self.users)
+        for user in self.users:
+            expected = CourseGradeFactory().update(user, self.course, force_update_subsections=True)
+            actual = course_grades[user.id]
+            assert (actual.percent, actual.letter_grade, actual.passed) == (
+                expected.percent, expected.letter_grade, expected.passed,
+            )
+
+    def test_problem_scores_match(self):
+        course_grades, problem_scores = self._batch_grader().grade_problems(self.users)
+        assert course_grades.keys() == {user.id for user in self.users}
+        for user in self.users:
+            expected = CourseGradeFactory().update(user, self.course, force_update_subsections=True).problem_scores
+            row = problem_scores.user_rows[user.id]
+            for block_key in (self.problem.location, self.problem2.location):
+                column = problem_scores.plan.block_index(block_key)
+                expected_score = expected[block_key]
+                assert problem_scores.is_available[row, column]
+                assert (
+                    problem_scores.earned[row, column],
+                    problem_scores.possible[row, column],
+                    problem_scores.is_attempted[row, column],
+                ) == (expected_score.earned, expected_score.possible, bool(expected_score.first_attempted))
+
+    def test_submissions_scores_match(self):
+        for user, points_earned in ((self.users[0], 3), (self.users[2], 0)):
+            submission = submissions_api.create_submission({
+                'student_id': anonymous_id_for_user(user, self.course.id),
+                'course_id': str(self.course.id),
+                'item_id': str(self.problem.location),
+                'item_type': 'problem',
+            }, 'answer')
+            submissions_api.set_score(submission['uuid'], points_earned, 4)
+
+        with patch('submissions.api.get_scores') as mock_get_scores:
+            course_grades, problem_scores = self._batch_grader().grade_problems(self.users)
+        mock_get_scores.assert_not_called()
+
+        for user in self.users:
+            expected = CourseGradeFactory().update(user, self.course, force_update_subsections=True)
+            assert course_grades[user.id].percent == expected.percent
+            row = problem_scores.user_rows[user.id]
+            column = problem_scores.plan.block_index(self.problem.location)
+            expected_score = expected.problem_scores[self.problem.location]
+            assert (problem_scores.earned[row, column], problem_scores.possible[row, column]) == (
+                expected_score.earned, expected_score.possible,
+            )
+
+    def test_zero_grade_without_scores(self):
+        course_grades = self._batch_grader().grade(self.users)
+        assert isinstance(course_grades[self.users[0].id], ZeroCourseGrade)
+        assert isinstance(course_grades[self.users[1].id], CourseGrade)
+
+    @override_settings(GENERATE_PROFILE_SCORES=True)
+    def test_unsupported(self):
+        assert self._batch_grader().unsupported_reason == 'random profile scores are generated'
+
+    def test_overridden_users_left_out(self):
+        StudentFieldOverride.objects.create(
+            course_id=self.course.id,
+            location=self.problem.location,
+            student=self.users[1],
+            field='start',
+            value='"2030-01-01T00:00:00Z"',
+        )
+        course_grades = self._batch_grader().grade(self.users)
+        assert course_grades.keys() == {user.id for user in self.users} - {self.users[1].id}
+
+    @ddt.data((True, True), (True, False), (False, True))
+    @ddt.unpack
+    def test_iter(self, flag_enabled, summary_only):
+        with override_waffle_flag(VECTORIZED_COURSE_GRADES, active=flag_enabled):
+            with patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.read') as mock_read:
+                results = list(CourseGradeFactory().iter(self.users, course=self.course, summary_only=summary_only))
+        assert [result.student for result in results] == self.users
+        assert mock_read.called != (flag_enabled and summary_only)
+
+
+@ddt.ddt
+class TestAssignmentFormatPercents(TestCase):
+    """
+    Tests that assignment_format_percents matches AssignmentFormatGrader.
+    """
+    @ddt.data(
+        (0, 0), (1, 0), (4, 0), (4, 1), (4, 2), (6, 2), (2, 5), (0, 3),
+    )
+    @ddt.unpack
+    def test_matches_total_with_drops(self, min_count, drop_count):
+        grader = AssignmentFormatGrader('Homework', min_count, drop_count)
+        percents = np.array([
+            [0.5, 0.25, 1.0, 0.0, 0.3333],
+            [0.5, 0.5, 0.5, 0.5, 0.5],
+            [0.1, 0.9, 0.2, 0.8, 0.7],
+            [1.0, 0.6667, 0.0, 0.25, 0.75],
+        ])
+        is_included = np.array([
+            [True, True, True, True, True],
+            [True, False, True, False, True],
+            [False, False, False, False, False],
+            [False, True, True, False, True],
+        ])
+        actual = assignment_format_percents(grader, percents, is_included)
+        for row in range(len(percents)):
+            scores = [percent for percent, included in zip(percents[row], is_included[row]) if included]
+            breakdown = [
+                {'percent': scores[index] if index < len(scores) else 0.0}
+                for index in range(max(min_count, len(scores)))
+            ]
+            expected, _ = grader.total_with_drops(breakdown)
+            assert actual[row] == expected
@@ -0,0 +1,63 @@
+"""
+Tests for coalescing subsection grade recalculations.
+"""
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from ..coalescing import COALESCED_KWARG, add_pending_recalculation, pop_pending_recalculation
+
+TASK_KWARGS = {
+    'user_id': 1,
+    'course_id': 'course-v1:edX+Test+Run',
+    'usage_id': 'block-v1:edX+Test+Run+type@problem+block@problem',
+    'expected_modified_time': 1,
+    'only_if_higher': True,
+    'force_update_subsections': False,
+}
+
+
+class TestCoalescing(TestCase):
+    """
+    Tests for add_pending_recalculation and pop_pending_recalculation.
+    """
+    def setUp(self):
+        super().setUp()
+        self.wrapped_cache = LocMemCache('grades_coalescing', {})
+        self.cache = Mock(wraps=self.wrapped_cache)
+        patcher = patch('lms.djangoapps.grades.coalescing.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sleep_patcher = patch('lms.djangoapps.grades.coalescing.time.sleep')
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_merged(self):
+        later_kwargs = dict(TASK_KWARGS, expected_modified_time=2, only_if_higher=False)
+        task_kwargs = add_pending_recalculation(TASK_KWARGS)
+        assert task_kwargs == dict(TASK_KWARGS, **{COALESCED_KWARG: True})
+        assert add_pending_recalculation(later_kwargs) is None
+
+        assert pop_pending_recalculation(task_kwargs) == later_kwargs
+        assert add_pending_recalculation(TASK_KWARGS) is not None
+
+    def test_concurrent_score_change(self):
+        forced_kwargs = dict(TASK_KWARGS, expected_modified_time=2, force_update_subsections=True)
+        concurrent_task_kwargs = []
+
+        def get_during_concurrent_score_change(key, *args, **kwargs):
+            """
+            Makes another score change while the pending entry is being merged.
+            """
+            if key.endswith('.pending') and not concurrent_task_kwargs:
+                concurrent_task_kwargs.append(add_pending_recalculation(forced_kwargs))
+            return self.wrapped_cache.get(key, *args, **kwargs)
+
+        self.cache.get.side_effect = get_during_concurrent_score_change
+        task_kwargs = add_pending_recalculation(TASK_KWARGS)
+
+        # The concurrent score change couldn't be merged, so it gets a task of its own.
+        assert concurrent_task_kwargs == [forced_kwargs]
+        assert task_kwargs == dict(TASK_KWARGS, **{COALESCED_KWARG: True})
+        assert pop_pending_recalculation(task_kwargs) == TASK_KWARGS
@@ -4,6 +4,7 @@ Tests for the CourseGradeFactory class.
 from unittest.mock import patch
 
 import ddt
+from edx_toggles.toggles.testutils import override_waffle_flag
 
 from common.djangoapps.student.tests.factories import UserFactory
 from lms.djangoapps.courseware.access import has_access
@@ -11,6 +12,7 @@ from openedx.core.djangoapps.content.block_structure.factory import BlockStructu
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase  # lint-amnesty, pylint: disable=wrong-import-order
 from xmodule.modulestore.tests.factories import CourseFactory  # lint-amnesty, pylint: disable=wrong-import-order
 
+from ..config.waffle import BULK_GRADE_UPSERTS
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
@@ -158,6 +160,18 @@ class TestCourseGradeFactory(GradeTestBase):
             ))
         assert mock_update.called == force_update
 
+    @ddt.data(True, False)
+    def test_iter_force_update_bulk_upserts(self, flag_enabled):
+        with override_waffle_flag(BULK_GRADE_UPSERTS, active=flag_enabled), mock_get_score(1, 2):
+            results = list(CourseGradeFactory().iter(
+                users=[self.request.user], course=self.course, force_update=True,
+            ))
+        assert results[0].course_grade.percent == 0.5
+
+        course_grade = CourseGradeFactory().read(self.request.user, self.course)
+        assert course_grade.percent == 0.5
+        assert course_grade.subsection_grade(self.sequence.location).percent_graded == 0.5
+
     def test_course_grade_summary(self):
         with mock_get_score(1, 2):
             self.subsection_grade_factory.update(self.course_structure[self.sequence.location])
@@ -291,6 +291,27 @@ class PersistentSubsectionGradeTest(GradesModelTestCase):
             grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
         self._assert_tracker_emitted_event(tracker_mock, grade)
 
+    def test_bulk_update_or_create_grades(self):
+        other_user = UserFactory()
+        PersistentSubsectionGrade.update_or_create_grade(**self.params)
+        moment = now()
+        updated_params = dict(self.params, earned_all=7.0, first_attempted=moment)
+        created_params = dict(self.params, user_id=other_user.id, first_attempted=None)
+
+        grades = PersistentSubsectionGrade.bulk_update_or_create_grades(
+            [updated_params, created_params], self.course_key,
+        )
+        assert len(grades) == 2
+
+        updated_grade = PersistentSubsectionGrade.read_grade(self.params['user_id'], self.usage_key)
+        assert updated_grade.earned_all == 7.0
+        assert updated_grade.first_attempted == self.params['first_attempted']
+        assert updated_grade.visible_blocks.blocks == self.block_records
+        created_grade = PersistentSubsectionGrade.read_grade(other_user.id, self.usage_key)
+        assert created_grade.first_attempted is None
+        assert created_grade.visible_blocks_id == updated_grade.visible_blocks_id
+        assert VisibleBlocks.objects.count() == 1
+
     def test_create_event(self):
         with patch('lms.djangoapps.grades.events.tracker') as tracker_mock:
             grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
@@ -447,6 +468,26 @@ class PersistentCourseGradesTest(GradesModelTestCase):
         assert grade.letter_grade == ''
         assert grade.passed_timestamp == passed_timestamp
 
+    @patch('lms.djangoapps.grades.signals.signals.COURSE_GRADE_PASSED_FIRST_TIME.send')
+    def test_bulk_update_or_create(self, mock):
+        passed_grade = PersistentCourseGrade.update_or_create(**self.params)
+        course_id = self.params.pop('course_id')
+        grades_params = [
+            dict(self.params, percent_grade=88.8, letter_grade='Better job'),
+            dict(self.params, user_id=54321, passed=False, letter_grade=''),
+            dict(self.params, user_id=67890),
+        ]
+        grades = PersistentCourseGrade.bulk_update_or_create(course_id, grades_params)
+        assert [grade.user_id for grade in grades] == [12345, 54321, 67890]
+
+        updated_grade = PersistentCourseGrade.read(12345, course_id)
+        assert updated_grade.id == passed_grade.id
+        assert updated_grade.percent_grade == 88.8
+        assert updated_grade.passed_timestamp == passed_grade.passed_timestamp
+        assert PersistentCourseGrade.read(54321, course_id).passed_timestamp is None
+        assert isinstance(PersistentCourseGrade.read(67890, course_id).passed_timestamp, datetime)
+        assert mock.call_count == 2
+
     @patch('lms.djangoapps.grades.signals.signals.COURSE_GRADE_PASSED_FIRST_TIME.send')
     def test_passed_timestamp_is_now(self, mock):
         with freeze_time(now()):
@@ -0,0 +1,66 @@
+"""
+Tests for sharing a learner's scores between the grades read during a request.
+"""
+from unittest.mock import patch
+
+import ddt
+from edx_toggles.toggles.testutils import override_waffle_flag
+
+from lms.djangoapps.courseware.model_data import ScoresClient
+
+from ..config.waffle import SHARE_REQUEST_SCORES
+from ..course_grade_factory import CourseGradeFactory
+from ..score_provider import LearnerScores, clear_learner_scores
+from .base import GradeTestBase
+
+
+@ddt.ddt
+class TestSharedRequestScores(GradeTestBase):
+    """
+    Tests that the grades read during a request query the learner's scores once.
+    """
+    def setUp(self):
+        super().setUp()
+        CourseGradeFactory().update(self.request.user, self.course, force_update_subsections=True)
+
+    def _read_problem_scores(self):
+        """
+        Reads the learner's course grade, and returns its problem scores.
+        """
+        return CourseGradeFactory().read(self.request.user, self.course).problem_scores
+
+    @ddt.data(True, False)
+    def test_shared_between_reads(self, flag_enabled):
+        fetch_scores = ScoresClient.fetch_scores
+        with override_waffle_flag(SHARE_REQUEST_SCORES, active=flag_enabled):
+            with patch.object(
+                ScoresClient, 'fetch_scores', autospec=True, side_effect=fetch_scores,
+            ) as mock_fetch_scores:
+                with patch('lms.djangoapps.grades.score_provider.submissions_api.get_scores') as mock_get_scores:
+                    mock_get_scores.return_value = {}
+                    first_scores = self._read_problem_scores()
+                    assert self._read_problem_scores().keys() == first_scores.keys()
+        expected_count = 1 if flag_enabled else 2
+        assert mock_fetch_scores.call_count == expected_count
+        assert mock_get_scores.call_count == expected_count
+
+    @override_waffle_flag(SHARE_REQUEST_SCORES, active=True)
+    def test_cleared(self):
+        fetch_scores = ScoresClient.fetch_scores
+        with patch.object(
+            ScoresClient, 'fetch_scores', autospec=True, side_effect=fetch_scores,
+        ) as mock_fetch_scores:
+            self._read_problem_scores()
+            clear_learner_scores(self.request.user.id, str(self.course.id))
+            self._read_problem_scores()
+        assert mock_fetch_scores.call_count == 2
+
+    def test_fetches_new_locations(self):
+        learner_scores = LearnerScores(self.request.user, self.course.id)
+        with patch.object(ScoresClient, 'fetch_scores', autospec=True) as mock_fetch_scores:
+            learner_scores.csm_scores([self.problem.location])
+            learner_scores.csm_scores([self.problem.location, self.problem2.location])
+            learner_scores.csm_scores([self.problem2.location])
+        assert [call_args[0][1] for call_args in mock_fetch_scores.call_args_list] == [
+            {self.problem.location}, {self.problem2.location},
+        ]
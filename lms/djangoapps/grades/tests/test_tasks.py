@@ -22,7 +22,11 @@ from common.djangoapps.track.event_transaction_utils import create_new_event_tra
 from common.djangoapps.util.date_utils import to_timestamp
 from lms.djangoapps.courseware.tests.test_group_access import MemoryUserPartitionScheme
 from lms.djangoapps.grades import tasks
-from lms.djangoapps.grades.config.waffle import ENFORCE_FREEZE_GRADE_AFTER_COURSE_END
+from lms.djangoapps.grades.coalescing import COALESCE_WINDOW_SECONDS
+from lms.djangoapps.grades.config.waffle import (
+    COALESCE_SUBSECTION_RECALCULATIONS,
+    ENFORCE_FREEZE_GRADE_AFTER_COURSE_END
+)
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
 from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
 from lms.djangoapps.grades.signals.signals import PROBLEM_WEIGHTED_SCORE_CHANGED
@@ -137,6 +141,34 @@ class RecalculateSubsectionGradeTest(HasCourseWithProblemsMixin, ModuleStoreTest
             PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
             mock_task_apply.assert_called_once_with(countdown=RECALCULATE_GRADE_DELAY_SECONDS, kwargs=local_task_args)
 
+    def test_coalesced_score_changes(self):
+        """
+        Ensures that score changes made while a task is enqueued are merged into it.
+        """
+        self.set_up_course()
+        send_args = self.problem_weighted_score_changed_kwargs
+        later_modified = self.frozen_now_datetime + timedelta(seconds=1)
+        with override_waffle_flag(COALESCE_SUBSECTION_RECALCULATIONS, active=True), patch(
+            'lms.djangoapps.grades.tasks.recalculate_subsection_grade_v3.apply_async',
+            return_value=None
+        ) as mock_task_apply:
+            PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+            PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **dict(send_args, modified=later_modified))
+            mock_task_apply.assert_called_once()
+            task_kwargs = mock_task_apply.call_args[1]['kwargs']
+            assert mock_task_apply.call_args[1]['countdown'] == COALESCE_WINDOW_SECONDS
+            assert task_kwargs['expected_modified_time'] == self.frozen_now_timestamp
+
+            with patch('lms.djangoapps.grades.tasks._recalculate_subsection_grade') as mock_recalculate:
+                recalculate_subsection_grade_v3.apply(kwargs=task_kwargs)
+            recalculated_kwargs = mock_recalculate.call_args[1]
+            assert recalculated_kwargs['expected_modified_time'] == to_timestamp(later_modified)
+            assert 'coalesced' not in recalculated_kwargs
+
+            # Once the task has run, the next score change enqueues a new task.
+            PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+            assert mock_task_apply.call_count == 2
+
     @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
     def test_triggers_subsection_score_signal(self, mock_subsection_signal):
         """
@@ -408,6 +408,54 @@ class GradesTransformerTestCase(CourseStructureTestCase):
             original_grading_policy_hash
         )
 
+    def test_grading_plan_collected(self):
+        blocks = self.build_course([
+            {
+                'org': 'GradesTestOrg',
+                'course': 'GB101',
+                'run': 'cannonball',
+                '#type': 'course',
+                '#ref': 'course',
+                '#children': [
+                    {
+                        '#type': 'chapter',
+                        '#ref': 'chapter',
+                        '#children': [
+                            {
+                                '#type': 'sequential',
+                                '#ref': 'sequential',
+                                '#children': [
+                                    {
+                                        '#type': 'vertical',
+                                        '#ref': 'vertical',
+                                        '#children': [
+                                            {'#type': 'problem', '#ref': 'problem_1'},
+                                            {'#type': 'html', '#ref': 'html'},
+                                            {'#type': 'problem', '#ref': 'problem_2'},
+                                        ]
+                                    },
+                                ]
+                            },
+                        ]
+                    }
+                ]
+            }
+        ])
+        block_structure = get_course_blocks(self.student, blocks['course'].location, self.transformers)
+        assert GradesTransformer.get_scorable_blocks(block_structure, blocks['sequential'].location) == [
+            blocks['problem_1'].location, blocks['problem_2'].location,
+        ]
+        assert GradesTransformer.get_scorable_blocks(block_structure, blocks['chapter'].location) is None
+
+    def test_grading_plan_excludes_dags(self):
+        blocks = self.build_complicated_hypothetical_course()
+        block_structure = get_course_blocks(self.student, blocks['course'].location, self.transformers)
+        assert GradesTransformer.get_scorable_blocks(block_structure, blocks['sub_C'].location) == [
+            blocks['prob_BCb'].location,
+        ]
+        assert GradesTransformer.get_scorable_blocks(block_structure, blocks['sub_A'].location) is None
+        assert GradesTransformer.get_scorable_blocks(block_structure, blocks['sub_B'].location) is None
+
 
 @ddt.ddt
 class MultiProblemModulestoreAccessTestCase(CourseStructureTestCase, SharedModuleStoreTestCase):
@@ -36,8 +36,21 @@ class GradesTransformer(BlockStructureTransformer):
     transformer_block_field for each block:
 
         max_score: (numeric)
+
+    And the grading plan of the course is stored as transformer_data, so
+    that the scorable blocks of a subsection are known without traversing
+    it for every learner:
+
+        grading_plan: (dict) with
+            scorable_blocks: (list of UsageKey) the blocks with a score,
+                numbered by their position in this list.
+            subsection_scorables: (dict of UsageKey to list of int) the
+                numbers of the scorable blocks in each subsection, in the
+                order of a post-order traversal of the subsection.  Only
+                subsections whose blocks are traversed in the same order
+                for every user are included.
     """
-    WRITE_VERSION = 4
+    WRITE_VERSION = 5
     READ_VERSION = 4
     FIELDS_TO_COLLECT = [
         'due',
@@ -51,6 +64,7 @@ class GradesTransformer(BlockStructureTransformer):
     ]
 
     EXPLICIT_GRADED_FIELD_NAME = 'explicit_graded'
+    GRADING_PLAN = 'grading_plan'
 
     @classmethod
     def name(cls):
@@ -76,6 +90,7 @@ class GradesTransformer(BlockStructureTransformer):
         )
         cls._collect_explicit_graded(block_structure)
         cls._collect_grading_policy_hash(block_structure)
+        cls._collect_grading_plan(block_structure)
 
     def transform(self, block_structure, usage_context):  # lint-amnesty, pylint: disable=arguments-differ
         """
@@ -95,6 +110,26 @@ class GradesTransformer(BlockStructureTransformer):
         )
         return b64encode(sha1(ordered_policy.encode('utf-8')).digest()).decode('utf-8')
 
+    @classmethod
+    def get_scorable_blocks(cls, block_structure, subsection_key):
+        """
+        Returns the usage keys of the scorable blocks in the given
+        subsection, as collected for the whole course and in the order of
+        a post-order traversal of it, or None if the grading plan was not
+        collected for it.
+
+        The returned blocks are not filtered by the given block_structure,
+        so they may include blocks that a user cannot access.
+        """
+        grading_plan = block_structure.get_transformer_data(cls, cls.GRADING_PLAN)
+        if grading_plan is None:
+            return None
+        block_numbers = grading_plan['subsection_scorables'].get(subsection_key)
+        if block_numbers is None:
+            return None
+        scorable_blocks = grading_plan['scorable_blocks']
+        return [scorable_blocks[block_number] for block_number in block_numbers]
+
     @classmethod
     def _collect_explicit_graded(cls, block_structure):
         """
@@ -154,6 +189,48 @@ class GradesTransformer(BlockStructureTransformer):
         if max_score is None:
             log.warning(f"GradesTransformer: max_score is None for {block.location}")
 
+    @classmethod
+    def _collect_grading_plan(cls, block_structure):
+        """
+        Collect the scorable blocks of every subsection, storing them as
+        `transformer_data` associated with the `GradesTransformer`.
+        """
+        from .scores import possibly_scored  # avoids a circular import, since scores imports this module
+
+        scorable_blocks = []
+        block_numbers = {}
+        subsection_scorables = {}
+        for subsection_key in block_structure.topological_traversal(filter_func=possibly_scored):
+            if subsection_key.block_type != 'sequential':
+                continue
+            subsection_blocks = list(block_structure.post_order_traversal(
+                filter_func=possibly_scored,
+                start_node=subsection_key,
+            ))
+            # A user's blocks are only visited in the same order as the collected blocks if the
+            # subsection is a tree whose children are never moved, which split_test blocks do.
+            if any(
+                block_key.block_type == 'split_test' or len(block_structure.get_parents(block_key)) > 1
+                for block_key in subsection_blocks
+                if block_key != subsection_key
+            ):
+                continue
+
+            scorables = []
+            for block_key in subsection_blocks:
+                if not getattr(block_structure.get_xblock(block_key), 'has_score', False):
+                    continue
+                if block_key not in block_numbers:
+                    block_numbers[block_key] = len(scorable_blocks)
+                    scorable_blocks.append(block_key)
+                scorables.append(block_numbers[block_key])
+            subsection_scorables[subsection_key] = scorables
+
+        block_structure.set_transformer_data(cls, cls.GRADING_PLAN, {
+            'scorable_blocks': scorable_blocks,
+            'subsection_scorables': subsection_scorables,
+        })
+
     @classmethod
     def _collect_grading_policy_hash(cls, block_structure):
         """
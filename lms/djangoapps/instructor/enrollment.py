@@ -395,17 +395,19 @@ def reset_student_attempts(
         from lms.djangoapps.teams.api import get_team_for_user_course_topic
         team = get_team_for_user_course_topic(student, str(course_id), selected_teamset_id)
     if team:
-        modules_to_reset = StudentModule.objects.filter(
-            student__teams=team,
-            course_id=course_id,
-            module_state_key=module_state_key
-        )
-        for module_to_reset in modules_to_reset:
-            _reset_or_delete_module(module_to_reset)
+        team_user_ids = list(team.users.values_list('id', flat=True))
+        for manager in StudentModule.objects.for_shards(course_id):
+            modules_to_reset = manager.filter(
+                student_id__in=team_user_ids,
+                course_id=course_id,
+                module_state_key=module_state_key
+            )
+            for module_to_reset in modules_to_reset:
+                _reset_or_delete_module(module_to_reset)
         return
     else:
         # Teams are not enabled or the user does not have a team
-        module_to_reset = StudentModule.objects.get(
+        module_to_reset = StudentModule.objects.for_shard(course_id, student.id).get(
             student_id=student.id,
             course_id=course_id,
             module_state_key=module_state_key
@@ -374,16 +374,25 @@ def list_problem_responses(course_key, problem_location, limit_responses=None):
     if problem_key.course_key != course_key:
         return []
 
-    smdat = StudentModule.objects.filter(
-        course_id=course_key,
-        module_state_key=problem_key
-    ).select_related('student')
-    smdat = smdat.order_by('student')
+    smdat = []
+    for manager in StudentModule.objects.for_shards(course_key):
+        shard_smdat = manager.filter(
+            course_id=course_key,
+            module_state_key=problem_key
+        ).order_by('student')
+        if limit_responses is not None:
+            shard_smdat = shard_smdat[:limit_responses]
+        smdat.extend(shard_smdat)
+    smdat.sort(key=lambda response: response.student_id)
     if limit_responses is not None:
         smdat = smdat[:limit_responses]
 
+    # The shards don't store users, so the usernames are loaded from the default database.
+    usernames = dict(User.objects.filter(
+        id__in={response.student_id for response in smdat},
+    ).values_list('id', 'username'))
     return [
-        {'username': response.student.username, 'state': get_response_state(response)}
+        {'username': usernames[response.student_id], 'state': get_response_state(response)}
         for response in smdat
     ]
 
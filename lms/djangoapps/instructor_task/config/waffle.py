@@ -36,6 +36,46 @@ USE_ON_DISK_GRADE_REPORTING = CourseWaffleFlag(
     f'{WAFFLE_NAMESPACE}.use_on_disk_grade_reporting', __name__
 )
 
+# .. toggle_name: instructor_task.use_chunked_grade_reporting
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When generating course grade reports, grade the learners in chunks of
+#   COURSE_GRADE_REPORT_USERS_PER_CHUNK users, each in a separate subtask writing a partial report,
+#   and then merge the partial reports. Reports generated this way are not limited by the time limit
+#   of a single task, and a report whose task is run again, e.g. after a worker restart, only grades
+#   the chunks which have not been completed yet.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+USE_CHUNKED_GRADE_REPORTING = CourseWaffleFlag(
+    f'{WAFFLE_NAMESPACE}.use_chunked_grade_reporting', __name__
+)
+
+# .. toggle_name: instructor_task.use_columnar_problem_grade_reporting
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When generating problem grade reports, compute the problem scores of each batch of
+#   learners as (learners x problems) arrays from bulk reads of their scores, rather than computing a full
+#   course grade for each learner and looking up each of their problem scores. Learners or courses which
+#   cannot be graded in batches are graded one at a time as before.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+USE_COLUMNAR_PROBLEM_GRADE_REPORTING = CourseWaffleFlag(
+    f'{WAFFLE_NAMESPACE}.use_columnar_problem_grade_reporting', __name__
+)
+
+# .. toggle_name: instructor_task.use_streaming_problem_responses_report
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When generating problem responses reports, read learners' state from StudentModule in
+#   batches in primary key order and write each response to a temporary file as it is read, rather than holding
+#   every response in memory until the report is uploaded. Avoids running out of memory for problems with very
+#   many submissions.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+USE_STREAMING_PROBLEM_RESPONSES_REPORT = CourseWaffleFlag(
+    f'{WAFFLE_NAMESPACE}.use_streaming_problem_responses_report', __name__
+)
+
 
 def optimize_get_learners_switch_enabled():
     """
@@ -69,3 +109,28 @@ def use_on_disk_grade_reporting(course_id):
     False otherwise.
     """
     return USE_ON_DISK_GRADE_REPORTING.is_enabled(course_id)
+
+
+def use_chunked_grade_reporting(course_id):
+    """
+    Returns True if course grade reports should be generated
+    in chunks by parallel subtasks, False otherwise.
+    """
+    return USE_CHUNKED_GRADE_REPORTING.is_enabled(course_id)
+
+
+def use_columnar_problem_grade_reporting(course_id):
+    """
+    Returns True if problem grade reports should compute
+    the problem scores of batches of learners as arrays,
+    False otherwise.
+    """
+    return USE_COLUMNAR_PROBLEM_GRADE_REPORTING.is_enabled(course_id)
+
+
+def use_streaming_problem_responses_report(course_id):
+    """
+    Returns True if problem responses reports should be
+    streamed through temporary files, False otherwise.
+    """
+    return USE_STREAMING_PROBLEM_RESPONSES_REPORT.is_enabled(course_id)
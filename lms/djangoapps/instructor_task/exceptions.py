@@ -16,3 +16,8 @@ class UpdateProblemModuleStateError(Exception):
 class DuplicateTaskException(Exception):
     """Exception indicating that a task already exists or has already completed."""
     pass  # lint-amnesty, pylint: disable=unnecessary-pass
+
+
+class SubtaskLockedException(DuplicateTaskException):
+    """Exception indicating that a subtask is locked, as being executed by another worker."""
+    pass  # lint-amnesty, pylint: disable=unnecessary-pass
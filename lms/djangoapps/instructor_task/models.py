@@ -23,7 +23,7 @@ from botocore.exceptions import ClientError
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 
 from django.utils.translation import gettext as _
@@ -293,9 +293,14 @@ class DjangoStorageReportStore(ReportStore):
         """
         Store the contents of `buff` in a directory determined by hashing
         `course_id`, and name the file `filename`. `buff` can be any file-like
-        object, ready to be read from the beginning.
+        object, ready to be read from the beginning. Binary files are streamed
+        to the storage backend rather than read into memory.
         """
         path = self.path_to(course_id, filename, parent_dir)
+        if isinstance(buff.read(0), bytes):
+            self.storage.save(path, File(buff))
+            return
+
         # See https://github.com/boto/boto/issues/2868
         # Boto doesn't play nice with unicode in python3
         buff_contents = buff.read()
@@ -18,7 +18,7 @@ from django.db import DatabaseError, transaction
 
 from common.djangoapps.util.db import outer_atomic
 
-from .exceptions import DuplicateTaskException
+from .exceptions import DuplicateTaskException, SubtaskLockedException
 from .models import PROGRESS, QUEUING, InstructorTask
 
 TASK_LOG = logging.getLogger('edx.celery.task')
@@ -209,7 +209,7 @@ class SubtaskStatus:
         return str(repr(self))
 
 
-def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
+def initialize_subtask_info(entry, action_name, total_num, subtask_id_list, subtask_inputs=None):
     """
     Store initial subtask information to InstructorTask object.
 
@@ -230,6 +230,10 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
     information for each subtask.  The value for each subtask (keyed by its task_id)
     is its subtask status, as defined by SubtaskStatus.to_dict().
 
+    If `subtask_inputs` is given, it is a dict of the input of each subtask (keyed by its task_id),
+    stored in an 'inputs' key so that the subtasks can be queued again when the task is resumed
+    (see reset_incomplete_subtasks).
+
     This information needs to be set up in the InstructorTask before any of the subtasks start
     running.  If not, there is a chance that the subtasks could complete before the parent task
     is done creating subtasks.  Doing so also simplifies the save() here, as it avoids the need
@@ -263,6 +267,8 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
         'failed': 0,
         'status': subtask_status
     }
+    if subtask_inputs is not None:
+        subtask_dict['inputs'] = subtask_inputs
     entry.subtasks = json.dumps(subtask_dict)
 
     # and save the entry immediately, before any subtasks actually start work:
@@ -352,6 +358,91 @@ def queue_subtasks_for_query(
     return progress
 
 
+def get_subtask_inputs(entry):
+    """
+    Returns the dict of the input of each subtask of the InstructorTask `entry`, keyed by its task_id,
+    as stored by initialize_subtask_info.
+    """
+    return json.loads(entry.subtasks).get('inputs', {})
+
+
+@transaction.atomic
+def reset_incomplete_subtasks(entry_id):
+    """
+    Replaces the subtasks of an InstructorTask which have not succeeded with new subtasks, so that
+    the task can be resumed by queueing only those, for instance when it is run again after a
+    worker restart.
+
+    Each new subtask takes over the input of the subtask it replaces, and the progress counted
+    for failed subtasks is removed from the task's progress.  Subtasks which are still queued or
+    running are replaced as well: they may have been lost, and if they were not, they are rejected
+    by check_subtask_is_valid as unknown to the InstructorTask.
+
+    Returns a dict of the inputs of the new subtasks, keyed by their task_ids.
+    """
+    entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    subtask_inputs = subtask_dict.get('inputs', {})
+    task_progress = json.loads(entry.task_output)
+
+    new_subtask_inputs = {}
+    for subtask_id, subtask_status_dict in list(subtask_dict['status'].items()):
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        if subtask_status.state == SUCCESS:
+            continue
+        if subtask_status.state in READY_STATES:
+            subtask_dict['failed'] -= 1
+            for statname in ['attempted', 'succeeded', 'failed', 'skipped']:
+                task_progress[statname] -= getattr(subtask_status, statname)
+        new_subtask_id = str(uuid4())
+        del subtask_dict['status'][subtask_id]
+        subtask_dict['status'][new_subtask_id] = SubtaskStatus.create(new_subtask_id).to_dict()
+        new_subtask_inputs[new_subtask_id] = subtask_inputs.pop(subtask_id, None)
+
+    TASK_LOG.info(
+        "Replacing %s incomplete subtasks of instructor task %d to resume it.",
+        len(new_subtask_inputs),
+        entry_id,
+    )
+    subtask_inputs.update(new_subtask_inputs)
+    subtask_dict['inputs'] = subtask_inputs
+    entry.subtasks = json.dumps(subtask_dict)
+    entry.task_output = InstructorTask.create_output_for_success(task_progress)
+    entry.task_state = PROGRESS if new_subtask_inputs else SUCCESS
+    entry.save()
+    return new_subtask_inputs
+
+
+@transaction.atomic
+def start_subtask_after_others(entry_id, current_task_id):
+    """
+    Marks a subtask which must only run once all the other subtasks of its InstructorTask are done
+    as in progress, if they are done and it has not already been started.
+
+    This lets each of the other subtasks try to start it when it completes, while ensuring that
+    only one of them does.
+
+    Returns None if the subtask was not marked, otherwise whether all the other subtasks succeeded.
+    """
+    entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    subtask_status_info = subtask_dict['status']
+    subtask_status = SubtaskStatus.from_dict(subtask_status_info[current_task_id])
+    other_states = [
+        other_subtask_status['state']
+        for subtask_id, other_subtask_status in subtask_status_info.items()
+        if subtask_id != current_task_id
+    ]
+    if subtask_status.state != QUEUING or any(state not in READY_STATES for state in other_states):
+        return None
+
+    subtask_status.state = PROGRESS
+    subtask_status_info[current_task_id] = subtask_status.to_dict()
+    entry.subtasks = json.dumps(subtask_dict)
+    entry.save()
+    return all(state == SUCCESS for state in other_states)
+
+
 def _acquire_subtask_lock(task_id):
     """
     Mark the specified task_id as being in progress.
@@ -453,7 +544,7 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         format_str = "Unexpected task_id '{}': already being executed - for subtask of instructor task '{}'"
         msg = format_str.format(current_task_id, entry)
         TASK_LOG.warning(msg)
-        raise DuplicateTaskException(msg)
+        raise SubtaskLockedException(msg)
 
 
 def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
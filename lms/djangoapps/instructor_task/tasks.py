@@ -35,7 +35,12 @@ from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_may_enroll_csv,
     upload_students_csv
 )
-from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport, ProblemGradeReport, ProblemResponses
+from lms.djangoapps.instructor_task.tasks_helper.grades import (
+    ChunkedCourseGradeReport,
+    CourseGradeReport,
+    ProblemGradeReport,
+    ProblemResponses
+)
 from lms.djangoapps.instructor_task.tasks_helper.misc import (
     cohort_students_and_upload,
     upload_course_survey_report,
@@ -197,10 +202,36 @@ def calculate_grades_csv(entry_id, xblock_instance_args):
         xblock_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xblock_instance_args)
+    task_fn = partial(CourseGradeReport.generate, xblock_instance_args, chunk_task=calculate_grades_csv_chunk)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+@set_code_owner_attribute
+def calculate_grades_csv_chunk(entry_id, xblock_instance_args, subtask_input, subtask_status_dict):
+    """
+    Grade a chunk of the learners of a course into a partial grade report, or merge
+    the partial grade reports and push the results to an S3 bucket for download.
+
+    These are the subtasks of `calculate_grades_csv` when the report is generated in
+    chunks.  `subtask_input` defines the chunk, as described by ChunkedCourseGradeReport,
+    and `subtask_status_dict` is the initial SubtaskStatus of the subtask as a dict.
+
+    The subtasks are only acknowledged once done, so that those lost with their worker
+    are redelivered: grading a chunk again replaces its partial report.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = gettext_noop('graded')
+    return ChunkedCourseGradeReport.run_subtask(
+        xblock_instance_args,
+        entry_id,
+        subtask_input,
+        subtask_status_dict,
+        action_name,
+        calculate_grades_csv_chunk,
+    )
+
+
 @shared_task(base=BaseInstructorTask)
 @set_code_owner_attribute
 def calculate_problem_grade_report(entry_id, xblock_instance_args):
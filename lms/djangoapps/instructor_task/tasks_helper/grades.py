@@ -3,38 +3,63 @@ Functionality for generating grade reports.
 """
 
 import csv
+import io
+import json
 import logging
 import re
+import shutil
 from collections import OrderedDict, defaultdict
 from datetime import datetime
 from itertools import chain
 from tempfile import TemporaryFile
 
 from time import time
+from uuid import uuid4
 
+import numpy as np
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from lazy import lazy
 from opaque_keys.edx.keys import UsageKey
 from pytz import UTC
 from six.moves import zip_longest
+from xblock.fields import Scope
 
 from common.djangoapps.course_modes.models import CourseMode
 from common.djangoapps.student.models import CourseEnrollment
 from common.djangoapps.student.roles import BulkRoleCache
+from common.djangoapps.util.db import outer_atomic
 from lms.djangoapps.certificates import api as certs_api
 from lms.djangoapps.certificates.models import GeneratedCertificate
 from lms.djangoapps.course_blocks.api import get_course_blocks
-from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
-from lms.djangoapps.grades.api import CourseGradeFactory
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient, XBlockUserState
+from lms.djangoapps.grades.api import BatchCourseGrader, CourseGradeFactory
 from lms.djangoapps.grades.api import context as grades_context
+from lms.djangoapps.grades.api import course_data as grades_course_data
 from lms.djangoapps.grades.api import prefetch_course_and_subsection_grades
-from lms.djangoapps.instructor_analytics.basic import list_problem_responses
+from lms.djangoapps.instructor_analytics.basic import get_response_state, list_problem_responses
 from lms.djangoapps.instructor_analytics.csvs import format_dictlist
 from lms.djangoapps.instructor_task.config.waffle import (
     course_grade_report_verified_only,
     problem_grade_report_verified_only,
+    use_chunked_grade_reporting,
+    use_columnar_problem_grade_reporting,
     use_on_disk_grade_reporting,
+    use_streaming_problem_responses_report,
+)
+from lms.djangoapps.instructor_task.exceptions import DuplicateTaskException, SubtaskLockedException
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskStatus,
+    check_subtask_is_valid,
+    get_subtask_inputs,
+    initialize_subtask_info,
+    reset_incomplete_subtasks,
+    start_subtask_after_others,
+    update_subtask_status,
 )
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
@@ -205,8 +230,7 @@ class _ProblemGradeReportContext:
         headers in the final report.
         """
         scorable_blocks_map = OrderedDict()
-        grading_context = grades_context.grading_context_for_course(self.course)
-        for assignment_type_name, subsection_infos in grading_context['all_graded_subsections_by_type'].items():
+        for assignment_type_name, subsection_infos in self.grading_context['all_graded_subsections_by_type'].items():
             for subsection_index, subsection_info in enumerate(subsection_infos, start=1):
                 for scorable_block in subsection_info['scored_descendants']:
                     header_name = (
@@ -226,6 +250,37 @@ class _ProblemGradeReportContext:
     def course_structure(self):
         return get_course_in_cache(self.course_id)
 
+    @lazy
+    def grading_context(self):
+        return grades_context.grading_context(self.course, self.course_structure)
+
+    @lazy
+    def batch_grader(self):
+        """
+        Returns the BatchCourseGrader with which the problem scores of each
+        batch of learners are computed, or None if learners are graded one
+        at a time.
+        """
+        if not use_columnar_problem_grade_reporting(self.course_id):
+            return None
+        batch_grader = BatchCourseGrader(grades_course_data.CourseData(
+            None,
+            course=self.course,
+            collected_block_structure=self.course_structure,
+            course_key=self.course_id,
+        ))
+        unsupported_reason = batch_grader.unsupported_reason
+        graded_formats = {subgrader.type for subgrader, _, _ in batch_grader.plan.subgraders}
+        if not unsupported_reason and set(self.grading_context['all_graded_subsections_by_type']) - graded_formats:
+            # The plan only lays out subsections graded by the course grader, but the report has all graded ones.
+            unsupported_reason = 'some graded subsections are not graded by the course grader'
+        if unsupported_reason:
+            TASK_LOG.info(
+                '%s, Not computing problem scores in batches because %s', self.task_info_string, unsupported_reason,
+            )
+            return None
+        return batch_grader
+
     def update_status(self, message):
         """
         Updates the status on the celery task to the given message.
@@ -451,18 +506,12 @@ class GradeReportBase:
             args = [iter(iterable)] * chunk_size
             return zip_longest(*args, fillvalue=fillvalue)
 
-        def get_enrolled_learners_for_course(course_id, verified_only=False):
+        def get_enrolled_learners_for_course(filter_kwargs):
             """
             Get all the enrolled users in a course chunk by chunk.
             This generator method fetches & loads the enrolled user objects on demand which in chunk
             size defined. This method is a workaround to avoid out-of-memory errors.
             """
-            filter_kwargs = {
-                'courseenrollment__course_id': course_id,
-            }
-            if verified_only:
-                filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
-
             user_ids_list = get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True).order_by('id')
             user_chunks = grouper(user_ids_list)
             for user_ids in user_chunks:
@@ -477,10 +526,18 @@ class GradeReportBase:
 
                 yield users
 
-        return get_enrolled_learners_for_course(
-            course_id=self.context.course_id,
-            verified_only=self.context.report_for_verified_only
-        )
+        return get_enrolled_learners_for_course(self._learner_filter_kwargs())
+
+    def _learner_filter_kwargs(self):
+        """
+        Returns the filters selecting the users included in this report.
+        """
+        filter_kwargs = {
+            'courseenrollment__course_id': self.context.course_id,
+        }
+        if self.context.report_for_verified_only:
+            filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
+        return filter_kwargs
 
     def log_additional_info_for_testing(self, message):
         """
@@ -513,13 +570,19 @@ class CourseGradeReport(GradeReportBase):
     USER_BATCH_SIZE = 100
 
     @classmethod
-    def generate(cls, _xblock_instance_args, _entry_id, course_id, _task_input, action_name):
+    def generate(cls, _xblock_instance_args, _entry_id, course_id, _task_input, action_name, chunk_task=None):
         """
         Public method to generate a grade report.
+
+        If `chunk_task` is given, it is the celery task with which the report is
+        generated in chunks when chunked grade reporting is enabled for the course
+        (see ChunkedCourseGradeReport).
         """
         with modulestore().bulk_operations(course_id):
             context = _CourseGradeReportContext(_xblock_instance_args, _entry_id, course_id, _task_input, action_name)
-            if use_on_disk_grade_reporting(course_id):  # AU-926
+            if chunk_task is not None and use_chunked_grade_reporting(course_id):
+                return ChunkedCourseGradeReport.queue_chunks(context, _xblock_instance_args, _entry_id, chunk_task)
+            elif use_on_disk_grade_reporting(course_id):  # AU-926
                 return TempFileCourseGradeReport(context)._generate()  # pylint: disable=protected-access
             else:
                 return InMemoryCourseGradeReport(context)._generate()  # pylint: disable=protected-access
@@ -706,6 +769,255 @@ class TempFileCourseGradeReport(CourseGradeReport, TemporaryFileReportMixin):
     """ Course Grade Report that writes file iteratively to a TempFile to then be uploaded """
 
 
+class ChunkedCourseGradeReport(CourseGradeReport, TemporaryFileReportMixin):
+    """
+    Course Grade Report that is generated by parallel subtasks, each grading the
+    learners in a range of user ids into a partial report, after which a final
+    subtask merges the partial reports into the uploaded report.
+
+    The subtasks are tracked by the report's InstructorTask, as defined in
+    instructor_task.subtasks, and the partial reports are kept in the report store
+    until they are merged.  A subtask lost with its worker is redelivered and run
+    again once its lock has expired; grading a chunk or merging the partial reports
+    again is safe.  When the report's task is run again for the same InstructorTask,
+    only the chunks which have not succeeded yet are graded again.
+
+    The input of each chunk's subtask is a dict of its 'chunk_index' and the
+    'user_id_range' of its learners, and that of the merging subtask is a dict
+    of the 'chunk_count'.
+    """
+    # Directory of the report store, relative to the report's own, where partial reports are kept.
+    PARTIAL_REPORTS_DIR = 'partial_grade_reports'
+
+    def __init__(self, context, user_id_range=None):
+        super().__init__(context)
+        self.user_id_range = user_id_range
+
+    @classmethod
+    def queue_chunks(cls, context, xblock_instance_args, entry_id, chunk_task):
+        """
+        Queues the subtasks generating a grade report for the given context, or
+        those which have not succeeded yet if they were already defined, and
+        returns the task progress as stored in the InstructorTask.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        if entry.subtasks:
+            TASK_LOG.info('%s, Resuming chunked grade report', context.task_info_string)
+            subtask_inputs = reset_incomplete_subtasks(entry_id)
+        else:
+            user_id_ranges, total_num_users = cls(context)._user_id_ranges()
+            subtask_inputs = {
+                str(uuid4()): {'chunk_index': chunk_index, 'user_id_range': user_id_range}
+                for chunk_index, user_id_range in enumerate(user_id_ranges)
+            }
+            subtask_inputs[str(uuid4())] = {'chunk_count': len(user_id_ranges)}
+            with outer_atomic():
+                initialize_subtask_info(
+                    entry, context.action_name, total_num_users, list(subtask_inputs), subtask_inputs,
+                )
+
+        TASK_LOG.info('%s, Queueing %s grade report subtasks', context.task_info_string, len(subtask_inputs))
+        for subtask_id, subtask_input in subtask_inputs.items():
+            if 'user_id_range' in subtask_input:
+                cls._queue_subtask(chunk_task, entry_id, xblock_instance_args, subtask_id, subtask_input)
+        # The merge is queued by the last chunk to complete, unless there is none left to grade.
+        cls._queue_merge_when_graded(chunk_task, entry_id, xblock_instance_args)
+
+        return json.loads(InstructorTask.objects.get(pk=entry_id).task_output)
+
+    @classmethod
+    def run_subtask(cls, xblock_instance_args, entry_id, subtask_input, subtask_status_dict, action_name, chunk_task):
+        """
+        Grades the chunk of learners defined by `subtask_input` into a partial
+        report, or merges the partial reports if it defines the final subtask,
+        and records the subtask's status in the InstructorTask.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        current_task_id = subtask_status.task_id
+        is_chunk = 'user_id_range' in subtask_input
+        try:
+            check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+        except SubtaskLockedException as exc:
+            # The subtask is redelivered after the worker running it was lost, or is a
+            # duplicate of one still running: check it again once the lock has expired.
+            raise chunk_task.retry(exc=exc, countdown=SUBTASK_LOCK_EXPIRE)
+        except DuplicateTaskException:
+            # The chunk was graded, but its worker may have been lost before queueing the merge.
+            if is_chunk:
+                cls._queue_merge_when_graded(chunk_task, entry_id, xblock_instance_args)
+            raise
+
+        entry = InstructorTask.objects.get(pk=entry_id)
+        course_id = entry.course_id
+        context = _CourseGradeReportContext(
+            xblock_instance_args, entry_id, course_id, json.loads(entry.task_input), action_name,
+        )
+        try:
+            with modulestore().bulk_operations(course_id):
+                if is_chunk:
+                    report = cls(context, subtask_input['user_id_range'])
+                    report._generate_chunk(entry.task_id, subtask_input['chunk_index'])
+                    subtask_status.increment(
+                        succeeded=context.task_progress.succeeded,
+                        failed=context.task_progress.failed,
+                        state=SUCCESS,
+                    )
+                else:
+                    cls(context)._merge_chunks(entry.task_id, subtask_input['chunk_count'])
+                    subtask_status.increment(state=SUCCESS)
+        except Exception:
+            TASK_LOG.exception('%s, Grade report subtask %s failed', context.task_info_string, current_task_id)
+            subtask_status.increment(state=FAILURE)
+            update_subtask_status(entry_id, current_task_id, subtask_status)
+            if is_chunk:
+                cls._queue_merge_when_graded(chunk_task, entry_id, xblock_instance_args)
+            raise
+
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        if is_chunk:
+            cls._queue_merge_when_graded(chunk_task, entry_id, xblock_instance_args)
+        return subtask_status.to_dict()
+
+    @staticmethod
+    def _queue_subtask(chunk_task, entry_id, xblock_instance_args, subtask_id, subtask_input):
+        """
+        Queues the subtask with the given id and input.
+        """
+        chunk_task.subtask(
+            (entry_id, xblock_instance_args, subtask_input, SubtaskStatus.create(subtask_id).to_dict()),
+            task_id=subtask_id,
+        ).apply_async()
+
+    @classmethod
+    def _queue_merge_when_graded(cls, chunk_task, entry_id, xblock_instance_args):
+        """
+        Queues the subtask merging the partial reports if all the chunks have
+        been graded, or records it as failed if any of them failed.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        merge_subtask_id, merge_input = next(
+            (subtask_id, subtask_input)
+            for subtask_id, subtask_input in get_subtask_inputs(entry).items()
+            if 'chunk_count' in subtask_input
+        )
+        chunks_succeeded = start_subtask_after_others(entry_id, merge_subtask_id)
+        if chunks_succeeded:
+            cls._queue_subtask(chunk_task, entry_id, xblock_instance_args, merge_subtask_id, merge_input)
+        elif chunks_succeeded is not None:
+            TASK_LOG.warning('InstructorTask ID: %s, Not merging grade report with failed chunks', entry_id)
+            update_subtask_status(entry_id, merge_subtask_id, SubtaskStatus.create(merge_subtask_id, state=FAILURE))
+
+    def _learner_filter_kwargs(self):
+        filter_kwargs = super()._learner_filter_kwargs()
+        if self.user_id_range is not None:
+            filter_kwargs['id__range'] = self.user_id_range
+        return filter_kwargs
+
+    def _user_id_ranges(self):
+        """
+        Returns the ranges of the ids of the users graded by each chunk of this
+        report, and the total number of users.
+        """
+        users_per_chunk = settings.COURSE_GRADE_REPORT_USERS_PER_CHUNK
+        user_ids = get_user_model().objects.filter(
+            **self._learner_filter_kwargs()
+        ).values_list('id', flat=True).order_by('id')
+
+        user_id_ranges = []
+        total_num_users = 0
+        for user_id in user_ids.iterator():
+            if total_num_users % users_per_chunk == 0:
+                user_id_ranges.append([user_id, user_id])
+            else:
+                user_id_ranges[-1][1] = user_id
+            total_num_users += 1
+        return user_id_ranges, total_num_users
+
+    def _partial_report_name(self, task_id, chunk_index, suffix=''):
+        """
+        Returns the name of a partial report of the given chunk.
+        """
+        return '{directory}/{task_id}/{filename}_{chunk_index:05d}{suffix}.csv'.format(
+            directory=self.PARTIAL_REPORTS_DIR,
+            task_id=task_id,
+            filename=self.context.upload_filename,
+            chunk_index=chunk_index,
+            suffix=suffix,
+        )
+
+    def _generate_chunk(self, task_id, chunk_index):
+        """
+        Grades the learners in this report's range of user ids, and stores their
+        rows in partial reports.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        with TemporaryFile('r+') as success_file, TemporaryFile('r+') as error_file:
+            has_errors = self.iter_and_write_batched_rows(self._batched_rows(), success_file, error_file)
+            self._store_partial_report(report_store, success_file, self._partial_report_name(task_id, chunk_index))
+            if has_errors:
+                self._store_partial_report(
+                    report_store, error_file, self._partial_report_name(task_id, chunk_index, '_err'),
+                )
+
+    def _store_partial_report(self, report_store, partial_file, partial_report_name):
+        """
+        Stores the partial report in `partial_file`, replacing any stored by an
+        earlier attempt at the same chunk.
+        """
+        path = report_store.path_to(self.context.course_id, partial_report_name, self.context.upload_parent_dir)
+        if report_store.storage.exists(path):
+            report_store.storage.delete(path)
+        partial_file.seek(0)
+        report_store.store(self.context.course_id, partial_report_name, partial_file, self.context.upload_parent_dir)
+
+    def _merge_chunks(self, task_id, chunk_count):
+        """
+        Streams the partial reports of all the chunks, in order, into the
+        uploaded report, and deletes them.
+
+        A missing partial report was deleted by an earlier attempt at the merge,
+        once it had uploaded the report, so only the remaining ones are deleted.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        partial_paths = {
+            (chunk_index, suffix): report_store.path_to(
+                self.context.course_id,
+                self._partial_report_name(task_id, chunk_index, suffix),
+                self.context.upload_parent_dir,
+            )
+            for chunk_index in range(chunk_count)
+            for suffix in ('', '_err')
+        }
+        existing_paths = [path for path in partial_paths.values() if report_store.storage.exists(path)]
+        if any(partial_paths[chunk_index, ''] not in existing_paths for chunk_index in range(chunk_count)):
+            TASK_LOG.warning('%s, Grade report already merged', self.context.task_info_string)
+            for path in existing_paths:
+                report_store.storage.delete(path)
+            return
+
+        with TemporaryFile('r+') as success_file, TemporaryFile('r+') as error_file:
+            csv.writer(success_file).writerow(self._success_headers())
+            csv.writer(error_file).writerow(self._error_headers())
+            has_errors = False
+            for chunk_index in range(chunk_count):
+                for suffix, merged_file in (('', success_file), ('_err', error_file)):
+                    path = partial_paths[chunk_index, suffix]
+                    if path not in existing_paths:
+                        continue
+                    with report_store.storage.open(path, 'rb') as partial_file:
+                        partial_text = io.TextIOWrapper(partial_file, encoding='utf-8', newline='')
+                        # Skip the partial report's own header.
+                        next(csv.reader(partial_text), None)
+                        shutil.copyfileobj(partial_text, merged_file)
+                        partial_text.detach()
+                    has_errors = has_errors or bool(suffix)
+
+            self.upload_temp_files(success_file, error_file, has_errors)
+
+        for path in existing_paths:
+            report_store.storage.delete(path)
+
+
 class ProblemGradeReport(GradeReportBase):
     """
     Class to encapsulate functionality related to generating user/row had header data for Problem Grade Reports.
@@ -748,10 +1060,15 @@ class ProblemGradeReport(GradeReportBase):
     def _rows_for_users(self, users):
         """
         Returns a list of rows for the given users for this report.
+
+        The rows of the users who can be graded in a batch are built from
+        arrays of their problem scores, and the others from their course grades.
         """
-        success_rows, error_rows = [], []
+        users = list(users)
+        success_rows_by_user_id = self._batch_rows_for_users(users) if self.context.batch_grader else {}
+        error_rows = []
         for student, course_grade, error in CourseGradeFactory().iter(
-            users,
+            [user for user in users if user.id not in success_rows_by_user_id],
             course=self.context.course,
             collected_block_structure=self.context.course_structure,
             course_key=self.context.course_id,
@@ -780,14 +1097,63 @@ class ProblemGradeReport(GradeReportBase):
                         earned_possible_values.append(['Not Attempted', problem_score.possible])
 
             enrollment_status = _user_enrollment_status(student, self.context.course_id)
-            success_rows.append(
+            success_rows_by_user_id[student.id] = (
                 [student.id, student.email, student.username] +
                 [enrollment_status, course_grade.percent] +
                 _flatten(earned_possible_values)
             )
 
+        success_rows = [success_rows_by_user_id[user.id] for user in users if user.id in success_rows_by_user_id]
         return success_rows, error_rows
 
+    def _batch_rows_for_users(self, users):
+        """
+        Returns a dict of the rows of the given users who can be graded in a
+        batch, keyed by user id, with the problem score columns built from
+        the (users x problems) arrays of their scores.
+        """
+        try:
+            course_grades, problem_scores = self.context.batch_grader.grade_problems(users)
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.exception(
+                '%s, Failed to compute problem scores in batch for %d users', self.context.task_info_string, len(users),
+            )
+            return {}
+        if not course_grades:
+            return {}
+
+        columns = [problem_scores.plan.block_index(location) for location in self.context.graded_scorable_blocks_header]
+        in_plan = np.array([column is not None for column in columns], dtype=bool)
+        plan_columns = np.array([column for column in columns if column is not None], dtype=np.intp)
+        is_available = problem_scores.is_available[:, plan_columns]
+        earned = np.where(
+            is_available,
+            np.where(
+                problem_scores.is_attempted[:, plan_columns],
+                problem_scores.earned[:, plan_columns].astype(object),
+                'Not Attempted',
+            ),
+            'Not Available',
+        )
+        possible = np.where(is_available, problem_scores.possible[:, plan_columns].astype(object), 'Not Available')
+
+        # Interleave the earned and possible columns, with problems outside of the plan not available.
+        cells = np.full((len(problem_scores.user_rows), len(columns), 2), 'Not Available', dtype=object)
+        cells[:, in_plan, 0] = earned
+        cells[:, in_plan, 1] = possible
+        cells = cells.reshape(len(problem_scores.user_rows), -1).tolist()
+
+        rows = {}
+        for user in users:
+            row = problem_scores.user_rows.get(user.id)
+            if row is not None:
+                rows[user.id] = (
+                    [user.id, user.email, user.username] +
+                    [_user_enrollment_status(user, self.context.course_id), course_grades[user.id].percent] +
+                    cells[row]
+                )
+        return rows
+
     def _clear_caches(self):
         get_cache('get_enrollment').clear()
         get_cache(CourseEnrollment.MODE_CACHE_NAMESPACE).clear()
@@ -847,6 +1213,80 @@ class ProblemResponses:
             name = course_blocks.get_xblock_field(block, 'display_name') or block.block_type
             yield from cls._build_problem_list(course_blocks, block, path + [name])
 
+    @classmethod
+    def _iter_report_blocks(cls, user, usage_keys, filter_types=None):
+        """
+        Generate the blocks under the ``usage_keys`` roots whose responses are
+        included in the report.
+        Arguments:
+            user (User): The user generating the report
+            usage_keys (List[UsageKey]): The report will include these blocks
+                and their child blocks.
+            filter_types (List[str]): Only blocks of types in this list are included.
+        Yields:
+            Tuple[str, str, UsageKey]: tuple of a block's display name, human-readable
+                location, and usage key
+        """
+        store = modulestore()
+        for usage_key in usage_keys:
+            course_blocks = get_course_blocks(user, usage_key)
+            base_path = cls._build_block_base_path(store.get_item(usage_key))
+            for title, path, block_key in cls._build_problem_list(course_blocks, usage_key):
+                # Chapter and sequential blocks are filtered out since they include state
+                # which isn't useful for this report.
+                if block_key.block_type in ('sequential', 'chapter'):
+                    continue
+
+                if filter_types is not None and block_key.block_type not in filter_types:
+                    continue
+
+                yield title, ' > '.join(base_path + path), block_key
+
+    @staticmethod
+    def _expand_response(response, user_states, student_data_keys):
+        """
+        Generate the rows for a learner's response: one for each of the states
+        generated from it by the block's ``generate_report_data``, if any, or
+        else the response itself. The keys of the generated states are added
+        to ``student_data_keys``.
+        """
+        if not user_states:
+            yield response
+            return
+
+        # A block that has a single state per user can contain multiple responses
+        # within the same state.
+        # For each response in the block, copy over the basic data like the
+        # title, location, block_key and state, and add in the responses
+        for user_state in user_states:
+            user_response = response.copy()
+            user_response.update(user_state)
+
+            # Respect the column order as returned by the xblock, if any.
+            if isinstance(user_state, OrderedDict):
+                user_state_keys = user_state.keys()
+            else:
+                user_state_keys = sorted(user_state.keys())
+            for key in user_state_keys:
+                student_data_keys[key] = 1
+
+            yield user_response
+
+    @staticmethod
+    def _student_data_keys_list(student_data_keys):
+        """
+        Returns the columns of the report, given the keys of the states
+        generated by the blocks' ``generate_report_data``.
+        """
+        # Keep the keys in a useful order, starting with username, title and location,
+        # then the columns returned by the xblock report generator in sorted order and
+        # finally end with the more machine friendly block_key and state.
+        return (
+            ['username', 'title', 'location'] +
+            list(student_data_keys.keys()) +
+            ['block_key', 'state']
+        )
+
     @classmethod
     def _build_student_data(
         cls, user_id, course_key, usage_key_str_list, filter_types=None,
@@ -884,80 +1324,163 @@ class ProblemResponses:
         student_data_keys = OrderedDict()
 
         with store.bulk_operations(course_key):
-            for usage_key in usage_keys:  # lint-amnesty, pylint: disable=too-many-nested-blocks
+            for title, location, block_key in cls._iter_report_blocks(user, usage_keys, filter_types):
                 if max_count is not None and max_count <= 0:
                     break
-                course_blocks = get_course_blocks(user, usage_key)
-                base_path = cls._build_block_base_path(store.get_item(usage_key))
-                for title, path, block_key in cls._build_problem_list(course_blocks, usage_key):
-                    # Chapter and sequential blocks are filtered out since they include state
-                    # which isn't useful for this report.
-                    if block_key.block_type in ('sequential', 'chapter'):
-                        continue
 
-                    if filter_types is not None and block_key.block_type not in filter_types:
-                        continue
+                block = store.get_item(block_key)
+                generated_report_data = defaultdict(list)
 
-                    block = store.get_item(block_key)
-                    generated_report_data = defaultdict(list)
-
-                    # Blocks can implement the generate_report_data method to provide their own
-                    # human-readable formatting for user state.
-                    if hasattr(block, 'generate_report_data'):
-                        try:
-                            user_state_iterator = user_state_client.iter_all_for_block(block_key)
-                            for username, state in block.generate_report_data(user_state_iterator, max_count):
-                                generated_report_data[username].append(state)
-                        except NotImplementedError:
-                            pass
-
-                    responses = []
-
-                    for response in list_problem_responses(course_key, block_key, max_count):
-                        response['title'] = title
-                        # A human-readable location for the current block
-                        response['location'] = ' > '.join(base_path + path)
-                        # A machine-friendly location for the current block
-                        response['block_key'] = str(block_key)
-                        # A block that has a single state per user can contain multiple responses
-                        # within the same state.
-                        user_states = generated_report_data.get(response['username'])
-                        if user_states:
-                            # For each response in the block, copy over the basic data like the
-                            # title, location, block_key and state, and add in the responses
-                            for user_state in user_states:
-                                user_response = response.copy()
-                                user_response.update(user_state)
-
-                                # Respect the column order as returned by the xblock, if any.
-                                if isinstance(user_state, OrderedDict):
-                                    user_state_keys = user_state.keys()
-                                else:
-                                    user_state_keys = sorted(user_state.keys())
-                                for key in user_state_keys:
-                                    student_data_keys[key] = 1
-
-                                responses.append(user_response)
-                        else:
-                            responses.append(response)
-
-                    student_data += responses
-
-                    if max_count is not None:
-                        max_count -= len(responses)
-                        if max_count <= 0:
-                            break
+                # Blocks can implement the generate_report_data method to provide their own
+                # human-readable formatting for user state.
+                if hasattr(block, 'generate_report_data'):
+                    try:
+                        user_state_iterator = user_state_client.iter_all_for_block(block_key)
+                        for username, state in block.generate_report_data(user_state_iterator, max_count):
+                            generated_report_data[username].append(state)
+                    except NotImplementedError:
+                        pass
 
-        # Keep the keys in a useful order, starting with username, title and location,
-        # then the columns returned by the xblock report generator in sorted order and
-        # finally end with the more machine friendly block_key and state.
-        student_data_keys_list = (
-            ['username', 'title', 'location'] +
-            list(student_data_keys.keys()) +
-            ['block_key', 'state']
-        )
+                responses = []
+
+                for response in list_problem_responses(course_key, block_key, max_count):
+                    response['title'] = title
+                    # A human-readable location for the current block
+                    response['location'] = location
+                    # A machine-friendly location for the current block
+                    response['block_key'] = str(block_key)
+                    responses.extend(cls._expand_response(
+                        response, generated_report_data.get(response['username']), student_data_keys,
+                    ))
+
+                student_data += responses
+
+                if max_count is not None:
+                    max_count -= len(responses)
+
+        return student_data, cls._student_data_keys_list(student_data_keys)
 
-        return student_data, student_data_keys_list
+    @staticmethod
+    def _iter_block_responses(course_key, block, block_key):
+        """
+        Generate the responses of all learners to a block, reading their state
+        from StudentModule on each of the course's shards in batches in primary
+        key order, so that only one batch is held in memory at a time.
+        Arguments:
+            course_key (CourseKey): The ``CourseKey`` of the course
+            block (XBlock): The block whose responses are read
+            block_key (UsageKey): The usage key of the block in the course
+        Yields:
+            Tuple[Dict, List[Dict]]: tuple of a learner's response, and the
+                states generated from it by the block's ``generate_report_data``
+        """
+        generate_report_data = getattr(block, 'generate_report_data', None)
+        for manager in StudentModule.objects.for_shards(course_key):
+            student_modules = manager.filter(
+                course_id=course_key,
+                module_state_key=block_key,
+            ).order_by('id')
+
+            last_id = 0
+            while True:
+                batch = list(student_modules.filter(id__gt=last_id)[:settings.USER_STATE_BATCH_SIZE])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                # The shards don't store users, so the batch's usernames are loaded
+                # from the default database.
+                usernames = dict(get_user_model().objects.filter(
+                    id__in={student_module.student_id for student_module in batch},
+                ).values_list('id', 'username'))
+
+                generated_report_data = defaultdict(list)
+                if generate_report_data is not None:
+                    user_states = []
+                    for student_module in batch:
+                        state = json.loads(student_module.state)
+                        if state != {}:
+                            user_states.append(XBlockUserState(
+                                usernames[student_module.student_id],
+                                student_module.module_state_key,
+                                state,
+                                student_module.modified,
+                                Scope.user_state,
+                            ))
+                    try:
+                        for username, state in generate_report_data(iter(user_states)):
+                            generated_report_data[username].append(state)
+                    except NotImplementedError:
+                        generate_report_data = None
+
+                for student_module in batch:
+                    username = usernames[student_module.student_id]
+                    response = {'username': username, 'state': get_response_state(student_module)}
+                    yield response, generated_report_data.get(username)
+
+    @classmethod
+    def _iter_student_data(cls, user_id, course_key, usage_key_str_list, filter_types, student_data_keys):
+        """
+        Generate the problem responses for all problems under the
+        ``usage_key_str_list`` roots one at a time, as they are read by
+        ``_iter_block_responses``. The keys of the states generated by the
+        blocks' ``generate_report_data`` are added to ``student_data_keys``.
+        """
+        usage_keys = [
+            UsageKey.from_string(usage_key_str).map_into_course(course_key)
+            for usage_key_str in usage_key_str_list
+        ]
+        user = get_user_model().objects.get(pk=user_id)
+        max_count = settings.FEATURES.get('MAX_PROBLEM_RESPONSES_COUNT')
+        if max_count is not None and max_count <= 0:
+            return
+
+        store = modulestore()
+        with store.bulk_operations(course_key):
+            for title, location, block_key in cls._iter_report_blocks(user, usage_keys, filter_types):
+                block = store.get_item(block_key)
+                for response, user_states in cls._iter_block_responses(course_key, block, block_key):
+                    response.update(title=title, location=location, block_key=str(block_key))
+                    for user_response in cls._expand_response(response, user_states, student_data_keys):
+                        yield user_response
+                        if max_count is not None:
+                            max_count -= 1
+                            if max_count <= 0:
+                                return
+
+    @classmethod
+    def _write_student_data(cls, report_file, user_id, course_key, usage_key_str_list, filter_types=None):
+        """
+        Write a CSV of the problem responses for all problems under the
+        ``usage_key_str_list`` roots to the binary ``report_file``, holding
+        only one batch of responses in memory at a time.
+
+        The columns depend on the states generated for every response, so the
+        responses are written to a temporary file as they are read, and copied
+        into the CSV once all of its columns are known.
+
+        Returns:
+            int: the number of rows written, not counting the header
+        """
+        student_data_keys = OrderedDict()
+        row_count = 0
+        with TemporaryFile('w+') as student_data_file:
+            for response in cls._iter_student_data(
+                user_id, course_key, usage_key_str_list, filter_types, student_data_keys,
+            ):
+                student_data_file.write(json.dumps(response, default=str) + '\n')
+                row_count += 1
+
+            student_data_keys_list = cls._student_data_keys_list(student_data_keys)
+            report_text = io.TextIOWrapper(report_file, encoding='utf-8', newline='')
+            csv_writer = csv.writer(report_text)
+            csv_writer.writerow(student_data_keys_list)
+            student_data_file.seek(0)
+            for line in student_data_file:
+                response = json.loads(line)
+                csv_writer.writerow([str(response.get(key, '')) for key in student_data_keys_list])
+            report_text.detach()
+
+        return row_count
 
     @classmethod
     def generate(cls, _xblock_instance_args, _entry_id, course_id, task_input, action_name):
@@ -978,31 +1501,49 @@ class ProblemResponses:
         if problem_types_filter:
             filter_types = problem_types_filter.split(',')
 
-        # Compute result table and format it
-        student_data, student_data_keys = cls._build_student_data(
-            user_id=task_input.get('user_id'),
-            course_key=course_id,
-            usage_key_str_list=problem_locations,
-            filter_types=filter_types,
-        )
+        csv_name = cls._generate_upload_file_name(problem_locations, filter_types)
+        if use_streaming_problem_responses_report(course_id):
+            with TemporaryFile('w+b') as report_file:
+                task_progress.attempted = task_progress.succeeded = cls._write_student_data(
+                    report_file,
+                    user_id=task_input.get('user_id'),
+                    course_key=course_id,
+                    usage_key_str_list=problem_locations,
+                    filter_types=filter_types,
+                )
+                task_progress.skipped = task_progress.total - task_progress.attempted
 
-        for data in student_data:
-            for key in student_data_keys:
-                data.setdefault(key, '')
+                current_step = {'step': 'Uploading CSV'}
+                task_progress.update_task_state(extra_meta=current_step)
 
-        header, rows = format_dictlist(student_data, student_data_keys)
+                report_file.seek(0)
+                report_name = upload_csv_file_to_report_store(report_file, csv_name, course_id, start_date)
+        else:
+            # Compute result table and format it
+            student_data, student_data_keys = cls._build_student_data(
+                user_id=task_input.get('user_id'),
+                course_key=course_id,
+                usage_key_str_list=problem_locations,
+                filter_types=filter_types,
+            )
 
-        task_progress.attempted = task_progress.succeeded = len(rows)
-        task_progress.skipped = task_progress.total - task_progress.attempted
+            for data in student_data:
+                for key in student_data_keys:
+                    data.setdefault(key, '')
 
-        rows.insert(0, header)
+            header, rows = format_dictlist(student_data, student_data_keys)
 
-        current_step = {'step': 'Uploading CSV'}
-        task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted = task_progress.succeeded = len(rows)
+            task_progress.skipped = task_progress.total - task_progress.attempted
+
+            rows.insert(0, header)
+
+            current_step = {'step': 'Uploading CSV'}
+            task_progress.update_task_state(extra_meta=current_step)
+
+            # Perform the upload
+            report_name = upload_csv_to_report_store(rows, csv_name, course_id, start_date)
 
-        # Perform the upload
-        csv_name = cls._generate_upload_file_name(problem_locations, filter_types)
-        report_name = upload_csv_to_report_store(rows, csv_name, course_id, start_date)
         current_step = {
             'step': 'CSV uploaded',
             'report_name': report_name,
@@ -421,14 +421,18 @@ def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn
     if student:
         module_query_params['student_id'] = student.id
 
-    student_modules = StudentModule.get_state_by_params(**module_query_params)
-    if filter_fcn is not None:
-        student_modules = filter_fcn(student_modules)
+    student_modules = []
+    for shard_student_modules in StudentModule.get_state_by_params(**module_query_params):
+        if filter_fcn is not None:
+            shard_student_modules = filter_fcn(shard_student_modules)
+        student_modules.extend(shard_student_modules)
 
-    can_create_student_modules = (override_score_task and (student_modules.count() == 0) and student is not None)
+    can_create_student_modules = (override_score_task and not student_modules and student is not None)
     if can_create_student_modules:
         student_modules = [
-            StudentModule.objects.get_or_create(course_id=course_id, student=student, module_state_key=key)[0]
+            StudentModule.objects.for_shard(course_id, student.id).get_or_create(
+                course_id=course_id, student=student, module_state_key=key,
+            )[0]
             for key in usage_keys
         ]
     return student_modules
@@ -7,6 +7,7 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 """
 
 
+import json
 import os
 import shutil
 import tempfile
@@ -14,10 +15,13 @@ from collections import OrderedDict
 from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
 from unittest.mock import ANY, MagicMock, Mock, patch
+from uuid import uuid4
 
 import ddt
 import pytest
 import unicodecsv
+from celery.exceptions import Retry
+from celery.states import SUCCESS
 from django.conf import settings
 from django.test.utils import override_settings
 from edx_django_utils.cache import RequestCache
@@ -34,16 +38,29 @@ from lms.djangoapps.certificates.data import CertificateStatuses
 from lms.djangoapps.certificates.models import GeneratedCertificate
 from lms.djangoapps.certificates.tests.factories import CertificateAllowlistFactory, GeneratedCertificateFactory
 from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.grades.batch_grader import BatchCourseGrader
 from lms.djangoapps.grades.course_data import CourseData
 from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGradeOverride
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from lms.djangoapps.instructor_task.data import InstructorTaskTypes
+from lms.djangoapps.instructor_task.exceptions import DuplicateTaskException
+from lms.djangoapps.instructor_task.models import PROGRESS
+from lms.djangoapps.instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskStatus,
+    _acquire_subtask_lock,
+    _release_subtask_lock,
+    get_subtask_inputs,
+)
+from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_chunk
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import upload_may_enroll_csv, upload_students_csv
 from lms.djangoapps.instructor_task.tasks_helper.grades import (
     ENROLLED_IN_COURSE,
     NOT_ENROLLED_IN_COURSE,
+    ChunkedCourseGradeReport,
     CourseGradeReport,
     ProblemGradeReport,
     ProblemResponses,
@@ -55,6 +72,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_ora2_submission_files,
     upload_ora2_summary
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -83,6 +101,13 @@ _TEAMS_CONFIG = TeamsConfig({
     'topics': [{'id': 'topic', 'name': 'Topic', 'description': 'A Topic'}],
 })
 USE_ON_DISK_GRADE_REPORT = 'lms.djangoapps.instructor_task.tasks_helper.grades.use_on_disk_grade_reporting'
+USE_CHUNKED_GRADE_REPORT = 'lms.djangoapps.instructor_task.tasks_helper.grades.use_chunked_grade_reporting'
+USE_COLUMNAR_PROBLEM_GRADE_REPORT = (
+    'lms.djangoapps.instructor_task.tasks_helper.grades.use_columnar_problem_grade_reporting'
+)
+USE_STREAMING_PROBLEM_RESPONSES_REPORT = (
+    'lms.djangoapps.instructor_task.tasks_helper.grades.use_streaming_problem_responses_report'
+)
 
 
 class InstructorGradeReportTestCase(TestReportMixin, InstructorTaskCourseTestCase):
@@ -474,6 +499,135 @@ class TestTeamGradeReport(InstructorGradeReportTestCase):
         self._verify_cell_data_for_user(self.student2.username, self.course.id, 'Team Name', team2.name)
 
 
+# pylint: disable=protected-access
+class TestChunkedCourseGradeReport(InstructorGradeReportTestCase):
+    """
+    Test that course grade reports generated in chunks by subtasks are complete and can be resumed.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student(f'student{index}') for index in range(5)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type=InstructorTaskTypes.GRADE_COURSE,
+        )
+
+    def _generate(self):
+        """
+        Generates the report with a chunk of two learners per subtask.
+        """
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            with patch(USE_CHUNKED_GRADE_REPORT, return_value=True):
+                with override_settings(COURSE_GRADE_REPORT_USERS_PER_CHUNK=2):
+                    return CourseGradeReport.generate(
+                        None, self.entry.id, self.course.id, {}, 'graded', chunk_task=calculate_grades_csv_chunk,
+                    )
+
+    def _verify_report(self):
+        """
+        Verifies that the report contains every learner, and that the task is complete.
+        """
+        self.verify_rows_in_csv(
+            [{'Username': student.username} for student in self.students],
+            ignore_other_columns=True,
+        )
+        self.entry.refresh_from_db()
+        assert self.entry.task_state == SUCCESS
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0, 'total': 5}, json.loads(self.entry.task_output)
+        )
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        partial_reports_dir = report_store.path_to(
+            self.course.id, f'{ChunkedCourseGradeReport.PARTIAL_REPORTS_DIR}/{self.entry.task_id}',
+        )
+        assert report_store.storage.listdir(partial_reports_dir) == ([], [])
+
+    def test_chunked_report(self):
+        self._generate()
+        assert json.loads(self.entry.subtasks)['total'] == 4
+        self._verify_report()
+
+    def test_resume(self):
+        generate_chunk = ChunkedCourseGradeReport._generate_chunk
+
+        def fail_second_chunk(report, task_id, chunk_index):
+            if chunk_index == 1:
+                raise ValueError('Worker lost')
+            return generate_chunk(report, task_id, chunk_index)
+
+        with patch.object(ChunkedCourseGradeReport, '_generate_chunk', autospec=True, side_effect=fail_second_chunk):
+            self._generate()
+        self.entry.refresh_from_db()
+        subtask_dict = json.loads(self.entry.subtasks)
+        assert (subtask_dict['succeeded'], subtask_dict['failed']) == (2, 2)
+
+        with patch.object(
+            ChunkedCourseGradeReport, '_generate_chunk', autospec=True, side_effect=generate_chunk,
+        ) as mock_generate_chunk:
+            self._generate()
+        assert [call_args[0][2] for call_args in mock_generate_chunk.call_args_list] == [1]
+        self._verify_report()
+
+    def _run_subtask(self, subtask_id, subtask_input):
+        """
+        Runs the given subtask, as when its task is delivered to a worker.
+        """
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            return ChunkedCourseGradeReport.run_subtask(
+                None,
+                self.entry.id,
+                subtask_input,
+                SubtaskStatus.create(subtask_id).to_dict(),
+                'graded',
+                calculate_grades_csv_chunk,
+            )
+
+    def test_lost_chunk(self):
+        assert calculate_grades_csv_chunk.acks_late
+        assert calculate_grades_csv_chunk.reject_on_worker_lost
+        queue_subtask = ChunkedCourseGradeReport._queue_subtask
+        lost_subtasks = []
+
+        def lose_second_chunk(chunk_task, entry_id, xblock_instance_args, subtask_id, subtask_input):
+            if subtask_input.get('chunk_index') == 1:
+                # The worker grading the chunk is lost, leaving its subtask locked.
+                _acquire_subtask_lock(subtask_id)
+                lost_subtasks.append((subtask_id, subtask_input))
+            else:
+                queue_subtask(chunk_task, entry_id, xblock_instance_args, subtask_id, subtask_input)
+
+        with patch.object(ChunkedCourseGradeReport, '_queue_subtask', side_effect=lose_second_chunk):
+            self._generate()
+        self.entry.refresh_from_db()
+        assert self.entry.task_state == PROGRESS
+        [(lost_subtask_id, lost_subtask_input)] = lost_subtasks
+
+        # Redelivered while still locked, the chunk is retried once the lock has expired.
+        with patch.object(calculate_grades_csv_chunk, 'retry', side_effect=Retry) as mock_retry:
+            with pytest.raises(Retry):
+                self._run_subtask(lost_subtask_id, lost_subtask_input)
+        mock_retry.assert_called_once_with(exc=ANY, countdown=SUBTASK_LOCK_EXPIRE)
+
+        _release_subtask_lock(lost_subtask_id)
+        self._run_subtask(lost_subtask_id, lost_subtask_input)
+        self._verify_report()
+
+    def test_lost_merge_queueing(self):
+        with patch.object(ChunkedCourseGradeReport, '_queue_merge_when_graded'):
+            self._generate()
+        self.entry.refresh_from_db()
+        assert self.entry.task_state == PROGRESS
+
+        # A graded chunk redelivered after its worker was lost queues the merge.
+        subtask_id, subtask_input = next(iter(get_subtask_inputs(self.entry).items()))
+        with pytest.raises(DuplicateTaskException):
+            self._run_subtask(subtask_id, subtask_input)
+        self._verify_report()
+
+
 # pylint: disable=protected-access
 @ddt.ddt
 class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
@@ -735,6 +889,47 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         mock_generate_report_data.assert_called_with(ANY, ANY)
         mock_list_problem_responses.assert_called_with(self.course.id, ANY, ANY)
 
+    @ddt.data(
+        (None, None),
+        (3, None),
+        (None, {'DATABASES': ['default'], 'KEY': 'course'}),
+        (None, {'DATABASES': ['default'], 'KEY': 'user'}),
+    )
+    @ddt.unpack
+    @override_settings(USER_STATE_BATCH_SIZE=2)
+    def test_streamed_report_matches(self, max_count, student_module_shards):
+        """
+        Ensure that the report streamed from StudentModule in batches, on each of
+        its shards, contains the same rows as the report built in memory.
+        """
+        self.define_option_problem('Problem1')
+        self.define_option_problem('Problem2')
+        for ctr in range(3):
+            student = self.create_student(f'student{ctr}')
+            self.submit_student_answer(student.username, 'Problem1', ['Option 1'])
+            self.submit_student_answer(student.username, 'Problem2', ['Option 2'])
+        task_input = {
+            'problem_locations': str(self.course.location),
+            'user_id': self.instructor.id
+        }
+        with patch.dict('django.conf.settings.FEATURES', {'MAX_PROBLEM_RESPONSES_COUNT': max_count}):
+            student_data, student_data_keys = ProblemResponses._build_student_data(
+                user_id=self.instructor.id,
+                course_key=self.course.id,
+                usage_key_str_list=[str(self.course.location)],
+            )
+            with override_settings(STUDENT_MODULE_SHARDS=student_module_shards):
+                with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+                    with patch(USE_STREAMING_PROBLEM_RESPONSES_REPORT, return_value=True):
+                        result = ProblemResponses.generate(None, None, self.course.id, task_input, 'calculated')
+
+        assert result['succeeded'] == len(student_data)
+        assert self.get_csv_row_with_headers() == student_data_keys
+        self.verify_rows_in_csv(
+            [{key: str(data.get(key, '')) for key in student_data_keys} for data in student_data],
+            verify_order=False,
+        )
+
     def test_success(self):
         task_input = {
             'problem_locations': str(self.course.location),
@@ -871,6 +1066,38 @@ class TestProblemGradeReport(TestReportMixin, InstructorTaskModuleTestCase):
             )))
         ])
 
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_columnar_report_matches(self, _):
+        """
+        Verify that the report built from arrays of problem scores matches the
+        one built from each learner's course grade.
+        """
+        vertical = BlockFactory.create(
+            parent_location=self.problem_section.location,
+            category='vertical',
+            metadata={'graded': True},
+            display_name='Problem Vertical'
+        )
+        self.define_option_problem('Problem1', parent=vertical)
+        self.define_option_problem('Problem2', parent=vertical)
+        self.submit_student_answer(self.student_1.username, 'Problem1', ['Option 1'])
+        self.submit_student_answer(self.student_2.username, 'Problem2', ['Option 2'])
+
+        reports = []
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        for columnar in (False, True):
+            with patch(USE_COLUMNAR_PROBLEM_GRADE_REPORT, return_value=columnar):
+                with patch.object(
+                    BatchCourseGrader, 'grade_problems', autospec=True, side_effect=BatchCourseGrader.grade_problems,
+                ) as mock_grade_problems:
+                    ProblemGradeReport.generate(None, None, self.course.id, {}, 'graded')
+            assert mock_grade_problems.called == columnar
+            report_path = report_store.path_to(self.course.id, report_store.links_for(self.course.id)[0][0])
+            with report_store.storage.open(report_path) as csv_file:
+                reports.append(list(unicodecsv.reader(csv_file, encoding='utf-8-sig')))
+        assert reports[1] == reports[0]
+        assert reports[1][1][-4:] == ['1.0', '2.0', 'Not Attempted', '2.0']
+
     @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
     @ddt.data(True, False)
     def test_single_problem_verified_student_only(self, use_tempfile, _):
@@ -490,10 +490,18 @@ class UserCourseEnrollmentsList(generics.ListAPIView):
         if not latest_enrollment:
             return None
 
-        latest_progress = StudentModule.objects.filter(
-            student__username=self.kwargs['username'],
-            course_id__in=mobile_available_course_ids,
-        ).order_by('-modified').first()
+        latest_progresses = [
+            manager.filter(
+                student_id=latest_enrollment.user_id,
+                course_id__in=mobile_available_course_ids,
+            ).order_by('-modified').first()
+            for manager in StudentModule.objects.for_user_shards(latest_enrollment.user_id)
+        ]
+        latest_progress = max(
+            (progress for progress in latest_progresses if progress is not None),
+            key=lambda progress: progress.modified,
+            default=None,
+        )
 
         if not latest_progress:
             return latest_enrollment
@@ -62,7 +62,7 @@ def _generate_grades(course_key, enrollments):
     users = [enrollment.program_enrollment.user for enrollment in enrollments]
     prefetch_course_grades(course_key, users)
     try:
-        grades_iter = CourseGradeFactory().iter(users, course_key=course_key)
+        grades_iter = CourseGradeFactory().iter(users, course_key=course_key, summary_only=True)
         for enrollment, grade_tuple in zip(enrollments, grades_iter):
             user, course_grade, exception = grade_tuple
             if course_grade:
@@ -1146,9 +1146,43 @@ STATUS_MESSAGE_PATH = ENV_ROOT / "status_message.json"
 
 DATABASE_ROUTERS = [
     'openedx.core.lib.django_courseware_routers.StudentModuleHistoryExtendedRouter',
+    'openedx.core.lib.django_courseware_routers.StudentModuleShardRouter',
     'edx_django_utils.db.read_replica.ReadReplicaRouter',
 ]
 
+# .. setting_name: STUDENT_MODULE_SHARDS
+# .. setting_default: {}
+# .. setting_description: Partitions the courseware StudentModule table, which stores the learners' XBlock
+#   user state, across several databases. 'DATABASES' lists the aliases of the databases (from DATABASES) to
+#   partition it across, and 'KEY' is what its rows are partitioned by: 'course' (the default) keeps the rows
+#   of a course together, 'user' the rows of a learner, by hashing the course key or the user id. An empty
+#   dict keeps StudentModule in the default database.
+# .. setting_warning: Existing rows aren't moved between databases, and the databases need disjoint id
+#   sequences (e.g. with MySQL's auto_increment_increment and auto_increment_offset), since the history tables
+#   refer to StudentModule rows by id. Queries of StudentModule must be made with the managers of its shards,
+#   as given by StudentModule.objects.for_shard and its other for_* methods: those made with StudentModule.objects
+#   itself use the default database.
+STUDENT_MODULE_SHARDS = {}
+
+# .. setting_name: STUDENT_MODULE_HISTORY_ARCHIVE
+# .. setting_default: {'ENABLED': False, 'STORAGE_CLASS': None, 'STORAGE_KWARGS': {},
+#   'ROOT_PATH': 'student_module_history', 'MIN_AGE_DAYS': 365}
+# .. setting_description: Configures the archive of old StudentModule history records. When 'ENABLED', the
+#   archive_student_module_history management command moves the history records older than 'MIN_AGE_DAYS' days
+#   out of their table, into compressed segment files of each course, stored under 'ROOT_PATH' on the storage
+#   created from 'STORAGE_CLASS' (the default storage if None) and 'STORAGE_KWARGS', and the submission history
+#   reads both the history tables and the archive.
+# .. setting_warning: Don't disable the archive once records were archived, or the submission history won't
+#   show them. The archived records of deleted StudentModules stay in their segment files until the command is
+#   run with --compact.
+STUDENT_MODULE_HISTORY_ARCHIVE = {
+    'ENABLED': False,
+    'STORAGE_CLASS': None,
+    'STORAGE_KWARGS': {},
+    'ROOT_PATH': 'student_module_history',
+    'MIN_AGE_DAYS': 365,
+}
+
 ############################ Cache Configuration ###############################
 
 CACHES = {
@@ -1242,6 +1276,21 @@ CACHES = {
     },
 }
 
+# .. setting_name: SPLIT_MODULESTORE_LOCAL_STRUCTURE_CACHE_MAX_BYTES
+# .. setting_default: 0
+# .. setting_description: Maximum total (pickled) size in bytes of the in-process LRU cache of split
+#   modulestore course structures that sits in front of the 'course_structure_cache' django cache.
+#   Structures are immutable per version, so cached entries never go stale. 0 disables the cache.
+SPLIT_MODULESTORE_LOCAL_STRUCTURE_CACHE_MAX_BYTES = 0
+
+# .. setting_name: SPLIT_MODULESTORE_DEFINITION_PREFETCH_SIZE
+# .. setting_default: 0
+# .. setting_description: When a split modulestore block's definition is first loaded lazily, also load the
+#   definitions of its siblings and descendants in the same query, up to this many definitions, and keep at most
+#   this many loaded definitions per course runtime. This avoids one query per block when traversing a course.
+#   0 disables prefetching, so each definition is loaded on its own.
+SPLIT_MODULESTORE_DEFINITION_PREFETCH_SIZE = 0
+
 ############################ OAUTH2 Provider ###################################
 OAUTH_EXPIRE_CONFIDENTIAL_CLIENT_DAYS = 365
 OAUTH_EXPIRE_PUBLIC_CLIENT_DAYS = 30
@@ -2750,8 +2799,22 @@ BLOCK_STRUCTURES_SETTINGS = dict(
     #   For more information, check https://github.com/openedx/edx-platform/pull/13388 and
     #   https://github.com/openedx/edx-platform/pull/14571.
     TASK_MAX_RETRIES=5,
+
+    # .. setting_name: BLOCK_STRUCTURES_SETTINGS['COMPACT_REPRESENTATION']
+    # .. setting_default: False
+    # .. setting_description: Whether block structures loaded from storage are held in memory in a
+    #   compact representation, with integer-indexed block relations and column-oriented block data,
+    #   instead of per-block objects. This reduces the memory used by large courses.
+    COMPACT_REPRESENTATION=False,
 )
 
+# .. setting_name: COURSE_BLOCKS_TRANSFORMED_CACHE_TIMEOUT
+# .. setting_default: 300
+# .. setting_description: Number of seconds for which a user's transformed course blocks are cached, when the
+#   course_blocks.cache_transformed_blocks flag is enabled. This bounds how long changes that do not invalidate
+#   the cache, such as start dates passing, take to be reflected.
+COURSE_BLOCKS_TRANSFORMED_CACHE_TIMEOUT = 300
+
 ################################ Bulk Email ###################################
 
 # Suffix used to construct 'from' email address for bulk emails.
@@ -3543,6 +3606,10 @@ GRADES_DOWNLOAD_ROUTING_KEY = Derived(lambda settings: settings.HIGH_MEM_QUEUE)
 
 RECALCULATE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
+# The number of learners graded by each subtask of a course grade report, when the
+# instructor_task.use_chunked_grade_reporting flag is enabled for the course.
+COURSE_GRADE_REPORT_USERS_PER_CHUNK = 2000
+
 GRADES_DOWNLOAD = {
     'STORAGE_CLASS': 'django.core.files.storage.FileSystemStorage',
     'STORAGE_KWARGS': {
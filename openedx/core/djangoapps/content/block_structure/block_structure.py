@@ -16,7 +16,7 @@ from logging import getLogger
 
 from xmodule.block_metadata_utils import get_datetime_field
 
-from openedx.core.lib.graph_traversals import traverse_post_order, traverse_topologically
+from openedx.core.lib.graph_traversals import TraversalOrders, traverse_post_order, traverse_topologically
 
 from .exceptions import TransformerException
 
@@ -26,6 +26,10 @@ logger = getLogger(__name__)  # pylint: disable=invalid-name
 # A dictionary key value for storing a transformer's version number.
 TRANSFORMER_VERSION_KEY = '_version'
 
+# A block data field for storing the modulestore version in which a block
+# was last edited, used to detect which blocks changed between collects.
+BLOCK_VERSION_KEY = '_edit_version'
+
 
 class _BlockRelations:
     """
@@ -68,6 +72,11 @@ class BlockStructure:
         # Add the root block.
         self._add_block(self._block_relations, root_block_usage_key)
 
+        # Cached TraversalOrders of the structure, discarded whenever its
+        # relations change.
+        # TraversalOrders or None
+        self._traversal_orders = None
+
     def __iter__(self):
         """
         The default iterator for a block structure is get_block_keys()
@@ -124,6 +133,7 @@ class BlockStructure:
         """
         self.root_block_usage_key = usage_key
         self._block_relations[usage_key].parents = []
+        self._traversal_orders = None
 
     def __contains__(self, usage_key):
         """
@@ -201,6 +211,25 @@ class BlockStructure:
             filter_func=filter_func,
         )
 
+    def get_traversal_orders(self):
+        """
+        Returns the precomputed topological, pre-order and post-order
+        orderings of the block structure from its root.  They are
+        computed on first use and cached until the structure's relations
+        change, so that transformers can apply per-block predicates in
+        bulk passes instead of each re-traversing the structure.
+
+        Returns:
+            openedx.core.lib.graph_traversals.TraversalOrders
+        """
+        if self._traversal_orders is None:
+            self._traversal_orders = TraversalOrders(
+                start_node=self.root_block_usage_key,
+                get_parents=self.get_parents,
+                get_children=self.get_children,
+            )
+        return self._traversal_orders
+
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
@@ -231,6 +260,7 @@ class BlockStructure:
 
         # Replace this structure's relations with the newly pruned one.
         self._block_relations = pruned_block_relations
+        self._traversal_orders = None
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -241,6 +271,7 @@ class BlockStructure:
             child_key (UsageKey) - Usage key of the child block.
         """
         self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._traversal_orders = None
 
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
@@ -422,12 +453,16 @@ class BlockStructureBlockData(BlockStructure):
         deep-copy of this instance's contents.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             self.root_block_usage_key,
             deepcopy(self._block_relations),
             deepcopy(self.transformer_data),
             deepcopy(self._block_data_map),
         )
+        # The copy has the same relations, so can share the (immutable)
+        # cached orderings.
+        block_structure._traversal_orders = self._traversal_orders  # pylint: disable=protected-access
+        return block_structure
 
     def iteritems(self):
         """
@@ -634,6 +669,7 @@ class BlockStructureBlockData(BlockStructure):
         # Remove block.
         self._block_relations.pop(usage_key, None)
         self._block_data_map.pop(usage_key, None)
+        self._traversal_orders = None
 
         # Recreate the graph connections if descendants are to be kept.
         if keep_descendants:
@@ -666,6 +702,38 @@ class BlockStructureBlockData(BlockStructure):
             keep_descendants=keep_descendants,
         )
 
+    def create_bulk_removal_filter(self, removal_condition, keep_descendants=False, removal_mask=None):
+        """
+        Returns a filter function like create_removal_filter, except that
+        removal_condition is evaluated for all blocks up front, in a single
+        pass over the structure's traversal orders, rather than for each
+        block as the filter is applied.
+
+        Arguments:
+            removal_condition ((usage_key)->bool) - See the description in
+                create_removal_filter.  It is still called for any block
+                that was added after the removal mask was computed.
+
+            keep_descendants (bool) - See the description in
+                remove_block.
+
+            removal_mask (bytearray) - Optional result of
+                get_traversal_orders().mask(removal_condition), if the
+                caller already computed it.
+        """
+        traversal_orders = self.get_traversal_orders()
+        if removal_mask is None:
+            removal_mask = traversal_orders.mask(removal_condition)
+        ordinals = traversal_orders.ordinals
+
+        def _precomputed_removal_condition(block_key):
+            ordinal = ordinals.get(block_key)
+            if ordinal is None:
+                return removal_condition(block_key)
+            return removal_mask[ordinal]
+
+        return self.create_removal_filter(_precomputed_removal_condition, keep_descendants)
+
     def retain_or_remove(self, block_key, removal_condition, keep_descendants=False):
         """
         Removes the given block if it satisfies the removal_condition.
@@ -752,6 +820,38 @@ class BlockStructureBlockData(BlockStructure):
             raise TransformerException('Version attributes are not set on transformer {0}.', transformer.name())  # lint-amnesty, pylint: disable=raising-format-tuple
         self.set_transformer_data(transformer, TRANSFORMER_VERSION_KEY, transformer.WRITE_VERSION)
 
+    def _get_block_version(self, usage_key):
+        """
+        Returns the modulestore version in which the block identified by the
+        given usage_key was last edited, or None if it was not collected.
+        """
+        return self.get_xblock_field(usage_key, BLOCK_VERSION_KEY)
+
+    def _copy_transformer_block_data(self, transformer, source_block_structure, usage_keys):
+        """
+        Replaces the given transformer's data for the blocks identified by
+        usage_keys with the transformer's data for those blocks in
+        source_block_structure.
+
+        Arguments:
+            transformer (BlockStructureTransformer) - The transformer whose
+                block data is to be copied.
+
+            source_block_structure (BlockStructureBlockData) - The block
+                structure to copy the transformer's block data from.
+
+            usage_keys (iterable(UsageKey)) - Usage keys of the blocks
+                whose transformer data is to be copied.
+        """
+        for usage_key in usage_keys:
+            block_data = self._get_or_create_block(usage_key)
+            try:
+                block_data.transformer_data[transformer] = source_block_structure.get_transformer_block_data(
+                    usage_key, transformer,
+                )
+            except KeyError:
+                block_data.transformer_data.pop(transformer.name(), None)
+
     def _get_or_create_block(self, usage_key):
         """
         Returns the BlockData associated with the given usage_key.
@@ -761,9 +861,10 @@ class BlockStructureBlockData(BlockStructure):
         try:
             return self._block_data_map[usage_key]
         except KeyError:
-            block_data = BlockData(usage_key)
-            self._block_data_map[usage_key] = block_data
-            return block_data
+            self._block_data_map[usage_key] = BlockData(usage_key)
+            # Return the stored block data, which may be a view onto a
+            # compact representation rather than the object just created.
+            return self._block_data_map[usage_key]
 
 
 class BlockStructureModulestoreData(BlockStructureBlockData):
@@ -817,6 +918,27 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _create_partial(self, usage_keys):
+        """
+        Returns a new BlockStructureModulestoreData containing only the
+        blocks identified by the given usage_keys, their xBlocks and the
+        relations between them.
+
+        Arguments:
+            usage_keys (set(UsageKey)) - Usage keys of the blocks to include.
+                Must include the root block and all ancestors of every
+                included block.
+        """
+        partial_block_structure = BlockStructureModulestoreData(self.root_block_usage_key)
+        for usage_key in self.get_block_keys():
+            if usage_key not in usage_keys:
+                continue
+            partial_block_structure._add_xblock(usage_key, self._xblock_map[usage_key])
+            for child_key in self.get_children(usage_key):
+                if child_key in usage_keys:
+                    partial_block_structure._add_relation(usage_key, child_key)
+        return partial_block_structure
+
     def _add_xblock(self, usage_key, xblock):
         """
         Associates the given xBlock object with the given usage_key.
@@ -842,6 +964,16 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
             for field_name in self._requested_xblock_fields:
                 self._set_xblock_field(block_data, xblock, field_name)
 
+    def _collect_block_versions(self):
+        """
+        Records the modulestore version in which each instantiated xBlock
+        was last edited, for xBlocks whose modulestore tracks it.
+        """
+        for xblock_usage_key, xblock in self._xblock_map.items():
+            update_version = getattr(xblock, 'update_version', None)
+            if update_version is not None:
+                setattr(self._get_or_create_block(xblock_usage_key), BLOCK_VERSION_KEY, str(update_version))
+
     def _set_xblock_field(self, block_data, xblock, field_name):
         """
         Updates the given block's xBlock fields data with the xBlock
@@ -0,0 +1,569 @@
+"""
+Columnar serialization format for the collected data of a BlockStructure.
+
+Unlike the legacy format (a single zpickle of the block relations, transformer
+data and block data map), this format lays the collected data out as one column
+per xBlock field and per transformer field, each indexed by an integer block
+ordinal.  Parent/child relations are stored as CSR-style int arrays.
+
+Every column is compressed separately, so deserialize_block_structure only
+decodes the block relations up front.  A column is decoded the first time any
+block's value for that field is requested; fields that are never read during a
+request are never decoded.
+
+Serialized layout::
+
+    MAGIC | version (1 byte) | header length (4 bytes, big endian) | header | segments
+
+The header is zlib-compressed JSON listing the block keys in ordinal order and
+the (offset, length) of each segment.  Segments are int arrays for the
+relations and zlib-compressed JSON for the field columns.  Field values are
+encoded as JSON with tags for the non-JSON types that transformers collect
+(tuples, sets, dicts with non-string keys, datetimes, opaque keys).  Values of
+any other type fall back to a per-value pickle.
+"""
+
+
+import base64
+import json
+import pickle
+import struct
+import sys
+import zlib
+from array import array
+from copy import deepcopy
+from datetime import date, datetime, timedelta
+
+from opaque_keys import OpaqueKey
+from opaque_keys.edx.keys import AssetKey, CourseKey, DefinitionKey, UsageKey
+from pytz import UTC
+
+from .block_structure import (
+    BlockData,
+    BlockStructureBlockData,
+    TransformerData,
+    TransformerDataMap,
+    _BlockRelations,
+)
+from .compact import CompactBlockRelations
+
+MAGIC = b'BSCF'
+VERSION = 1
+
+_HEADER_PREFIX = struct.Struct('>4sBI')
+
+# Segment name prefixes.
+_XBLOCK_FIELD_COLUMN = 'xblock:'
+_TRANSFORMER_FIELD_COLUMN = 'transformer:'
+_TRANSFORMER_PRESENCE = 'presence:'
+
+_OPAQUE_KEY_TYPES = {
+    key_class.KEY_TYPE: key_class
+    for key_class in (AssetKey, CourseKey, DefinitionKey, UsageKey)
+}
+
+
+def is_columnar(serialized_data):
+    """
+    Returns whether the given serialized data is in the columnar format
+    (as opposed to the legacy zpickle format).
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def serialize_block_structure(block_structure):
+    """
+    Returns the columnar serialization of the collected data of the given
+    BlockStructureBlockData.
+    """
+    # pylint: disable=protected-access
+    block_keys = list(block_structure._block_relations)
+    ordinals = {block_key: ordinal for ordinal, block_key in enumerate(block_keys)}
+
+    segments = {}
+    for relation in ('children', 'parents'):
+        segments[relation + '_offsets'], segments[relation] = _encode_adjacency(
+            (getattr(block_structure._block_relations[block_key], relation) for block_key in block_keys),
+            ordinals,
+        )
+
+    segments['transformer_data'] = _compress_json({
+        transformer_name: _encode_value(transformer_data.fields)
+        for transformer_name, transformer_data in block_structure.transformer_data.items()
+    })
+
+    xblock_columns = {}
+    transformer_columns = {}
+    transformer_presence = {}
+    block_data_ordinals = []
+    for block_key, block_data in block_structure._block_data_map.items():
+        ordinal = ordinals.get(block_key)
+        if ordinal is None:
+            # Data for a block that has since been removed from the structure.
+            continue
+        block_data_ordinals.append(ordinal)
+        for field_name, value in block_data.fields.items():
+            _append_to_column(xblock_columns, _XBLOCK_FIELD_COLUMN + field_name, ordinal, value)
+        for transformer_name, transformer_data in block_data.transformer_data.items():
+            transformer_presence.setdefault(transformer_name, []).append(ordinal)
+            for field_name, value in transformer_data.fields.items():
+                column_name = f'{_TRANSFORMER_FIELD_COLUMN}{transformer_name}:{field_name}'
+                _append_to_column(transformer_columns, column_name, ordinal, value)
+
+    segments['block_data'] = _int_array_bytes(block_data_ordinals)
+    for columns in (xblock_columns, transformer_columns):
+        for column_name, column in columns.items():
+            segments[column_name] = _compress_json(column)
+    for transformer_name, present_ordinals in transformer_presence.items():
+        segments[_TRANSFORMER_PRESENCE + transformer_name] = _int_array_bytes(present_ordinals)
+
+    offset = 0
+    segment_index = {}
+    for segment_name, segment in segments.items():
+        segment_index[segment_name] = (offset, len(segment))
+        offset += len(segment)
+
+    header = _compress_json({
+        'block_keys': [str(block_key) for block_key in block_keys],
+        'segments': segment_index,
+    })
+    return b''.join(
+        [_HEADER_PREFIX.pack(MAGIC, VERSION, len(header)), header] + list(segments.values())
+    )
+
+
+def deserialize_block_structure(serialized_data, root_block_usage_key, compact=False):
+    """
+    Returns a BlockStructureBlockData for the given columnar serialized data.
+
+    The block relations are decoded immediately; all collected field data is
+    decoded lazily, one column at a time.  If compact is True, the block
+    relations are kept in their CSR arrays (see compact.CompactBlockRelations).
+
+    Raises:
+        ValueError if the data is not in a supported columnar format.
+    """
+    magic, version, header_length = _HEADER_PREFIX.unpack_from(serialized_data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'Unsupported block structure serialization: {magic!r} version {version}')
+
+    header_end = _HEADER_PREFIX.size + header_length
+    header = _decompress_json(serialized_data[_HEADER_PREFIX.size:header_end])
+    reader = _ColumnReader(memoryview(serialized_data)[header_end:], header['segments'])
+
+    block_keys = [UsageKey.from_string(block_key) for block_key in header['block_keys']]
+
+    if compact:
+        block_relations = CompactBlockRelations(
+            block_keys,
+            reader.int_array('children_offsets'),
+            reader.int_array('children'),
+            reader.int_array('parents_offsets'),
+            reader.int_array('parents'),
+        )
+    else:
+        block_relations = {block_key: _BlockRelations() for block_key in block_keys}
+        for relation in ('children', 'parents'):
+            offsets = reader.int_array(relation + '_offsets')
+            targets = reader.int_array(relation)
+            for ordinal, block_key in enumerate(block_keys):
+                setattr(
+                    block_relations[block_key],
+                    relation,
+                    [block_keys[target] for target in targets[offsets[ordinal]:offsets[ordinal + 1]]],
+                )
+
+    transformer_data = TransformerDataMap()
+    for transformer_name, fields in reader.json('transformer_data').items():
+        transformer_data[transformer_name] = TransformerData()
+        transformer_data[transformer_name].fields = _decode_value(fields)
+
+    block_data_map = {}
+    for ordinal in reader.int_array('block_data'):
+        block_key = block_keys[ordinal]
+        block_data = BlockData(block_key)
+        block_data.fields = _LazyColumnFields(reader, _XBLOCK_FIELD_COLUMN, ordinal)
+        block_data.transformer_data = _LazyTransformerDataMap(reader, ordinal)
+        block_data_map[block_key] = block_data
+
+    block_structure = BlockStructureBlockData(root_block_usage_key)
+    # pylint: disable=protected-access
+    block_structure._block_relations = block_relations
+    block_structure.transformer_data = transformer_data
+    block_structure._block_data_map = block_data_map
+    return block_structure
+
+
+class _ColumnReader:
+    """
+    Decodes the segments of a columnar serialization on demand, caching
+    each decoded column.
+    """
+    def __init__(self, data, segments):
+        self._data = data
+        self._segments = segments
+        self._columns = {}
+        self._field_names = {}
+        self._presence = {}
+
+    def _segment(self, name):
+        offset, length = self._segments[name]
+        return self._data[offset:offset + length]
+
+    def int_array(self, name):
+        """
+        Returns the int array stored in the named segment.
+        """
+        values = array('i')
+        values.frombytes(self._segment(name))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values
+
+    def json(self, name):
+        """
+        Returns the decompressed JSON stored in the named segment.
+        """
+        return _decompress_json(self._segment(name))
+
+    def field_names(self, prefix):
+        """
+        Returns the names of all fields stored in columns with the given prefix.
+        """
+        field_names = self._field_names.get(prefix)
+        if field_names is None:
+            field_names = self._field_names[prefix] = [
+                segment_name[len(prefix):]
+                for segment_name in self._segments
+                if segment_name.startswith(prefix)
+            ]
+        return field_names
+
+    def get_value(self, prefix, field_name, ordinal):
+        """
+        Returns the value of the given field for the block with the given
+        ordinal, decoding the field's column if needed.
+
+        Raises:
+            KeyError if the block has no value for the field.
+        """
+        column_name = prefix + field_name
+        column = self._columns.get(column_name)
+        if column is None:
+            if column_name not in self._segments:
+                raise KeyError(field_name)
+            ordinals, values = self.json(column_name)
+            column = self._columns[column_name] = dict(zip(ordinals, values))
+        # Values are decoded individually so that each block gets its own copy
+        # of mutable values, as it would when unpickled.
+        return _decode_value(column[ordinal])
+
+    def has_transformer_data(self, transformer_name, ordinal):
+        """
+        Returns whether the block with the given ordinal has any data
+        collected by the named transformer.
+        """
+        presence = self._presence.get(transformer_name)
+        if presence is None:
+            segment_name = _TRANSFORMER_PRESENCE + transformer_name
+            presence = set(self.int_array(segment_name)) if segment_name in self._segments else set()
+            self._presence[transformer_name] = presence
+        return ordinal in presence
+
+    def transformer_names(self):
+        """
+        Returns the names of all transformers that have collected block data.
+        """
+        return [
+            segment_name[len(_TRANSFORMER_PRESENCE):]
+            for segment_name in self._segments
+            if segment_name.startswith(_TRANSFORMER_PRESENCE)
+        ]
+
+
+class _LazyDictMixin:
+    """
+    Mixin for dict subclasses whose entries are loaded from a _ColumnReader
+    the first time they are requested.
+
+    Subclasses implement _load, which returns the value for a key or raises
+    KeyError, and _all_keys.  Every dict method sees the entries that haven't
+    been loaded yet; iterating, copying or pickling the dict loads all of them.
+    """
+    def _init_lazy(self, reader, ordinal):
+        self._reader = reader
+        self._ordinal = ordinal
+        # Keys that have been loaded (or found to be absent), set or deleted,
+        # and so must never be loaded from the reader again.
+        self._resolved = set()
+
+    def __missing__(self, key):
+        if key in self._resolved:
+            raise KeyError(key)
+        self._resolved.add(key)
+        value = self._load(key)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._resolved.add(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self[key]  # pylint: disable=pointless-statement
+        dict.__delitem__(self, key)
+
+    def __contains__(self, key):
+        try:
+            self[key]  # pylint: disable=pointless-statement
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        self.get(key)
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def popitem(self):
+        self._load_all()
+        return dict.popitem(self)
+
+    def clear(self):
+        self._resolved.update(self._all_keys())
+        dict.clear(self)
+
+    def _load_all(self):
+        for key in self._all_keys():
+            self.get(key)
+
+    def __iter__(self):
+        self._load_all()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._load_all()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._load_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._load_all()
+        return dict.values(self)
+
+    def items(self):
+        self._load_all()
+        return dict.items(self)
+
+    def __eq__(self, other):
+        self._load_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+class _LazyColumnFields(_LazyDictMixin, dict):
+    """
+    The fields dict of a BlockData or TransformerData, loaded column by column.
+    """
+    def __init__(self, reader, prefix, ordinal):
+        super().__init__()
+        self._init_lazy(reader, ordinal)
+        self._prefix = prefix
+
+    def _load(self, key):
+        return self._reader.get_value(self._prefix, key, self._ordinal)
+
+    def _all_keys(self):
+        return self._reader.field_names(self._prefix)
+
+    def copy(self):
+        self._load_all()
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self.copy(), memo)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+class _LazyTransformerDataMap(_LazyDictMixin, TransformerDataMap):
+    """
+    The per-block TransformerDataMap, creating each transformer's
+    TransformerData on first access.
+    """
+    def __init__(self, reader, ordinal):
+        super().__init__()
+        self._init_lazy(reader, ordinal)
+
+    def __getitem__(self, key):
+        return dict.__getitem__(self, self._translate_key(key))
+
+    def __setitem__(self, key, value):
+        _LazyDictMixin.__setitem__(self, self._translate_key(key), value)
+
+    def __delitem__(self, key):
+        _LazyDictMixin.__delitem__(self, self._translate_key(key))
+
+    def __contains__(self, key):
+        return _LazyDictMixin.__contains__(self, self._translate_key(key))
+
+    def get(self, key, default=None):
+        return _LazyDictMixin.get(self, self._translate_key(key), default)
+
+    def pop(self, key, *default):
+        return _LazyDictMixin.pop(self, self._translate_key(key), *default)
+
+    def setdefault(self, key, default=None):
+        return _LazyDictMixin.setdefault(self, self._translate_key(key), default)
+
+    def _load(self, key):
+        if not self._reader.has_transformer_data(key, self._ordinal):
+            raise KeyError(key)
+        transformer_data = TransformerData()
+        transformer_data.fields = _LazyColumnFields(
+            self._reader, f'{_TRANSFORMER_FIELD_COLUMN}{key}:', self._ordinal,
+        )
+        return transformer_data
+
+    def _all_keys(self):
+        return self._reader.transformer_names()
+
+    def _materialized(self):
+        transformer_data_map = TransformerDataMap()
+        for key, transformer_data in self.items():
+            transformer_data_map[key] = transformer_data
+        return transformer_data_map
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self._materialized(), memo)
+
+    def __reduce__(self):
+        return self._materialized().__reduce__()
+
+
+def _append_to_column(columns, column_name, ordinal, value):
+    """
+    Appends the encoded value for the block with the given ordinal to the
+    named column.
+    """
+    ordinals, values = columns.setdefault(column_name, ([], []))
+    ordinals.append(ordinal)
+    values.append(_encode_value(value))
+
+
+def _encode_adjacency(relations, ordinals):
+    """
+    Returns the CSR offsets and the flattened ordinals of the related blocks,
+    as int array bytes, for the given per-block relations.
+    """
+    offsets = [0]
+    flattened = []
+    for related_keys in relations:
+        flattened.extend(ordinals[related_key] for related_key in related_keys)
+        offsets.append(len(flattened))
+    return _int_array_bytes(offsets), _int_array_bytes(flattened)
+
+
+def _int_array_bytes(values):
+    """
+    Returns the little-endian bytes of an int array of the given values.
+    """
+    values = array('i', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _compress_json(data):
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+
+def _decompress_json(data):
+    return json.loads(zlib.decompress(data))
+
+
+def _encode_value(value):
+    """
+    Returns a JSON-serializable encoding of the given value.
+
+    Containers and non-JSON types are encoded as single-key dicts whose key
+    identifies the type, so plain dicts never appear in the encoding.
+    """
+    value_type = type(value)
+    if value is None or value_type in (bool, int, float, str):
+        return value
+    if value_type is list:
+        return [_encode_value(item) for item in value]
+    if value_type is tuple:
+        return {'t': [_encode_value(item) for item in value]}
+    if value_type in (dict, _LazyColumnFields):
+        return {'d': [[_encode_value(key), _encode_value(item)] for key, item in value.items()]}
+    if value_type is frozenset:
+        return {'fs': [_encode_value(item) for item in value]}
+    if value_type is set:
+        return {'s': [_encode_value(item) for item in value]}
+    if value_type is datetime and (value.tzinfo is None or value.tzinfo is UTC):
+        return {'dt': [value.replace(tzinfo=None).isoformat(), value.tzinfo is not None]}
+    if value_type is date:
+        return {'da': value.isoformat()}
+    if value_type is timedelta:
+        return {'td': [value.days, value.seconds, value.microseconds]}
+    if isinstance(value, OpaqueKey) and value.KEY_TYPE in _OPAQUE_KEY_TYPES:
+        return {'k': [value.KEY_TYPE, str(value)]}
+    return {'p': base64.b64encode(pickle.dumps(value, 4)).decode('ascii')}
+
+
+def _decode_value(value):
+    """
+    Returns the value for the given output of _encode_value.
+    """
+    if not isinstance(value, (list, dict)):
+        return value
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+
+    (tag, encoded), = value.items()
+    if tag == 't':
+        return tuple(_decode_value(item) for item in encoded)
+    if tag == 'd':
+        return {_decode_value(key): _decode_value(item) for key, item in encoded}
+    if tag == 'fs':
+        return frozenset(_decode_value(item) for item in encoded)
+    if tag == 's':
+        return {_decode_value(item) for item in encoded}
+    if tag == 'dt':
+        isoformat, is_utc = encoded
+        return datetime.fromisoformat(isoformat).replace(tzinfo=UTC if is_utc else None)
+    if tag == 'da':
+        return date.fromisoformat(encoded)
+    if tag == 'td':
+        return timedelta(*encoded)
+    if tag == 'k':
+        key_type, serialized_key = encoded
+        return _OPAQUE_KEY_TYPES[key_type].from_string(serialized_key)
+    if tag == 'p':
+        return pickle.loads(base64.b64decode(encoded), encoding='latin1')
+    raise ValueError(f'Unknown encoded value type: {tag}')
@@ -0,0 +1,495 @@
+"""
+Compact in-memory representation of collected BlockStructures.
+
+The default representation keeps a _BlockRelations object (with lists of
+parent and child keys) and a BlockData object (with dicts of fields) for
+every block.  For large courses that are held in memory, these per-block
+objects dominate the memory used.
+
+This module provides drop-in replacements for a BlockStructureBlockData's
+internal maps:
+
+    CompactBlockRelations - usage keys are interned to integer ordinals and
+        the relations are stored as CSR-style int arrays.
+
+    CompactBlockDataMap - each xBlock field and each transformer field is a
+        single list (column) indexed by block ordinal.  The BlockData and
+        TransformerData objects it returns are views onto those columns.
+
+Copying (and deep-copying) a block structure with these maps is cheap: the
+copy shares the immutable arrays, and each column is only deep-copied the
+first time it is accessed after the copy.
+
+Use compact_block_structure to switch a block structure to the compact
+representation.
+"""
+
+
+from array import array
+from collections.abc import MutableMapping
+from copy import deepcopy
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+
+
+class _Missing:
+    """
+    Marker for a block that has no value in a column.  A single instance
+    survives copying and pickling.
+    """
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return '_MISSING'
+
+    def __repr__(self):
+        return '<missing>'
+
+
+_MISSING = _Missing()
+
+# Key of the presence column for block data itself, as opposed to the
+# presence column of a transformer's data.
+_BLOCK_DATA = None
+
+
+def compact_block_structure(block_structure):
+    """
+    Converts the given BlockStructureBlockData to the compact representation,
+    in place, and returns it.
+    """
+    # pylint: disable=protected-access
+    if not isinstance(block_structure._block_relations, CompactBlockRelations):
+        block_structure._block_relations = CompactBlockRelations.from_block_relations(
+            block_structure._block_relations
+        )
+    if not isinstance(block_structure._block_data_map, CompactBlockDataMap):
+        block_structure._block_data_map = CompactBlockDataMap.from_block_data_map(
+            block_structure._block_data_map,
+            block_keys=list(block_structure._block_relations),
+        )
+    return block_structure
+
+
+class CompactBlockRelations(MutableMapping):
+    """
+    A {UsageKey: _BlockRelations} map whose relations are stored as
+    CSR-style int arrays of block ordinals.
+
+    A block's _BlockRelations object is only created when it is accessed
+    (so it can be mutated in place, as BlockStructure does) and is kept
+    from then on.
+    """
+    def __init__(self, block_keys, children_offsets, children, parents_offsets, parents):
+        """
+        Arguments:
+            block_keys ([UsageKey]) - The usage keys of the blocks, in
+                ordinal order.
+
+            children_offsets, parents_offsets (array('i')) - For each
+                ordinal, the offset of its first related block in children
+                (or parents), followed by the total number of relations.
+
+            children, parents (array('i')) - The ordinals of each block's
+                children (or parents), concatenated in ordinal order.
+        """
+        self._block_keys = block_keys
+        self._ordinals = {block_key: ordinal for ordinal, block_key in enumerate(block_keys)}
+        self._children_offsets = children_offsets
+        self._children = children
+        self._parents_offsets = parents_offsets
+        self._parents = parents
+
+        # Relations of blocks that have been accessed or added since.
+        # dict {UsageKey: _BlockRelations}
+        self._materialized = {}
+
+        # Blocks that have been added, or removed, since.
+        self._added = {}
+        self._removed = set()
+
+    @classmethod
+    def from_block_relations(cls, block_relations):
+        """
+        Returns a CompactBlockRelations for the given
+        {UsageKey: _BlockRelations} map.
+        """
+        block_keys = list(block_relations)
+        ordinals = {block_key: ordinal for ordinal, block_key in enumerate(block_keys)}
+        arrays = {}
+        for relation in ('children', 'parents'):
+            offsets = array('i', [0])
+            related = array('i')
+            for block_key in block_keys:
+                related.extend(ordinals[related_key] for related_key in getattr(block_relations[block_key], relation))
+                offsets.append(len(related))
+            arrays[relation + '_offsets'] = offsets
+            arrays[relation] = related
+        return cls(block_keys, **arrays)
+
+    def _related_keys(self, ordinal, offsets, related):
+        return [self._block_keys[related_ordinal] for related_ordinal in related[offsets[ordinal]:offsets[ordinal + 1]]]
+
+    def __getitem__(self, block_key):
+        relations = self._materialized.get(block_key)
+        if relations is None:
+            if block_key in self._removed or block_key not in self._ordinals:
+                raise KeyError(block_key)
+            ordinal = self._ordinals[block_key]
+            relations = _BlockRelations()
+            relations.children = self._related_keys(ordinal, self._children_offsets, self._children)
+            relations.parents = self._related_keys(ordinal, self._parents_offsets, self._parents)
+            self._materialized[block_key] = relations
+        return relations
+
+    def __setitem__(self, block_key, relations):
+        if block_key in self._removed:
+            self._removed.discard(block_key)
+        elif block_key not in self._ordinals:
+            self._added[block_key] = None
+        self._materialized[block_key] = relations
+
+    def __delitem__(self, block_key):
+        if block_key not in self:
+            raise KeyError(block_key)
+        self._materialized.pop(block_key, None)
+        if block_key in self._ordinals:
+            self._removed.add(block_key)
+        else:
+            del self._added[block_key]
+
+    def __contains__(self, block_key):
+        if block_key in self._ordinals:
+            return block_key not in self._removed
+        return block_key in self._added
+
+    def __iter__(self):
+        for block_key in self._block_keys:
+            if block_key not in self._removed:
+                yield block_key
+        yield from list(self._added)
+
+    def __len__(self):
+        return len(self._block_keys) - len(self._removed) + len(self._added)
+
+    def __deepcopy__(self, memo):
+        copied = self.__class__.__new__(self.__class__)
+        # The key list and arrays are never mutated, so they can be shared.
+        copied.__dict__.update(self.__dict__)
+        copied._materialized = deepcopy(self._materialized, memo)  # pylint: disable=protected-access
+        copied._added = dict(self._added)  # pylint: disable=protected-access
+        copied._removed = set(self._removed)  # pylint: disable=protected-access
+        return copied
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+
+class CompactBlockDataMap(MutableMapping):
+    """
+    A {UsageKey: BlockData} map that stores each field in a column indexed
+    by block ordinal.
+
+    The BlockData objects returned by this map are views: reading and
+    writing their fields (and their transformer data's fields) reads and
+    writes the columns.
+    """
+    def __init__(self, block_keys):
+        """
+        Arguments:
+            block_keys ([UsageKey]) - The usage keys of the blocks that will
+                be stored, in ordinal order.  Keys that are not in this
+                list are appended to it when they are first stored.
+        """
+        self._block_keys = block_keys
+        self._ordinals = {block_key: ordinal for ordinal, block_key in enumerate(block_keys)}
+
+        # Map of (transformer name or None for xBlock fields, field name) to
+        # a list of field values indexed by block ordinal.
+        self._columns = {}
+
+        # Map of transformer name (or _BLOCK_DATA) to a bytearray indexed by
+        # block ordinal, of whether the block has data for the transformer.
+        self._presence = {_BLOCK_DATA: bytearray()}
+
+        # Columns and presence arrays that are not shared with a copy of this
+        # map, and so can be accessed without being copied first.
+        self._owned = {(False, _BLOCK_DATA)}
+        self._keys_owned = True
+
+    @classmethod
+    def from_block_data_map(cls, block_data_map, block_keys):
+        """
+        Returns a CompactBlockDataMap with the contents of the given
+        {UsageKey: BlockData} map.
+        """
+        compact_block_data_map = cls(list(block_keys))
+        for block_key, block_data in block_data_map.items():
+            compact_block_data_map[block_key] = block_data
+        return compact_block_data_map
+
+    #--- Column access ---#
+
+    def _ordinal(self, block_key, create=False):
+        """
+        Returns the ordinal of the given block key, interning it if create
+        is True.  Raises KeyError if the block key is unknown.
+        """
+        ordinal = self._ordinals.get(block_key)
+        if ordinal is None:
+            if not create:
+                raise KeyError(block_key)
+            if not self._keys_owned:
+                self._block_keys = list(self._block_keys)
+                self._ordinals = dict(self._ordinals)
+                self._keys_owned = True
+            ordinal = len(self._block_keys)
+            self._block_keys.append(block_key)
+            self._ordinals[block_key] = ordinal
+        return ordinal
+
+    def _owned_value(self, container, key, create):
+        """
+        Returns the column or presence array for key in the given container,
+        first copying it if it is shared with a copy of this map.
+        """
+        value = container.get(key)
+        if value is None:
+            if not create:
+                return None
+            value = container[key] = [] if container is self._columns else bytearray()
+            self._owned.add((container is self._columns, key))
+        elif (container is self._columns, key) not in self._owned:
+            value = container[key] = deepcopy(value)
+            self._owned.add((container is self._columns, key))
+        return value
+
+    def _is_present(self, presence_key, ordinal):
+        presence = self._presence.get(presence_key)
+        return presence is not None and ordinal < len(presence) and presence[ordinal]
+
+    def _set_present(self, presence_key, ordinal, present):
+        presence = self._owned_value(self._presence, presence_key, create=present)
+        if presence is None:
+            return
+        if ordinal >= len(presence):
+            presence.extend(bytes(ordinal + 1 - len(presence)))
+        presence[ordinal] = int(present)
+
+    def _has_value(self, column_key, ordinal):
+        column = self._columns.get(column_key)
+        return column is not None and ordinal < len(column) and column[ordinal] is not _MISSING
+
+    def _get_value(self, column_key, ordinal):
+        if not self._has_value(column_key, ordinal):
+            raise KeyError(column_key[1])
+        return self._owned_value(self._columns, column_key, create=False)[ordinal]
+
+    def _set_value(self, column_key, ordinal, value):
+        column = self._owned_value(self._columns, column_key, create=True)
+        if ordinal >= len(column):
+            column.extend([_MISSING] * (ordinal + 1 - len(column)))
+        column[ordinal] = value
+
+    def _delete_value(self, column_key, ordinal):
+        if not self._has_value(column_key, ordinal):
+            raise KeyError(column_key[1])
+        self._owned_value(self._columns, column_key, create=False)[ordinal] = _MISSING
+
+    def _field_names(self, transformer_name, ordinal):
+        return [
+            field_name
+            for (column_transformer_name, field_name) in self._columns
+            if column_transformer_name == transformer_name and self._has_value(
+                (column_transformer_name, field_name), ordinal,
+            )
+        ]
+
+    def _clear_fields(self, transformer_name, ordinal):
+        for field_name in self._field_names(transformer_name, ordinal):
+            self._delete_value((transformer_name, field_name), ordinal)
+
+    #--- Mapping interface ---#
+
+    def __getitem__(self, block_key):
+        ordinal = self._ordinal(block_key)
+        if not self._is_present(_BLOCK_DATA, ordinal):
+            raise KeyError(block_key)
+        block_data = BlockData(block_key)
+        block_data.fields = _CompactFields(self, None, ordinal)
+        block_data.transformer_data = _CompactTransformerDataMap(self, ordinal)
+        return block_data
+
+    def __setitem__(self, block_key, block_data):
+        ordinal = self._ordinal(block_key, create=True)
+        self._clear_block(ordinal)
+        self._set_present(_BLOCK_DATA, ordinal, True)
+        for field_name, value in block_data.fields.items():
+            self._set_value((None, field_name), ordinal, value)
+        for transformer_name, transformer_data in block_data.transformer_data.items():
+            _CompactTransformerDataMap(self, ordinal)[transformer_name] = transformer_data
+
+    def __delitem__(self, block_key):
+        ordinal = self._ordinal(block_key)
+        if not self._is_present(_BLOCK_DATA, ordinal):
+            raise KeyError(block_key)
+        self._clear_block(ordinal)
+
+    def _clear_block(self, ordinal):
+        self._clear_fields(None, ordinal)
+        for presence_key in list(self._presence):
+            if presence_key is not _BLOCK_DATA and self._is_present(presence_key, ordinal):
+                self._clear_fields(presence_key, ordinal)
+                self._set_present(presence_key, ordinal, False)
+        self._set_present(_BLOCK_DATA, ordinal, False)
+
+    def __contains__(self, block_key):
+        ordinal = self._ordinals.get(block_key)
+        return ordinal is not None and bool(self._is_present(_BLOCK_DATA, ordinal))
+
+    def __iter__(self):
+        presence = self._presence[_BLOCK_DATA]
+        return iter([
+            block_key
+            for ordinal, block_key in enumerate(self._block_keys[:len(presence)])
+            if presence[ordinal]
+        ])
+
+    def __len__(self):
+        return sum(self._presence[_BLOCK_DATA])
+
+    def __deepcopy__(self, memo):
+        copied = self.__class__.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+        # Both maps now share all columns, presence arrays and keys; each
+        # copies them as needed before accessing them.
+        copied._columns = dict(self._columns)  # pylint: disable=protected-access
+        copied._presence = dict(self._presence)  # pylint: disable=protected-access
+        copied._owned = set()  # pylint: disable=protected-access
+        copied._keys_owned = False  # pylint: disable=protected-access
+        self._owned = set()
+        self._keys_owned = False
+        return copied
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+
+class _CompactFields(MutableMapping):
+    """
+    A view of a single block's fields (either its xBlock fields, or the
+    fields of one of its transformers' data) in a CompactBlockDataMap.
+    """
+    def __init__(self, block_data_map, transformer_name, ordinal):
+        self._block_data_map = block_data_map
+        self._transformer_name = transformer_name
+        self._ordinal = ordinal
+
+    def __getitem__(self, field_name):
+        # pylint: disable=protected-access
+        return self._block_data_map._get_value((self._transformer_name, field_name), self._ordinal)
+
+    def __setitem__(self, field_name, value):
+        # pylint: disable=protected-access
+        self._block_data_map._set_value((self._transformer_name, field_name), self._ordinal, value)
+
+    def __delitem__(self, field_name):
+        # pylint: disable=protected-access
+        self._block_data_map._delete_value((self._transformer_name, field_name), self._ordinal)
+
+    def __contains__(self, field_name):
+        # pylint: disable=protected-access
+        return self._block_data_map._has_value((self._transformer_name, field_name), self._ordinal)
+
+    def __iter__(self):
+        # pylint: disable=protected-access
+        return iter(self._block_data_map._field_names(self._transformer_name, self._ordinal))
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def copy(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class _CompactTransformerDataMap(MutableMapping):
+    """
+    A view of a single block's TransformerDataMap in a CompactBlockDataMap.
+    Like TransformerDataMap, it can be accessed by the transformer's class
+    or its name.
+    """
+    def __init__(self, block_data_map, ordinal):
+        self._block_data_map = block_data_map
+        self._ordinal = ordinal
+
+    _translate_key = TransformerDataMap._translate_key  # pylint: disable=protected-access
+
+    def __getitem__(self, key):
+        transformer_name = self._translate_key(key)
+        if not self._block_data_map._is_present(transformer_name, self._ordinal):  # pylint: disable=protected-access
+            raise KeyError(transformer_name)
+        transformer_data = TransformerData()
+        transformer_data.fields = _CompactFields(self._block_data_map, transformer_name, self._ordinal)
+        return transformer_data
+
+    def __setitem__(self, key, transformer_data):
+        # pylint: disable=protected-access
+        transformer_name = self._translate_key(key)
+        fields = dict(transformer_data.fields)
+        self._block_data_map._clear_fields(transformer_name, self._ordinal)
+        self._block_data_map._set_present(transformer_name, self._ordinal, True)
+        for field_name, value in fields.items():
+            self._block_data_map._set_value((transformer_name, field_name), self._ordinal, value)
+
+    def __delitem__(self, key):
+        # pylint: disable=protected-access
+        transformer_name = self._translate_key(key)
+        if not self._block_data_map._is_present(transformer_name, self._ordinal):
+            raise KeyError(transformer_name)
+        self._block_data_map._clear_fields(transformer_name, self._ordinal)
+        self._block_data_map._set_present(transformer_name, self._ordinal, False)
+
+    def __iter__(self):
+        # pylint: disable=protected-access
+        return iter([
+            presence_key
+            for presence_key in list(self._block_data_map._presence)
+            if presence_key is not _BLOCK_DATA and self._block_data_map._is_present(presence_key, self._ordinal)
+        ])
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def get_or_create(self, key):
+        """
+        Returns the TransformerData associated with the given key, creating
+        it if needed.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = TransformerData()
+            return self[key]
+
+    def _materialized(self):
+        transformer_data_map = TransformerDataMap()
+        for transformer_name, transformer_data in self.items():
+            transformer_data_map[transformer_name] = TransformerData()
+            transformer_data_map[transformer_name].fields = dict(transformer_data.fields)
+        return transformer_data_map
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self._materialized(), memo)
+
+    def __reduce__(self):
+        return self._materialized().__reduce__()
@@ -9,6 +9,29 @@ from openedx.core.lib.cache_utils import request_cached
 
 from .models import BlockStructureConfiguration
 
+# .. toggle_name: block_structure.columnar_serialization
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, collected block structures are stored in the versioned columnar format
+#   (see block_structure/columnar.py) instead of as a single zlib-compressed pickle. Data in either format
+#   can always be read, so the switch can be turned off again without invalidating stored structures.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-04-18
+COLUMNAR_SERIALIZATION = WaffleSwitch('block_structure.columnar_serialization', __name__)
+
+# .. toggle_name: block_structure.incremental_collection
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, updating a collected block structure after a publish only re-runs the
+#   collect phase of transformers that collect from ancestors only (COLLECTS_FROM_ANCESTORS_ONLY) for blocks
+#   that changed since the previous collect, their descendants and their ancestors. Previously collected data is
+#   reused for all other blocks. Other transformers are still collected over the entire course.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-04-18
+INCREMENTAL_COLLECTION = WaffleSwitch('block_structure.incremental_collection', __name__)
+
 
 @request_cached()
 def num_versions_to_keep():
@@ -55,6 +55,7 @@ class BlockStructureFactory:
 
         root_xblock = modulestore.get_item(root_block_usage_key, depth=None, lazy=False)
         build_block_structure(root_xblock)
+        block_structure._collect_block_versions()  # pylint: disable=protected-access
         return block_structure
 
     @classmethod
@@ -5,12 +5,17 @@ BlockStructures.
 
 
 from contextlib import contextmanager
+from logging import getLogger
 
+from . import config
 from .exceptions import BlockStructureNotFound, TransformerDataIncompatible, UsageKeyNotInBlockStructure
 from .factory import BlockStructureFactory
 from .store import BlockStructureStore
+from .transformer_registry import TransformerRegistry
 from .transformers import BlockStructureTransformers
 
+logger = getLogger(__name__)  # pylint: disable=C0103
+
 
 class BlockStructureManager:
     """
@@ -118,6 +123,17 @@ class BlockStructureManager:
 
         return block_structure
 
+    def get_collected_version(self):
+        """
+        Returns a string identifying the version of the collected Block
+        Structure for the root_block_usage_key in the store, or None if
+        it has not been collected yet.
+        """
+        try:
+            return self.store.get_version(self.root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+
     def update_collected_if_needed(self):
         """
         The store is updated with newly collected transformers data from
@@ -131,16 +147,99 @@ class BlockStructureManager:
         """
         The store is updated with newly collected transformers data from
         the modulestore.
+
+        When incremental collection is enabled and the previously
+        collected data is compatible, only the blocks that changed since
+        the previous collect are re-collected where possible.
         """
         with self._bulk_operations():
             block_structure = BlockStructureFactory.create_from_modulestore(
                 self.root_block_usage_key,
                 self.modulestore,
             )
-            BlockStructureTransformers.collect(block_structure)
+            previous_block_structure = self._get_previously_collected()
+            recollect_block_keys = None
+            if previous_block_structure is not None:
+                recollect_block_keys = self._get_blocks_to_recollect(previous_block_structure, block_structure)
+
+            if recollect_block_keys is None:
+                BlockStructureTransformers.collect(block_structure)
+            else:
+                logger.info(
+                    "BlockStructure: Incrementally collecting %d of %d blocks; %s.",
+                    len(recollect_block_keys),
+                    len(block_structure),
+                    self.root_block_usage_key,
+                )
+                BlockStructureTransformers.collect_incremental(
+                    block_structure, previous_block_structure, recollect_block_keys,
+                )
             self.store.add(block_structure)
             return block_structure
 
+    def _get_previously_collected(self):
+        """
+        Returns the previously collected block structure from the store if
+        incremental collection is enabled and its data was collected by the
+        current version of every registered transformer, otherwise None.
+        """
+        if not config.INCREMENTAL_COLLECTION.is_enabled():
+            return None
+
+        try:
+            previous_block_structure = self.store.get(self.root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+
+        for transformer in TransformerRegistry.get_registered_transformers():
+            # pylint: disable=protected-access
+            if previous_block_structure._get_transformer_data_version(transformer) != transformer.WRITE_VERSION:
+                return None
+        return previous_block_structure
+
+    @staticmethod
+    def _get_blocks_to_recollect(previous_block_structure, block_structure):
+        """
+        Returns the usage keys of the blocks in block_structure whose data
+        needs to be re-collected: the blocks whose modulestore version
+        differs from the one in previous_block_structure, all of their
+        descendants, and all ancestors of those.
+
+        Returns None if the changed blocks can't be determined, or if
+        every block needs to be re-collected anyway.
+        """
+        # pylint: disable=protected-access
+        changed_block_keys = []
+        for block_key in block_structure:
+            block_version = block_structure._get_block_version(block_key)
+            if block_version is None:
+                return None
+            if block_key not in previous_block_structure or (
+                previous_block_structure._get_block_version(block_key) != block_version
+            ):
+                changed_block_keys.append(block_key)
+
+        if block_structure.root_block_usage_key in changed_block_keys:
+            return None
+
+        # The root block is always re-collected, since it is an ancestor of
+        # every changed block (or the only block to collect if none changed).
+        recollect_block_keys = {block_structure.root_block_usage_key}
+        for changed_block_key in changed_block_keys:
+            if changed_block_key not in recollect_block_keys:
+                recollect_block_keys.update(block_structure.post_order_traversal(start_node=changed_block_key))
+
+        ancestors_to_visit = list(recollect_block_keys)
+        while ancestors_to_visit:
+            for parent_key in block_structure.get_parents(ancestors_to_visit.pop()):
+                if parent_key not in recollect_block_keys:
+                    recollect_block_keys.add(parent_key)
+                    ancestors_to_visit.append(parent_key)
+
+        if len(recollect_block_keys) == len(block_structure):
+            return None
+        return recollect_block_keys
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
@@ -6,11 +6,14 @@ Module for the Storage of BlockStructure objects.
 
 from logging import getLogger
 
+from django.conf import settings
 
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
 from . import config
 from .block_structure import BlockStructureBlockData
+from .columnar import deserialize_block_structure, is_columnar, serialize_block_structure
+from .compact import compact_block_structure
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .models import BlockStructureModel
@@ -97,6 +100,18 @@ class BlockStructureStore:
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
+    def get_version(self, root_block_usage_key):
+        """
+        Returns a string identifying the version of the block structure
+        in storage for the given root_block_usage_key, which changes
+        whenever the block structure is re-collected.
+
+        Raises:
+            BlockStructureNotFound if the root_block_usage_key is not
+            found.
+        """
+        return self._encode_root_cache_key(self._get_model(root_block_usage_key))
+
     def is_up_to_date(self, root_block_usage_key, modulestore):
         """
         Returns whether the data in storage for the given key is
@@ -175,7 +190,13 @@ class BlockStructureStore:
     def _serialize(self, block_structure):
         """
         Serializes the data for the given block_structure.
+
+        The columnar format is used when enabled by the
+        COLUMNAR_SERIALIZATION switch, otherwise the legacy zpickle format.
         """
+        if config.COLUMNAR_SERIALIZATION.is_enabled():
+            return serialize_block_structure(block_structure)
+
         data_to_cache = (
             block_structure._block_relations,
             block_structure.transformer_data,
@@ -186,9 +207,18 @@ class BlockStructureStore:
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+
+        Data in the columnar format is decoded lazily; anything else is
+        assumed to be in the legacy zpickle format.
+
+        The compact in-memory representation is used when enabled by
+        BLOCK_STRUCTURES_SETTINGS['COMPACT_REPRESENTATION'].
         """
+        compact = settings.BLOCK_STRUCTURES_SETTINGS.get('COMPACT_REPRESENTATION', False)
 
         try:
+            if is_columnar(serialized_data):
+                return deserialize_block_structure(serialized_data, root_block_usage_key, compact=compact)
             block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
@@ -196,12 +226,15 @@ class BlockStructureStore:
             logger.exception("BlockStructure: Failed to load data from cache for %s", bs_model)
             raise BlockStructureNotFound(bs_model.data_usage_key)  # lint-amnesty, pylint: disable=raise-missing-from
 
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             root_block_usage_key,
             block_relations,
             transformer_data,
             block_data_map,
         )
+        if compact:
+            compact_block_structure(block_structure)
+        return block_structure
 
     @staticmethod
     def _encode_root_cache_key(bs_model):
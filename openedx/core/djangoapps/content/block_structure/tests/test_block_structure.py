@@ -248,6 +248,29 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
 
+    def test_bulk_removal_filter(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        evaluated_blocks = []
+
+        def _removal_condition(block):
+            evaluated_blocks.append(block)
+            return block == 1
+
+        block_structure.filter_topological_traversal(block_structure.create_bulk_removal_filter(_removal_condition))
+        self.assert_block_structure(block_structure, [[2], [], [], [], []], missing_blocks=[1])
+        assert sorted(evaluated_blocks) == [0, 1, 2, 3, 4]
+
+    def test_traversal_orders(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        traversal_orders = block_structure.get_traversal_orders()
+        assert traversal_orders.nodes == list(block_structure.topological_traversal())
+        assert block_structure.get_traversal_orders() is traversal_orders
+        assert block_structure.copy().get_traversal_orders() is traversal_orders
+
+        # The cached orders are discarded when the relations change.
+        block_structure.remove_block(1, keep_descendants=False)
+        assert block_structure.get_traversal_orders().nodes == [0, 2]
+
     def test_copy(self):
         def _set_value(structure, value):
             """
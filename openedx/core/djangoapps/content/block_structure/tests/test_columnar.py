@@ -0,0 +1,154 @@
+"""
+Tests for columnar.py
+"""
+
+import pickle
+from copy import deepcopy
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import ddt
+from pytz import UTC
+
+from ..columnar import deserialize_block_structure, is_columnar, serialize_block_structure
+from ..block_structure import TransformerDataMap
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestColumnarSerialization(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the columnar BlockStructure serialization format.
+    """
+
+    def round_trip(self, block_structure):
+        """
+        Returns the given block structure after serializing and deserializing it.
+        """
+        serialized_data = serialize_block_structure(block_structure)
+        assert is_columnar(serialized_data)
+        return deserialize_block_structure(serialized_data, block_structure.root_block_usage_key)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_relations(self, children_map):
+        block_structure = self.create_block_structure(children_map)
+        deserialized = self.round_trip(block_structure)
+        self.assert_block_structure(deserialized, children_map)
+        assert list(deserialized.get_block_keys()) == list(block_structure.get_block_keys())
+        for block_key in block_structure:
+            assert deserialized.get_parents(block_key) == block_structure.get_parents(block_key)
+
+    @ddt.data(
+        'a string',
+        17,
+        1.5,
+        None,
+        True,
+        [1, [2, 'three']],
+        (1, 2),
+        {'nested': {'dict': [1]}},
+        {1, 2},
+        frozenset(['a']),
+        datetime(2020, 1, 1, 12, 30, tzinfo=UTC),
+        datetime(2020, 1, 1, 12, 30),
+        timedelta(days=1, seconds=3),
+    )
+    def test_field_values(self, value):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_key = self.block_key_factory(3)
+        block_structure.override_xblock_field(block_key, 'field', value)
+        block_structure.set_transformer_block_field(block_key, MockTransformer, 'transformer_field', value)
+        block_structure.set_transformer_data(MockTransformer, 'structure_field', value)
+
+        deserialized = self.round_trip(block_structure)
+        assert deserialized.get_xblock_field(block_key, 'field') == value
+        assert deserialized.get_transformer_block_field(block_key, MockTransformer, 'transformer_field') == value
+        assert deserialized.get_transformer_data(MockTransformer, 'structure_field') == value
+
+    def test_opaque_key_values(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        value = {self.block_key_factory(1): [self.block_key_factory(2), self.course_key]}
+        block_structure.override_xblock_field(self.block_key_factory(0), 'keys', value)
+        deserialized = self.round_trip(block_structure)
+        assert deserialized.get_xblock_field(self.block_key_factory(0), 'keys') == value
+
+    def test_missing_fields(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_structure.override_xblock_field(self.block_key_factory(1), 'field', 'value')
+        block_structure.set_transformer_block_field(self.block_key_factory(1), MockTransformer, 'key', 'value')
+
+        deserialized = self.round_trip(block_structure)
+        block_key = self.block_key_factory(2)
+        assert deserialized.get_xblock_field(block_key, 'field', 'default') == 'default'
+        assert deserialized.get_transformer_block_field(block_key, MockTransformer, 'key', 'default') == 'default'
+        assert MockTransformer not in deserialized[block_key].transformer_data
+        assert MockTransformer in deserialized[self.block_key_factory(1)].transformer_data
+
+    def test_mutations_after_deserialization(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_key = self.block_key_factory(1)
+        block_structure.set_transformer_block_field(block_key, MockTransformer, 'key', 'value')
+
+        deserialized = self.round_trip(block_structure)
+        deserialized.remove_transformer_block_field(block_key, MockTransformer, 'key')
+        assert deserialized.get_transformer_block_field(block_key, MockTransformer, 'key') is None
+        deserialized.override_xblock_field(block_key, 'field', 'overridden')
+        assert deserialized.get_xblock_field(block_key, 'field') == 'overridden'
+
+        # The mutated structure serializes with its changes.
+        reserialized = self.round_trip(deserialized)
+        assert reserialized.get_transformer_block_field(block_key, MockTransformer, 'key') is None
+        assert reserialized.get_xblock_field(block_key, 'field') == 'overridden'
+
+    def test_dict_methods_load_entries(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_key = self.block_key_factory(1)
+        block_structure.override_xblock_field(block_key, 'field', 'value')
+        block_structure.override_xblock_field(block_key, 'other', 'other value')
+        block_structure.set_transformer_block_field(block_key, MockTransformer, 'key', 'value')
+
+        def fields():
+            return self.round_trip(block_structure)[block_key].fields
+
+        assert fields().pop('field') == 'value'
+        assert fields().pop('missing', 'default') == 'default'
+        assert fields().setdefault('field', 'default') == 'value'
+        assert fields().setdefault('missing', 'default') == 'default'
+
+        updated = fields()
+        updated.update({'field': 'updated'}, new='new')
+        assert updated == {'field': 'updated', 'other': 'other value', 'new': 'new'}
+
+        popped = fields()
+        assert popped.popitem() in {('field', 'value'), ('other', 'other value')}
+        assert len(popped) == 1
+
+        cleared = fields()
+        cleared.clear()
+        assert 'field' not in cleared
+        assert not cleared
+
+        transformer_data = self.round_trip(block_structure)[block_key].transformer_data
+        assert transformer_data.pop(MockTransformer).key == 'value'
+        assert MockTransformer not in transformer_data
+
+    def test_copy_and_pickle(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_key = self.block_key_factory(1)
+        block_structure.override_xblock_field(block_key, 'field', ['value'])
+        block_structure.set_transformer_block_field(block_key, MockTransformer, 'key', 'value')
+        deserialized = self.round_trip(block_structure)
+
+        copied = deserialized.copy()
+        assert type(copied[block_key].fields) is dict  # pylint: disable=unidiomatic-typecheck
+        assert type(copied[block_key].transformer_data) is TransformerDataMap  # pylint: disable=unidiomatic-typecheck
+        copied.override_xblock_field(block_key, 'field', ['changed'])
+        assert deserialized.get_xblock_field(block_key, 'field') == ['value']
+
+        unpickled = pickle.loads(pickle.dumps(deepcopy(deserialized[block_key])))
+        assert unpickled.fields == {'field': ['value']}
+        assert unpickled.transformer_data[MockTransformer].key == 'value'
@@ -0,0 +1,89 @@
+"""
+Tests for compact.py
+"""
+
+import pickle
+from unittest import TestCase
+
+import ddt
+
+from ..compact import CompactBlockDataMap, CompactBlockRelations, compact_block_structure
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestCompactBlockStructure(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the compact BlockStructure representation.
+    """
+
+    def create_collected_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map, with xBlock and
+        transformer fields set on each block.
+        """
+        block_structure = self.create_block_structure(children_map)
+        for block_key in block_structure:
+            block_structure.override_xblock_field(block_key, 'display_name', str(block_key))
+            block_structure.override_xblock_field(block_key, 'list_field', [1])
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'transformer_field', [2])
+        return block_structure
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_equivalence(self, children_map):
+        block_structure = self.create_collected_block_structure(children_map)
+        compacted = compact_block_structure(self.create_collected_block_structure(children_map))
+        assert isinstance(compacted._block_relations, CompactBlockRelations)  # pylint: disable=protected-access
+        assert isinstance(compacted._block_data_map, CompactBlockDataMap)  # pylint: disable=protected-access
+
+        self.assert_block_structure(compacted, children_map)
+        assert list(compacted) == list(block_structure)
+        for block_key in block_structure:
+            assert compacted.get_parents(block_key) == block_structure.get_parents(block_key)
+            assert compacted.get_xblock_field(block_key, 'display_name') == str(block_key)
+            assert compacted.get_xblock_field(block_key, 'missing', 'default') == 'default'
+            assert compacted.get_transformer_block_field(block_key, MockTransformer, 'transformer_field') == [2]
+
+    def test_copy_is_independent(self):
+        block_structure = compact_block_structure(self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP))
+        copied = block_structure.copy()
+
+        copied.get_xblock_field(self.block_key_factory(1), 'list_field').append(3)
+        copied.override_xblock_field(self.block_key_factory(2), 'display_name', 'changed')
+        copied.remove_transformer_block_field(self.block_key_factory(3), MockTransformer, 'transformer_field')
+        copied.remove_block(self.block_key_factory(4), keep_descendants=False)
+
+        assert block_structure.get_xblock_field(self.block_key_factory(1), 'list_field') == [1]
+        assert block_structure.get_xblock_field(self.block_key_factory(2), 'display_name') != 'changed'
+        assert block_structure.get_transformer_block_field(
+            self.block_key_factory(3), MockTransformer, 'transformer_field',
+        ) == [2]
+        assert self.block_key_factory(4) in block_structure
+        assert self.block_key_factory(4) in block_structure.get_children(self.block_key_factory(1))
+
+        assert copied.get_xblock_field(self.block_key_factory(1), 'list_field') == [1, 3]
+        assert self.block_key_factory(4) not in copied
+
+    def test_add_block(self):
+        block_structure = compact_block_structure(self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP))
+        new_block_key = self.block_key_factory(100)
+        block_structure._add_relation(self.block_key_factory(0), new_block_key)  # pylint: disable=protected-access
+        block_structure.override_xblock_field(new_block_key, 'display_name', 'new')
+
+        assert new_block_key in block_structure
+        assert block_structure.get_parents(new_block_key) == [self.block_key_factory(0)]
+        assert block_structure.get_xblock_field(new_block_key, 'display_name') == 'new'
+
+    def test_pickle(self):
+        block_structure = compact_block_structure(self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP))
+        block_relations, block_data_map = pickle.loads(pickle.dumps(
+            (block_structure._block_relations, block_structure._block_data_map)  # pylint: disable=protected-access
+        ))
+        assert type(block_relations) is dict  # pylint: disable=unidiomatic-typecheck
+        block_data = block_data_map[self.block_key_factory(1)]
+        assert block_data.fields == {'display_name': str(self.block_key_factory(1)), 'list_field': [1]}
+        assert block_data.transformer_data[MockTransformer].fields == {'transformer_field': [2]}
@@ -5,8 +5,10 @@ Tests for manager.py
 import pytest
 import ddt
 from django.test import TestCase
+from edx_toggles.toggles.testutils import override_waffle_switch
 
 from ..block_structure import BlockStructureBlockData
+from ..config import INCREMENTAL_COLLECTION
 from ..exceptions import UsageKeyNotInBlockStructure
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
@@ -92,6 +94,25 @@ class TestTransformer1(MockTransformer):
         return data_key + 't1.val1.' + str(block_key)
 
 
+class TestAncestorsOnlyTransformer(TestTransformer1):
+    """
+    Test Transformer class that collects from ancestors only, recording the
+    blocks it collected data for.
+    """
+    COLLECTS_FROM_ANCESTORS_ONLY = True
+    collect_data_key = 't2.collect'
+    transform_data_key = 't2.transform'
+    collected_block_keys = []
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects block data for the block structure.
+        """
+        cls.collected_block_keys.extend(block_structure.topological_traversal())
+        super().collect(block_structure)
+
+
 @ddt.ddt
 class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
     """
@@ -216,3 +237,51 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         assert TestTransformer1.collect_call_count == 2
+
+    def set_block_versions(self, version, block_ids=None):
+        """
+        Sets the modulestore version of the given blocks (default: all blocks).
+        """
+        for block_id in (range(len(self.children_map)) if block_ids is None else block_ids):
+            self.modulestore.blocks[self.block_key_factory(block_id)].field_map['update_version'] = version
+
+    @ddt.data(
+        ([3], [0, 1, 3]),
+        ([1], [0, 1, 3, 4]),
+        ([], [0]),
+        ([0], [0, 1, 2, 3, 4]),
+    )
+    @ddt.unpack
+    def test_incremental_collection(self, changed_block_ids, expected_recollected_block_ids):
+        registered_transformers = [TestTransformer1(), TestAncestorsOnlyTransformer()]
+        self.set_block_versions('version1')
+        with override_waffle_switch(INCREMENTAL_COLLECTION, active=True):
+            with mock_registered_transformers(registered_transformers):
+                self.bs_manager.update_collected_if_needed()
+                TestAncestorsOnlyTransformer.collected_block_keys = []
+                TestTransformer1.collect_call_count = 0
+
+                self.set_block_versions('version2', changed_block_ids)
+                self.bs_manager._update_collected()  # pylint: disable=protected-access
+                block_structure = self.bs_manager.get_collected()
+
+        assert sorted(TestAncestorsOnlyTransformer.collected_block_keys) == sorted(
+            self.block_key_factory(block_id) for block_id in expected_recollected_block_ids
+        )
+        # Transformers that don't collect from ancestors only are always fully collected.
+        assert TestTransformer1.collect_call_count == 1
+        self.assert_block_structure(block_structure, self.children_map)
+        TestTransformer1.assert_collected(block_structure)
+        TestAncestorsOnlyTransformer.assert_collected(block_structure)
+
+    def test_incremental_collection_disabled(self):
+        registered_transformers = [TestAncestorsOnlyTransformer()]
+        self.set_block_versions('version1')
+        with mock_registered_transformers(registered_transformers):
+            self.bs_manager.update_collected_if_needed()
+            TestAncestorsOnlyTransformer.collected_block_keys = []
+
+            self.set_block_versions('version2', [3])
+            self.bs_manager._update_collected()  # pylint: disable=protected-access
+
+        assert len(TestAncestorsOnlyTransformer.collected_block_keys) == len(self.children_map)
@@ -4,9 +4,14 @@ Tests for block_structure/cache.py
 
 import pytest
 import ddt
+from django.test.utils import override_settings
+from edx_toggles.toggles.testutils import override_waffle_switch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
+from ..columnar import is_columnar
+from ..compact import CompactBlockRelations
+from ..config import COLUMNAR_SERIALIZATION
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
 from ..store import BlockStructureStore
@@ -76,3 +81,29 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         assert self.mock_cache.timeout_from_last_call == 0
         self.store.add(self.block_structure)
         assert self.mock_cache.timeout_from_last_call == timeout
+
+    @ddt.data(True, False)
+    def test_serialization_format(self, columnar_enabled):
+        with override_waffle_switch(COLUMNAR_SERIALIZATION, active=columnar_enabled):
+            self.store.add(self.block_structure)
+        serialized_data = list(self.mock_cache.map.values())[0]
+        assert is_columnar(serialized_data) == columnar_enabled
+
+        # Data in either format is readable regardless of the switch.
+        stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+        assert stored_value.get_transformer_block_field(
+            self.block_key_factory(0), MockTransformer, 'test',
+        ) == f'{MockTransformer.name()} val'
+
+    @ddt.data(True, False)
+    def test_compact_representation(self, columnar_enabled):
+        with override_waffle_switch(COLUMNAR_SERIALIZATION, active=columnar_enabled):
+            self.store.add(self.block_structure)
+        with override_settings(BLOCK_STRUCTURES_SETTINGS={'COMPACT_REPRESENTATION': True}):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        assert isinstance(stored_value._block_relations, CompactBlockRelations)  # pylint: disable=protected-access
+        self.assert_block_structure(stored_value, self.children_map)
+        assert stored_value.get_transformer_block_field(
+            self.block_key_factory(0), MockTransformer, 'test',
+        ) == f'{MockTransformer.name()} val'
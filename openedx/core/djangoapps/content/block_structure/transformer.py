@@ -58,6 +58,13 @@ class BlockStructureTransformer:
     WRITE_VERSION = 0
     READ_VERSION = 0
 
+    # Whether the data collected by this transformer for a block depends
+    # only on that block and its ancestors (for example, fields merged
+    # down from parents).  Such transformers are only re-collected for the
+    # blocks affected by a change (see BlockStructureTransformers.collect_incremental),
+    # rather than for the entire block structure.
+    COLLECTS_FROM_ANCESTORS_ONLY = False
+
     @classmethod
     def name(cls):
         """
@@ -80,6 +80,54 @@ class BlockStructureTransformers:
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def collect_incremental(cls, block_structure, previous_block_structure, recollect_block_keys):
+        """
+        Collects data for each registered transformer, reusing the data
+        previously collected for blocks that are not in recollect_block_keys.
+
+        Transformers that collect from ancestors only are run on a partial
+        block structure containing just the blocks in recollect_block_keys,
+        and their previously collected data is kept for all other blocks.
+        All other transformers are run on the entire block structure.
+
+        Arguments:
+            block_structure (BlockStructureModulestoreData) - The newly
+                created block structure to collect data into.
+
+            previous_block_structure (BlockStructureBlockData) - The block
+                structure collected for a previous version of the content,
+                with data for the current version of every transformer.
+
+            recollect_block_keys (set(UsageKey)) - Usage keys of the blocks
+                whose data must be re-collected.  Must include every
+                ancestor of each of these blocks.
+        """
+        # pylint: disable=protected-access
+        partial_block_structure = block_structure._create_partial(recollect_block_keys)
+        unchanged_block_keys = [
+            block_key for block_key in block_structure if block_key not in recollect_block_keys
+        ]
+
+        for transformer in TransformerRegistry.get_registered_transformers():
+            block_structure._add_transformer(transformer)
+            if transformer.COLLECTS_FROM_ANCESTORS_ONLY:
+                partial_block_structure._add_transformer(transformer)
+                transformer.collect(partial_block_structure)
+                block_structure.transformer_data[transformer] = partial_block_structure.transformer_data[transformer]
+                block_structure._copy_transformer_block_data(
+                    transformer, partial_block_structure, recollect_block_keys,
+                )
+                block_structure._copy_transformer_block_data(
+                    transformer, previous_block_structure, unchanged_block_keys,
+                )
+            else:
+                transformer.collect(block_structure)
+
+        # Collect all fields that were requested by the transformers.
+        block_structure.request_xblock_fields(*partial_block_structure._requested_xblock_fields)
+        block_structure._collect_requested_xblock_fields()
+
     @classmethod
     def verify_versions(cls, block_structure):
         """
@@ -1,8 +1,14 @@
 """
-Database Routers for use with the coursewarehistoryextended django app.
+Database Routers for use with the courseware and coursewarehistoryextended django apps.
 """
 
 
+import zlib
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
 class StudentModuleHistoryExtendedRouter:
     """
     A Database Router that separates StudentModuleHistoryExtended into its own database.
@@ -77,3 +83,156 @@ class StudentModuleHistoryExtendedRouter:
             return False
 
         return None
+
+
+class StudentModuleShardRouter:
+    """
+    A Database Router that partitions StudentModule across the database aliases
+    listed in settings.STUDENT_MODULE_SHARDS['DATABASES'], by course or by user.
+
+    The shard of a StudentModule row is chosen by hashing its course key, or
+    its user id, depending on settings.STUDENT_MODULE_SHARDS['KEY'].  Django
+    routers only see the model being queried, so queries that don't start from
+    a StudentModule instance must ask for their shard with :meth:`shard_for`,
+    :meth:`shards_for_course` or :meth:`shards_for_user`, and use it with
+    ``db_manager``, as StudentModule's manager does.
+
+    Without settings.STUDENT_MODULE_SHARDS, this router leaves StudentModule
+    to the other routers.
+    """
+
+    COURSE_KEY = 'course'
+    USER_KEY = 'user'
+
+    @staticmethod
+    def _settings():
+        return getattr(settings, 'STUDENT_MODULE_SHARDS', None) or {}
+
+    @classmethod
+    def is_enabled(cls):
+        """
+        Return True if StudentModule is partitioned across shards.
+        """
+        return bool(cls._settings().get('DATABASES'))
+
+    @classmethod
+    def shards(cls):
+        """
+        Return the database aliases of the shards.
+        """
+        return list(cls._settings().get('DATABASES', []))
+
+    @classmethod
+    def _shard_key(cls):
+        """
+        Return what rows are partitioned by: COURSE_KEY or USER_KEY.
+        """
+        return cls._settings().get('KEY', cls.COURSE_KEY)
+
+    @staticmethod
+    def _hashed_shard(shards, value):
+        """
+        Return the shard of ``shards`` that ``value`` hashes to.
+        """
+        return shards[zlib.crc32(str(value).encode('utf-8')) % len(shards)]
+
+    @classmethod
+    def shard_for(cls, course_key, user_id):
+        """
+        Return the database alias of the shard storing the StudentModule rows of
+        the user in the course, or None if StudentModule isn't partitioned.
+        """
+        shards = cls.shards()
+        if not shards:
+            return None
+        if cls._shard_key() == cls.USER_KEY:
+            return cls._hashed_shard(shards, user_id)
+        return cls._hashed_shard(shards, course_key)
+
+    @classmethod
+    def shards_for_course(cls, course_key):
+        """
+        Return the database aliases of the shards storing the StudentModule rows
+        of the course, or [None] if StudentModule isn't partitioned.
+        """
+        shards = cls.shards()
+        if not shards:
+            return [None]
+        if cls._shard_key() == cls.USER_KEY:
+            return shards
+        return [cls._hashed_shard(shards, course_key)]
+
+    @classmethod
+    def shards_for_user(cls, user_id):
+        """
+        Return the database aliases of the shards storing the StudentModule rows
+        of the user, or [None] if StudentModule isn't partitioned.
+        """
+        shards = cls.shards()
+        if not shards:
+            return [None]
+        if cls._shard_key() == cls.USER_KEY:
+            return [cls._hashed_shard(shards, user_id)]
+        return shards
+
+    def _is_csm(self, model):
+        """
+        Return True if ``model`` is courseware.models.StudentModule.
+        """
+        return (
+            model._meta.app_label == 'courseware' and
+            model._meta.model_name == 'studentmodule'
+        )
+
+    def _is_csm_h(self, model):
+        """
+        Return True if ``model`` is courseware.models.StudentModuleHistory.
+        """
+        return (
+            model._meta.app_label == 'courseware' and
+            model._meta.model_name == 'studentmodulehistory'
+        )
+
+    def _db_for_instance(self, model, **hints):
+        """
+        Return the shard of the StudentModule instance hinted, if any.
+
+        StudentModuleHistory stays in the default database, rather than
+        following its StudentModule to its shard.
+        """
+        if not self.is_enabled():
+            return None
+        if self._is_csm_h(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if self._is_csm(model) and isinstance(instance, model) and instance.course_id and instance.student_id:
+            return self.shard_for(instance.course_id, instance.student_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        """
+        Use the shard of the StudentModule instance hinted, if any.
+        """
+        return self._db_for_instance(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        """
+        Use the shard of the StudentModule instance hinted, if any.
+        """
+        return self._db_for_instance(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):  # pylint: disable=unused-argument
+        """
+        Allow the relations of StudentModule across shards, which are all declared with db_constraint=False.
+        """
+        if self.is_enabled() and (self._is_csm(obj1) or self._is_csm(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):  # pylint: disable=unused-argument
+        """
+        Only sync StudentModule to the shards other than the default database.
+        """
+        if db == DEFAULT_DB_ALIAS or db not in self.shards():
+            return None
+        return app_label == 'courseware' and model_name == 'studentmodule'
@@ -108,8 +108,18 @@ an efficient way to get a node's parents, perhaps with back pointers
 to each node's parents.  This requires additional storage space, which
 could be eliminated if DAGs are not supported.
 
+Precomputed orderings:
+Callers that traverse the same graph repeatedly (for example, every
+block transformer that runs on a block structure) can instead compute
+a TraversalOrders object once.  It numbers the nodes by their position
+in a topological sort and provides the pre-order, post-order and
+filtered orderings as lists and masks indexed by those ordinals, so
+that per-node predicates can be applied in bulk passes over the
+ordinals instead of re-walking the graph with callbacks.
+
 """
 
+from array import array
 from collections import deque
 
 
@@ -335,6 +345,157 @@ def _traverse_generic(
             yield_results[current_node] = should_yield_node
 
 
+class TraversalOrders:
+    """
+    Precomputed orderings of the nodes of a tree (or directed acyclic
+    graph) reachable from a start node.
+
+    Nodes are identified by their ordinal: their position in a
+    topological sort of the graph, as yielded by traverse_topologically.
+    The orderings are a snapshot and are not updated if the graph
+    changes.
+    """
+    def __init__(
+            self,
+            start_node,
+            get_parents,
+            get_children,  # lint-amnesty, pylint: disable=redefined-outer-name
+    ):
+        """
+        Arguments:
+            See description in traverse_topologically.
+        """
+        # The nodes in topological order; a node's index in this list is
+        # its ordinal.
+        self.nodes = list(traverse_topologically(start_node, get_parents, get_children))
+
+        # Map of node to its ordinal.
+        self.ordinals = {node: ordinal for ordinal, node in enumerate(self.nodes)}
+
+        # The ordinals of each node's parents and children, indexed by
+        # ordinal.  Relations to nodes outside the ordering are omitted.
+        self.parents = [self._get_ordinals(get_parents(node)) for node in self.nodes]
+        self.children = [self._get_ordinals(get_children(node)) for node in self.nodes]
+
+        self._pre_order = None
+        self._post_order = None
+
+    def _get_ordinals(self, nodes):
+        return array('i', (self.ordinals[node] for node in nodes if node in self.ordinals))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def topological(self):
+        """
+        Returns the ordinals of the nodes in topological order.
+        """
+        return range(len(self.nodes))
+
+    @property
+    def pre_order(self):
+        """
+        Returns the ordinals of the nodes in the order yielded by
+        traverse_pre_order.
+        """
+        if self._pre_order is None:
+            visited = bytearray(len(self.nodes))
+            order = array('i')
+            stack = [0] if self.nodes else []
+            while stack:
+                ordinal = stack.pop()
+                if not visited[ordinal]:
+                    stack.extend(reversed([child for child in self.children[ordinal] if not visited[child]]))
+                    order.append(ordinal)
+                    visited[ordinal] = 1
+            self._pre_order = order
+        return self._pre_order
+
+    @property
+    def post_order(self):
+        """
+        Returns the ordinals of the nodes in the order yielded by
+        traverse_post_order.
+        """
+        if self._post_order is None:
+            visited = bytearray(len(self.nodes))
+            order = array('i')
+            stack = [(0, iter(self.children[0]))] if self.nodes else []
+            while stack:
+                ordinal, children = stack[-1]
+                if visited[ordinal]:
+                    stack.pop()
+                    continue
+                next_child = next(children, None)
+                if next_child is None:
+                    order.append(ordinal)
+                    visited[ordinal] = 1
+                    stack.pop()
+                else:
+                    stack.append((next_child, iter(self.children[next_child])))
+            self._post_order = order
+        return self._post_order
+
+    def mask(self, func):
+        """
+        Returns a mask, indexed by ordinal, of whether func returns a
+        truthy value for each node.  func is called once for each node,
+        in topological order.
+
+        Arguments:
+            func (node->boolean) - Function evaluated for each node.
+
+        Returns:
+            bytearray
+        """
+        return bytearray(bool(func(node)) for node in self.nodes)
+
+    def filter_mask(self, filter_func=None, yield_descendants_of_unyielded=False):
+        """
+        Returns a mask, indexed by ordinal, of the nodes that
+        traverse_topologically yields for the given arguments.  As in
+        traverse_topologically, filter_func is only called for nodes
+        that the traversal reaches.
+
+        Arguments:
+            See description in traverse_topologically.
+
+        Returns:
+            bytearray
+        """
+        filter_func = filter_func or (lambda __: True)
+        visited = bytearray(len(self.nodes))
+        yielded = bytearray(len(self.nodes))
+        for ordinal, node in enumerate(self.nodes):
+            if ordinal:
+                parents = self.parents[ordinal]
+                if not all(visited[parent] for parent in parents):
+                    continue
+                elif not yield_descendants_of_unyielded and not any(yielded[parent] for parent in parents):
+                    continue
+            visited[ordinal] = 1
+            yielded[ordinal] = bool(filter_func(node))
+        return yielded
+
+    def get_nodes(self, ordinals, mask=None):
+        """
+        Returns the nodes for the given ordinals, optionally limited to
+        those set in the given mask.
+
+        Arguments:
+            ordinals ([int]) - Ordinals, such as one of the orderings.
+
+            mask (bytearray) - Optional mask indexed by ordinal.
+
+        Returns:
+            [node]
+        """
+        if mask is None:
+            return [self.nodes[ordinal] for ordinal in ordinals]
+        return [self.nodes[ordinal] for ordinal in ordinals if mask[ordinal]]
+
+
 def leaf_filter(block):
     """
     Filter for traversals to find leaf blocks
@@ -0,0 +1,160 @@
+"""
+Tests for the database routers of the courseware apps.
+"""
+
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import ddt
+from django.db import connections
+from django.test import TestCase as DjangoTestCase
+from django.test import override_settings
+from django.utils import timezone
+from opaque_keys.edx.keys import CourseKey
+
+from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.courseware.models import StudentModule, StudentModuleHistory, StudentModuleManager
+from lms.djangoapps.courseware.tests.factories import COURSE_KEY, StudentModuleFactory
+from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
+
+SHARDS = ['default', 'csm_1', 'csm_2']
+
+
+@ddt.ddt
+class StudentModuleShardRouterTest(TestCase):
+    """
+    Tests for StudentModuleShardRouter.
+    """
+    def setUp(self):
+        super().setUp()
+        self.router = StudentModuleShardRouter()
+        self.course_keys = [CourseKey.from_string(f'course-v1:org+course+run{index}') for index in range(10)]
+
+    def test_disabled(self):
+        student_module = StudentModule(course_id=self.course_keys[0], student_id=1)
+        assert not StudentModuleShardRouter.is_enabled()
+        assert StudentModuleShardRouter.shard_for(self.course_keys[0], 1) is None
+        assert StudentModuleShardRouter.shards_for_course(self.course_keys[0]) == [None]
+        assert StudentModuleShardRouter.shards_for_user(1) == [None]
+        assert self.router.db_for_write(StudentModule, instance=student_module) is None
+        assert self.router.db_for_read(StudentModuleHistory) is None
+        assert self.router.allow_migrate('csm_1', 'courseware', 'studentmodule') is None
+
+    @override_settings(STUDENT_MODULE_SHARDS={'DATABASES': SHARDS, 'KEY': 'course'})
+    def test_course_shards(self):
+        shards = {StudentModuleShardRouter.shard_for(course_key, 1) for course_key in self.course_keys}
+        assert len(shards) > 1
+        assert shards <= set(SHARDS)
+        for course_key in self.course_keys:
+            shard = StudentModuleShardRouter.shard_for(course_key, 1)
+            assert {StudentModuleShardRouter.shard_for(course_key, user_id) for user_id in range(10)} == {shard}
+            assert StudentModuleShardRouter.shards_for_course(course_key) == [shard]
+        assert StudentModuleShardRouter.shards_for_user(1) == SHARDS
+
+    @override_settings(STUDENT_MODULE_SHARDS={'DATABASES': SHARDS, 'KEY': 'user'})
+    def test_user_shards(self):
+        shards = {StudentModuleShardRouter.shard_for(self.course_keys[0], user_id) for user_id in range(10)}
+        assert len(shards) > 1
+        assert shards <= set(SHARDS)
+        for user_id in range(10):
+            shard = StudentModuleShardRouter.shard_for(self.course_keys[0], user_id)
+            assert {StudentModuleShardRouter.shard_for(course_key, user_id) for course_key in self.course_keys} == {
+                shard
+            }
+            assert StudentModuleShardRouter.shards_for_user(user_id) == [shard]
+        assert StudentModuleShardRouter.shards_for_course(self.course_keys[0]) == SHARDS
+
+    @override_settings(STUDENT_MODULE_SHARDS={'DATABASES': SHARDS, 'KEY': 'course'})
+    def test_db_for_instance(self):
+        student_module = StudentModule(course_id=self.course_keys[0], student_id=1)
+        shard = StudentModuleShardRouter.shard_for(self.course_keys[0], 1)
+        assert self.router.db_for_read(StudentModule, instance=student_module) == shard
+        assert self.router.db_for_write(StudentModule, instance=student_module) == shard
+        assert self.router.db_for_write(StudentModule) is None
+        assert self.router.db_for_write(StudentModuleHistory, instance=student_module) == 'default'
+
+    @override_settings(STUDENT_MODULE_SHARDS={'DATABASES': SHARDS, 'KEY': 'user'})
+    def test_managers(self):
+        shard = StudentModuleShardRouter.shard_for(self.course_keys[0], 1)
+        assert StudentModule.objects.for_shard(self.course_keys[0], 1).db == shard
+        assert [manager.db for manager in StudentModule.objects.for_shards(self.course_keys[0], 1)] == [shard]
+        assert [manager.db for manager in StudentModule.objects.for_shards(self.course_keys[0])] == SHARDS
+        assert [manager.db for manager in StudentModule.objects.for_user_shards(1)] == [shard]
+        assert [manager.db for manager in StudentModule.objects.for_all_shards()] == SHARDS
+
+    @override_settings(STUDENT_MODULE_SHARDS={'DATABASES': SHARDS, 'KEY': 'course'})
+    @ddt.data(
+        ('default', 'courseware', 'studentmodule', None),
+        ('default', 'auth', 'user', None),
+        ('csm_1', 'courseware', 'studentmodule', True),
+        ('csm_1', 'courseware', 'studentmodulehistory', False),
+        ('csm_1', 'auth', 'user', False),
+        ('other', 'auth', 'user', None),
+    )
+    @ddt.unpack
+    def test_allow_migrate(self, db, app_label, model_name, allowed):
+        assert self.router.allow_migrate(db, app_label, model_name) is allowed
+
+
+class StudentModuleShardDeletionTest(DjangoTestCase):
+    """
+    Tests that deleting a user deletes their StudentModules on every shard.
+    """
+    def test_delete_user(self):
+        user = UserFactory()
+        user_id = user.id
+        StudentModuleFactory(student=user, course_id=COURSE_KEY)
+        shard_manager = Mock(db='csm_1')
+        with override_settings(STUDENT_MODULE_SHARDS={'DATABASES': SHARDS, 'KEY': 'course'}):
+            with patch.object(
+                StudentModuleManager,
+                'for_user_shards',
+                return_value=[StudentModule.objects.db_manager('default'), shard_manager],
+            ):
+                user.delete()
+        assert not StudentModule.objects.filter(student_id=user_id).exists()
+        shard_manager.filter.assert_called_once_with(student_id=user_id)
+        shard_manager.filter.return_value.delete.assert_called_once_with()
+
+
+class StudentModuleShardHistoryDeletionTest(DjangoTestCase):
+    """
+    Tests that deleting a StudentModule stored on a shard deletes its history from the default database.
+    """
+    # Tell Django to clean out all databases, not just default
+    databases = set(connections)
+    # A database other than the default one, which only holds StudentModule as a shard would.
+    SHARD = 'student_module_history'
+
+    @classmethod
+    def setUpClass(cls):
+        with connections[cls.SHARD].schema_editor() as schema_editor:
+            schema_editor.create_model(StudentModule)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connections[cls.SHARD].schema_editor() as schema_editor:
+            schema_editor.delete_model(StudentModule)
+
+    def test_delete_student_module(self):
+        with override_settings(STUDENT_MODULE_SHARDS={'DATABASES': [self.SHARD], 'KEY': 'course'}):
+            user = UserFactory()
+            student_module = StudentModule.objects.for_shard(COURSE_KEY, user.id).create(
+                student=user,
+                course_id=COURSE_KEY,
+                module_state_key=COURSE_KEY.make_usage_key('problem', 'problem_1'),
+                module_type='problem',
+                state='{}',
+            )
+            assert student_module._state.db == self.SHARD  # pylint: disable=protected-access
+            student_module_id = student_module.id
+            StudentModuleHistory.objects.create(
+                student_module_id=student_module_id, version=None, created=timezone.now(), state='{}',
+            )
+
+            student_module.delete()
+        assert not StudentModule.objects.db_manager(self.SHARD).exists()
+        assert not StudentModuleHistory.objects.filter(student_module_id=student_module_id).exists()
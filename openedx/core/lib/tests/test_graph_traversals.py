@@ -6,7 +6,7 @@ Tests for graph traversal generator functions.
 from collections import defaultdict
 from unittest import TestCase
 
-from ..graph_traversals import traverse_post_order, traverse_pre_order, traverse_topologically
+from ..graph_traversals import TraversalOrders, traverse_post_order, traverse_pre_order, traverse_topologically
 
 
 class TestGraphTraversals(TestCase):
@@ -167,3 +167,42 @@ class TestGraphTraversals(TestCase):
                     get_children=(lambda node: parent_to_children[node]),
                     get_parents=(lambda node: child_to_parents[node]))
             ) == ['root', 'A', 'D', 'B', 'E', 'F', 'J', 'K', 'M', 'N', 'G', 'C', 'H', 'L', 'O', 'P', 'I']
+
+    def test_traversal_orders(self):
+        get_children = lambda node: self.parent_to_children_map[node]  # lint-amnesty, pylint: disable=unnecessary-lambda-assignment
+        get_parents = lambda node: self.child_to_parents_map[node]  # lint-amnesty, pylint: disable=unnecessary-lambda-assignment
+        traversal_orders = TraversalOrders(start_node='b1', get_parents=get_parents, get_children=get_children)
+
+        assert traversal_orders.nodes == list(
+            traverse_topologically(start_node='b1', get_parents=get_parents, get_children=get_children)
+        )
+        assert traversal_orders.get_nodes(traversal_orders.topological) == traversal_orders.nodes
+        assert traversal_orders.get_nodes(traversal_orders.pre_order) == list(
+            traverse_pre_order(start_node='b1', get_children=get_children)
+        )
+        assert traversal_orders.get_nodes(traversal_orders.post_order) == list(
+            traverse_post_order(start_node='b1', get_children=get_children)
+        )
+        assert traversal_orders.get_nodes(
+            traversal_orders.topological, traversal_orders.mask(lambda node: node.startswith('d')),
+        ) == ['d1', 'd2', 'd3']
+
+    def test_traversal_orders_filter_mask(self):
+        get_children = lambda node: self.parent_to_children_map[node]  # lint-amnesty, pylint: disable=unnecessary-lambda-assignment
+        get_parents = lambda node: self.child_to_parents_map[node]  # lint-amnesty, pylint: disable=unnecessary-lambda-assignment
+        traversal_orders = TraversalOrders(start_node='b1', get_parents=get_parents, get_children=get_children)
+
+        for yield_descendants_of_unyielded in (True, False):
+            filter_mask = traversal_orders.filter_mask(
+                filter_func=(lambda node: (node != 'd2')),
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            )
+            assert set(traversal_orders.get_nodes(traversal_orders.topological, filter_mask)) == set(
+                traverse_topologically(
+                    start_node='b1',
+                    get_parents=get_parents,
+                    get_children=get_children,
+                    filter_func=(lambda node: (node != 'd2')),
+                    yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+                )
+            )
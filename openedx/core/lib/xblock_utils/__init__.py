@@ -9,6 +9,7 @@ import json
 import logging
 import re
 import uuid
+from collections import defaultdict
 
 import markupsafe
 from django.conf import settings
@@ -234,8 +235,8 @@ def grade_histogram(block_id):
     it, their grade is None. Since there will always be at least one such student
     this function almost always returns [].
     '''
-    from django.db import connection
-    cursor = connection.cursor()
+    from django.db import DEFAULT_DB_ALIAS, connections
+    from openedx.core.lib.django_courseware_routers import StudentModuleShardRouter
 
     query = """\
         SELECT courseware_studentmodule.grade,
@@ -243,10 +244,15 @@ def grade_histogram(block_id):
         FROM courseware_studentmodule
         WHERE courseware_studentmodule.module_id=%s
         GROUP BY courseware_studentmodule.grade"""
-    # Passing block_id this way prevents sql-injection.
-    cursor.execute(query, [str(block_id)])
-
-    grades = list(cursor.fetchall())
+    counts = defaultdict(int)
+    for shard in StudentModuleShardRouter.shards_for_course(block_id.context_key):
+        with connections[shard or DEFAULT_DB_ALIAS].cursor() as cursor:
+            # Passing block_id this way prevents sql-injection.
+            cursor.execute(query, [str(block_id)])
+            for grade, count in cursor.fetchall():
+                counts[grade] += count
+
+    grades = list(counts.items())
     grades.sort(key=lambda x: x[0])  # Add ORDER BY to sql query?
     if len(grades) >= 1 and grades[0][0] is None:
         return []
@@ -6,7 +6,7 @@ students in the Unlocked Group of the ContentTypeGating partition.
 
 from django.conf import settings
 
-from lms.djangoapps.courseware.field_overrides import FieldOverrideProvider
+from lms.djangoapps.courseware.field_overrides import ALL_BLOCKS, FieldOverrideProvider
 from openedx.features.content_type_gating.helpers import CONTENT_GATING_PARTITION_ID
 from openedx.features.content_type_gating.models import ContentTypeGatingConfig
 
@@ -65,6 +65,9 @@ class ContentTypeGatingFieldOverride(FieldOverrideProvider):
 
         return original_group_access
 
+    def overridden_fields(self, course_key):
+        return {ALL_BLOCKS: {'group_access'}}
+
     @classmethod
     def enabled_for(cls, course):  # pylint: disable=arguments-differ
         """Check our stackable config for this specific course"""
@@ -3,7 +3,7 @@ FieldOverride that forces Show Answer values that use Past Due logic to
 new Show Answer values that remove the Past Due check (keeping the rest intact)
 """
 
-from lms.djangoapps.courseware.field_overrides import FieldOverrideProvider
+from lms.djangoapps.courseware.field_overrides import ALL_BLOCKS, FieldOverrideProvider
 from openedx.features.course_experience import RELATIVE_DATES_FLAG
 from xmodule.capa_block import SHOWANSWER  # lint-amnesty, pylint: disable=wrong-import-order
 
@@ -37,6 +37,9 @@ class ShowAnswerFieldOverride(FieldOverrideProvider):
 
         return mapping.get(current_show_answer_value, default)
 
+    def overridden_fields(self, course_key):
+        return {ALL_BLOCKS: {'showanswer'}}
+
     @classmethod
     def enabled_for(cls, course):  # pylint: disable=arguments-differ
         """ Enabled only for Self-Paced courses using Personalized User Schedules. """
@@ -355,6 +355,13 @@ class ContentStore:
     def save(self, content):
         raise NotImplementedError
 
+    def save_many(self, contents):
+        """
+        Save each of the given StaticContents. Stores may override this to save them in fewer round trips.
+        """
+        for content in contents:
+            self.save(content)
+
     def find(self, filename):
         raise NotImplementedError
 
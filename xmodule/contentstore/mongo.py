@@ -10,6 +10,7 @@ import os
 import gridfs
 import pymongo
 from bson.son import SON
+from fs import path as fs_path
 from fs.osfs import OSFS
 from gridfs.errors import NoFile, FileExists
 from opaque_keys.edx.keys import AssetKey
@@ -121,6 +122,29 @@ class MongoContentStore(ContentStore):
         # the location as the _id, we must delete before adding (there's no replace method in gridFS)
         self.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
 
+        return self._write(content, content_id, content_son)
+
+    def save_many(self, contents):
+        """
+        Save all of the given StaticContents, deleting any previous versions of them
+        in one pair of queries rather than two queries per content.
+        """
+        keyed_contents = [(content, *self.asset_db_key(content.location)) for content in contents]
+        if not keyed_contents:
+            return
+
+        # See save: gridFS has no replace, so delete the files and their chunks before adding them.
+        content_ids = [content_id for __, content_id, __ in keyed_contents]
+        self.fs_files.delete_many({'_id': {'$in': content_ids}})
+        self.chunks.delete_many({'files_id': {'$in': content_ids}})
+
+        for content, content_id, content_son in keyed_contents:
+            self._write(content, content_id, content_son)
+
+    def _write(self, content, content_id, content_son):
+        """
+        Write the content to gridFS as the file content_id, which must not already exist.
+        """
         thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None  # lint-amnesty, pylint: disable=line-too-long
         with self.fs.new_file(_id=content_id, filename=str(content.location), content_type=content.content_type,  # lint-amnesty, pylint: disable=line-too-long
                               displayname=content.name, content_son=content_son,
@@ -253,13 +277,68 @@ class MongoContentStore(ContentStore):
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
-            for attr, value in asset.items():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
+            self._add_asset_to_policy(asset, policy)
 
         with open(assets_policy_file, 'w') as f:
             json.dump(policy, f, sort_keys=True, indent=4)
 
+    def export_to_fs(self, location, output_fs, output_directory):
+        """
+        Export the asset at `location` to `output_directory` in the pyfilesystem `output_fs`.
+
+        Unlike `export`, the asset's content is copied from GridFS a chunk at a time, so
+        large assets are never read into memory as a whole.
+        """
+        content_id, __ = self.asset_db_key(location)
+        try:
+            with self.fs.get(content_id) as fp:
+                # Need to replace dict IDs with SON for chunk lookup to work under Python 3
+                # because field order can be different and mongo cares about the order
+                if isinstance(fp._id, dict):  # lint-amnesty, pylint: disable=protected-access
+                    fp._file['_id'] = content_id  # lint-amnesty, pylint: disable=protected-access
+
+                import_path = getattr(fp, 'import_path', None)
+                if import_path is not None:
+                    output_directory = fs_path.join(output_directory, os.path.dirname(import_path))
+                output_fs.makedirs(output_directory, recreate=True)
+
+                # Escape invalid char from filename.
+                export_name = escape_invalid_characters(name=fp.displayname, invalid_char_list=['/', '\\'])
+                output_fs.upload(fs_path.join(output_directory, export_name), fp, size=fp.length)
+        except NoFile:
+            raise NotFoundError(content_id)  # lint-amnesty, pylint: disable=raise-missing-from
+
+    def export_all_for_course_to_fs(self, course_key, output_fs, output_directory, assets_policy_file):
+        """
+        Export all of this course's assets to the output_directory of the pyfilesystem output_fs,
+        streaming each asset's content. Export all of the assets' attributes to the policy file.
+
+        Args:
+            course_key (CourseKey): the :class:`CourseKey` identifying the course
+            output_fs (FS): the filesystem to export to
+            output_directory: the directory of output_fs under which to put all the asset files
+            assets_policy_file: the path within output_fs of the policy file, whose directory
+                must already exist.
+        """
+        policy = {}
+        assets, __ = self.get_all_content_for_course(course_key)
+
+        for asset in assets:
+            self.export_to_fs(asset['asset_key'], output_fs, output_directory)
+            self._add_asset_to_policy(asset, policy)
+
+        with output_fs.open(assets_policy_file, 'w') as f:
+            json.dump(policy, f, sort_keys=True, indent=4)
+
+    @staticmethod
+    def _add_asset_to_policy(asset, policy):
+        """
+        Add the exportable attributes of the asset to the assets policy.
+        """
+        for attr, value in asset.items():
+            if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
+
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
 
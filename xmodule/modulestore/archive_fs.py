@@ -0,0 +1,235 @@
+"""
+A write-only filesystem that streams the files written to it into a tar or zip archive.
+
+Exports write OLX through a pyfilesystem ``FS``; writing them to an ``ArchiveFS``
+instead of an ``OSFS`` produces the export archive directly, without first
+staging the whole course on disk and then compressing the directory.
+"""
+
+
+import io
+import shutil
+import tarfile
+import time
+import zipfile
+from tempfile import SpooledTemporaryFile
+
+from fs import errors
+from fs.base import FS
+from fs.info import Info
+from fs.mode import Mode
+from fs.path import basename, dirname, relpath
+from fs.subfs import SubFS
+
+ARCHIVE_FORMATS = ('tar', 'tar.gz', 'zip')
+
+# Files written through `open` are held in memory up to this size, then spooled to a temporary file.
+DEFAULT_SPOOL_SIZE = 1024 * 1024
+
+
+class ArchiveFS(FS):
+    """
+    A write-only filesystem which adds each file written to it to an archive.
+
+    The archive is written sequentially to `fileobj`, which does not need to be
+    seekable, so it may be a socket or an upload stream as well as a file.
+
+    Files opened for writing are added to the archive when they are closed;
+    until then they are buffered in memory, spilling to a temporary file past
+    `spool_size` bytes.  Files uploaded with a known `size` (see `upload`) are
+    copied straight into the archive without being buffered at all.
+    """
+    _meta = {
+        'case_insensitive': False,
+        'invalid_path_chars': '\0',
+        'network': False,
+        'read_only': False,
+        'thread_safe': True,
+        'unicode_paths': True,
+        'virtual': False,
+    }
+
+    def __init__(self, fileobj, archive_format='tar.gz', spool_size=DEFAULT_SPOOL_SIZE):
+        """
+        Arguments:
+            fileobj: a binary file-like object open for writing, which the archive is written to.
+                It is not closed when the filesystem is closed.
+            archive_format (str): one of ARCHIVE_FORMATS.
+            spool_size (int): the number of bytes of each open file to buffer in memory.
+        """
+        super().__init__()
+        self._tar_file = None
+        self._zip_file = None
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f'Unsupported archive format: {archive_format}')
+        self.archive_format = archive_format
+        self.spool_size = spool_size
+        self._directories = {'/'}
+        self._files = set()
+        if archive_format == 'zip':
+            self._zip_file = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            self._tar_file = tarfile.open(fileobj=fileobj, mode='w|gz' if archive_format == 'tar.gz' else 'w|')
+
+    def __repr__(self):
+        return f'ArchiveFS({self.archive_format!r})'
+
+    def getinfo(self, path, namespaces=None):
+        self.check()
+        _path = self.validatepath(path)
+        if _path in self._directories:
+            is_dir = True
+        elif _path in self._files:
+            is_dir = False
+        else:
+            raise errors.ResourceNotFound(path)
+        return Info({'basic': {'name': basename(_path), 'is_dir': is_dir}})
+
+    def listdir(self, path):
+        self.check()
+        _path = self.validatepath(path)
+        if _path in self._files:
+            raise errors.DirectoryExpected(path)
+        if _path not in self._directories:
+            raise errors.ResourceNotFound(path)
+        return [
+            basename(entry)
+            for entry in self._directories | self._files
+            if entry != '/' and dirname(entry) == _path
+        ]
+
+    def makedir(self, path, permissions=None, recreate=False):
+        self.check()
+        _path = self.validatepath(path)
+        with self._lock:
+            if _path in self._directories:
+                if not recreate:
+                    raise errors.DirectoryExists(path)
+            elif _path in self._files:
+                raise errors.DirectoryExists(path)
+            else:
+                self._check_parent(path, _path)
+                self._add_directory(_path)
+                self._directories.add(_path)
+        return SubFS(self, _path)
+
+    def openbin(self, path, mode='r', buffering=-1, **options):
+        self.check()
+        _mode = Mode(mode)
+        _mode.validate_bin()
+        _path = self.validatepath(path)
+        if _mode.reading or _mode.appending:
+            raise errors.ResourceReadOnly(path, msg='files in an archive filesystem can only be written')
+        if _path in self._directories:
+            raise errors.FileExpected(path)
+        if _mode.exclusive and _path in self._files:
+            raise errors.FileExists(path)
+        self._check_parent(path, _path)
+        return _ArchiveMemberFile(self, _path)
+
+    def upload(self, path, file, chunk_size=None, size=None, **options):  # pylint: disable=arguments-differ
+        """
+        Add the contents of the binary file object `file` to the archive at `path`.
+
+        If `size` is given, exactly that many bytes are copied from `file` straight
+        into the archive; otherwise the file is buffered like any other written file.
+        """
+        if size is None:
+            super().upload(path, file, chunk_size=chunk_size, **options)
+            return
+        self.check()
+        _path = self.validatepath(path)
+        if _path in self._directories:
+            raise errors.FileExpected(path)
+        self._check_parent(path, _path)
+        self._add_file(_path, file, size)
+
+    def remove(self, path):
+        raise errors.ResourceReadOnly(path, msg='files cannot be removed from an archive filesystem')
+
+    def removedir(self, path):
+        raise errors.ResourceReadOnly(path, msg='directories cannot be removed from an archive filesystem')
+
+    def setinfo(self, path, info):
+        self.getinfo(path)
+
+    def close(self):
+        if not self.isclosed():
+            with self._lock:
+                if self._tar_file is not None:
+                    self._tar_file.close()
+                if self._zip_file is not None:
+                    self._zip_file.close()
+        super().close()
+
+    def _check_parent(self, path, _path):
+        """
+        Raises ResourceNotFound if the directory containing `_path` has not been made.
+        """
+        if dirname(_path) not in self._directories:
+            raise errors.ResourceNotFound(path)
+
+    def _add_directory(self, _path):
+        """
+        Adds an entry for the directory `_path` to the archive, so that empty directories are kept.
+        """
+        arcname = relpath(_path)
+        if self._tar_file is not None:
+            tar_info = tarfile.TarInfo(arcname)
+            tar_info.type = tarfile.DIRTYPE
+            tar_info.mode = 0o755
+            tar_info.mtime = time.time()
+            self._tar_file.addfile(tar_info)
+        else:
+            zip_info = zipfile.ZipInfo(arcname + '/', date_time=time.localtime()[:6])
+            zip_info.external_attr = (0o40755 << 16) | 0x10
+            self._zip_file.writestr(zip_info, b'')
+
+    def _add_file(self, _path, file, size):
+        """
+        Copies `size` bytes from the binary file object `file` into the archive at `_path`.
+        """
+        arcname = relpath(_path)
+        with self._lock:
+            if self._tar_file is not None:
+                tar_info = tarfile.TarInfo(arcname)
+                tar_info.size = size
+                tar_info.mode = 0o644
+                tar_info.mtime = time.time()
+                self._tar_file.addfile(tar_info, file)
+            else:
+                zip_info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                zip_info.compress_type = zipfile.ZIP_DEFLATED
+                zip_info.external_attr = 0o644 << 16
+                with self._zip_file.open(zip_info, 'w', force_zip64=size > zipfile.ZIP64_LIMIT) as member:
+                    shutil.copyfileobj(file, member)
+            self._files.add(_path)
+
+
+class _ArchiveMemberFile(io.RawIOBase):
+    """
+    A file open for writing in an ArchiveFS, which is added to the archive when closed.
+    """
+    def __init__(self, archive_fs, path):
+        super().__init__()
+        self.name = path
+        self.mode = 'wb'
+        self._archive_fs = archive_fs
+        self._spool = SpooledTemporaryFile(max_size=archive_fs.spool_size)  # pylint: disable=consider-using-with
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self._spool.write(b)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            size = self._spool.tell()
+            self._spool.seek(0)
+            self._archive_fs._add_file(self.name, self._spool, size)  # pylint: disable=protected-access
+        finally:
+            self._spool.close()
+            super().close()
@@ -5,6 +5,7 @@ import sys
 import weakref
 
 from crum import get_current_user
+from django.conf import settings
 from fs.osfs import OSFS
 from lazy import lazy
 from opaque_keys.edx.locator import BlockUsageLocator, DefinitionLocator, LocalId
@@ -20,7 +21,7 @@ from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin, inheriting_field_data
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
-from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionLazyLoader
+from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionLazyLoader, DefinitionPrefetcher
 from xmodule.modulestore.split_mongo.id_manager import SplitMongoIdManager
 from xmodule.modulestore.split_mongo.split_mongo_kvs import SplitMongoKVS
 from xmodule.util.misc import get_library_or_course_attribute
@@ -91,6 +92,22 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
                 parent_map[child] = block_key
         return parent_map
 
+    @lazy
+    def _definition_prefetcher(self):
+        """
+        The DefinitionPrefetcher for the blocks of this runtime's structure, or
+        None if SPLIT_MODULESTORE_DEFINITION_PREFETCH_SIZE disables prefetching.
+        """
+        max_definitions = getattr(settings, 'SPLIT_MODULESTORE_DEFINITION_PREFETCH_SIZE', 0)
+        if not max_definitions:
+            return None
+        return DefinitionPrefetcher(
+            self.modulestore,
+            self.course_entry.structure['blocks'],
+            self._parent_map.get,
+            max_definitions,
+        )
+
     def _load_item(self, usage_key, course_entry_override=None, **kwargs):
         """
         Instantiate the xblock fetching it either from the cache or from the structure
@@ -290,6 +307,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
                 block_key.type,
                 definition_id,
                 convert_fields,
+                prefetcher=self._definition_prefetcher,
+                block_key=block_key,
             )
         else:
             definition_loader = None
@@ -1,8 +1,9 @@
 # lint-amnesty, pylint: disable=missing-module-docstring
 
 import copy
+from collections import OrderedDict, deque
 
-from opaque_keys.edx.locator import DefinitionLocator
+from opaque_keys.edx.locator import DefinitionLocator, LocalId
 
 
 class DefinitionLazyLoader:
@@ -12,16 +13,22 @@ class DefinitionLazyLoader:
     object doesn't force access during init but waits until client wants the
     definition. Only works if the modulestore is a split mongo store.
     """
-    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter):
+    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter,
+                 prefetcher=None, block_key=None):
         """
         Simple placeholder for yet-to-be-fetched data
         :param modulestore: the pymongo db connection with the definitions
         :param definition_locator: the id of the record in the above to fetch
+        :param prefetcher: an optional DefinitionPrefetcher which loads this definition
+            in a batch with those of the related blocks
+        :param block_key: the BlockKey of the block whose definition this is (used by the prefetcher)
         """
         self.modulestore = modulestore
         self.course_key = course_key
         self.definition_locator = DefinitionLocator(block_type, definition_id)
         self.field_converter = field_converter
+        self.prefetcher = prefetcher
+        self.block_key = block_key
 
     def fetch(self):
         """
@@ -31,5 +38,101 @@ class DefinitionLazyLoader:
         # get_definition may return a cached value perhaps from another course or code path
         # so, we copy the result here so that updates don't cross-pollinate nor change the cached
         # value in such a way that we can't tell that the definition's been updated.
-        definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
+        if self.prefetcher is not None:
+            definition = self.prefetcher.get_definition(
+                self.course_key, self.block_key, self.definition_locator.definition_id
+            )
+        else:
+            definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
         return copy.deepcopy(definition)
+
+
+class DefinitionPrefetcher:
+    """
+    Loads the definitions of the blocks in a course structure in batches.
+
+    When a block's definition is first needed, the definitions of its siblings
+    and descendants (which are likely to be needed next, e.g. when rendering an
+    outline or exporting a course) are loaded along with it in one
+    get_definitions call, instead of one query per block.
+
+    Loaded definitions are kept in an LRU cache of at most max_definitions
+    entries. Definitions are never updated in place once persisted, so the
+    cached entries do not go stale.
+    """
+    def __init__(self, modulestore, structure_blocks, get_parent, max_definitions):
+        """
+        :param modulestore: the split modulestore
+        :param structure_blocks: the structure's map of BlockKey to BlockData
+        :param get_parent: function returning the parent BlockKey of a BlockKey, or None
+        :param max_definitions: the maximum number of definitions to keep, and to load in one batch
+        """
+        self.modulestore = modulestore
+        self.structure_blocks = structure_blocks
+        self.get_parent = get_parent
+        self.max_definitions = max_definitions
+        self._definitions = OrderedDict()
+
+    def get_definition(self, course_key, block_key, definition_id):
+        """
+        Returns the definition with the given id, loading it (and those of the
+        blocks related to block_key) if it isn't cached.
+        """
+        try:
+            self._definitions.move_to_end(definition_id)
+            return self._definitions[definition_id]
+        except KeyError:
+            pass
+
+        definitions = self.modulestore.get_definitions(course_key, self._get_batch(block_key, definition_id))
+        for definition in definitions:
+            self._definitions[definition['_id']] = definition
+            self._definitions.move_to_end(definition['_id'])
+        while len(self._definitions) > self.max_definitions:
+            self._definitions.popitem(last=False)
+
+        definition = self._definitions.get(definition_id)
+        if definition is None:
+            # Not found in the batch (e.g. only in an active bulk operation); load it alone.
+            definition = self.modulestore.get_definition(course_key, definition_id)
+        return definition
+
+    def _get_batch(self, block_key, definition_id):
+        """
+        Returns the ids of the definitions to load along with definition_id:
+        those of the block's siblings, then of its descendants breadth first,
+        which are not already cached, up to max_definitions in total.
+        """
+        batch = OrderedDict([(definition_id, None)])
+        if block_key is None:
+            return list(batch)
+
+        parent_key = self.get_parent(block_key)
+        siblings = set(self._get_children(parent_key)) if parent_key is not None else set()
+        queue = deque(self._get_children(parent_key) if parent_key is not None else [])
+        queue.extend(self._get_children(block_key))
+        visited = set()
+        while queue and len(batch) < self.max_definitions:
+            related_key = queue.popleft()
+            block = self.structure_blocks.get(related_key)
+            if block is None or related_key in visited:
+                continue
+            visited.add(related_key)
+            related_definition_id = block.definition
+            if (
+                related_definition_id is not None and
+                not isinstance(related_definition_id, LocalId) and
+                not block.definition_loaded and
+                related_definition_id not in self._definitions
+            ):
+                batch[related_definition_id] = None
+            if related_key not in siblings:
+                # Only descend into the block's own subtree, not its siblings'.
+                queue.extend(self._get_children(related_key))
+        return list(batch)
+
+    def _get_children(self, block_key):
+        block = self.structure_blocks.get(block_key)
+        if block is None:
+            return []
+        return block.fields.get('children', [])
@@ -8,11 +8,14 @@ import logging
 import math
 import pickle
 import re
+import threading
 import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
 from ccx_keys.locator import CCXLocator
+from django.conf import settings
 from django.core.cache import caches, InvalidCacheBackendError
 from django.db.transaction import TransactionManagementError
 import pymongo
@@ -234,32 +237,191 @@ class CourseStructureCache:
                 self.cache.delete(key)
                 return None
 
+    def get_many(self, keys, course_context=None):
+        """
+        Pull the compressed, pickled struct data for all of ``keys`` from cache in a
+        single round trip and deserialize it.
+
+        Returns a dict mapping each key found in the cache to its structure.
+        """
+        if self.cache is None or not keys:
+            return {}
+
+        with TIMER.timer("CourseStructureCache.get_many", course_context) as tagger:
+            tagger.measure('requested', len(keys))
+            compressed_pickled_data_by_key = self.cache.get_many(keys)
+            tagger.measure('from_cache', len(compressed_pickled_data_by_key))
+            if len(compressed_pickled_data_by_key) < len(keys):
+                # Always log cache misses, because they are unexpected
+                tagger.sample_rate = 1
+
+            structures = {}
+            for key, compressed_pickled_data in compressed_pickled_data_by_key.items():
+                try:
+                    structures[key] = pickle.loads(zlib.decompress(compressed_pickled_data), encoding='latin-1')
+                except Exception:  # lint-amnesty, pylint: disable=broad-except
+                    # The cached data is corrupt in some way, get rid of it.
+                    log.warning("CourseStructureCache: Bad data in cache for %s", course_context)
+                    self.cache.delete(key)
+            return structures
+
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
-            tagger.measure('uncompressed_size', len(pickled_data))
-
-            # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
-            data_size = len(compressed_pickled_data)
-            tagger.measure('compressed_size', data_size)
-
-            # We rely on the course structure cache default timeout, which should be
-            # high by default (~ a few days).
-            total_bytes_in_one_mb = 1024 * 1024
-            if data_size < total_bytes_in_one_mb * 2:  # Only data with a size smaller than 2MB will be cached
+            compressed_pickled_data = self._compress(structure, tagger)
+            if compressed_pickled_data is not None:
                 self.cache.set(key, compressed_pickled_data)
-            else:
-                chunk_size_in_mbs = round(data_size / total_bytes_in_one_mb, 2)
 
-                # .. custom_attribute_name: split_mongo_compressed_size_in_mbs
-                # .. custom_attribute_description: contains the data chunk size in MBs. The size on which
-                #   the memcached client failed to store value in course structure cache.
-                monitoring.set_custom_attribute('split_mongo_compressed_size_in_mbs', chunk_size_in_mbs)
+    def set_many(self, structures, course_context=None):
+        """
+        Given a dict mapping keys to structures, pickle and compress each of them and
+        write them all to cache in a single round trip.
+        """
+        if self.cache is None or not structures:
+            return None
+
+        with TIMER.timer("CourseStructureCache.set_many", course_context) as tagger:
+            tagger.measure('structures', len(structures))
+            compressed_pickled_data_by_key = {}
+            for key, structure in structures.items():
+                compressed_pickled_data = self._compress(structure, tagger)
+                if compressed_pickled_data is not None:
+                    compressed_pickled_data_by_key[key] = compressed_pickled_data
+            self.cache.set_many(compressed_pickled_data_by_key)
+
+    def _compress(self, structure, tagger):
+        """
+        Pickle and compress ``structure``, returning None if the result is too large to cache.
+        """
+        pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
+        tagger.measure('uncompressed_size', len(pickled_data))
+
+        # 1 = Fastest (slightly larger results)
+        compressed_pickled_data = zlib.compress(pickled_data, 1)
+        data_size = len(compressed_pickled_data)
+        tagger.measure('compressed_size', data_size)
+
+        # We rely on the course structure cache default timeout, which should be
+        # high by default (~ a few days).
+        total_bytes_in_one_mb = 1024 * 1024
+        if data_size < total_bytes_in_one_mb * 2:  # Only data with a size smaller than 2MB will be cached
+            return compressed_pickled_data
+
+        chunk_size_in_mbs = round(data_size / total_bytes_in_one_mb, 2)
+
+        # .. custom_attribute_name: split_mongo_compressed_size_in_mbs
+        # .. custom_attribute_description: contains the data chunk size in MBs. The size on which
+        #   the memcached client failed to store value in course structure cache.
+        monitoring.set_custom_attribute('split_mongo_compressed_size_in_mbs', chunk_size_in_mbs)
+        return None
+
+
+class LocalStructureCache:
+    """
+    In-process LRU cache of deserialized course structures, bounded by the
+    total pickled size of the cached structures rather than by entry count.
+
+    Structures are immutable once written, so entries are addressed by the
+    structure's ObjectId (together with ``VERSION``, which must be bumped if the
+    in-memory representation of a structure changes) and never need invalidation.
+
+    The deserialized structures are changed in place by their callers (e.g. the
+    definitions loaded into their BlockData by the split modulestore), so the
+    cache keeps them pickled, and every ``get`` returns a copy of its own.
+    """
+
+    # Bump this whenever structure_from_mongo changes the shape of what it returns.
+    VERSION = 1
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_key(self, key):
+        return (self.VERSION, key)
+
+    def get(self, key, course_context=None):
+        """Return the cached structure for ``key``, or None if it isn't cached."""
+        with TIMER.timer("LocalStructureCache.get", course_context) as tagger:
+            with self._lock:
+                entry = self._entries.get(self._cache_key(key))
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(self._cache_key(key))
+                tagger.tag(from_local_cache=str(entry is not None).lower())
+                tagger.measure('local_cache_hits', self.hits)
+                tagger.measure('local_cache_misses', self.misses)
+
+            if entry is None:
+                return None
+            return pickle.loads(entry[0])
+
+    def set(self, key, structure, course_context=None):
+        """
+        Add ``structure`` to the cache, evicting least recently used entries
+        until the cache fits within ``max_bytes`` again.
+        """
+        with TIMER.timer("LocalStructureCache.set", course_context) as tagger:
+            pickled = pickle.dumps(structure, 4)
+            size = len(pickled)
+            tagger.measure('uncompressed_size', size)
+            if size > self.max_bytes:
+                # Caching this structure would evict everything else for a single entry.
+                tagger.tag(too_large='true')
+                return
+
+            evicted_bytes = 0
+            with self._lock:
+                cache_key = self._cache_key(key)
+                previous = self._entries.pop(cache_key, None)
+                if previous is not None:
+                    self.current_bytes -= previous[1]
+                while self._entries and self.current_bytes + size > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted_size
+                    evicted_bytes += evicted_size
+                self._entries[cache_key] = (pickled, size)
+                self.current_bytes += size
+                self.evicted_bytes += evicted_bytes
+                tagger.measure('evicted_bytes', evicted_bytes)
+                tagger.measure('local_cache_evicted_bytes', self.evicted_bytes)
+                tagger.measure('local_cache_bytes', self.current_bytes)
+
+    def clear(self):
+        """Remove every entry from the cache (the counters are preserved)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_LOCAL_STRUCTURE_CACHE = None
+
+
+def get_local_structure_cache():
+    """
+    Return the process-wide :class:`LocalStructureCache`, or None if
+    ``SPLIT_MODULESTORE_LOCAL_STRUCTURE_CACHE_MAX_BYTES`` disables it.
+    """
+    global _LOCAL_STRUCTURE_CACHE  # pylint: disable=global-statement
+    max_bytes = getattr(settings, 'SPLIT_MODULESTORE_LOCAL_STRUCTURE_CACHE_MAX_BYTES', 0)
+    if not max_bytes:
+        return None
+    if _LOCAL_STRUCTURE_CACHE is None or _LOCAL_STRUCTURE_CACHE.max_bytes != max_bytes:
+        _LOCAL_STRUCTURE_CACHE = LocalStructureCache(max_bytes)
+    return _LOCAL_STRUCTURE_CACHE
 
 
 class MongoPersistenceBackend:
@@ -337,9 +499,17 @@ class MongoPersistenceBackend:
         """
         Get the structure from the persistence mechanism whose id is the given key.
 
-        This method will use a cached version of the structure if it is available.
+        This method will use a cached version of the structure if it is available,
+        checking the in-process :class:`LocalStructureCache` before the django cache.
         """
         with TIMER.timer("get_structure", course_context) as tagger_get_structure:
+            local_cache = get_local_structure_cache()
+            if local_cache is not None:
+                structure = local_cache.get(key, course_context)
+                tagger_get_structure.tag(from_local_cache=str(structure is not None).lower())
+                if structure is not None:
+                    return structure
+
             cache = CourseStructureCache()
 
             structure = cache.get(key, course_context)
@@ -362,8 +532,58 @@ class MongoPersistenceBackend:
 
                 cache.set(key, structure, course_context)
 
+            if local_cache is not None:
+                local_cache.set(key, structure, course_context)
+
             return structure
 
+    def get_structures(self, keys, course_context=None):
+        """
+        Get all of the structures whose ids are in ``keys``, in the order given.
+        Structures which don't exist are omitted.
+
+        Cached structures are read with a single lookup per cache tier, and all of the
+        remaining structures are fetched from the database with a single query, then
+        written back to the caches.
+        """
+        with TIMER.timer("get_structures", course_context) as tagger:
+            keys = list(dict.fromkeys(keys))
+            tagger.measure("requested_ids", len(keys))
+            structures = {}
+
+            local_cache = get_local_structure_cache()
+            if local_cache is not None:
+                for key in keys:
+                    structure = local_cache.get(key, course_context)
+                    if structure is not None:
+                        structures[key] = structure
+            tagger.measure("from_local_cache", len(structures))
+
+            cache = CourseStructureCache()
+            missing_keys = [key for key in keys if key not in structures]
+            cached_structures = cache.get_many(missing_keys, course_context)
+            tagger.measure("from_cache", len(cached_structures))
+            structures.update(cached_structures)
+
+            missing_keys = [key for key in keys if key not in structures]
+            if missing_keys:
+                # Always log cache misses, because they are unexpected
+                tagger.sample_rate = 1
+                fetched_structures = {
+                    structure['_id']: structure
+                    for structure in self.find_structures_by_id(missing_keys, course_context)
+                }
+                tagger.measure("from_db", len(fetched_structures))
+                cache.set_many(fetched_structures, course_context)
+                structures.update(fetched_structures)
+                cached_structures.update(fetched_structures)
+
+            if local_cache is not None:
+                for key, structure in cached_structures.items():
+                    local_cache.set(key, structure, course_context)
+
+            return [structures[key] for key in keys if key in structures]
+
     def find_structures_by_id(self, ids, course_context=None):
         """
         Return all structures that specified in ``ids``.
@@ -605,6 +825,8 @@ class MongoPersistenceBackend:
         If connections is True, then close the connection to the database as well.
         """
         RequestCache(namespace="course_index_cache").clear()
+        if _LOCAL_STRUCTURE_CACHE is not None:
+            _LOCAL_STRUCTURE_CACHE.clear()
 
         self.ensure_connection()
         connection = self.database.client
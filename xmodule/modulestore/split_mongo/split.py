@@ -605,7 +605,8 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         Return all structures that specified in ``ids``.
 
         If a structure with the same id is in both the cache and the database,
-        the cached version will be preferred.
+        the cached version will be preferred. Structures which aren't part of an
+        active bulk operation are fetched in a single batch through the structure cache.
 
         Arguments:
             ids (list): A list of structure ids
@@ -620,7 +621,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                     ids.remove(structure_id)
                     structures.append(structure)
 
-        structures.extend(self.db_connection.find_structures_by_id(list(ids)))
+        structures.extend(self.db_connection.get_structures(list(ids)))
         return structures
 
 
@@ -0,0 +1,104 @@
+"""
+Tests for ArchiveFS.
+"""
+
+
+import io
+import tarfile
+import zipfile
+from unittest import TestCase
+
+import ddt
+from fs import errors
+
+from xmodule.modulestore.archive_fs import ArchiveFS
+
+
+class _UnseekableOutput:
+    """
+    A write-only output stream, like a socket.
+    """
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+
+@ddt.ddt
+class TestArchiveFS(TestCase):
+    """
+    Tests writing tar and zip archives through ArchiveFS.
+    """
+
+    def _write_files(self, archive_fs):
+        """
+        Writes a small export-like tree to archive_fs.
+        """
+        course_fs = archive_fs.makedir('course', recreate=True)
+        course_fs.makedirs('html/nested', recreate=True)
+        with course_fs.open('course.xml', 'wb') as course_xml:
+            course_xml.write(b'<course/>')
+        with course_fs.open('html/nested/page.html', 'w') as page:
+            page.write('caf\xe9')
+        course_fs.makedir('static', recreate=True)
+        course_fs.upload('static/large.bin', io.BytesIO(b'x' * 5000), size=5000)
+        course_fs.makedir('policies', recreate=True)
+
+    def _read_archive(self, data, archive_format):
+        """
+        Returns a dict of the file contents in the archive, and the set of its directories.
+        """
+        if archive_format == 'zip':
+            with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+                return (
+                    {name: zip_file.read(name) for name in zip_file.namelist() if not name.endswith('/')},
+                    {name.rstrip('/') for name in zip_file.namelist() if name.endswith('/')},
+                )
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar_file:
+            return (
+                {member.name: tar_file.extractfile(member).read() for member in tar_file if member.isfile()},
+                {member.name for member in tar_file if member.isdir()},
+            )
+
+    @ddt.data('tar', 'tar.gz', 'zip')
+    def test_archive(self, archive_format):
+        output = io.BytesIO()
+        with ArchiveFS(output, archive_format, spool_size=4) as archive_fs:
+            self._write_files(archive_fs)
+            assert archive_fs.isfile('course/static/large.bin')
+            assert sorted(archive_fs.listdir('course')) == ['course.xml', 'html', 'policies', 'static']
+
+        files, directories = self._read_archive(output.getvalue(), archive_format)
+        assert files == {
+            'course/course.xml': b'<course/>',
+            'course/html/nested/page.html': 'caf\xe9'.encode('utf-8'),
+            'course/static/large.bin': b'x' * 5000,
+        }
+        assert directories == {'course', 'course/html', 'course/html/nested', 'course/static', 'course/policies'}
+
+    @ddt.data('tar.gz', 'zip')
+    def test_unseekable_output(self, archive_format):
+        output = _UnseekableOutput()
+        with ArchiveFS(output, archive_format) as archive_fs:
+            self._write_files(archive_fs)
+        files, __ = self._read_archive(output.buffer.getvalue(), archive_format)
+        assert files['course/static/large.bin'] == b'x' * 5000
+
+    def test_write_only(self):
+        with ArchiveFS(io.BytesIO()) as archive_fs:
+            with archive_fs.open('file.txt', 'w') as text_file:
+                text_file.write('text')
+            with self.assertRaises(errors.ResourceReadOnly):
+                archive_fs.open('file.txt', 'r')
+            with self.assertRaises(errors.ResourceReadOnly):
+                archive_fs.remove('file.txt')
+            with self.assertRaises(errors.ResourceNotFound):
+                archive_fs.open('missing/file.txt', 'w')
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            ArchiveFS(io.BytesIO(), 'rar')
@@ -125,6 +125,24 @@ class TestContentstore(unittest.TestCase):
         assert self.contentstore.find(unknown_asset, throw_on_not_found=False) is None,\
             f'Found unknown asset {unknown_asset}'
 
+    @ddt.data(True, False)
+    def test_save_many(self, deprecated):
+        """
+        Test that saving several assets at once adds new assets and replaces existing ones
+        """
+        self.set_up_assets(deprecated)
+        existing_key = self.course1_key.make_asset_key('asset', self.course1_files[0])
+        new_key = self.course1_key.make_asset_key('asset', 'new.txt')
+        self.contentstore.save_many([
+            StaticContent(existing_key, 'replaced.txt', 'text/plain', b'replaced'),
+            StaticContent(new_key, 'new.txt', 'text/plain', b'new'),
+        ])
+
+        assert self.contentstore.find(existing_key).data == b'replaced'
+        assert self.contentstore.find(new_key).data == b'new'
+        __, count = self.contentstore.get_all_content_for_course(self.course1_key)
+        assert count == len(self.course1_files) + 1
+
     @ddt.data(True, False)
     def test_export_for_course(self, deprecated):
         """
@@ -10,9 +10,10 @@ from unittest import skip
 
 import ddt
 from django.test import TestCase  # lint-amnesty, pylint: disable=reimported
+from django.test.utils import override_settings
 
 from xmodule.modulestore import ModuleStoreEnum
-from xmodule.modulestore.tests.factories import check_mongo_calls
+from xmodule.modulestore.tests.factories import check_mongo_calls, check_mongo_calls_range
 from xmodule.modulestore.tests.utils import (
     TEST_DATA_DIR,
     MemoryCache,
@@ -160,6 +161,21 @@ class CountMongoCallsCourseTraversal(TestCase):
                     start_block = modulestore.get_course(course_key, depth=depth, lazy=lazy)
                     self._traverse_blocks_in_course(start_block, access_all_block_fields)
 
+    @ddt.data(None, 0)
+    @override_settings(SPLIT_MODULESTORE_DEFINITION_PREFETCH_SIZE=1000)
+    def test_lazy_definition_prefetch(self, depth):
+        request_cache = MemoryCache()
+        with MIXED_SPLIT_MODULESTORE_BUILDER.build(request_cache=request_cache) as (content_store, modulestore):
+            course_key = self._import_course(content_store, modulestore)
+
+            # Without prefetching, loading every definition lazily takes one
+            # query per block (see test_number_mongo_calls); with it, the
+            # definitions of the whole course are loaded in a single batch.
+            with check_mongo_calls_range(max_finds=5):
+                with modulestore.bulk_operations(course_key):
+                    start_block = modulestore.get_course(course_key, depth=depth, lazy=True)
+                    self._traverse_blocks_in_course(start_block, access_all_block_fields=True)
+
     @ddt.data(
         (MIXED_SPLIT_MODULESTORE_BUILDER, 3),
     )
@@ -874,6 +874,30 @@ class TestCourseStructureCache(CacheIsolationMixin, SplitModuleTest):
         mock_set_cache.assert_called()
         mock_set_custom_attribute.assert_not_called()
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_get_structures_batches_cache_misses(self, mock_get_cache):
+        enabled_cache = caches['default']
+        mock_get_cache.return_value = enabled_cache
+        other_course = modulestore().create_course(
+            'org', 'other_course', 'test_run', self.user, BRANCH_NAME_DRAFT,
+        )
+        version_guids = [
+            course.location.as_object_id(course.location.version_guid)
+            for course in (self.new_course, other_course)
+        ]
+        db_connection = modulestore().db_connection
+
+        # Both structures are fetched from mongo with a single query
+        with check_mongo_calls(1):
+            not_cached_structures = db_connection.get_structures(version_guids)
+
+        # and then both are read back from the cache
+        with check_mongo_calls(0):
+            cached_structures = db_connection.get_structures(version_guids)
+
+        assert [structure['_id'] for structure in cached_structures] == version_guids
+        assert cached_structures == not_cached_structures
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -394,10 +394,10 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
 
     def test_no_bulk_find_structures_by_id(self):
         ids = [Mock(name='id')]
-        self.conn.find_structures_by_id.return_value = [MagicMock(name='result')]
+        self.conn.get_structures.return_value = [MagicMock(name='result')]
         result = self.bulk.find_structures_by_id(ids)
-        self.assertConnCalls(call.find_structures_by_id(ids))
-        assert result == self.conn.find_structures_by_id.return_value
+        self.assertConnCalls(call.get_structures(ids))
+        assert result == self.conn.get_structures.return_value
         self.assertCacheNotCleared()
 
     @ddt.data(
@@ -417,9 +417,9 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
             self.bulk._begin_bulk_operation(course_key)
             self.bulk.update_structure(course_key, active_structure(_id))
 
-        self.conn.find_structures_by_id.return_value = db_structures
+        self.conn.get_structures.return_value = db_structures
         results = self.bulk.find_structures_by_id(search_ids)
-        self.conn.find_structures_by_id.assert_called_once_with(list(set(search_ids) - set(active_ids)))
+        self.conn.get_structures.assert_called_once_with(list(set(search_ids) - set(active_ids)))
         for _id in active_ids:
             if _id in search_ids:
                 assert active_structure(_id) in results
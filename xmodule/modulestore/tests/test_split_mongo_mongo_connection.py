@@ -1,6 +1,7 @@
 """ Test the behavior of split_mongo/MongoPersistenceBackend """
 
 
+import pickle
 import unittest
 from unittest.mock import patch
 
@@ -8,7 +9,7 @@ import pytest
 from pymongo.errors import ConnectionFailure
 
 from xmodule.exceptions import HeartbeatFailure
-from xmodule.modulestore.split_mongo.mongo_connection import MongoPersistenceBackend
+from xmodule.modulestore.split_mongo.mongo_connection import LocalStructureCache, MongoPersistenceBackend
 
 
 class TestHeartbeatFailureException(unittest.TestCase):
@@ -23,3 +24,59 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
         with pytest.raises(HeartbeatFailure):
             useless_conn.heartbeat()
+
+
+class TestLocalStructureCache(unittest.TestCase):
+    """ Test the in-process, size-bounded structure cache """
+
+    def _structure(self, structure_id, payload_size=100):
+        return {'_id': structure_id, 'blocks': {}, 'payload': 'x' * payload_size}
+
+    def test_get_and_set(self):
+        cache = LocalStructureCache(max_bytes=10000)
+        assert cache.get('a') is None
+        structure = self._structure('a')
+        cache.set('a', structure)
+        assert cache.get('a') == structure
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_returns_copies(self):
+        cache = LocalStructureCache(max_bytes=10000)
+        structure = self._structure('a')
+        cache.set('a', structure)
+        structure['blocks']['set'] = 'after caching'
+
+        cached = cache.get('a')
+        assert cached is not structure
+        assert cached['blocks'] == {}
+        cached['blocks']['changed'] = 'by a caller'
+        assert cache.get('a')['blocks'] == {}
+
+    def test_evicts_least_recently_used_by_size(self):
+        structure_size = len(pickle.dumps(self._structure('a'), 4))
+        cache = LocalStructureCache(max_bytes=structure_size * 2)
+        cache.set('a', self._structure('a'))
+        cache.set('b', self._structure('b'))
+        # Touch 'a' so that 'b' is the least recently used entry
+        assert cache.get('a') is not None
+        cache.set('c', self._structure('c'))
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+        assert cache.evicted_bytes == structure_size
+        assert cache.current_bytes <= cache.max_bytes
+
+    def test_structure_larger_than_cache_is_not_stored(self):
+        cache = LocalStructureCache(max_bytes=10)
+        cache.set('a', self._structure('a'))
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_clear(self):
+        cache = LocalStructureCache(max_bytes=10000)
+        cache.set('a', self._structure('a'))
+        cache.clear()
+        assert cache.get('a') is None
+        assert cache.current_bytes == 0
@@ -233,18 +233,13 @@ class StaticContentImporterTest(unittest.TestCase):  # lint-amnesty, pylint: dis
             'xmodule.modulestore.xml_importer.os.walk',
             return_value=mocked_os_walk_yield
         ), mock.patch.object(
-            self.static_content_importer, 'import_static_file'
-        ) as patched_import_static_file:
+            self.static_content_importer, '_prepare_static_file', return_value=None
+        ) as patched_prepare_static_file:
             self.static_content_importer.import_static_content_directory('static')
-            patched_import_static_file.assert_any_call(
-                'static/file1.txt', base_dir=expected_base_dir
-            )
-            patched_import_static_file.assert_any_call(
-                'static/file2.txt', base_dir=expected_base_dir
-            )
-            patched_import_static_file.assert_any_call(
-                'static/inner/file1.txt', base_dir=expected_base_dir
-            )
+            patched_prepare_static_file.assert_any_call('static/file1.txt', expected_base_dir)
+            patched_prepare_static_file.assert_any_call('static/file2.txt', expected_base_dir)
+            patched_prepare_static_file.assert_any_call('static/inner/file1.txt', expected_base_dir)
+            self.mocked_content_store.save_many.assert_called_once_with([])
 
     def test_import_static_file(self):
         base_dir = path('/path/to/dir')
@@ -257,3 +252,4 @@ class StaticContentImporterTest(unittest.TestCase):  # lint-amnesty, pylint: dis
             )
             mock_file.assert_called_with(full_file_path, 'rb')
             self.mocked_content_store.generate_thumbnail.assert_called_once()
+            self.mocked_content_store.save_many.assert_called_once()
@@ -4,12 +4,12 @@ Methods for exporting course data to XML
 
 
 import logging
-import os
 from abc import abstractmethod
 from json import dumps
 
 import lxml.etree
 from edx_django_utils.monitoring import set_custom_attribute
+from fs.base import FS
 from fs.osfs import OSFS
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict, Scope
@@ -22,6 +22,7 @@ from xmodule.assetstore import AssetMetadata
 from xmodule.contentstore.content import StaticContent
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore import LIBRARY_ROOT, EdxJSONEncoder, ModuleStoreEnum
+from xmodule.modulestore.archive_fs import ArchiveFS
 from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES
 from xmodule.modulestore.inheritance import own_metadata
 from xmodule.modulestore.store_utilities import draft_node_constructor, get_draft_subtree_roots
@@ -117,7 +118,7 @@ class ExportManager:
         `modulestore`: A `ModuleStore` object that is the source of the blocks to export
         `contentstore`: A `ContentStore` object that is the source of the content to export, can be None
         `courselike_key`: The Locator of the block to export
-        `root_dir`: The directory to write the exported xml to
+        `root_dir`: The directory to write the exported xml to, or a pyfilesystem `FS` (such as an `ArchiveFS`)
         `target_dir`: The name of the directory inside `root_dir` to write the content to
         """
         self.modulestore = modulestore
@@ -138,7 +139,7 @@ class ExportManager:
         Perform any additional tasks to the root XML node.
         """
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Process additional content, like static assets.
         """
@@ -160,7 +161,7 @@ class ExportManager:
         """
         with self.modulestore.bulk_operations(self.courselike_key):
 
-            fsm = OSFS(self.root_dir)
+            fsm = self.root_dir if isinstance(self.root_dir, FS) else OSFS(self.root_dir)
             root = lxml.etree.Element('unknown')
 
             # export only the published content
@@ -178,8 +179,7 @@ class ExportManager:
             self.process_root(root, export_fs)
 
             # Process extra items-- drafts, assets, etc
-            root_courselike_dir = self.root_dir + '/' + self.target_dir
-            self.process_extra(root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs)
+            self.process_extra(root, courselike, xml_centric_courselike_key, export_fs)
 
             # Any last pass adjustments
             self.post_process(root, export_fs)
@@ -206,29 +206,25 @@ class CourseExportManager(ExportManager):
         with export_fs.open('course.xml', 'wb') as course_xml:
             lxml.etree.ElementTree(root).write(course_xml, encoding='utf-8')
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         # Export the modulestore's asset metadata.
         set_custom_attribute("export_asset_started", str(courselike))
-        asset_dir = root_courselike_dir + '/' + AssetMetadata.EXPORTED_ASSET_DIR + '/'
-        if not os.path.isdir(asset_dir):
-            os.makedirs(asset_dir)
+        asset_dir = export_fs.makedirs(AssetMetadata.EXPORTED_ASSET_DIR, recreate=True)
         asset_root = lxml.etree.Element(AssetMetadata.ALL_ASSETS_XML_TAG)
         course_assets = self.modulestore.get_all_asset_metadata(self.courselike_key, None)
         for asset_md in course_assets:
             # All asset types are exported using the "asset" tag - but their asset type is specified in each asset key.
             asset = lxml.etree.SubElement(asset_root, AssetMetadata.ASSET_XML_TAG)
             asset_md.to_xml(asset)
-        with OSFS(asset_dir).open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
+        with asset_dir.open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
             lxml.etree.ElementTree(asset_root).write(asset_xml_file, encoding='utf-8')
 
         # export the static assets
         set_custom_attribute("export_static_assets_started", str(courselike))
         policies_dir = export_fs.makedir('policies', recreate=True)
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
+            self.contentstore.export_all_for_course_to_fs(
+                self.courselike_key, export_fs, 'static', 'policies/assets.json',
             )
 
             # If we are using the default course image, export it to the
@@ -244,10 +240,8 @@ class CourseExportManager(ExportManager):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_courselike_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                    output_dir = export_fs.makedirs('static/images', recreate=True)
+                    with output_dir.open('course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
@@ -330,7 +324,7 @@ class LibraryExportManager(ExportManager):
         root.set('org', self.courselike_key.org)
         root.set('library', self.courselike_key.library)
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Notionally, libraries may have assets. This is currently unsupported, but the structure is here
         to ease in duck typing during import. This may be expanded as a useful feature eventually.
@@ -339,10 +333,8 @@ class LibraryExportManager(ExportManager):
         export_fs.makedir('policies', recreate=True)
 
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
+            self.contentstore.export_all_for_course_to_fs(
+                self.courselike_key, export_fs, 'static', 'policies/assets.json',
             )
 
     def post_process(self, root, export_fs):
@@ -372,6 +364,26 @@ def export_library_to_xml(modulestore, contentstore, library_key, root_dir, libr
     LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
 
 
+def export_course_to_archive(modulestore, contentstore, course_key, fileobj, course_dir, archive_format='tar.gz'):
+    """
+    Export a course as an archive written sequentially to the binary file-like object `fileobj`.
+
+    Each OLX file is added to the archive as soon as it has been written, and static assets
+    are copied into it a chunk at a time, so neither the export directory nor the assets are
+    ever staged as a whole. `archive_format` is one of `archive_fs.ARCHIVE_FORMATS`.
+    """
+    with ArchiveFS(fileobj, archive_format) as archive_fs:
+        CourseExportManager(modulestore, contentstore, course_key, archive_fs, course_dir).export()
+
+
+def export_library_to_archive(modulestore, contentstore, library_key, fileobj, library_dir, archive_format='tar.gz'):
+    """
+    Export a library as an archive written sequentially to `fileobj`. See export_course_to_archive.
+    """
+    with ArchiveFS(fileobj, archive_format) as archive_fs:
+        LibraryExportManager(modulestore, contentstore, library_key, archive_fs, library_dir).export()
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
@@ -26,7 +26,11 @@ import logging
 import mimetypes
 import os
 import re
+import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
 from datetime import datetime, timezone
 
 import xblock
@@ -64,6 +68,9 @@ log = logging.getLogger(__name__)
 
 DEFAULT_STATIC_CONTENT_SUBDIR = 'static'
 
+# The number of static files which are read and saved to the static content store together.
+STATIC_CONTENT_IMPORT_BATCH_SIZE = 50
+
 
 class CourseImportException(Exception):
     """
@@ -121,10 +128,12 @@ class LocationMixin(XBlockMixin):
 
 
 class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docstring
-    def __init__(self, static_content_store, course_data_path, target_id):
+    def __init__(self, static_content_store, course_data_path, target_id, workers=1):
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        # The number of threads which read static files and generate their thumbnails.
+        self.workers = workers
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -141,7 +150,8 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
-        for dirname, _, filenames in os.walk(static_dir):
+        file_paths = []
+        for dirname, __, filenames in os.walk(static_dir):
             for filename in filenames:
 
                 file_path = os.path.join(dirname, filename)
@@ -151,19 +161,47 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
                         log.debug('skipping static content %s...', file_path)
                     continue
 
+                file_paths.append(file_path)
+
+        # Files are read and their thumbnails generated by a pool of threads, one batch at a time
+        # so that at most a batch of files is held in memory, and each batch is saved at once.
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for batch_start in range(0, len(file_paths), STATIC_CONTENT_IMPORT_BATCH_SIZE):
+                batch = file_paths[batch_start:batch_start + STATIC_CONTENT_IMPORT_BATCH_SIZE]
                 if verbose:
-                    log.debug('importing static content %s...', file_path)
+                    for file_path in batch:
+                        log.debug('importing static content %s...', file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+                prepared_files = [
+                    prepared_file
+                    for prepared_file in executor.map(self._prepare_static_file, batch, repeat(static_dir))
+                    if prepared_file is not None
+                ]
+                self._save_static_contents([content for __, __, content in prepared_files])
 
-                if imported_file_attrs:
+                for file_subpath, asset_key, __ in prepared_files:
                     # store the remapping information which will be needed
                     # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+                    remap_dict[file_subpath] = asset_key
 
         return remap_dict
 
     def import_static_file(self, full_file_path, base_dir):  # lint-amnesty, pylint: disable=missing-function-docstring
+        prepared_file = self._prepare_static_file(full_file_path, base_dir)
+        if prepared_file is None:
+            return None
+
+        file_subpath, asset_key, content = prepared_file
+        self._save_static_contents([content])
+        return file_subpath, asset_key
+
+    def _prepare_static_file(self, full_file_path, base_dir):
+        """
+        Reads the static file and saves its thumbnail, if any.
+
+        Returns a tuple of the file's path relative to base_dir, its asset key and the
+        StaticContent to save, or None if the file should be skipped.
+        """
         filename = os.path.basename(full_file_path)
         try:
             with open(full_file_path, 'rb') as f:
@@ -206,15 +244,23 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
         if thumbnail_content is not None:
             content.thumbnail_location = thumbnail_location
 
-        # then commit the content
-        try:
-            self.static_content_store.save(content)
-        except Exception as err:  # lint-amnesty, pylint: disable=broad-except
-            msg = f'Error importing {file_subpath}, error={err}'
-            log.exception(f'Course import {self.target_id}: {msg}')
-            monitor_import_failure(self.target_id, 'Updating', exception=err)
+        return file_subpath, asset_key, content
 
-        return file_subpath, asset_key
+    def _save_static_contents(self, contents):
+        """
+        Commits the contents to the static content store, all at once if possible.
+        """
+        try:
+            self.static_content_store.save_many(contents)
+        except Exception:  # lint-amnesty, pylint: disable=broad-except
+            # Save the contents one by one, so that only those which fail are skipped.
+            for content in contents:
+                try:
+                    self.static_content_store.save(content)
+                except Exception as err:  # lint-amnesty, pylint: disable=broad-except
+                    msg = f'Error importing {content.import_path}, error={err}'
+                    log.exception(f'Course import {self.target_id}: {msg}')
+                    monitor_import_failure(self.target_id, 'Updating', exception=err)
 
 
 class ImportManager:
@@ -258,7 +304,11 @@ class ImportManager:
         python_lib_filename: The filename of the courselike's python library. Course authors can optionally
             create this file to implement custom logic in their course.
 
+        static_content_workers: The number of threads which read static files and generate their thumbnails.
+
         default_class, load_error_blocks: are arguments for constructing the XMLModuleStore (see its doc)
+
+    The time taken by each stage of the import is logged, and recorded in stage_timings.
     """
     store_class = XMLModuleStore
 
@@ -271,6 +321,7 @@ class ImportManager:
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
             python_lib_filename='python_lib.zip',
+            static_content_workers=1,
     ):
         self.store = store
         self.user_id = user_id
@@ -286,17 +337,33 @@ class ImportManager:
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
-        self.xml_module_store = self.store_class(
-            data_dir,
-            default_class=default_class,
-            source_dirs=source_dirs,
-            load_error_blocks=load_error_blocks,
-            xblock_mixins=store.xblock_mixins,
-            xblock_select=store.xblock_select,
-            target_course_id=target_id,
-        )
+        self.static_content_workers = static_content_workers
+        self.stage_timings = {}
+        with self.import_stage('parse', target_id):
+            self.xml_module_store = self.store_class(
+                data_dir,
+                default_class=default_class,
+                source_dirs=source_dirs,
+                load_error_blocks=load_error_blocks,
+                xblock_mixins=store.xblock_mixins,
+                xblock_select=store.xblock_select,
+                target_course_id=target_id,
+            )
         self.logger, self.errors = make_error_tracker()
 
+    @contextmanager
+    def import_stage(self, stage, courselike_key):
+        """
+        Times a stage of the import, logging how long it took and adding it to stage_timings.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - start
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0) + duration
+            log.info(f'Course import {courselike_key}: {stage} stage took {duration:.2f} seconds')
+
     def preflight(self):
         """
         Perform any pre-import sanity checks.
@@ -319,7 +386,8 @@ class ImportManager:
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            workers=self.static_content_workers,
         )
         if self.do_import_static:
             if self.verbose:
@@ -567,37 +635,45 @@ class ImportManager:
             except DuplicateCourseError:
                 continue
 
-            # This bulk operation wraps all the operations to populate the published branch.
-            with self.store.bulk_operations(dest_id):
+            # This bulk operation wraps all the operations to populate the published branch,
+            # which are written to the store together when it ends.
+            with self.import_stage('published', dest_id), self.store.bulk_operations(dest_id):
                 # Retrieve the course itself.
-                source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
+                with self.import_stage('courselike', dest_id):
+                    source_courselike, courselike, data_path = self.get_courselike(
+                        courselike_key, runtime, dest_id
+                    )
 
                 # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                with self.import_stage('static', dest_id):
+                    self.import_static(data_path, dest_id)
 
                 # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
+                with self.import_stage('asset_metadata', dest_id):
+                    self.import_asset_metadata(data_path, dest_id)
 
                 # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                with self.import_stage('children', dest_id):
+                    self.import_children(source_courselike, courselike, courselike_key, dest_id)
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
             # Drafts must be imported in a separate bulk operation from published items to import properly,
             # due to the recursive_build() above creating a draft item for each course block
             # and then publishing it.
-            with self.store.bulk_operations(dest_id):
+            with self.import_stage('drafts', dest_id), self.store.bulk_operations(dest_id):
                 # Import all draft items into the courselike.
                 courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
 
-            with self.store.bulk_operations(dest_id):
+            with self.import_stage('tags', dest_id), self.store.bulk_operations(dest_id):
                 try:
                     self.import_tags(data_path, dest_id)
                 except FileNotFoundError:
                     logging.info(f'Course import {dest_id}: No tags.csv file present.')
                 except ValueError as e:
                     logging.info(f'Course import {dest_id}: {str(e)}')
-            self.post_course_import(dest_id)
+            with self.import_stage('post_import', dest_id):
+                self.post_course_import(dest_id)
             yield courselike
 
 
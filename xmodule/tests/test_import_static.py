@@ -4,7 +4,9 @@ Tests that check that we ignore the appropriate files when importing courses.
 
 
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
+
+import ddt
 
 from opaque_keys.edx.locator import CourseLocator
 
@@ -18,6 +20,7 @@ from xmodule.modulestore.xml_importer import StaticContentImporter
 from xmodule.tests import DATA_DIR
 
 
+@ddt.ddt
 class IgnoredFilesTestCase(unittest.TestCase):
     """
     Tests for ignored files
@@ -45,7 +48,9 @@ class IgnoredFilesTestCase(unittest.TestCase):
             target_id=course_id
         )
         static_content_importer.import_static_content_directory()
-        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
+        saved_static_content = [
+            content for call in content_store.save_many.call_args_list for content in call[0][0]
+        ]
         name_val = {sc.name: sc.data for sc in saved_static_content}
         assert 'example.txt' in name_val
         assert '.example.txt' in name_val
@@ -54,3 +59,26 @@ class IgnoredFilesTestCase(unittest.TestCase):
         assert '._example.txt' not in name_val
         assert '.DS_Store' not in name_val
         assert 'example.txt~' not in name_val
+
+    @ddt.data(1, 4)
+    def test_batched_static_files(self, workers):
+        """
+        Test that static files are saved in batches, whatever the number of workers.
+        """
+        course_id = CourseLocator("edX", "course_ignore", "2014_Fall")
+        content_store = Mock()
+        content_store.generate_thumbnail.return_value = (None, None)
+        static_content_importer = StaticContentImporter(
+            static_content_store=content_store,
+            course_data_path=self.course_dir,
+            target_id=course_id,
+            workers=workers,
+        )
+        with patch('xmodule.modulestore.xml_importer.STATIC_CONTENT_IMPORT_BATCH_SIZE', 2):
+            remap_dict = static_content_importer.import_static_content_directory()
+
+        batches = [call[0][0] for call in content_store.save_many.call_args_list]
+        assert all(len(batch) <= 2 for batch in batches)
+        saved_paths = [content.import_path for batch in batches for content in batch]
+        assert sorted(saved_paths) == sorted(remap_dict)
+        content_store.save.assert_not_called()